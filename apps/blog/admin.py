@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.db import models
 from django.forms import Textarea
 from .models import Post, Category, Tag
+from .search import buscar_posts
 
 
 @admin.register(Tag)
@@ -24,7 +25,8 @@ class CategoryAdmin(admin.ModelAdmin):
 class PostAdmin(admin.ModelAdmin):
     list_display = ('title', 'category', 'author', 'is_featured', 'status', 'focus_keyword', 'created_at', 'updated_at')
     list_filter = ('status', 'is_featured', 'category', 'tags', 'created_at', 'author')
-    search_fields = ('title', 'content', 'meta_title', 'meta_description', 'focus_keyword')
+    # O conteúdo é buscado pelo índice full-text (get_search_results)
+    search_fields = ('title', 'meta_title', 'focus_keyword')
     filter_horizontal = ('tags',)
     prepopulated_fields = {'slug': ('title',)}
     date_hierarchy = 'created_at'
@@ -50,6 +52,14 @@ class PostAdmin(admin.ModelAdmin):
     
     readonly_fields = ('created_at', 'updated_at')
     
+    def get_search_results(self, request, queryset, search_term):
+        """Soma à busca padrão os posts encontrados pelo vetor de busca."""
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        if search_term:
+            encontrados = buscar_posts(queryset, search_term).values('pk')
+            results = results | queryset.filter(pk__in=encontrados)
+        return results, may_have_duplicates
+    
     def save_model(self, request, obj, form, change):
         """Define o autor como o usuário atual se não definido"""
         if not obj.pk:
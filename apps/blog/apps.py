@@ -6,3 +6,5 @@ class BlogConfig(AppConfig):
     name = 'apps.blog'
     verbose_name = 'Blog'
 
+    def ready(self):
+        import apps.blog.signals
@@ -1,5 +1,5 @@
 from django.contrib.syndication.views import Feed
-from django.template.defaultfilters import truncatewords_html
+from django.template.defaultfilters import truncatewords
 from django.urls import reverse
 from .models import Post
 
@@ -12,13 +12,13 @@ class BlogPostsFeed(Feed):
     link = "/blog/"
     
     def items(self):
-        return Post.objects.filter(status='published').order_by('-created_at')[:20]
+        return Post.objects.filter(status='published').defer('content').select_related('author', 'category').order_by('-created_at')[:20]
     
     def item_title(self, item):
         return item.seo_title
     
     def item_description(self, item):
-        return truncatewords_html(item.content, 50)
+        return truncatewords(item.plain_text, 50)
     
     def item_link(self, item):
         return item.get_absolute_url()
@@ -61,13 +61,13 @@ class CategoryFeed(Feed):
         return Post.objects.filter(
             status='published',
             category=obj
-        ).order_by('-created_at')[:20]
+        ).defer('content').order_by('-created_at')[:20]
     
     def item_title(self, item):
         return item.seo_title
     
     def item_description(self, item):
-        return truncatewords_html(item.content, 50)
+        return truncatewords(item.plain_text, 50)
     
     def item_link(self, item):
         return item.get_absolute_url()
@@ -0,0 +1,141 @@
+"""
+Listagem do blog: cabeçalho em cache, paginação por cursor e cards em cache.
+
+- Cabeçalho (destaques, 3 mais recentes e tags): uma entrada no cache,
+  compartilhada pelas views de listagem e invalidada pelos signals de
+  Post/Category/Tag (incremento de versão).
+- Paginação por cursor (created_at, id): cada página é uma única consulta
+  "WHERE (created_at, id) < cursor ORDER BY created_at DESC, id DESC LIMIT n",
+  então páginas profundas custam o mesmo que a segunda. A listagem geral
+  começa logo após o último post do cabeçalho.
+- Cards: o HTML de cada card fica no cache por post + updated_at, buscado
+  com get_many; só os cards de posts novos ou editados são renderizados.
+"""
+import base64
+import binascii
+import logging
+from datetime import datetime
+
+from django.core.cache import cache
+from django.db.models import Q
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from gestao360_project.cache_versions import bump_version, get_version
+
+from .models import Post, Tag
+
+logger = logging.getLogger(__name__)
+
+LISTING_VERSION_KEY = 'blog:listing_version'
+LISTING_HEAD_KEY = 'blog:head:v{version}'
+LISTING_HEAD_TIMEOUT = 60 * 30
+CARD_KEY = 'blog:card:{id}:{stamp}'
+CARD_TIMEOUT = 60 * 60 * 24
+
+PAGE_SIZE = 8
+HEAD_RECENT = 3
+HEAD_FEATURED = 3
+
+# Colunas pesadas que as listagens não usam
+LISTING_DEFER = ('content', 'plain_text', 'search_vector')
+# Colunas usadas pelo card (blog/partials/post_card.html)
+CARD_FIELDS = ('id', 'slug', 'title', 'featured_image', 'created_at', 'updated_at')
+
+CARD_TEMPLATE = 'blog/partials/post_card.html'
+
+
+def get_listing_version():
+    return get_version(LISTING_VERSION_KEY)
+
+
+def invalidate_listing():
+    """Descarta o cabeçalho em cache (os cards se renovam pelo updated_at)."""
+    bump_version(LISTING_VERSION_KEY)
+
+
+def published_posts():
+    return Post.objects.filter(status='published')
+
+
+def get_head():
+    """
+    Destaques, posts mais recentes e tags da listagem (em cache).
+
+    Returns:
+        dict: featured, recent (listas de Post) e tags (lista de Tag)
+    """
+    key = LISTING_HEAD_KEY.format(version=get_listing_version())
+    head = cache.get(key)
+    if head is None:
+        posts = published_posts().select_related('category', 'author').defer(*LISTING_DEFER)
+        head = {
+            'featured': list(posts.filter(is_featured=True).order_by('-created_at', '-id')[:HEAD_FEATURED]),
+            'recent': list(posts.order_by('-created_at', '-id')[:HEAD_RECENT]),
+            'tags': list(Tag.objects.all()),
+        }
+        cache.set(key, head, LISTING_HEAD_TIMEOUT)
+    return head
+
+
+def encode_cursor(post):
+    raw = f"{post.created_at.isoformat()}|{post.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Retorna (created_at, id) do cursor, ou None se for inválido."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, post_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(post_id)
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        return None
+
+
+def head_cursor(head):
+    """Cursor logo após o último post do cabeçalho (início da listagem geral)."""
+    return encode_cursor(head['recent'][-1]) if head['recent'] else None
+
+
+def get_page(queryset, cursor=None, size=PAGE_SIZE):
+    """
+    Uma página da listagem a partir do cursor, em uma consulta.
+
+    Returns:
+        tuple[list[Post], str | None]: posts e cursor da próxima página
+            (None quando não há mais posts)
+    """
+    queryset = queryset.only(*CARD_FIELDS).order_by('-created_at', '-id')
+    position = decode_cursor(cursor)
+    if position:
+        created_at, post_id = position
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=post_id))
+
+    # Um item a mais indica se existe próxima página (sem COUNT)
+    posts = list(queryset[:size + 1])
+    has_more = len(posts) > size
+    posts = posts[:size]
+    return posts, encode_cursor(posts[-1]) if has_more else None
+
+
+def render_cards(posts):
+    """HTML dos cards dos posts, reaproveitando os cards em cache."""
+    keys = {
+        post.id: CARD_KEY.format(id=post.id, stamp=int(post.updated_at.timestamp() * 1_000_000))
+        for post in posts
+    }
+    cached = cache.get_many(keys.values())
+    missing = {}
+    cards = []
+    for post in posts:
+        html = cached.get(keys[post.id])
+        if html is None:
+            html = render_to_string(CARD_TEMPLATE, {'post': post})
+            missing[keys[post.id]] = html
+        cards.append(html)
+    if missing:
+        cache.set_many(missing, CARD_TIMEOUT)
+    return mark_safe(''.join(cards))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from apps.blog.models import Post
+from apps.blog.text import backfill_text_fields
+
+
+class Command(BaseCommand):
+    help = 'Recalcula texto puro, contagem de palavras, tempo de leitura e descrição SEO dos posts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=200, help='Posts por bulk_update')
+
+    def handle(self, *args, **options):
+        total = backfill_text_fields(Post, batch_size=options['lote'])
+        self.stdout.write(self.style.SUCCESS(f'✅ {total} posts atualizados'))
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:28
+
+from django.db import migrations, models
+
+from apps.blog.text import backfill_text_fields
+
+
+def calcular_campos_texto(apps, schema_editor):
+    backfill_text_fields(apps.get_model('blog', 'Post'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_tag_post_tags'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='plain_text',
+            field=models.TextField(blank=True, editable=False, verbose_name='Texto puro'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='reading_minutes',
+            field=models.PositiveSmallIntegerField(default=1, editable=False, verbose_name='Tempo de leitura (min)'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='seo_description_cached',
+            field=models.CharField(blank=True, editable=False, max_length=160, verbose_name='Descrição SEO calculada'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Palavras'),
+        ),
+        migrations.RunPython(calcular_campos_texto, migrations.RunPython.noop),
+    ]
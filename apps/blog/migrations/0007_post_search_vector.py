@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:32
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+from apps.blog.search import post_search_vector
+
+
+def calcular_vetor_busca(apps, schema_editor):
+    apps.get_model('blog', 'Post').objects.update(search_vector=post_search_vector())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_post_text_fields'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Vetor de busca'),
+        ),
+        migrations.RunPython(calcular_vetor_busca, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='post',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='blog_post_search_gin'),
+        ),
+    ]
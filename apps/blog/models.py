@@ -2,6 +2,10 @@ from django.db import models
 from django.contrib.auth import get_user_model
 from django.utils.text import slugify
 from django.urls import reverse
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from .search import post_search_vector
+from .text import TEXT_FIELD_NAMES, text_fields
 try:
     from django_ckeditor_5.fields import CKEditor5Field
 except ImportError:
@@ -143,13 +147,30 @@ class Post(models.Model):
         help_text='URL canônica personalizada. Se vazio, usa a URL padrão do post.'
     )
     
+    # Campos derivados do conteúdo (calculados no save)
+    plain_text = models.TextField('Texto puro', blank=True, editable=False)
+    word_count = models.PositiveIntegerField('Palavras', default=0, editable=False)
+    reading_minutes = models.PositiveSmallIntegerField('Tempo de leitura (min)', default=1, editable=False)
+    seo_description_cached = models.CharField('Descrição SEO calculada', max_length=160, blank=True, editable=False)
+    search_vector = SearchVectorField('Vetor de busca', null=True, editable=False)
+    
     created_at = models.DateTimeField('Criado em', auto_now_add=True)
     updated_at = models.DateTimeField('Atualizado em', auto_now=True)
     
+    # Campos recalculados a partir do conteúdo a cada save
+    TEXT_FIELDS = TEXT_FIELD_NAMES
+    # Campos que entram no vetor de busca
+    SEARCH_FIELDS = ('title', 'excerpt', 'content', 'plain_text')
+    
     class Meta:
         verbose_name = 'Post'
         verbose_name_plural = 'Posts'
         ordering = ['-created_at']
+        indexes = [
+            GinIndex(fields=['search_vector'], name='blog_post_search_gin'),
+            # Paginação por cursor da listagem (blog/listing.py)
+            models.Index(fields=['status', '-created_at', '-id'], name='blog_post_listing_idx'),
+        ]
         
     def __str__(self):
         return self.title
@@ -165,14 +186,35 @@ class Post(models.Model):
                 counter += 1
             self.slug = slug
         
-        # Gera excerpt automaticamente se não fornecido
-        if not self.excerpt and self.content:
-            # Remove tags HTML e pega os primeiros 300 caracteres
-            import re
-            clean_content = re.sub('<[^<]+?>', '', self.content)
-            self.excerpt = clean_content[:300] + '...' if len(clean_content) > 300 else clean_content
+        # Instâncias carregadas com defer('content') não recalculam (evita ler o conteúdo só para isso)
+        if 'content' not in self.get_deferred_fields():
+            self.update_text_fields()
+        
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'content', 'excerpt', 'meta_description'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'excerpt', *self.TEXT_FIELDS}
             
         super().save(*args, **kwargs)
+        
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or set(self.SEARCH_FIELDS) & set(update_fields):
+            self.update_search_vector()
+    
+    def update_search_vector(self):
+        """Atualiza o vetor de busca no banco (calculado pelo próprio PostgreSQL)."""
+        Post.objects.filter(pk=self.pk).update(search_vector=post_search_vector())
+    
+    def update_text_fields(self):
+        """Recalcula texto puro, contagem de palavras, tempo de leitura e descrição SEO."""
+        fields = text_fields(self.content, self.excerpt, self.meta_description)
+        
+        # Gera excerpt automaticamente se não fornecido
+        if not self.excerpt and fields['plain_text']:
+            clean_content = fields['plain_text']
+            self.excerpt = clean_content[:300] + '...' if len(clean_content) > 300 else clean_content
+        
+        for name in self.TEXT_FIELDS:
+            setattr(self, name, fields[name])
     
     def get_absolute_url(self):
         """Retorna a URL do post"""
@@ -185,16 +227,8 @@ class Post(models.Model):
     
     @property
     def seo_description(self):
-        """Retorna meta_description se definido, senão o excerpt"""
-        if self.meta_description:
-            return self.meta_description
-        if self.excerpt:
-            return self.excerpt[:160]
-        if self.content:
-            import re
-            clean = re.sub('<[^<]+?>', '', self.content)
-            return clean[:160]
-        return ''
+        """Retorna meta_description se definido, senão o excerpt ou o início do texto"""
+        return self.seo_description_cached
     
     @property
     def seo_keywords(self):
@@ -210,12 +244,5 @@ class Post(models.Model):
     
     @property
     def reading_time(self):
-        """Calcula o tempo estimado de leitura em minutos"""
-        import re
-        if not self.content:
-            return 1
-        clean_content = re.sub('<[^<]+?>', '', self.content)
-        word_count = len(clean_content.split())
-        minutes = max(1, round(word_count / 200))
-        return minutes
-
+        """Tempo estimado de leitura em minutos (calculado no save)"""
+        return self.reading_minutes
@@ -0,0 +1,73 @@
+"""
+Busca textual do blog (full-text search do PostgreSQL).
+
+O vetor de busca fica gravado em Post.search_vector (índice GIN), atualizado
+no save: título (peso A), resumo (peso B) e texto puro do conteúdo (peso C),
+com o dicionário "portuguese" (radicais e stopwords).
+"""
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank, SearchVector
+from django.db.models import F
+from django.utils.html import escape
+
+SEARCH_CONFIG = 'portuguese'
+SEARCH_MIN_LENGTH = 2
+
+# Marcadores do trecho destacado, trocados por <mark> depois do escape
+_MARK_START = '\x02'
+_MARK_STOP = '\x03'
+
+
+def post_search_vector():
+    """Expressão do vetor de busca de um post (usada no save e na migration)."""
+    return (
+        SearchVector('title', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('excerpt', weight='B', config=SEARCH_CONFIG)
+        + SearchVector('plain_text', weight='C', config=SEARCH_CONFIG)
+    )
+
+
+def normalizar_termo(termo):
+    termo = ' '.join((termo or '').split())
+    return termo if len(termo) >= SEARCH_MIN_LENGTH else ''
+
+
+def search_query(termo):
+    """SearchQuery no formato de buscadores web ("frase exata", -exclusão, OR)."""
+    return SearchQuery(termo, config=SEARCH_CONFIG, search_type='websearch')
+
+
+def buscar_posts(queryset, termo, destacar=False):
+    """
+    Filtra o queryset pelos posts que casam com o termo, do mais relevante ao
+    menos relevante (empate: mais recente primeiro).
+
+    Com `destacar=True` anota `headline`, um trecho do texto com os termos
+    encontrados entre marcadores (use `snippet_html` para exibir).
+    """
+    termo = normalizar_termo(termo)
+    if not termo:
+        return queryset.none()
+
+    query = search_query(termo)
+    queryset = queryset.filter(search_vector=query).annotate(
+        # F() usa o vetor gravado (com pesos); uma string seria recalculada sem pesos
+        rank=SearchRank(F('search_vector'), query)
+    ).order_by('-rank', '-created_at')
+    if destacar:
+        queryset = queryset.annotate(headline=SearchHeadline(
+            'plain_text',
+            query,
+            config=SEARCH_CONFIG,
+            start_sel=_MARK_START,
+            stop_sel=_MARK_STOP,
+            max_words=35,
+            min_words=15,
+            max_fragments=2,
+            fragment_delimiter=' … ',
+        ))
+    return queryset
+
+
+def snippet_html(headline):
+    """Trecho destacado seguro para HTML (texto escapado + <mark>)."""
+    return escape(headline or '').replace(_MARK_START, '<mark>').replace(_MARK_STOP, '</mark>')
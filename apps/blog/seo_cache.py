@@ -0,0 +1,101 @@
+"""
+Cache do XML servido a crawlers e leitores de feed (sitemaps e RSS).
+
+O XML renderizado fica no cache por caminho (+ página do sitemap) e "última
+alteração do blog": o maior Post.updated_at, guardado no cache e avançado
+pelos signals do blog a cada post salvo/removido (ou categoria alterada), o
+que regenera sitemaps e feeds na publicação seguinte.
+
+As respostas levam ETag e Last-Modified e respondem 304 a If-None-Match /
+If-Modified-Since, para que bots não baixem tudo a cada visita.
+"""
+import hashlib
+import logging
+from functools import wraps
+
+from django.core.cache import cache
+from django.db.models import Max
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+BLOG_LASTMOD_KEY = 'seo:blog_lastmod'
+XML_ENTRY_KEY = 'seo:xml:{chave}'
+XML_CACHE_TIMEOUT = 60 * 60 * 24
+# Navegadores e proxies podem reutilizar o XML por este tempo antes de revalidar
+XML_MAX_AGE = 60 * 10
+
+
+def get_blog_lastmod():
+    """Data da última alteração do blog (em cache até o próximo post salvo)."""
+    lastmod = cache.get(BLOG_LASTMOD_KEY)
+    if lastmod is None:
+        lastmod = Post.objects.filter(status='published').aggregate(ultimo=Max('updated_at'))['ultimo']
+        lastmod = lastmod or timezone.now()
+        cache.set(BLOG_LASTMOD_KEY, lastmod, None)
+    return lastmod
+
+
+def touch_blog_lastmod():
+    """Marca o blog como alterado agora (novas chaves de cache e Last-Modified)."""
+    cache.set(BLOG_LASTMOD_KEY, timezone.now(), None)
+
+
+def cached_xml(view=None, *, lastmod=get_blog_lastmod):
+    """
+    Decorator que guarda no cache o XML da view e atende requisições condicionais.
+
+    `lastmod` é uma função que retorna a data da última alteração do conteúdo
+    (None para conteúdo que só muda com deploy, como o sitemap de páginas
+    estáticas: nesse caso só o ETag é usado).
+
+    Example:
+        path('feed/', cached_xml(BlogPostsFeed()), name='rss_feed')
+        path('sitemap-static.xml', cached_xml(sitemap, lastmod=None), ...)
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+
+            modified = lastmod() if lastmod else None
+            stamp = modified.timestamp() if modified else ''
+            # Só a página do sitemap (?p=) varia o conteúdo; outros parâmetros são ignorados
+            raw = f"{request.path}|{request.GET.get('p', '')}|{stamp}"
+            entry_key = XML_ENTRY_KEY.format(chave=hashlib.md5(raw.encode()).hexdigest())
+
+            entry = cache.get(entry_key)
+            if entry is None:
+                response = view(request, *args, **kwargs)
+                if hasattr(response, 'render') and callable(response.render):
+                    response = response.render()
+                if response.status_code != 200:
+                    return response
+                entry = {
+                    'content': response.content,
+                    'content_type': response['Content-Type'],
+                    'etag': f'"{hashlib.md5(response.content).hexdigest()}"',
+                }
+                cache.set(entry_key, entry, XML_CACHE_TIMEOUT)
+
+            last_modified = int(modified.timestamp()) if modified else None
+            response = get_conditional_response(request, etag=entry['etag'], last_modified=last_modified)
+            if response is None:
+                response = HttpResponse(entry['content'], content_type=entry['content_type'])
+            response['ETag'] = entry['etag']
+            if last_modified:
+                response['Last-Modified'] = http_date(last_modified)
+            patch_cache_control(response, public=True, max_age=XML_MAX_AGE)
+            return response
+
+        return wrapper
+
+    if view is not None:
+        return decorator(view)
+    return decorator
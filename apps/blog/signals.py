@@ -0,0 +1,16 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .listing import invalidate_listing
+from .seo_cache import touch_blog_lastmod
+from .models import Category, Post, Tag
+
+
+@receiver([post_save, post_delete], sender=Post)
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Tag)
+@receiver(m2m_changed, sender=Post.tags.through)
+def invalidar_cache_listagem(sender, **kwargs):
+    """Invalida o cabeçalho em cache da listagem do blog e o XML de sitemaps/feeds."""
+    invalidate_listing()
+    touch_blog_lastmod()
@@ -1,6 +1,7 @@
 from django.contrib.sitemaps import Sitemap
 from django.urls import reverse
 from apps.blog.models import Post
+from apps.blog.seo_cache import get_blog_lastmod
 
 
 class StaticViewSitemap(Sitemap):
@@ -37,11 +38,15 @@ class BlogPostSitemap(Sitemap):
     priority = 0.9
 
     def items(self):
-        return Post.objects.filter(status='published').order_by('-created_at')
+        return Post.objects.filter(status='published').only('slug', 'updated_at').order_by('-created_at')
 
     def lastmod(self, obj):
         return obj.updated_at
 
+    def get_latest_lastmod(self):
+        # Usado no índice: evita percorrer todos os posts
+        return get_blog_lastmod()
+
     def location(self, obj):
         return f'/blog/{obj.slug}/'
 
@@ -1,26 +1,30 @@
 from django import template
-import re
+
+from apps.blog.text import html_to_text, reading_minutes_for
 
 register = template.Library()
 
 
 @register.filter(name='reading_time')
 def reading_time(content):
-    """Calcula o tempo estimado de leitura de um conteúdo HTML"""
+    """
+    Tempo estimado de leitura de um conteúdo HTML.
+
+    Para posts, prefira post.reading_minutes (já calculado no save).
+    """
     if not content:
         return 1
-    clean_content = re.sub('<[^<]+?>', '', str(content))
-    word_count = len(clean_content.split())
-    minutes = max(1, round(word_count / 200))
-    return minutes
+    return reading_minutes_for(len(html_to_text(content).split()))
 
 
 @register.filter(name='strip_html')
 def strip_html(value):
-    """Remove todas as tags HTML de um texto"""
-    if not value:
-        return ''
-    return re.sub('<[^<]+?>', '', str(value))
+    """
+    Remove todas as tags HTML de um texto.
+
+    Para posts, prefira post.plain_text (já calculado no save).
+    """
+    return html_to_text(value)
 
 
 # Mapeamento de slugs de página para categorias e títulos
@@ -71,13 +75,13 @@ def show_recent_posts(page_slug, count=3):
     category_slug = mapping['category_slug']
     category_title = mapping['title']
     
-    posts = Post.objects.filter(
+    posts = list(Post.objects.filter(
         status='published', 
         category__slug=category_slug
-    ).order_by('-created_at')[:count]
+    ).defer('content', 'plain_text').order_by('-created_at')[:count])
     
     return {
         'recent_posts': posts,
         'category_title': category_title,
-        'has_posts': posts.exists()
+        'has_posts': bool(posts)
     }
@@ -1,3 +1,181 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from .models import Category, Post
+
+
+class PostTextFieldsTest(TestCase):
+    """Campos de texto derivados do conteúdo, calculados no save"""
+
+    def setUp(self):
+        self.author = get_user_model().objects.create_user(username='autor', password='x')
+        self.category = Category.objects.create(name='Impostos')
+
+    def criar_post(self, content, **kwargs):
+        return Post.objects.create(
+            title='Como abrir um MEI',
+            category=self.category,
+            author=self.author,
+            content=content,
+            status='published',
+            **kwargs
+        )
+
+    def test_campos_calculados_no_save(self):
+        post = self.criar_post('<p>Abrir&nbsp;um <strong>MEI</strong> &eacute; simples.</p>' + '<p>palavra</p>' * 400)
+
+        self.assertTrue(post.plain_text.startswith('Abrir um MEI é simples.'))
+        self.assertNotIn('<', post.plain_text)
+        self.assertEqual(post.word_count, 405)
+        self.assertEqual(post.reading_minutes, 2)
+        self.assertTrue(post.excerpt.startswith('Abrir um MEI é simples.'))
+        self.assertEqual(post.seo_description, post.seo_description_cached)
+        self.assertLessEqual(len(post.seo_description_cached), 160)
+
+        post.content = '<p>Novo texto</p>'
+        post.save(update_fields=['content'])
+        post.refresh_from_db()
+        self.assertEqual(post.plain_text, 'Novo texto')
+        self.assertEqual(post.word_count, 2)
+
+    def test_feed_usa_texto_puro(self):
+        self.criar_post('<p>Conteúdo com <a href="/x">link</a></p>', meta_description='Resumo')
+
+        response = self.client.get(reverse('blog:rss_feed'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Conteúdo com link')
+        self.assertNotContains(response, '&lt;a href')
+
+
+class PostSearchTest(TestCase):
+    """Busca full-text do blog"""
+
+    def setUp(self):
+        author = get_user_model().objects.create_user(username='autor', password='x')
+        category = Category.objects.create(name='Impostos')
+        self.no_titulo = Post.objects.create(
+            title='Impostos do MEI', category=category, author=author, status='published',
+            content='<p>Quanto o microempreendedor paga por mês.</p>',
+        )
+        self.no_conteudo = Post.objects.create(
+            title='Abrir empresa', category=category, author=author, status='published',
+            content='<p>Escolha do regime (Simples &amp; Presumido) e dos <b>impostos</b> da empresa.</p>',
+        )
+        Post.objects.create(
+            title='Rascunho sobre impostos', category=category, author=author, status='draft',
+            content='<p>impostos</p>',
+        )
+
+    def test_pagina_ordenada_por_relevancia(self):
+        response = self.client.get(reverse('blog:search'), {'q': 'imposto'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['posts']), [self.no_titulo, self.no_conteudo])
+
+    def test_api_retorna_trecho_destacado_escapado(self):
+        self.no_conteudo.title = 'Regime tributário'
+        self.no_conteudo.save(update_fields=['title'])
+
+        response = self.client.get(reverse('blog:search_api'), {'q': 'regime'})
+
+        data = response.json()['data']
+        self.assertEqual([r['title'] for r in data['results']], ['Regime tributário'])
+        self.assertIn('<mark>regime</mark>', data['results'][0]['snippet'])
+        self.assertIn('Simples &amp; Presumido', data['results'][0]['snippet'])
+        self.assertFalse(data['has_more'])
+
+
+class BlogListingTest(TestCase):
+    """Listagem por cursor com cabeçalho e cards em cache"""
+
+    def setUp(self):
+        cache.clear()
+        author = get_user_model().objects.create_user(username='autor', password='x')
+        category = Category.objects.create(name='Impostos')
+        self.posts = [
+            Post.objects.create(
+                title=f'Post {i}', category=category, author=author, status='published',
+                content=f'<p>Conteúdo {i}</p>',
+            )
+            for i in range(20)
+        ]
+
+    def test_paginas_por_cursor_sem_repetir_posts(self):
+        response = self.client.get(reverse('blog:post_list'))
+        recentes = [response.context['latest_post'], *response.context['other_recent']]
+        vistos = [post.title for post in response.context['posts']]
+        cursor = response.context['next_cursor']
+
+        self.assertEqual([post.title for post in recentes], ['Post 19', 'Post 18', 'Post 17'])
+        self.assertEqual(len(vistos), 8)
+
+        while cursor:
+            data = self.client.get(reverse('blog:load_more'), {'cursor': cursor}).json()
+            vistos += [f'Post {i}' for i in range(20) if f'>Post {i}<' in data['html']]
+            cursor = data['next_cursor']
+
+        self.assertEqual(sorted(vistos), sorted(f'Post {i}' for i in range(17)))
+
+    def test_carregar_mais_com_cache_quente_faz_uma_consulta(self):
+        cursor = self.client.get(reverse('blog:post_list')).context['next_cursor']
+        self.client.get(reverse('blog:load_more'), {'cursor': cursor})
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('blog:load_more'), {'cursor': cursor})
+        self.assertTrue(response.json()['has_more'])
+
+        # Editar um post renova o card dele
+        post = self.posts[8]
+        post.title = 'Post editado'
+        post.save()
+        self.assertContains(self.client.get(reverse('blog:load_more'), {'cursor': cursor}), 'Post editado')
+
+
+class SitemapFeedCacheTest(TestCase):
+    """Sitemaps e RSS em cache com requisições condicionais"""
+
+    def setUp(self):
+        cache.clear()
+        self.author = get_user_model().objects.create_user(username='autor', password='x')
+        self.category = Category.objects.create(name='Impostos')
+        Post.objects.create(
+            title='Primeiro post', category=self.category, author=self.author,
+            status='published', content='<p>Texto</p>',
+        )
+
+    def test_indice_lista_secoes(self):
+        response = self.client.get('/sitemap.xml')
+
+        self.assertEqual(response.status_code, 200)
+        for secao in ('static', 'blog', 'services'):
+            self.assertContains(response, f'/sitemap-{secao}.xml')
+        self.assertEqual(self.client.get('/sitemap-static.xml').status_code, 200)
+
+    def test_requisicao_condicional_e_regeneracao(self):
+        url = '/sitemap-blog.xml'
+        response = self.client.get(url)
+        self.assertContains(response, '/blog/primeiro-post/')
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304
+        )
+
+        Post.objects.create(
+            title='Segundo post', category=self.category, author=self.author,
+            status='published', content='<p>Texto</p>',
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '/blog/segundo-post/')
+
+    def test_feed_responde_304(self):
+        response = self.client.get(reverse('blog:rss_feed'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            self.client.get(reverse('blog:rss_feed'), HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304
+        )
@@ -0,0 +1,75 @@
+"""
+Campos derivados do conteúdo HTML dos posts.
+
+Calculados uma vez no Post.save (e pelo comando backfill_post_text), para que
+listagens, feeds e sitemaps não precisem processar o HTML do CKEditor a cada
+requisição.
+"""
+import html
+import re
+
+from django.utils.html import strip_tags
+
+WORDS_PER_MINUTE = 200
+SEO_DESCRIPTION_LENGTH = 160
+
+_WHITESPACE_RE = re.compile(r'\s+')
+# Tags de bloco viram espaço, para "<p>a</p><p>b</p>" não virar "ab"
+_BLOCK_TAG_RE = re.compile(r'(?=<(?:/?(?:p|div|br|hr|li|ul|ol|h[1-6]|tr|td|th|blockquote|figure|figcaption)\b))', re.I)
+
+
+def html_to_text(content):
+    """Texto puro do HTML: sem tags, entidades decodificadas e espaços normalizados."""
+    if not content:
+        return ''
+    text = html.unescape(strip_tags(_BLOCK_TAG_RE.sub(' ', str(content))))
+    return _WHITESPACE_RE.sub(' ', text).strip()
+
+
+def reading_minutes_for(word_count):
+    return max(1, round(word_count / WORDS_PER_MINUTE))
+
+
+def text_fields(content, excerpt='', meta_description=''):
+    """
+    Retorna os campos derivados: plain_text, word_count, reading_minutes e
+    seo_description_cached (meta description > resumo > início do texto).
+    """
+    plain_text = html_to_text(content)
+    word_count = len(plain_text.split())
+    seo_description = meta_description or excerpt or plain_text
+    return {
+        'plain_text': plain_text,
+        'word_count': word_count,
+        'reading_minutes': reading_minutes_for(word_count),
+        'seo_description_cached': seo_description[:SEO_DESCRIPTION_LENGTH],
+    }
+
+
+TEXT_FIELD_NAMES = ('plain_text', 'word_count', 'reading_minutes', 'seo_description_cached')
+
+
+def backfill_text_fields(post_model, batch_size=200):
+    """
+    Recalcula os campos derivados de todos os posts em lotes (bulk_update).
+
+    Recebe a classe do model para poder ser usado também em migrations.
+
+    Returns:
+        int: quantidade de posts atualizados
+    """
+    posts = post_model.objects.only('id', 'content', 'excerpt', 'meta_description').order_by('id')
+    pendentes = []
+    total = 0
+    for post in posts.iterator(chunk_size=batch_size):
+        for name, value in text_fields(post.content, post.excerpt, post.meta_description).items():
+            setattr(post, name, value)
+        pendentes.append(post)
+        if len(pendentes) >= batch_size:
+            post_model.objects.bulk_update(pendentes, TEXT_FIELD_NAMES)
+            total += len(pendentes)
+            pendentes = []
+    if pendentes:
+        post_model.objects.bulk_update(pendentes, TEXT_FIELD_NAMES)
+        total += len(pendentes)
+    return total
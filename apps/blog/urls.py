@@ -1,14 +1,17 @@
 from django.urls import path
-from .views import PostListView, PostDetailView, PostsByTagView, load_more_posts
+from .views import PostListView, PostDetailView, PostsByTagView, PostSearchView, load_more_posts, search_posts_api
 from .feeds import BlogPostsFeed, CategoryFeed
+from .seo_cache import cached_xml
 
 app_name = 'blog'
 
 urlpatterns = [
     path('', PostListView.as_view(), name='post_list'),
     path('load-more/', load_more_posts, name='load_more'),
-    path('feed/', BlogPostsFeed(), name='rss_feed'),
-    path('feed/categoria/<slug:slug>/', CategoryFeed(), name='category_feed'),
+    path('busca/', PostSearchView.as_view(), name='search'),
+    path('busca/api/', search_posts_api, name='search_api'),
+    path('feed/', cached_xml(BlogPostsFeed()), name='rss_feed'),
+    path('feed/categoria/<slug:slug>/', cached_xml(CategoryFeed()), name='category_feed'),
     path('tag/<slug:slug>/', PostsByTagView.as_view(), name='tag'),
     path('<slug:slug>/', PostDetailView.as_view(), name='post_detail'),
 ]
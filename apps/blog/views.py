@@ -1,56 +1,50 @@
-from django.shortcuts import render
+from django.shortcuts import get_object_or_404
 from django.views.generic import ListView, DetailView
 from django.http import JsonResponse
-from django.template.loader import render_to_string
-from .models import Post, Category, Tag
+from . import listing
+from .models import Post, Tag
+from .search import buscar_posts, normalizar_termo, snippet_html
 
 
-class PostListView(ListView):
-    """View para listagem de posts do blog"""
+class BlogListMixin:
+    """
+    Contexto comum das listagens: cabeçalho em cache (destaques, recentes e
+    tags) e a primeira página de cards por cursor.
+    """
     model = Post
     template_name = 'blog/post_list.html'
     context_object_name = 'posts'
-    paginate_by = 8
+    
+    def get_start_cursor(self, head):
+        return None
     
     def get_queryset(self):
-        """Retorna apenas posts publicados, excluindo os 3 mais recentes"""
-        # Obter IDs dos 3 posts mais recentes
-        recent_ids = list(Post.objects.filter(
-            status='published'
-        ).order_by('-created_at').values_list('id', flat=True)[:3])
-        
-        # Retornar posts excluindo os 3 mais recentes com otimização
-        return Post.objects.filter(
-            status='published'
-        ).exclude(id__in=recent_ids).select_related('category', 'author').order_by('-created_at')
+        self.head = listing.get_head()
+        posts, self.next_cursor = listing.get_page(self.get_listing_queryset(), self.get_start_cursor(self.head))
+        return posts
     
     def get_context_data(self, **kwargs):
-        """Adiciona dados extras ao contexto"""
         context = super().get_context_data(**kwargs)
-        
-        # Posts em destaque
-        context['featured_posts'] = Post.objects.filter(
-            status='published',
-            is_featured=True
-        ).order_by('-created_at')[:3]
-        
-        # Posts mais recentes (para a seção "Mais Recentes")
-        recent_posts = Post.objects.filter(
-            status='published'
-        ).order_by('-created_at')[:3]
-        
+        recent_posts = self.head['recent']
+        context['featured_posts'] = self.head['featured']
         context['latest_post'] = recent_posts[0] if recent_posts else None
-        context['other_recent'] = recent_posts[1:3] if len(recent_posts) > 1 else []
-        
-        # Categorias
-        context['categories'] = Category.objects.all()
-        
-        # Tags
-        context['tags'] = Tag.objects.all()
-        
+        context['other_recent'] = recent_posts[1:3]
+        context['tags'] = self.head['tags']
+        context['cards_html'] = listing.render_cards(context['posts'])
+        context['next_cursor'] = self.next_cursor
         return context
 
 
+class PostListView(BlogListMixin, ListView):
+    """View para listagem de posts do blog (exceto os 3 mais recentes, exibidos no topo)"""
+    
+    def get_listing_queryset(self):
+        return listing.published_posts()
+    
+    def get_start_cursor(self, head):
+        return listing.head_cursor(head)
+
+
 class PostDetailView(DetailView):
     """View para detalhes de um post"""
     model = Post
@@ -64,87 +58,103 @@ class PostDetailView(DetailView):
     def get_context_data(self, **kwargs):
         """Adiciona posts relacionados ao contexto"""
         context = super().get_context_data(**kwargs)
-        post = self.get_object()
+        post = self.object
         
         # Posts relacionados da mesma categoria
         context['related_posts'] = Post.objects.filter(
             category=post.category,
             status='published'
-        ).exclude(id=post.id).select_related('category')[:3]
+        ).exclude(id=post.id).select_related('category').defer(*listing.LISTING_DEFER)[:3]
         
         return context
 
 
-class PostsByTagView(ListView):
+class PostsByTagView(BlogListMixin, ListView):
     """View para listagem de posts filtrados por tag"""
-    model = Post
-    template_name = 'blog/post_list.html'
-    context_object_name = 'posts'
-    paginate_by = 8
     
-    def get_queryset(self):
-        from django.shortcuts import get_object_or_404
+    def get_listing_queryset(self):
         self.tag = get_object_or_404(Tag, slug=self.kwargs['slug'])
-        return Post.objects.filter(
-            status='published',
-            tags=self.tag
-        ).select_related('category', 'author').order_by('-created_at')
+        return listing.published_posts().filter(tags=self.tag)
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['current_tag'] = self.tag
-        context['categories'] = Category.objects.all()
-        context['tags'] = Tag.objects.all()
-        
-        # Posts em destaque
-        context['featured_posts'] = Post.objects.filter(
-            status='published',
-            is_featured=True
-        ).order_by('-created_at')[:3]
-        
-        # Posts mais recentes
-        recent_posts = Post.objects.filter(
-            status='published'
-        ).order_by('-created_at')[:3]
-        context['latest_post'] = recent_posts[0] if recent_posts else None
-        context['other_recent'] = recent_posts[1:3] if len(recent_posts) > 1 else []
-        
         return context
 
 
 def load_more_posts(request):
-    """View AJAX para carregar mais posts"""
-    page = int(request.GET.get('page', 2))
-    per_page = 8
+    """View AJAX para carregar mais posts (a partir do cursor da página anterior)"""
+    posts = listing.published_posts()
+    tag_slug = request.GET.get('tag')
+    if tag_slug:
+        posts = posts.filter(tags__slug=tag_slug)
     
-    # Obter IDs dos 3 posts mais recentes (excluir da listagem)
-    recent_ids = list(Post.objects.filter(
-        status='published'
-    ).order_by('-created_at').values_list('id', flat=True)[:3])
+    cursor = request.GET.get('cursor')
+    if not cursor and not tag_slug:
+        cursor = listing.head_cursor(listing.get_head())
     
-    # Calcular offset
-    offset = (page - 1) * per_page
+    posts, next_cursor = listing.get_page(posts, cursor)
     
-    # Buscar posts
-    posts = Post.objects.filter(
-        status='published'
-    ).exclude(id__in=recent_ids).order_by('-created_at')[offset:offset + per_page]
+    return JsonResponse({
+        'html': listing.render_cards(posts),
+        'has_more': next_cursor is not None,
+        'next_cursor': next_cursor,
+    })
+
+
+class PostSearchView(ListView):
+    """Busca de posts por relevância (full-text search)"""
+    model = Post
+    template_name = 'blog/post_search.html'
+    context_object_name = 'posts'
+    paginate_by = 8
     
-    # Verificar se há mais posts
-    total_posts = Post.objects.filter(
-        status='published'
-    ).exclude(id__in=recent_ids).count()
+    def get_queryset(self):
+        self.query = normalizar_termo(self.request.GET.get('q'))
+        posts = Post.objects.filter(status='published').select_related('category', 'author').defer(*listing.LISTING_DEFER)
+        return buscar_posts(posts, self.query, destacar=True)
     
-    has_more = (offset + per_page) < total_posts
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.query
+        for post in context['posts']:
+            post.snippet = snippet_html(post.headline)
+        return context
+
+
+def search_posts_api(request):
+    """Busca de posts em JSON (mesma ordenação da página de busca)"""
+    query = normalizar_termo(request.GET.get('q'))
+    try:
+        page = max(1, int(request.GET.get('page', 1)))
+    except ValueError:
+        page = 1
+    per_page = 10
+    offset = (page - 1) * per_page
     
-    # Renderizar HTML dos posts
-    html = render_to_string('blog/partials/post_cards.html', {
-        'posts': posts
-    })
+    posts = Post.objects.filter(status='published').select_related('category').only(
+        'title', 'slug', 'excerpt', 'featured_image', 'created_at', 'plain_text', 'category__name'
+    )
+    # Busca um item a mais para saber se há próxima página sem COUNT
+    results = list(buscar_posts(posts, query, destacar=True)[offset:offset + per_page + 1])
+    has_more = len(results) > per_page
     
     return JsonResponse({
-        'html': html,
-        'has_more': has_more,
-        'next_page': page + 1
+        'success': True,
+        'data': {
+            'query': query,
+            'page': page,
+            'has_more': has_more,
+            'results': [
+                {
+                    'title': post.title,
+                    'url': post.get_absolute_url(),
+                    'category': post.category.name if post.category else None,
+                    'created_at': post.created_at.date().isoformat(),
+                    'image': post.featured_image.url if post.featured_image else None,
+                    'snippet': snippet_html(post.headline) or post.excerpt,
+                }
+                for post in results[:per_page]
+            ],
+        }
     })
-
@@ -0,0 +1,19 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from apps.services.models import Plano
+from apps.support.models import Duvida
+from apps.testimonials.models import Testimonial
+from gestao360_project.page_cache import invalidate_page_cache
+from .models import SocialMedia
+
+
+@receiver([post_save, post_delete], sender=Plano)
+@receiver([post_save, post_delete], sender=Testimonial)
+@receiver([post_save, post_delete], sender=Duvida)
+@receiver([post_save, post_delete], sender=SocialMedia)
+def invalidar_cache_paginas(sender, **kwargs):
+    """
+    Invalida o cache das landing pages sempre que planos, depoimentos,
+    dúvidas ou redes sociais forem alterados.
+    """
+    invalidate_page_cache()
@@ -1,3 +1,42 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
 
-# Create your tests here.
+from apps.support.models import Duvida
+
+
+class AnonymousPageCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_segunda_visita_vem_do_cache_com_token_csrf_proprio(self):
+        primeira = self.client.get('/faq/')
+        self.assertEqual(primeira['X-Page-Cache'], 'MISS')
+
+        self.client.cookies.clear()
+        with self.assertNumQueries(0):
+            segunda = self.client.get('/faq/')
+        self.assertEqual(segunda['X-Page-Cache'], 'HIT')
+        self.assertNotIn(b'__page_cache_csrf_token__', segunda.content)
+        self.assertIn('csrftoken', segunda.cookies)
+
+        revalidacao = self.client.get('/faq/', HTTP_IF_NONE_MATCH=segunda['ETag'])
+        self.assertEqual(revalidacao.status_code, 304)
+        self.assertIn('public', revalidacao['Cache-Control'])
+        self.assertIn('stale-while-revalidate', revalidacao['Cache-Control'])
+
+    def test_alteracao_no_catalogo_invalida_paginas(self):
+        self.client.get('/faq/')
+        Duvida.objects.create(titulo='Quanto custa abrir uma empresa?', descricao='Depende do regime.')
+
+        response = self.client.get('/faq/')
+        self.assertEqual(response['X-Page-Cache'], 'MISS')
+        self.assertContains(response, 'Quanto custa abrir uma empresa?')
+
+    def test_usuario_autenticado_nao_usa_cache(self):
+        user = get_user_model().objects.create_user('cliente', password='senha-123')
+        self.client.force_login(user)
+
+        response = self.client.get('/faq/')
+        self.assertNotIn('X-Page-Cache', response)
+        self.assertIn('no-cache', response['Cache-Control'])
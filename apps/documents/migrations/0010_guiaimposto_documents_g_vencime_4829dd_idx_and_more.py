@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0009_boletocontabilidade'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='guiaimposto',
+            index=models.Index(fields=['vencimento', 'id'], name='documents_g_vencime_4829dd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='guiaimposto',
+            index=models.Index(fields=['status', 'vencimento', 'id'], name='documents_g_status_9cd6bf_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='guiaimposto',
+            index=models.Index(fields=['cliente', 'vencimento', 'id'], name='documents_g_cliente_747f74_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0010_guiaimposto_documents_g_vencime_4829dd_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='guiaimposto',
+            index=models.Index(fields=['criado_em', 'id'], name='documents_g_criado__67a689_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='guiaimposto',
+            index=models.Index(fields=['cliente', 'criado_em', 'id'], name='documents_g_cliente_c97882_idx'),
+        ),
+    ]
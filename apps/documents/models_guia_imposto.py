@@ -43,6 +43,13 @@ class GuiaImposto(models.Model):
         verbose_name = 'Guia de Imposto'
         verbose_name_plural = 'Guias de Impostos'
         ordering = ['status', 'vencimento']
+        indexes = [
+            models.Index(fields=['vencimento', 'id']),
+            models.Index(fields=['status', 'vencimento', 'id']),
+            models.Index(fields=['cliente', 'vencimento', 'id']),
+            models.Index(fields=['criado_em', 'id']),
+            models.Index(fields=['cliente', 'criado_em', 'id']),
+        ]
 
     def __str__(self):
         return f"{self.get_tipo_display()} - {self.vencimento.strftime('%d/%m/%Y')} - R$ {self.valor}"
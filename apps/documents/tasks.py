@@ -208,6 +208,7 @@ def enviar_email_nota_fiscal(self, nota_fiscal_id: int) -> bool:
     try:
         from apps.documents.models import NotaFiscal
         from apps.services.email_service import EmailService
+        from apps.services.email_outbox import enfileirar_email
         
         nota_fiscal = NotaFiscal.objects.select_related('cliente', 'enviado_por').get(id=nota_fiscal_id)
         
@@ -219,9 +220,9 @@ def enviar_email_nota_fiscal(self, nota_fiscal_id: int) -> bool:
             logger.error(f"Cliente {cliente.username} não possui e-mail")
             return False
         
-        # Enviar e-mail
+        # Enfileirar e-mail (enviado em lote pela outbox)
         email_service = EmailService()
-        sucesso = email_service.enviar_email_com_template(
+        enfileirar_email(
             destinatario=cliente_email,
             assunto='📄 Nova Nota Fiscal Disponível',
             template_html='emails/notificacao_documento.html',
@@ -237,13 +238,8 @@ def enviar_email_nota_fiscal(self, nota_fiscal_id: int) -> bool:
             }
         )
         
-        if sucesso:
-            logger.info(f"Notificação de NF enviada para {cliente_email}")
-        else:
-            logger.error(f"Falha ao enviar notificação de NF para {cliente_email}")
-            raise Exception("Falha no envio do e-mail")
-        
-        return sucesso
+        logger.info(f"Notificação de NF enfileirada para {cliente_email}")
+        return True
         
     except Exception as e:
         logger.error(f"Erro na task de notificação de NF: {str(e)}")
@@ -273,6 +269,7 @@ def enviar_email_documento_empresa(self, documento_id: int) -> bool:
     try:
         from apps.documents.models import DocumentoEmpresa
         from apps.services.email_service import EmailService
+        from apps.services.email_outbox import enfileirar_email
         
         documento = DocumentoEmpresa.objects.select_related('cliente', 'enviado_por').get(id=documento_id)
         
@@ -284,9 +281,9 @@ def enviar_email_documento_empresa(self, documento_id: int) -> bool:
             logger.error(f"Cliente {cliente.username} não possui e-mail")
             return False
         
-        # Enviar e-mail
+        # Enfileirar e-mail (enviado em lote pela outbox)
         email_service = EmailService()
-        sucesso = email_service.enviar_email_com_template(
+        enfileirar_email(
             destinatario=cliente_email,
             assunto=f'📄 Novo Documento: {documento.titulo}',
             template_html='emails/notificacao_documento.html',
@@ -302,13 +299,8 @@ def enviar_email_documento_empresa(self, documento_id: int) -> bool:
             }
         )
         
-        if sucesso:
-            logger.info(f"Notificação de Documento Empresa enviada para {cliente_email}")
-        else:
-            logger.error(f"Falha ao enviar notificação de Documento Empresa para {cliente_email}")
-            raise Exception("Falha no envio do e-mail")
-        
-        return sucesso
+        logger.info(f"Notificação de Documento Empresa enfileirada para {cliente_email}")
+        return True
         
     except Exception as e:
         logger.error(f"Erro na task de notificação de Documento Empresa: {str(e)}")
@@ -338,6 +330,7 @@ def enviar_email_certidao_negativa(self, certidao_id: int) -> bool:
     try:
         from apps.users.models import CertidaoNegativa
         from apps.services.email_service import EmailService
+        from apps.services.email_outbox import enfileirar_email
         
         certidao = CertidaoNegativa.objects.select_related('cliente').get(id=certidao_id)
         
@@ -349,9 +342,9 @@ def enviar_email_certidao_negativa(self, certidao_id: int) -> bool:
             logger.error(f"Cliente {cliente.username} não possui e-mail")
             return False
         
-        # Enviar e-mail
+        # Enfileirar e-mail (enviado em lote pela outbox)
         email_service = EmailService()
-        sucesso = email_service.enviar_email_com_template(
+        enfileirar_email(
             destinatario=cliente_email,
             assunto=f'📄 Nova Certidão: {certidao.get_tipo_display()}',
             template_html='emails/notificacao_documento.html',
@@ -367,13 +360,8 @@ def enviar_email_certidao_negativa(self, certidao_id: int) -> bool:
             }
         )
         
-        if sucesso:
-            logger.info(f"Notificação de Certidão enviada para {cliente_email}")
-        else:
-            logger.error(f"Falha ao enviar notificação de Certidão para {cliente_email}")
-            raise Exception("Falha no envio do e-mail")
-        
-        return sucesso
+        logger.info(f"Notificação de Certidão enfileirada para {cliente_email}")
+        return True
         
     except Exception as e:
         logger.error(f"Erro na task de notificação de Certidão: {str(e)}")
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Subcategory, Account, Transaction
+from .models import Subcategory, Account, Transaction, MonthlyAccountBalance
 
 @admin.register(Subcategory)
 class SubcategoryAdmin(admin.ModelAdmin):
@@ -19,3 +19,10 @@ class TransactionAdmin(admin.ModelAdmin):
     list_filter = ('status', 'account__subcategory__type', 'date', 'user')
     search_fields = ('description', 'account__name', 'user__username')
     date_hierarchy = 'date'
+
+@admin.register(MonthlyAccountBalance)
+class MonthlyAccountBalanceAdmin(admin.ModelAdmin):
+    list_display = ('month', 'account', 'total', 'user')
+    list_filter = ('month', 'user')
+    search_fields = ('account__name', 'user__username')
+    readonly_fields = ('user', 'account', 'month', 'total')
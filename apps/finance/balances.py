@@ -0,0 +1,196 @@
+"""
+Saldos mensais materializados do painel financeiro.
+
+MonthlyAccountBalance guarda o total de cada (usuário, conta, mês). Os signals
+de Transaction aplicam apenas a diferença de cada lançamento salvo/excluído, e
+o comando `rebuild_monthly_balances` recalcula tudo a partir dos lançamentos.
+bulk_create() e update() não disparam signals: o queryset de Transaction
+recalcula os meses afetados com `rebuild_months`.
+
+Os totais de um período somam as linhas do resumo para os meses completos e
+só leem Transaction nas bordas do período (meses parciais), com uma consulta
+agrupada por subcategoria em cada lado.
+"""
+import datetime
+from decimal import Decimal
+
+from django.db import transaction as db_transaction
+from django.db.models import F, Q, Sum
+from django.db.models.functions import TruncMonth
+
+from .models import MonthlyAccountBalance, Transaction
+
+ZERO = Decimal('0')
+
+_GROUP_FIELDS = ('account__subcategory__type', 'account__subcategory_id', 'account__subcategory__name')
+
+
+def month_start(value):
+    """Primeiro dia do mês de uma data (aceita datetime)."""
+    if isinstance(value, datetime.datetime):
+        value = value.date()
+    return value.replace(day=1)
+
+
+def _next_month(value):
+    if value.month == 12:
+        return value.replace(year=value.year + 1, month=1, day=1)
+    return value.replace(month=value.month + 1, day=1)
+
+
+def apply_delta(user_id, account_id, date, delta, create=True):
+    """
+    Soma `delta` ao saldo mensal da conta.
+
+    Com create=False (remoções) a linha não é criada quando não existe, o que
+    acontece quando a própria conta está sendo excluída em cascata.
+    """
+    if not delta:
+        return
+    month = month_start(date)
+    lookup = {'user_id': user_id, 'account_id': account_id, 'month': month}
+    updated = MonthlyAccountBalance.objects.filter(**lookup).update(total=F('total') + delta)
+    if not create:
+        # Mês que ficou sem lançamentos não precisa de linha no resumo
+        if updated:
+            MonthlyAccountBalance.objects.filter(**lookup, total=0).delete()
+        return
+    if updated:
+        return
+    _obj, created = MonthlyAccountBalance.objects.get_or_create(**lookup, defaults={'total': delta})
+    if not created:
+        # Outra requisição criou a linha entre o UPDATE e o INSERT
+        MonthlyAccountBalance.objects.filter(**lookup).update(total=F('total') + delta)
+
+
+def rebuild_monthly_balances(user=None):
+    """
+    Recalcula os saldos mensais a partir de Transaction.
+
+    Args:
+        user: limita a reconstrução a um usuário (todos quando None)
+
+    Returns:
+        quantidade de linhas de resumo criadas
+    """
+    transactions = Transaction.objects.all()
+    balances = MonthlyAccountBalance.objects.all()
+    if user is not None:
+        transactions = transactions.filter(user=user)
+        balances = balances.filter(user=user)
+
+    rows = (
+        transactions.annotate(month=TruncMonth('date'))
+        .values('user_id', 'account_id', 'month')
+        .annotate(total=Sum('value'))
+        .order_by()
+    )
+    with db_transaction.atomic():
+        balances.delete()
+        created = MonthlyAccountBalance.objects.bulk_create(
+            (MonthlyAccountBalance(**row) for row in rows),
+            batch_size=1000,
+        )
+    return len(created)
+
+
+def rebuild_months(keys):
+    """
+    Recalcula a partir de Transaction apenas os saldos informados.
+
+    Args:
+        keys: iterável de (user_id, account_id, data); a data pode ser
+            qualquer dia do mês
+    """
+    keys = {(user_id, account_id, month_start(date)) for user_id, account_id, date in keys}
+    if not keys:
+        return
+    transactions = Q()
+    balances = Q()
+    for user_id, account_id, month in keys:
+        transactions |= Q(user_id=user_id, account_id=account_id, date__gte=month, date__lt=_next_month(month))
+        balances |= Q(user_id=user_id, account_id=account_id, month=month)
+
+    rows = (
+        Transaction.objects.filter(transactions)
+        .annotate(month=TruncMonth('date'))
+        .values('user_id', 'account_id', 'month')
+        .annotate(total=Sum('value'))
+        .order_by()
+    )
+    with db_transaction.atomic():
+        MonthlyAccountBalance.objects.filter(balances).delete()
+        MonthlyAccountBalance.objects.bulk_create(
+            (MonthlyAccountBalance(**{**row, 'month': month_start(row['month'])}) for row in rows),
+            batch_size=1000,
+        )
+
+
+def _apply_filters(qs, filter_type=None, filter_subcategory=None, filter_account=None):
+    if filter_type:
+        qs = qs.filter(account__subcategory__type=filter_type)
+    if filter_subcategory:
+        qs = qs.filter(account__subcategory_id=filter_subcategory)
+    if filter_account:
+        qs = qs.filter(account_id=filter_account)
+    return qs
+
+
+def _grouped(qs, value_field):
+    return qs.values(*_GROUP_FIELDS).annotate(total=Sum(value_field)).order_by()
+
+
+def period_summary(user, start_date, end_date, **filters):
+    """
+    Totais de um período [start_date, end_date] com os filtros do dashboard.
+
+    Args:
+        filters: filter_type, filter_subcategory e filter_account
+
+    Returns:
+        dict com total_entradas, total_saidas, saldo e saidas_por_subcategoria
+        (lista de {'name', 'value'} ordenada pelo nome)
+    """
+    # Meses completos dentro do período: [first_full, full_end)
+    first_full = start_date if start_date.day == 1 else _next_month(start_date)
+    day_after = end_date + datetime.timedelta(days=1)
+    full_end = day_after if day_after.day == 1 else month_start(end_date)
+
+    partial = Transaction.objects.filter(user=user)
+    groups = []
+    if first_full < full_end:
+        summary = MonthlyAccountBalance.objects.filter(user=user, month__gte=first_full, month__lt=full_end)
+        groups.append(_grouped(_apply_filters(summary, **filters), 'total'))
+
+        bordas = Q()
+        if start_date < first_full:
+            bordas |= Q(date__gte=start_date, date__lt=first_full)
+        if full_end <= end_date:
+            bordas |= Q(date__gte=full_end, date__lte=end_date)
+        if bordas:
+            groups.append(_grouped(_apply_filters(partial.filter(bordas), **filters), 'value'))
+    else:
+        partial = partial.filter(date__range=[start_date, end_date])
+        groups.append(_grouped(_apply_filters(partial, **filters), 'value'))
+
+    totals = {}
+    for rows in groups:
+        for row in rows:
+            key = tuple(row[field] for field in _GROUP_FIELDS)
+            totals[key] = totals.get(key, ZERO) + (row['total'] or ZERO)
+
+    total_entradas = sum((v for (tipo, _id, _nome), v in totals.items() if tipo == 'entrada'), ZERO)
+    total_saidas = sum((v for (tipo, _id, _nome), v in totals.items() if tipo == 'saida'), ZERO)
+
+    saidas_por_subcategoria = [
+        {'name': nome, 'value': float(valor)}
+        for (tipo, _id, nome), valor in sorted(totals.items(), key=lambda item: item[0][2] or '')
+        if tipo == 'saida' and valor > 0
+    ]
+
+    return {
+        'total_entradas': total_entradas,
+        'total_saidas': total_saidas,
+        'saldo': total_entradas - total_saidas,
+        'saidas_por_subcategoria': saidas_por_subcategoria,
+    }
@@ -0,0 +1,23 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.finance.balances import rebuild_monthly_balances
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói os saldos mensais por conta (MonthlyAccountBalance) a partir dos lançamentos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='ID do usuário (padrão: todos)')
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            User = get_user_model()
+            try:
+                user = User.objects.get(pk=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"Usuário {options['user']} não encontrado")
+
+        total = rebuild_monthly_balances(user)
+        self.stdout.write(self.style.SUCCESS(f"Concluído! {total} saldos mensais gerados."))
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth
+
+
+def popular_saldos_mensais(apps, schema_editor):
+    Transaction = apps.get_model('finance', 'Transaction')
+    MonthlyAccountBalance = apps.get_model('finance', 'MonthlyAccountBalance')
+    rows = (
+        Transaction.objects.annotate(month=TruncMonth('date'))
+        .values('user_id', 'account_id', 'month')
+        .annotate(total=Sum('value'))
+        .order_by()
+    )
+    MonthlyAccountBalance.objects.bulk_create(
+        (MonthlyAccountBalance(**row) for row in rows),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0004_alter_account_options_alter_account_unique_together_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyAccountBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='Primeiro dia do mês (YYYY-MM-01)', verbose_name='Mês')),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Total (R$)')),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_balances', to='finance.account', verbose_name='Conta')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='finance_monthly_balances', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Saldo Mensal por Conta',
+                'verbose_name_plural': 'Saldos Mensais por Conta',
+                'ordering': ['-month'],
+                'indexes': [models.Index(fields=['user', 'month'], name='finance_mon_user_id_2e2629_idx')],
+                'unique_together': {('user', 'account', 'month')},
+            },
+        ),
+        migrations.RunPython(popular_saldos_mensais, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction as db_transaction
 from django.conf import settings
 from django.utils import timezone
 
@@ -47,6 +47,40 @@ class Account(models.Model):
         return self.code.count('.')
 
 
+class TransactionQuerySet(models.QuerySet):
+    """
+    bulk_create(), update() e bulk_update() não disparam os signals que
+    mantêm MonthlyAccountBalance; aqui eles recalculam os meses afetados.
+    """
+    BALANCE_FIELDS = {'user', 'user_id', 'account', 'account_id', 'date', 'value'}
+
+    def _balance_keys(self):
+        return set(self.order_by().values_list('user_id', 'account_id', 'date').distinct())
+
+    def bulk_create(self, objs, *args, **kwargs):
+        from .balances import rebuild_months
+        with db_transaction.atomic():
+            objs = super().bulk_create(objs, *args, **kwargs)
+            rebuild_months((obj.user_id, obj.account_id, obj.date) for obj in objs)
+        return objs
+
+    bulk_create.alters_data = True
+
+    def update(self, **kwargs):
+        if not self.BALANCE_FIELDS.intersection(kwargs):
+            return super().update(**kwargs)
+        from .balances import rebuild_months
+        with db_transaction.atomic():
+            pks = list(self.values_list('pk', flat=True))
+            keys = self._balance_keys()
+            rows = super().update(**kwargs)
+            keys |= Transaction.objects.filter(pk__in=pks)._balance_keys()
+            rebuild_months(keys)
+        return rows
+
+    update.alters_data = True
+
+
 class Transaction(models.Model):
     STATUS_PENDING = 'pendente'
     STATUS_TRANSMITTED = 'transmitido'
@@ -64,6 +98,8 @@ class Transaction(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING, verbose_name='Status')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    objects = TransactionQuerySet.as_manager()
     
     class Meta:
         verbose_name = 'Lançamento'
@@ -77,6 +113,30 @@ class Transaction(models.Model):
     def type(self):
         return self.account.subcategory.type
 
+
+class MonthlyAccountBalance(models.Model):
+    """Total mensal dos lançamentos de uma conta (resumo materializado).
+
+    Mantido incrementalmente pelos signals de Transaction e reconstruído pelo
+    comando `rebuild_monthly_balances`.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='finance_monthly_balances')
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='monthly_balances', verbose_name='Conta')
+    month = models.DateField(verbose_name='Mês', help_text='Primeiro dia do mês (YYYY-MM-01)')
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name='Total (R$)')
+
+    class Meta:
+        verbose_name = 'Saldo Mensal por Conta'
+        verbose_name_plural = 'Saldos Mensais por Conta'
+        ordering = ['-month']
+        unique_together = ['user', 'account', 'month']
+        indexes = [
+            models.Index(fields=['user', 'month']),
+        ]
+
+    def __str__(self):
+        return f"{self.month.strftime('%m/%Y')} - {self.account.name} - R$ {self.total}"
+
 class ScheduledTransaction(models.Model):
     TYPE_CHOICES = [
         ('entrada', 'A Receber'),
@@ -0,0 +1,160 @@
+"""
+Importação em lote de extratos OFX para a conciliação bancária.
+
+- Os fitids já importados são buscados em uma única consulta (índice único
+  (fitid, user)) e comparados em memória.
+- A sugestão de categoria usa uma única regex com todas as palavras-chave,
+  compilada uma vez por processo; o mapa palavra-chave -> conta de cada
+  usuário fica em cache e é invalidado quando as contas mudam.
+- As gravações são feitas com bulk_create(ignore_conflicts=True) em lotes;
+  os registros criados são contados no banco, antes e depois de cada lote.
+- O id da task de cada importação fica associado ao usuário que enviou o
+  arquivo: só ele pode consultar o andamento.
+"""
+import logging
+import re
+import time
+
+from django.core.cache import cache
+
+from .models import Account, BankReconciliation
+
+logger = logging.getLogger(__name__)
+
+# Palavra-chave do histórico -> trecho do nome da conta sugerida.
+# A ordem define a prioridade quando mais de uma palavra aparece no histórico.
+KEYWORD_MAPPING = {
+    'POSTO': 'Combustível',
+    'IPIRANGA': 'Combustível',
+    'SHELL': 'Combustível',
+    'ALUGUEL': 'Aluguel',
+    'TELEFONE': 'Telefone',
+    'INTERNET': 'Internet',
+    'LUZ': 'Energia',
+    'ENERGIA': 'Energia',
+    'SUPERMERCADO': 'Alimentação',
+    'FOOD': 'Alimentação',
+    'RESTAURANTE': 'Alimentação',
+}
+
+_KEYWORD_PRIORITY = {keyword: i for i, keyword in enumerate(KEYWORD_MAPPING)}
+# Palavras maiores primeiro para a alternância não parar em um prefixo
+KEYWORD_PATTERN = re.compile('|'.join(
+    re.escape(keyword) for keyword in sorted(KEYWORD_MAPPING, key=len, reverse=True)
+))
+
+MATCHER_CACHE_KEY = 'finance:ofx_matcher:{user_id}'
+MATCHER_TIMEOUT = 60 * 60 * 24
+BATCH_SIZE = 500
+TASK_OWNER_KEY = 'finance:ofx_task:{task_id}'
+TASK_OWNER_TIMEOUT = 60 * 60 * 24
+
+
+def register_import_task(task_id, user_id):
+    """Associa a task de importação ao usuário que enviou o arquivo."""
+    cache.set(TASK_OWNER_KEY.format(task_id=task_id), user_id, TASK_OWNER_TIMEOUT)
+
+
+def is_import_task_owner(task_id, user_id):
+    return cache.get(TASK_OWNER_KEY.format(task_id=task_id)) == user_id
+
+
+def invalidate_account_matcher(user_id):
+    cache.delete(MATCHER_CACHE_KEY.format(user_id=user_id))
+
+
+def get_account_matcher(user_id):
+    """
+    Mapa {palavra-chave: id da conta} do usuário.
+
+    Equivale à busca original (primeira conta cujo nome contém o trecho
+    mapeado), mas calculado uma vez e reaproveitado entre importações.
+    """
+    cache_key = MATCHER_CACHE_KEY.format(user_id=user_id)
+    matcher = cache.get(cache_key)
+    if matcher is None:
+        accounts = [
+            (name.lower(), pk)
+            for pk, name in Account.objects.filter(user_id=user_id).values_list('id', 'name')
+        ]
+        matcher = {}
+        for keyword, acc_name in KEYWORD_MAPPING.items():
+            trecho = acc_name.lower()
+            for name, pk in accounts:
+                if trecho in name:
+                    matcher[keyword] = pk
+                    break
+        cache.set(cache_key, matcher, MATCHER_TIMEOUT)
+    return matcher
+
+
+def suggest_account_id(memo, matcher):
+    """Conta sugerida para o histórico (palavra-chave de maior prioridade com conta)."""
+    if not memo or not matcher:
+        return None
+    candidates = [m.group() for m in KEYWORD_PATTERN.finditer(memo.upper()) if m.group() in matcher]
+    if not candidates:
+        return None
+    return matcher[min(candidates, key=_KEYWORD_PRIORITY.__getitem__)]
+
+
+def import_ofx_transactions(user_id, transactions, progress=None, batch_size=BATCH_SIZE):
+    """
+    Cria os registros de conciliação das transações ainda não importadas.
+
+    Args:
+        transactions: transações do ofxparse (id, date, memo, amount)
+        progress: callback opcional progress(processadas, total, por_segundo)
+
+    Returns:
+        dict com total, created, skipped, seconds e rate (transações/s)
+    """
+    inicio = time.perf_counter()
+    transactions = list(transactions)
+    total = len(transactions)
+
+    existing = set(
+        BankReconciliation.objects.filter(
+            user_id=user_id, fitid__in={t.id for t in transactions}
+        ).values_list('fitid', flat=True)
+    )
+    matcher = get_account_matcher(user_id)
+
+    created = 0
+    batch = []
+    for processed, trans in enumerate(transactions, start=1):
+        if trans.id not in existing:
+            existing.add(trans.id)  # fitid repetido no mesmo arquivo
+            batch.append(BankReconciliation(
+                user_id=user_id,
+                date=trans.date,
+                description=trans.memo or '',
+                amount=trans.amount,
+                fitid=trans.id,
+                suggested_account_id=suggest_account_id(trans.memo, matcher),
+                status=BankReconciliation.STATUS_PENDING,
+            ))
+
+        if len(batch) >= batch_size or processed == total:
+            if batch:
+                # ignore_conflicts descarta em silêncio os fitids gravados por
+                # outra importação simultânea: conta o que de fato entrou
+                gravados = BankReconciliation.objects.filter(
+                    user_id=user_id, fitid__in=[item.fitid for item in batch]
+                )
+                antes = gravados.count()
+                BankReconciliation.objects.bulk_create(batch, ignore_conflicts=True)
+                created += gravados.count() - antes
+                batch = []
+            if progress:
+                elapsed = time.perf_counter() - inicio
+                progress(processed, total, round(processed / elapsed, 1) if elapsed else None)
+
+    seconds = time.perf_counter() - inicio
+    return {
+        'total': total,
+        'created': created,
+        'skipped': total - created,
+        'seconds': round(seconds, 3),
+        'rate': round(total / seconds, 1) if seconds else None,
+    }
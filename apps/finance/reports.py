@@ -0,0 +1,273 @@
+"""
+Relatório financeiro em PDF.
+
+Os lançamentos são lidos com select_related e .iterator(chunk_size=...) e a
+tabela é quebrada em blocos do tamanho de uma página, em vez de uma única
+Table gigante (que o reportlab precisa medir e dividir inteira). Os blocos
+são gerados sob demanda durante o build (StreamingDocTemplate): só a página
+em montagem fica em memória, não todas as tabelas do relatório.
+
+Relatórios acima de FINANCE_REPORT_ASYNC_THRESHOLD lançamentos são gerados
+por uma task Celery, que grava o arquivo no storage privado (o download passa
+pela view `download_report`, só para o dono) e avisa o usuário por e-mail;
+os arquivos são removidos após FINANCE_REPORT_RETENTION_DAYS dias (task
+periódica `cleanup_report_files`).
+"""
+import logging
+from datetime import datetime, timedelta
+from itertools import chain
+
+from django.conf import settings
+from django.core.files.storage import default_storage, storages
+from django.utils import timezone
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import cm
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from apps.users.formatters import format_currency_brl
+from .balances import period_summary
+from .models import Transaction
+
+logger = logging.getLogger(__name__)
+
+REPORT_CHUNK_SIZE = 2000
+ROWS_PER_TABLE = 40
+REPORT_STORAGE_DIR = 'relatorios_financeiros'
+# Extratos do usuário: storage privado (STORAGES['private']), fora do MEDIA_ROOT
+REPORT_STORAGE_ALIAS = 'private'
+
+HEADER = ['Data', 'Tipo', 'Categoria/Conta', 'Descrição', 'Valor']
+COL_WIDTHS = [2.5*cm, 2*cm, 5*cm, 5*cm, 2.5*cm]
+BASE_TABLE_STYLE = [
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('FONTSIZE', (0, 1), (-1, -1), 8),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+]
+
+
+class FlowableStream(list):
+    """
+    Lista de flowables alimentada sob demanda por um iterável.
+
+    O build do reportlab consome a lista pela frente (flowables[0], del
+    flowables[0] e reinserção das partes divididas); aqui ela só guarda os
+    próximos `lookahead` itens, puxando do iterável conforme é consumida.
+    """
+
+    def __init__(self, flowables, lookahead=2):
+        super().__init__()
+        self._source = iter(flowables)
+        self._lookahead = lookahead
+
+    def _fill(self):
+        while self._source is not None and list.__len__(self) < self._lookahead:
+            try:
+                self.append(next(self._source))
+            except StopIteration:
+                self._source = None
+
+    def __len__(self):
+        self._fill()
+        return list.__len__(self)
+
+    def __getitem__(self, index):
+        self._fill()
+        return list.__getitem__(self, index)
+
+
+class StreamingDocTemplate(SimpleDocTemplate):
+    """SimpleDocTemplate que aceita um gerador de flowables (ver FlowableStream)."""
+
+    def build(self, flowables, *args, **kwargs):
+        return super().build(FlowableStream(flowables), *args, **kwargs)
+
+
+def async_threshold():
+    return getattr(settings, 'FINANCE_REPORT_ASYNC_THRESHOLD', 2000)
+
+
+def report_storage():
+    return storages[REPORT_STORAGE_ALIAS]
+
+
+def retention_days():
+    return getattr(settings, 'FINANCE_REPORT_RETENTION_DAYS', 7)
+
+
+def parse_report_params(params):
+    """
+    Período e filtros do relatório a partir da querystring (mesma lógica do
+    dashboard): sem datas, usa o mês atual.
+    """
+    today = timezone.now().date()
+    start_date_str = params.get('start_date')
+    end_date_str = params.get('end_date')
+
+    if start_date_str:
+        start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
+    else:
+        start_date = today.replace(day=1)
+
+    if end_date_str:
+        end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
+    else:
+        next_month = today.replace(day=28) + timedelta(days=4)
+        end_date = next_month - timedelta(days=next_month.day)
+
+    return {
+        'start_date': start_date,
+        'end_date': end_date,
+        'filter_type': params.get('type') or None,
+        'filter_subcategory': params.get('subcategory') or None,
+        'filter_account': params.get('account') or None,
+    }
+
+
+def report_queryset(user, start_date, end_date, filter_type=None, filter_subcategory=None, filter_account=None):
+    transactions = Transaction.objects.filter(user=user, date__range=[start_date, end_date])
+    if filter_type:
+        transactions = transactions.filter(account__subcategory__type=filter_type)
+    if filter_subcategory:
+        transactions = transactions.filter(account__subcategory_id=filter_subcategory)
+    if filter_account:
+        transactions = transactions.filter(account_id=filter_account)
+    return transactions.select_related('account__subcategory').order_by('date', 'id')
+
+
+def report_filename(start_date, end_date):
+    return f"relatorio_financeiro_{start_date.strftime('%d-%m-%Y')}_{end_date.strftime('%d-%m-%Y')}.pdf"
+
+
+def _transaction_row(t):
+    subcategory = t.account.subcategory
+    tipo = "Entrada" if subcategory and subcategory.type == 'entrada' else "Saída"
+
+    # Formatar descrição
+    desc = t.description if t.description else "-"
+    if len(desc) > 30:
+        desc = desc[:27] + "..."
+
+    categoria = f"{subcategory.name if subcategory else '-'}\n{t.account.name}"
+    return [t.date.strftime('%d/%m/%Y'), tipo, categoria, desc, format_currency_brl(t.value)]
+
+
+def _chunk_table(rows):
+    table = Table([HEADER] + rows, colWidths=COL_WIDTHS, repeatRows=1)
+    style = TableStyle(BASE_TABLE_STYLE)
+    # Colorir linhas de entrada/saída
+    for i, row in enumerate(rows, start=1):
+        style.add('TEXTCOLOR', (4, i), (4, i), colors.green if row[1] == 'Entrada' else colors.red)
+    table.setStyle(style)
+    return table
+
+
+def _transaction_tables(transactions):
+    """Tabelas de até ROWS_PER_TABLE linhas, lendo o queryset em blocos."""
+    rows = []
+    emitted = False
+    for t in transactions.iterator(chunk_size=REPORT_CHUNK_SIZE):
+        rows.append(_transaction_row(t))
+        if len(rows) == ROWS_PER_TABLE:
+            yield _chunk_table(rows)
+            emitted = True
+            rows = []
+    # Sem lançamentos o relatório mantém a tabela só com o cabeçalho
+    if rows or not emitted:
+        yield _chunk_table(rows)
+
+
+def build_report_pdf(output, user, start_date, end_date, **filters):
+    """Escreve o PDF do relatório em `output` (arquivo ou objeto file-like)."""
+    resumo = period_summary(user, start_date, end_date, **filters)
+    total_entradas = resumo['total_entradas']
+    total_saidas = resumo['total_saidas']
+    saldo = resumo['saldo']
+
+    doc = StreamingDocTemplate(output, pagesize=A4, rightMargin=2*cm, leftMargin=2*cm, topMargin=2*cm, bottomMargin=2*cm)
+    elements = []
+    styles = getSampleStyleSheet()
+
+    # Título
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=16,
+        spaceAfter=30,
+        alignment=1 # Center
+    )
+    elements.append(Paragraph("Relatório Financeiro - Vetorial", title_style))
+    elements.append(Paragraph(f"Período: {start_date.strftime('%d/%m/%Y')} a {end_date.strftime('%d/%m/%Y')}", styles['Normal']))
+    elements.append(Spacer(1, 20))
+
+    # Resumo
+    summary_data = [
+        ['Resumo do Período', ''],
+        ['Total Entradas:', format_currency_brl(total_entradas)],
+        ['Total Saídas:', format_currency_brl(total_saidas)],
+        ['Saldo Final:', format_currency_brl(saldo)]
+    ]
+
+    summary_table = Table(summary_data, colWidths=[4*cm, 4*cm], hAlign='LEFT')
+    summary_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (1, 0), colors.lightgrey),
+        ('TEXTCOLOR', (0, 0), (1, 0), colors.black),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.whitesmoke),
+        ('GRID', (0, 0), (-1, -1), 1, colors.white),
+        ('TEXTCOLOR', (1, 3), (1, 3), colors.blue if saldo >= 0 else colors.red), # Saldo color
+        ('FONTNAME', (0, 3), (1, 3), 'Helvetica-Bold'),
+    ]))
+    elements.append(summary_table)
+    elements.append(Spacer(1, 30))
+
+    # Tabela de Lançamentos, em blocos de uma página gerados durante o build
+    doc.build(chain(elements, _transaction_tables(report_queryset(user, start_date, end_date, **filters))))
+
+
+def _remove_reports(storage, limite=None):
+    """Remove os relatórios do storage (todos, ou os modificados antes de `limite`)."""
+    if not storage.exists(REPORT_STORAGE_DIR):
+        return 0
+
+    removidos = 0
+    user_dirs, _files = storage.listdir(REPORT_STORAGE_DIR)
+    for user_dir in user_dirs:
+        _dirs, names = storage.listdir(f"{REPORT_STORAGE_DIR}/{user_dir}")
+        for name in names:
+            path = f"{REPORT_STORAGE_DIR}/{user_dir}/{name}"
+            try:
+                if limite is None or storage.get_modified_time(path) < limite:
+                    storage.delete(path)
+                    removidos += 1
+            except (OSError, NotImplementedError) as e:
+                logger.warning(f"Não foi possível remover o relatório {path}: {e}")
+    return removidos
+
+
+def cleanup_stored_reports(max_age_days=None):
+    """
+    Remove do storage privado os relatórios gerados em segundo plano há mais
+    de `max_age_days` dias (padrão: FINANCE_REPORT_RETENTION_DAYS) e os que
+    ainda estiverem no MEDIA_ROOT público (gravados antes do storage privado).
+
+    Returns:
+        quantidade de arquivos removidos
+    """
+    if max_age_days is None:
+        max_age_days = retention_days()
+    removidos = _remove_reports(report_storage(), timezone.now() - timedelta(days=max_age_days))
+    removidos += _remove_reports(default_storage)
+    if removidos:
+        logger.info(f"[RELATORIO] {removidos} relatórios expirados removidos")
+    return removidos
@@ -0,0 +1,41 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .balances import apply_delta
+from .models import Account, Transaction
+from .ofx_import import invalidate_account_matcher
+
+
+@receiver(pre_save, sender=Transaction)
+def guardar_lancamento_anterior(sender, instance, **kwargs):
+    """Guarda conta/data/valor anteriores para calcular a diferença no post_save."""
+    instance._saldo_anterior = None
+    if instance.pk:
+        instance._saldo_anterior = (
+            Transaction.objects.filter(pk=instance.pk)
+            .values('user_id', 'account_id', 'date', 'value')
+            .first()
+        )
+
+
+@receiver(post_save, sender=Transaction)
+def atualizar_saldo_mensal(sender, instance, raw=False, **kwargs):
+    """Aplica no saldo mensal apenas a diferença causada pelo lançamento."""
+    if raw:
+        return
+    anterior = getattr(instance, '_saldo_anterior', None)
+    if anterior:
+        apply_delta(anterior['user_id'], anterior['account_id'], anterior['date'], -anterior['value'], create=False)
+    apply_delta(instance.user_id, instance.account_id, instance.date, instance.value)
+
+
+@receiver(post_delete, sender=Transaction)
+def remover_do_saldo_mensal(sender, instance, **kwargs):
+    apply_delta(instance.user_id, instance.account_id, instance.date, -instance.value, create=False)
+
+
+@receiver(post_save, sender=Account)
+@receiver(post_delete, sender=Account)
+def invalidar_sugestoes_ofx(sender, instance, **kwargs):
+    """Contas novas/renomeadas mudam a sugestão de categoria da importação OFX."""
+    invalidate_account_matcher(instance.user_id)
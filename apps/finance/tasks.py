@@ -1,87 +1,104 @@
 from celery import shared_task
-from django.conf import settings
-from .models import BankReconciliation, Account
+from .ofx_import import import_ofx_transactions
 import ofxparse
-from datetime import datetime
+import logging
 import os
+import tempfile
+import time
+import uuid
 
-@shared_task
-def process_ofx_file(file_path, user_id):
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True)
+def process_ofx_file(self, file_path, user_id):
     """
     Processa um arquivo OFX e cria registros de conciliação.
+
+    O andamento é publicado no estado da task (PROGRESS) com o número de
+    transações processadas e a vazão (transações/s).
     """
-    print(f"[OFX] Iniciando processamento. Path: {file_path}, UserID: {user_id}")
-    
+    logger.info(f"[OFX] Iniciando processamento. Path: {file_path}, UserID: {user_id}")
+
     if not os.path.exists(file_path):
-        print(f"[OFX] ERRO: Arquivo não encontrado no caminho: {file_path}")
+        logger.error(f"[OFX] Arquivo não encontrado no caminho: {file_path}")
         return
 
+    def report_progress(current, total, rate):
+        if self.request.id and not self.request.is_eager:
+            self.update_state(state='PROGRESS', meta={
+                'current': current,
+                'total': total,
+                'percent': round(current * 100 / total, 1) if total else 100,
+                'rate': rate,
+            })
+
     try:
         with open(file_path, 'rb') as f:
-            print(f"[OFX] Arquivo aberto com sucesso. Fazendo parse...")
             ofx = ofxparse.OfxParser.parse(f)
-            print(f"[OFX] Parse realizado. Conta: {ofx.account.number if hasattr(ofx.account, 'number') else 'N/A'}")
-            print(f"[OFX] Total de transações encontradas: {len(ofx.account.statement.transactions)}")
-        
-        # Mapeamento simples de palavras-chave para sugestão
-        # Isso poderia ser movido para o banco de dados futuramente
-        KEYWORD_MAPPING = {
-            'POSTO': 'Combustível',
-            'IPIRANGA': 'Combustível',
-            'SHELL': 'Combustível',
-            'ALUGUEL': 'Aluguel',
-            'TELEFONE': 'Telefone',
-            'INTERNET': 'Internet',
-            'LUZ': 'Energia',
-            'ENERGIA': 'Energia',
-            'SUPERMERCADO': 'Alimentação',
-            'FOOD': 'Alimentação',
-            'RESTAURANTE': 'Alimentação',
-        }
-
-        # Busca todas as contas do usuário para fazer o match
-        user_accounts = Account.objects.filter(user_id=user_id)
-        account_map = {acc.name.lower(): acc for acc in user_accounts}
-
-        count = 0
-        for trans in ofx.account.statement.transactions:
-            # Tenta encontrar uma sugestão
-            suggested_acc = None
-            memo_upper = trans.memo.upper()
-            
-            for keyword, acc_name in KEYWORD_MAPPING.items():
-                if keyword in memo_upper:
-                    # Tenta achar a conta pelo nome sugerido
-                    # O nome da conta deve bater com o valor do mapa
-                    # Procura insensivel a caixa no mapa de contas do usuario
-                    for u_acc_name, u_acc in account_map.items():
-                        if acc_name.lower() in u_acc_name:
-                            suggested_acc = u_acc
-                            break
-                if suggested_acc:
-                    break
-            
-            # Cria o registro se não existir (baseado no fitid)
-            if not BankReconciliation.objects.filter(fitid=trans.id, user_id=user_id).exists():
-                BankReconciliation.objects.create(
-                    user_id=user_id,
-                    date=trans.date,
-                    description=trans.memo,
-                    amount=trans.amount,
-                    fitid=trans.id,
-                    suggested_account=suggested_acc,
-                    status=BankReconciliation.STATUS_PENDING
-                )
-                count += 1
-        
-        print(f"[OFX] Processamento concluído. Novos registros: {count}")
+        transactions = ofx.account.statement.transactions
+        logger.info(f"[OFX] Parse realizado. Total de transações encontradas: {len(transactions)}")
+
+        result = import_ofx_transactions(user_id, transactions, progress=report_progress)
+        logger.info(
+            f"[OFX] Processamento concluído. Novos registros: {result['created']} "
+            f"({result['rate']} transações/s)"
+        )
+        return result
 
     except Exception as e:
-        import traceback
-        print(f"[OFX] ERRO CRÍTICO no processamento: {str(e)}")
-        print(traceback.format_exc())
+        logger.exception(f"[OFX] ERRO CRÍTICO no processamento: {str(e)}")
     finally:
         # Limpa arquivo temporário
         if os.path.exists(file_path):
             os.remove(file_path)
-            print(f"[OFX] Arquivo temporário removido.")
+            logger.info("[OFX] Arquivo temporário removido.")
+
+
+@shared_task
+def generate_report_pdf_task(user_id, params):
+    """
+    Gera o relatório financeiro em segundo plano, grava no storage privado e
+    envia ao usuário um e-mail com o link de download (view download_report).
+
+    Returns:
+        caminho do arquivo no storage
+    """
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.core.files import File
+    from django.urls import reverse
+    from apps.services.email_service import EmailService
+    from .reports import REPORT_STORAGE_DIR, build_report_pdf, parse_report_params, report_storage, retention_days
+
+    user = get_user_model().objects.get(pk=user_id)
+    report = parse_report_params(params)
+
+    inicio = time.perf_counter()
+    with tempfile.TemporaryFile() as output:
+        build_report_pdf(output, user, **report)
+        output.seek(0)
+        path = report_storage().save(f"{REPORT_STORAGE_DIR}/{user_id}/{uuid.uuid4().hex}.pdf", File(output))
+    logger.info(f"[RELATORIO] {path} gerado em {time.perf_counter() - inicio:.1f}s")
+
+    if user.email:
+        link = settings.SITE_URL + reverse('finance:download_report', args=[os.path.basename(path)])
+        periodo = f"{report['start_date'].strftime('%d/%m/%Y')} a {report['end_date'].strftime('%d/%m/%Y')}"
+        EmailService().enviar_email_simples(
+            destinatario=user.email,
+            assunto='Seu relatório financeiro está pronto',
+            mensagem=(
+                f"Olá, {user.first_name or user.username}!\n\n"
+                f"O relatório financeiro do período {periodo} foi gerado.\n"
+                f"Faça o download em: {link}\n"
+                f"O link fica disponível por {retention_days()} dias.\n"
+            ),
+        )
+    return path
+
+
+@shared_task(ignore_result=True)
+def cleanup_report_files():
+    """Remove os relatórios gerados em segundo plano que já expiraram (agendada no beat)."""
+    from .reports import cleanup_stored_reports
+    cleanup_stored_reports()
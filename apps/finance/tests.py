@@ -0,0 +1,248 @@
+import datetime
+import io
+import os
+import shutil
+import tempfile
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage, storages
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .balances import apply_delta, rebuild_monthly_balances
+from .models import Account, BankReconciliation, MonthlyAccountBalance, Subcategory, Transaction
+from .ofx_import import import_ofx_transactions, register_import_task
+from .reports import REPORT_STORAGE_ALIAS, REPORT_STORAGE_DIR, FlowableStream, build_report_pdf, cleanup_stored_reports
+
+
+class MonthlyAccountBalanceTest(TestCase):
+    """Saldos mensais mantidos pelos signals, pelo queryset e pela reconstrução."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='fin1', email='fin1@example.com', password='pass1234')
+        sub = Subcategory.objects.create(user=self.user, name='Vendas', type='entrada')
+        self.conta = Account.objects.create(user=self.user, subcategory=sub, name='Serviços')
+        self.outra = Account.objects.create(user=self.user, subcategory=sub, name='Produtos')
+        self.jan = datetime.date(2025, 1, 1)
+        self.fev = datetime.date(2025, 2, 1)
+
+    def _lancar(self, valor, date=None, account=None):
+        return Transaction.objects.create(
+            user=self.user, account=account or self.conta, date=date or self.jan, value=Decimal(valor),
+        )
+
+    def _saldos(self):
+        return {
+            (b.account_id, b.month): b.total
+            for b in MonthlyAccountBalance.objects.filter(user=self.user)
+        }
+
+    def test_apply_delta_cria_soma_e_remove_mes_zerado(self):
+        apply_delta(self.user.pk, self.conta.pk, datetime.date(2025, 1, 15), Decimal('10'))
+        apply_delta(self.user.pk, self.conta.pk, datetime.date(2025, 1, 20), Decimal('5'))
+        self.assertEqual(self._saldos(), {(self.conta.pk, self.jan): Decimal('15')})
+
+        apply_delta(self.user.pk, self.conta.pk, self.jan, Decimal('-15'), create=False)
+        self.assertEqual(self._saldos(), {})
+
+        # Remoção sem linha existente não cria saldo negativo
+        apply_delta(self.user.pk, self.conta.pk, self.fev, Decimal('-7'), create=False)
+        self.assertEqual(self._saldos(), {})
+
+    def test_signals_aplicam_criacao_edicao_e_exclusao(self):
+        lancamento = self._lancar('100')
+        self._lancar('50', date=datetime.date(2025, 1, 31))
+        self.assertEqual(self._saldos(), {(self.conta.pk, self.jan): Decimal('150')})
+
+        # Mudar conta, data e valor move o lançamento entre os saldos
+        lancamento.account = self.outra
+        lancamento.date = datetime.date(2025, 2, 10)
+        lancamento.value = Decimal('80')
+        lancamento.save()
+        self.assertEqual(self._saldos(), {
+            (self.conta.pk, self.jan): Decimal('50'),
+            (self.outra.pk, self.fev): Decimal('80'),
+        })
+
+        lancamento.delete()
+        self.assertEqual(self._saldos(), {(self.conta.pk, self.jan): Decimal('50')})
+
+    def test_rebuild_corrige_saldos_divergentes(self):
+        self._lancar('100')
+        self._lancar('30', date=self.fev, account=self.outra)
+        esperado = self._saldos()
+
+        MonthlyAccountBalance.objects.filter(user=self.user).update(total=Decimal('999'))
+        MonthlyAccountBalance.objects.create(user=self.user, account=self.outra, month=self.jan, total=Decimal('1'))
+
+        self.assertEqual(rebuild_monthly_balances(self.user), 2)
+        self.assertEqual(self._saldos(), esperado)
+
+    def test_bulk_create_e_update_mantem_saldos(self):
+        Transaction.objects.bulk_create([
+            Transaction(user=self.user, account=self.conta, date=self.jan, value=Decimal('10')),
+            Transaction(user=self.user, account=self.conta, date=datetime.date(2025, 1, 9), value=Decimal('20')),
+            Transaction(user=self.user, account=self.outra, date=self.fev, value=Decimal('5')),
+        ])
+        self.assertEqual(self._saldos(), {
+            (self.conta.pk, self.jan): Decimal('30'),
+            (self.outra.pk, self.fev): Decimal('5'),
+        })
+
+        Transaction.objects.filter(account=self.conta).update(account=self.outra, date=self.fev)
+        self.assertEqual(self._saldos(), {(self.outra.pk, self.fev): Decimal('35')})
+
+        # Atualização que não mexe em conta/data/valor não recalcula nada
+        with self.assertNumQueries(1):
+            Transaction.objects.filter(user=self.user).update(status=Transaction.STATUS_TRANSMITTED)
+
+        lancamentos = list(Transaction.objects.filter(user=self.user))
+        for lancamento in lancamentos:
+            lancamento.value = Decimal('1')
+        Transaction.objects.bulk_update(lancamentos, ['value'])
+        self.assertEqual(self._saldos(), {(self.outra.pk, self.fev): Decimal('3')})
+
+
+class OfxImportTest(TestCase):
+    """Importação OFX: contagem dos registros criados e acesso ao andamento."""
+
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.user = User.objects.create_user(username='ofx1', email='ofx1@example.com', password='pass1234')
+        self.outro = User.objects.create_user(username='ofx2', email='ofx2@example.com', password='pass1234')
+
+    def _transacao(self, fitid, memo='POSTO IPIRANGA'):
+        return SimpleNamespace(id=fitid, date=datetime.date(2025, 1, 10), memo=memo, amount=Decimal('-50'))
+
+    def test_conta_apenas_registros_gravados(self):
+        BankReconciliation.objects.create(
+            user=self.user, date=datetime.date(2025, 1, 1), description='x', amount=Decimal('1'), fitid='A',
+        )
+
+        def importacao_simultanea(processadas, total, rate):
+            # Outra importação grava "C" entre a verificação inicial e o lote
+            if processadas == 2:
+                BankReconciliation.objects.create(
+                    user=self.user, date=datetime.date(2025, 1, 1), description='y', amount=Decimal('1'), fitid='C',
+                )
+
+        resultado = import_ofx_transactions(
+            self.user.pk,
+            [self._transacao('A'), self._transacao('B'), self._transacao('B'), self._transacao('C')],
+            progress=importacao_simultanea,
+            batch_size=1,
+        )
+
+        self.assertEqual(resultado['total'], 4)
+        self.assertEqual(resultado['created'], 1)
+        self.assertEqual(resultado['skipped'], 3)
+        self.assertEqual(BankReconciliation.objects.filter(user=self.user).count(), 3)
+
+    def test_status_da_task_so_para_o_dono(self):
+        register_import_task('task-1', self.user.pk)
+        url = reverse('finance:reconciliation_task_status', args=['task-1'])
+
+        self.client.login(username='ofx2', password='pass1234')
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(
+            self.client.get(reverse('finance:reconciliation_task_status', args=['desconhecida'])).status_code, 404
+        )
+
+        self.client.login(username='ofx1', password='pass1234')
+        with mock.patch('apps.finance.views.AsyncResult') as async_result:
+            async_result.return_value = SimpleNamespace(state='PROGRESS', info={'current': 1, 'total': 2})
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data'], {'current': 1, 'total': 2})
+
+
+class ReportPdfTest(TestCase):
+    """Relatório em PDF gerado por blocos e limpeza dos arquivos armazenados."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='rel1', email='rel1@example.com', password='pass1234')
+        sub = Subcategory.objects.create(user=self.user, name='Despesas', type='saida')
+        self.conta = Account.objects.create(user=self.user, subcategory=sub, name='Aluguel')
+        self.media, privado = tempfile.mkdtemp(), tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        self.addCleanup(shutil.rmtree, privado, ignore_errors=True)
+        backend = 'django.core.files.storage.FileSystemStorage'
+        storages_override = override_settings(MEDIA_ROOT=self.media, STORAGES={
+            'default': {'BACKEND': backend},
+            'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+            REPORT_STORAGE_ALIAS: {'BACKEND': backend, 'OPTIONS': {'location': privado}},
+        })
+        storages_override.enable()
+        self.addCleanup(storages_override.disable)
+
+    def test_stream_puxa_flowables_sob_demanda(self):
+        consumidos = []
+
+        def gerar():
+            for i in range(100):
+                consumidos.append(i)
+                yield i
+
+        stream = FlowableStream(gerar(), lookahead=2)
+        self.assertEqual(stream[0], 0)
+        self.assertEqual(len(consumidos), 2)
+        del stream[0]
+        stream[0:0] = ['parte']
+        self.assertEqual(stream[0], 'parte')
+        self.assertEqual(len(consumidos), 2)
+
+        restantes = 0
+        while len(stream):
+            del stream[0]
+            restantes += 1
+        self.assertEqual(restantes, 100)
+
+    def test_pdf_com_varias_paginas_de_lancamentos(self):
+        from pypdf import PdfReader
+
+        Transaction.objects.bulk_create([
+            Transaction(user=self.user, account=self.conta, date=datetime.date(2025, 3, 1 + i % 28), value=Decimal(i + 1))
+            for i in range(130)
+        ])
+        output = io.BytesIO()
+        build_report_pdf(output, self.user, datetime.date(2025, 3, 1), datetime.date(2025, 3, 31))
+
+        output.seek(0)
+        reader = PdfReader(output)
+        self.assertGreaterEqual(len(reader.pages), 3)
+        self.assertIn('Relatório Financeiro', reader.pages[0].extract_text())
+
+    def test_cleanup_remove_expirados_e_os_do_storage_publico(self):
+        privado = storages[REPORT_STORAGE_ALIAS]
+        antigo = privado.save(f'{REPORT_STORAGE_DIR}/{self.user.pk}/antigo.pdf', ContentFile(b'%PDF'))
+        recente = privado.save(f'{REPORT_STORAGE_DIR}/{self.user.pk}/recente.pdf', ContentFile(b'%PDF'))
+        publico = default_storage.save(f'{REPORT_STORAGE_DIR}/{self.user.pk}/legado.pdf', ContentFile(b'%PDF'))
+        dez_dias = (datetime.datetime.now() - datetime.timedelta(days=10)).timestamp()
+        os.utime(privado.path(antigo), (dez_dias, dez_dias))
+
+        self.assertEqual(cleanup_stored_reports(max_age_days=7), 2)
+        self.assertFalse(privado.exists(antigo))
+        self.assertTrue(privado.exists(recente))
+        self.assertFalse(default_storage.exists(publico))
+
+    def test_relatorio_em_segundo_plano_fica_no_storage_privado(self):
+        from .tasks import generate_report_pdf_task
+
+        path = generate_report_pdf_task(self.user.pk, {'start_date': '2025-03-01', 'end_date': '2025-03-31'})
+        self.assertTrue(storages[REPORT_STORAGE_ALIAS].exists(path))
+        self.assertFalse(default_storage.exists(path))
+
+        url = reverse('finance:download_report', args=[os.path.basename(path)])
+        get_user_model().objects.create_user(username='rel2', email='rel2@example.com', password='pass1234')
+        self.client.login(username='rel2', password='pass1234')
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.client.login(username='rel1', password='pass1234')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
@@ -20,11 +20,13 @@ urlpatterns = [
     path('transaction/<int:pk>/edit/', views.edit_transaction, name='edit_transaction'),
     path('transaction/<int:pk>/delete/', views.delete_transaction, name='delete_transaction'),
     path('report/pdf/', views.generate_report_pdf, name='generate_report_pdf'),
+    path('report/download/<str:name>/', views.download_report, name='download_report'),
     path('scheduled/add/', views.add_scheduled_transaction, name='add_scheduled_transaction'),
     path('scheduled/list/', views.list_scheduled_transactions, name='list_scheduled_transactions'),
     path('scheduled/<int:pk>/liquidate/', views.liquidate_scheduled_transaction, name='liquidate_scheduled_transaction'),
     path('scheduled/<int:pk>/delete/', views.delete_scheduled_transaction, name='delete_scheduled_transaction'),
     path('reconciliation/', views.reconciliation_view, name='reconciliation'),
+    path('reconciliation/status/<str:task_id>/', views.reconciliation_task_status, name='reconciliation_task_status'),
     path('reconciliation/<int:pk>/approve/', views.approve_reconciliation, name='approve_reconciliation'),
     path('reconciliation/<int:pk>/ignore/', views.ignore_reconciliation, name='ignore_reconciliation'),
 ]
@@ -1,22 +1,26 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Sum
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, FileResponse, Http404
+from django.urls import reverse
 from django.utils import timezone
 from datetime import datetime, timedelta
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import cm
 from .models import Transaction, Subcategory, Account, ScheduledTransaction, BankReconciliation
 from .forms import TransactionForm, AccountForm, ScheduledTransactionForm
-from .tasks import process_ofx_file
+from .tasks import process_ofx_file, generate_report_pdf_task
+from .balances import period_summary
+from .ofx_import import is_import_task_owner, register_import_task
+from .reports import (
+    REPORT_STORAGE_DIR, async_threshold, build_report_pdf, parse_report_params, report_filename, report_queryset,
+    report_storage,
+)
 from django.core.files.storage import FileSystemStorage
 from django.conf import settings
 import os
+import re
+import tempfile
 import uuid
+from celery.result import AsyncResult
 
 from apps.users.models import MovimentacaoFinanceira
 
@@ -56,22 +60,15 @@ def dashboard(request):
     if filter_account:
         transactions = transactions.filter(account_id=filter_account)
 
-    # Totais
-    total_entradas = transactions.filter(account__subcategory__type='entrada').aggregate(Sum('value'))['value__sum'] or 0
-    total_saidas = transactions.filter(account__subcategory__type='saida').aggregate(Sum('value'))['value__sum'] or 0
-    saldo = total_entradas - total_saidas
-
-    # Gráfico (Saídas por Subcategoria)
-    saidas_por_subcategoria = []
-    if total_saidas > 0:
-        subcategories = Subcategory.objects.filter(user=request.user, type='saida')
-        for sub in subcategories:
-            val = transactions.filter(account__subcategory=sub).aggregate(Sum('value'))['value__sum'] or 0
-            if val > 0:
-                saidas_por_subcategoria.append({
-                    'name': sub.name,
-                    'value': float(val)
-                })
+    # Totais e gráfico (Saídas por Subcategoria) a partir dos saldos mensais
+    resumo = period_summary(
+        request.user, start_date, end_date,
+        filter_type=filter_type, filter_subcategory=filter_subcategory, filter_account=filter_account,
+    )
+    total_entradas = resumo['total_entradas']
+    total_saidas = resumo['total_saidas']
+    saldo = resumo['saldo']
+    saidas_por_subcategoria = resumo['saidas_por_subcategoria']
 
     # Forms
     transaction_form = TransactionForm(user=request.user)
@@ -311,136 +308,36 @@ def delete_transaction(request, pk):
 
 @login_required
 def generate_report_pdf(request):
-    # Filtros (mesma lógica do dashboard)
-    today = timezone.now().date()
-    start_date_str = request.GET.get('start_date')
-    end_date_str = request.GET.get('end_date')
-    
-    if start_date_str:
-        start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
-    else:
-        start_date = today.replace(day=1)
-        
-    if end_date_str:
-        end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
-    else:
-        next_month = today.replace(day=28) + timedelta(days=4)
-        end_date = next_month - timedelta(days=next_month.day)
-
-    filter_type = request.GET.get('type')
-    filter_subcategory = request.GET.get('subcategory')
-    filter_account = request.GET.get('account')
-
-    transactions = Transaction.objects.filter(user=request.user, date__range=[start_date, end_date]).order_by('date')
-
-    if filter_type:
-        transactions = transactions.filter(account__subcategory__type=filter_type)
-    
-    if filter_subcategory:
-        transactions = transactions.filter(account__subcategory_id=filter_subcategory)
-        
-    if filter_account:
-        transactions = transactions.filter(account_id=filter_account)
-
-    # Totais
-    total_entradas = transactions.filter(account__subcategory__type='entrada').aggregate(Sum('value'))['value__sum'] or 0
-    total_saidas = transactions.filter(account__subcategory__type='saida').aggregate(Sum('value'))['value__sum'] or 0
-    saldo = total_entradas - total_saidas
-
-    # Gerar PDF
-    response = HttpResponse(content_type='application/pdf')
-    filename = f"relatorio_financeiro_{start_date.strftime('%d-%m-%Y')}_{end_date.strftime('%d-%m-%Y')}.pdf"
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-
-    doc = SimpleDocTemplate(response, pagesize=A4, rightMargin=2*cm, leftMargin=2*cm, topMargin=2*cm, bottomMargin=2*cm)
-    elements = []
-    styles = getSampleStyleSheet()
-    
-    # Título
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=16,
-        spaceAfter=30,
-        alignment=1 # Center
+    params = parse_report_params(request.GET)
+
+    # Relatórios grandes são gerados em segundo plano e enviados por e-mail
+    if report_queryset(request.user, **params).count() > async_threshold():
+        generate_report_pdf_task.delay(request.user.id, request.GET.dict())
+        messages.info(request, 'O relatório é grande e está sendo gerado em segundo plano. '
+                               'Você receberá um e-mail com o link para download quando estiver pronto.')
+        return redirect(f"{reverse('finance:dashboard')}?{request.GET.urlencode()}")
+
+    # Gerar PDF em arquivo temporário e enviar em streaming
+    output = tempfile.SpooledTemporaryFile(max_size=5 * 1024 * 1024)
+    build_report_pdf(output, request.user, **params)
+    output.seek(0)
+    return FileResponse(
+        output,
+        as_attachment=True,
+        filename=report_filename(params['start_date'], params['end_date']),
+        content_type='application/pdf',
     )
-    elements.append(Paragraph(f"Relatório Financeiro - Vetorial", title_style))
-    elements.append(Paragraph(f"Período: {start_date.strftime('%d/%m/%Y')} a {end_date.strftime('%d/%m/%Y')}", styles['Normal']))
-    elements.append(Spacer(1, 20))
-
-    # Resumo
-    summary_data = [
-        ['Resumo do Período', ''],
-        ['Total Entradas:', f"R$ {total_entradas:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')],
-        ['Total Saídas:', f"R$ {total_saidas:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')],
-        ['Saldo Final:', f"R$ {saldo:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')]
-    ]
-    
-    summary_table = Table(summary_data, colWidths=[4*cm, 4*cm], hAlign='LEFT')
-    summary_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (1, 0), colors.lightgrey),
-        ('TEXTCOLOR', (0, 0), (1, 0), colors.black),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.whitesmoke),
-        ('GRID', (0, 0), (-1, -1), 1, colors.white),
-        ('TEXTCOLOR', (1, 3), (1, 3), colors.blue if saldo >= 0 else colors.red), # Saldo color
-        ('FONTNAME', (0, 3), (1, 3), 'Helvetica-Bold'),
-    ]))
-    elements.append(summary_table)
-    elements.append(Spacer(1, 30))
-
-    # Tabela de Lançamentos
-    data = [['Data', 'Tipo', 'Categoria/Conta', 'Descrição', 'Valor']]
-    
-    for t in transactions:
-        tipo = "Entrada" if t.account.subcategory.type == 'entrada' else "Saída"
-        valor_str = f"R$ {t.value:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
-        
-        # Formatar descrição
-        desc = t.description if t.description else "-"
-        if len(desc) > 30:
-            desc = desc[:27] + "..."
-            
-        categoria = f"{t.account.subcategory.name}\n{t.account.name}"
-        
-        data.append([
-            t.date.strftime('%d/%m/%Y'),
-            tipo,
-            categoria,
-            desc,
-            valor_str
-        ])
-
-    # Estilo da tabela
-    table = Table(data, colWidths=[2.5*cm, 2*cm, 5*cm, 5*cm, 2.5*cm])
-    
-    style = TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('FONTSIZE', (0, 1), (-1, -1), 8),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-    ])
-    
-    # Colorir linhas de entrada/saída
-    for i, row in enumerate(data[1:], start=1):
-        if row[1] == 'Entrada':
-            style.add('TEXTCOLOR', (4, i), (4, i), colors.green)
-        else:
-            style.add('TEXTCOLOR', (4, i), (4, i), colors.red)
-            
-    table.setStyle(style)
-    elements.append(table)
 
-    doc.build(elements)
-    return response
+@login_required
+def download_report(request, name):
+    """Download de um relatório gerado em segundo plano (somente o dono)."""
+    if not re.fullmatch(r'[\w-]+\.pdf', name):
+        raise Http404
+    storage = report_storage()
+    path = f"{REPORT_STORAGE_DIR}/{request.user.id}/{name}"
+    if not storage.exists(path):
+        raise Http404
+    return FileResponse(storage.open(path, 'rb'), as_attachment=True, filename=name, content_type='application/pdf')
 
 @login_required
 def add_scheduled_transaction(request):
@@ -544,7 +441,9 @@ def reconciliation_view(request):
         
         # Dispara Task do Celery
         try:
-            task_result = process_ofx_file.delay(file_path, request.user.id)
+            task_id = str(uuid.uuid4())
+            register_import_task(task_id, request.user.id)
+            task_result = process_ofx_file.apply_async(args=[file_path, request.user.id], task_id=task_id)
             print(f"[VIEW] Task disparada com ID: {task_result.id}")
             messages.info(request, f'Arquivo enviado! ID da Tarefa: {task_result.id}')
         except Exception as e:
@@ -567,6 +466,15 @@ def reconciliation_view(request):
         'accounts': accounts
     })
 
+@login_required
+def reconciliation_task_status(request, task_id):
+    """Andamento da importação OFX (estado da task Celery) para polling."""
+    if not is_import_task_owner(task_id, request.user.id):
+        raise Http404
+    result = AsyncResult(task_id)
+    info = result.info if isinstance(result.info, dict) else None
+    return JsonResponse({'success': True, 'state': result.state, 'data': info})
+
 @login_required
 def approve_reconciliation(request, pk):
     if request.method == 'POST':
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Service, Plan, Subscription, ProcessoAbertura, Socio, Plano, CategoriaCNAE, CNAE, SolicitacaoAberturaMEI, ServicoAvulso, ContratacaoServicoAvulso, SolicitacaoBaixaMEI, SolicitacaoDeclaracaoAnualMEI
+from .models import Service, Plan, Subscription, ProcessoAbertura, Socio, Plano, CategoriaCNAE, CNAE, SolicitacaoAberturaMEI, ServicoAvulso, ContratacaoServicoAvulso, SolicitacaoBaixaMEI, SolicitacaoDeclaracaoAnualMEI, EmailOutbox, AtividadeCNAE, EnderecoCEP
 
 # Register your models here.
 
@@ -133,6 +133,23 @@ class CNAEAdmin(admin.ModelAdmin):
     descricao_curta.short_description = 'Descrição'
 
 
+@admin.register(AtividadeCNAE)
+class AtividadeCNAEAdmin(admin.ModelAdmin):
+    list_display = ['codigo', 'nivel', 'descricao', 'pai']
+    list_filter = ['nivel']
+    search_fields = ['codigo', 'descricao']
+    raw_id_fields = ['pai']
+    ordering = ['codigo']
+
+
+@admin.register(EnderecoCEP)
+class EnderecoCEPAdmin(admin.ModelAdmin):
+    list_display = ['cep', 'logradouro', 'bairro', 'cidade', 'uf', 'atualizado_em']
+    list_filter = ['uf']
+    search_fields = ['cep', 'logradouro', 'cidade']
+    ordering = ['cep']
+
+
 # =============================================================================
 # ADMIN PARA SOLICITAÇÕES DE ABERTURA MEI
 # =============================================================================
@@ -342,3 +359,22 @@ class SolicitacaoDeclaracaoAnualMEIAdmin(admin.ModelAdmin):
     list_editable = ['status']
     readonly_fields = ['criado_em', 'atualizado_em']
     ordering = ['-criado_em']
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ['destinatario', 'assunto', 'status', 'tentativas', 'criado_em', 'enviado_em']
+    list_filter = ['status', 'criado_em']
+    search_fields = ['destinatario', 'assunto']
+    readonly_fields = ['criado_em', 'atualizado_em', 'enviado_em']
+    ordering = ['-criado_em']
+    actions = ['reenviar']
+
+    def reenviar(self, request, queryset):
+        from .email_outbox import agendar_processamento
+        updated = queryset.exclude(status=EmailOutbox.STATUS_ENVIADO).update(
+            status=EmailOutbox.STATUS_PENDENTE, tentativas=0
+        )
+        agendar_processamento()
+        self.message_user(request, f'{updated} e-mail(s) reenfileirado(s).')
+    reenviar.short_description = 'Reenviar e-mails selecionados'
@@ -0,0 +1,163 @@
+"""
+Consulta de endereço por CEP.
+
+Ordem de resolução:
+1. Cache (Redis): acertos ficam 30 dias, "CEP não encontrado" fica 1 hora.
+2. Tabela local EnderecoCEP (carregada com `importar_ceps`).
+3. ViaCEP, por uma sessão HTTP com pool de conexões e timeouts curtos.
+
+Consultas simultâneas do mesmo CEP são agrupadas: só uma requisição vai ao
+ViaCEP e as demais aguardam o resultado no cache. Se o ViaCEP falhar, o CEP
+fica marcado como indisponível por CEP_UNAVAILABLE_TIMEOUT segundos, e quem
+aguardava (ou consultar nesse intervalo) recebe CEPIndisponivel sem repetir a
+chamada.
+"""
+import logging
+import re
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from django.core.cache import cache
+
+from .models import EnderecoCEP
+
+logger = logging.getLogger(__name__)
+
+VIACEP_URL = 'https://viacep.com.br/ws/{cep}/json/'
+# (conexão, leitura) em segundos
+VIACEP_TIMEOUT = (2, 3)
+
+CEP_CACHE_KEY = 'services:cep:{cep}'
+CEP_LOCK_KEY = 'services:cep:lock:{cep}'
+CEP_CACHE_TIMEOUT = 60 * 60 * 24 * 30
+CEP_NOT_FOUND_TIMEOUT = 60 * 60
+CEP_UNAVAILABLE_TIMEOUT = 30
+CEP_LOCK_TIMEOUT = 10
+# Quanto tempo uma requisição espera o resultado de outra que já consulta o mesmo CEP
+CEP_WAIT_TIMEOUT = 5
+CEP_WAIT_INTERVAL = 0.05
+
+_NAO_ENCONTRADO = 'nao_encontrado'
+_INDISPONIVEL = 'indisponivel'
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class CEPIndisponivel(Exception):
+    """O serviço de CEP externo não respondeu (timeout ou erro)."""
+
+
+def normalizar_cep(cep):
+    """Retorna o CEP só com dígitos, ou None se não tiver 8 dígitos."""
+    cep = re.sub(r'\D', '', cep or '')
+    return cep if len(cep) == 8 else None
+
+
+def get_session():
+    """Sessão HTTP compartilhada (pool de conexões keep-alive) para o ViaCEP."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                retry = Retry(total=1, backoff_factor=0.2, status_forcelist=[502, 503, 504], allowed_methods=['GET'])
+                session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=20, max_retries=retry))
+                _session = session
+    return _session
+
+
+def _endereco(logradouro, bairro, cidade, uf):
+    return {
+        'endereco': logradouro or '',
+        'bairro': bairro or '',
+        'cidade': cidade or '',
+        'estado': uf or '',
+    }
+
+
+def _consultar_tabela_local(cep):
+    registro = EnderecoCEP.objects.filter(cep=cep).first()
+    if registro is None:
+        return None
+    return _endereco(registro.logradouro, registro.bairro, registro.cidade, registro.uf)
+
+
+def _consultar_viacep(cep):
+    """Consulta o ViaCEP. Retorna o endereço, None se não existir ou levanta CEPIndisponivel."""
+    try:
+        response = get_session().get(VIACEP_URL.format(cep=cep), timeout=VIACEP_TIMEOUT)
+        if response.status_code == 400:
+            return None
+        response.raise_for_status()
+        data = response.json()
+    except (requests.RequestException, ValueError) as e:
+        logger.warning(f"ViaCEP indisponível para o CEP {cep}: {e}")
+        raise CEPIndisponivel(str(e))
+
+    if data.get('erro'):
+        return None
+    return _endereco(data.get('logradouro'), data.get('bairro'), data.get('localidade'), data.get('uf'))
+
+
+def _guardar(cep, endereco):
+    if endereco is None:
+        cache.set(CEP_CACHE_KEY.format(cep=cep), _NAO_ENCONTRADO, CEP_NOT_FOUND_TIMEOUT)
+    else:
+        cache.set(CEP_CACHE_KEY.format(cep=cep), endereco, CEP_CACHE_TIMEOUT)
+
+
+def _resolver(cep):
+    endereco = _consultar_tabela_local(cep)
+    if endereco is None:
+        try:
+            endereco = _consultar_viacep(cep)
+        except CEPIndisponivel:
+            cache.set(CEP_CACHE_KEY.format(cep=cep), _INDISPONIVEL, CEP_UNAVAILABLE_TIMEOUT)
+            raise
+    _guardar(cep, endereco)
+    return endereco
+
+
+def _aguardar_resultado(chave):
+    limite = time.monotonic() + CEP_WAIT_TIMEOUT
+    while time.monotonic() < limite:
+        time.sleep(CEP_WAIT_INTERVAL)
+        valor = cache.get(chave)
+        if valor is not None:
+            return valor
+    return None
+
+
+def consultar_cep(cep):
+    """
+    Retorna o endereço do CEP ({endereco, bairro, cidade, estado}) ou None se
+    o CEP não existir.
+
+    Raises:
+        CEPIndisponivel: se o CEP não estiver no cache nem na tabela local e o
+            ViaCEP não responder (ou outra consulta ao mesmo CEP não terminar
+            a tempo)
+    """
+    chave = CEP_CACHE_KEY.format(cep=cep)
+    valor = cache.get(chave)
+
+    if valor is None:
+        lock_key = CEP_LOCK_KEY.format(cep=cep)
+        if cache.add(lock_key, 1, CEP_LOCK_TIMEOUT):
+            try:
+                return _resolver(cep)
+            finally:
+                cache.delete(lock_key)
+        # Outra requisição já está consultando este CEP
+        valor = _aguardar_resultado(chave)
+        if valor is None:
+            raise CEPIndisponivel(f'Consulta ao CEP {cep} em andamento')
+
+    if valor == _INDISPONIVEL:
+        raise CEPIndisponivel(f'CEP {cep} consultado sem sucesso há pouco')
+    return None if valor == _NAO_ENCONTRADO else valor
@@ -0,0 +1,199 @@
+"""
+Catálogo local da CNAE (IBGE).
+
+Importa a hierarquia completa (seção > divisão > grupo > classe > subclasse)
+a partir do JSON da API de CNAE do IBGE, salvo em arquivo ou baixado uma única
+vez, e oferece a busca usada pela página de consulta e pelo autocomplete.
+Depois da importação, nenhuma requisição de página depende do IBGE.
+
+Formato aceito: a lista retornada por
+    https://servicodados.ibge.gov.br/api/v2/cnae/subclasses  (ou /classes)
+em que cada item traz o nível superior aninhado (classe > grupo > divisao > secao).
+"""
+import json
+import logging
+import re
+import unicodedata
+from pathlib import Path
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, IntegerField, Q, Value, When
+
+from .models import AtividadeCNAE
+
+logger = logging.getLogger(__name__)
+
+IBGE_CNAE_URL = 'https://servicodados.ibge.gov.br/api/v2/cnae/{nivel}'
+# Arquivo padrão do catálogo (gerado com `importar_cnaes --ibge --salvar` ou
+# na primeira importação sem ele; o entrypoint.sh importa no deploy se vazio)
+DEFAULT_CATALOG_PATH = Path(__file__).resolve().parent / 'data' / 'cnae_subclasses.json'
+
+# Níveis do mais alto para o mais baixo, com a chave do nível superior no JSON
+NIVEIS = (
+    ('secao', None),
+    ('divisao', 'secao'),
+    ('grupo', 'divisao'),
+    ('classe', 'grupo'),
+    ('subclasse', 'classe'),
+)
+_CHAVE_PAI = dict(NIVEIS)
+
+CATALOG_TOTAL_KEY = 'services:cnae:total:{nivel}'
+CATALOG_TOTAL_TIMEOUT = 60 * 60 * 24
+
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 50
+
+
+def normalizar_busca(texto):
+    """Minúsculas e sem acentos, para comparar "educacao" com "Educação"."""
+    texto = unicodedata.normalize('NFKD', texto or '')
+    return ''.join(c for c in texto if not unicodedata.combining(c)).lower().strip()
+
+
+def _nivel_do_registro(registro, nivel_raiz):
+    """Descobre o nível de um item do JSON pela chave do nível superior."""
+    for nivel, chave_pai in reversed(NIVEIS):
+        if chave_pai and chave_pai in registro:
+            return nivel
+    return nivel_raiz
+
+
+def _observacoes(registro):
+    observacoes = registro.get('observacoes') or []
+    if isinstance(observacoes, str):
+        return observacoes
+    return '\n'.join(observacoes)
+
+
+def extrair_hierarquia(registros):
+    """
+    Percorre os itens do JSON do IBGE e devolve {codigo: dados} com todos os
+    níveis encontrados, incluindo os níveis superiores aninhados.
+    """
+    nos = {}
+
+    def visitar(registro, nivel):
+        codigo = str(registro['id']).strip()
+        chave_pai = _CHAVE_PAI[nivel]
+        pai = registro.get(chave_pai) if chave_pai else None
+        if pai:
+            visitar(pai, chave_pai)
+        if codigo not in nos:
+            nos[codigo] = {
+                'nivel': nivel,
+                'descricao': (registro.get('descricao') or '').strip()[:300],
+                'observacoes': _observacoes(registro),
+                'pai': str(pai['id']).strip() if pai else None,
+            }
+
+    for registro in registros:
+        visitar(registro, _nivel_do_registro(registro, 'secao'))
+    return nos
+
+
+def carregar_arquivo(caminho):
+    with open(caminho, encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+
+def baixar_ibge(nivel='subclasses', timeout=60):
+    """Baixa o catálogo do IBGE (uso apenas na importação, nunca em views)."""
+    import requests
+
+    response = requests.get(IBGE_CNAE_URL.format(nivel=nivel), timeout=timeout)
+    response.raise_for_status()
+    return response.json()
+
+
+def importar_catalogo(registros, batch_size=500):
+    """
+    Grava a hierarquia no banco com bulk_create (upsert por código),
+    nível a nível, para que os pais já tenham id quando os filhos forem gravados.
+
+    Returns:
+        dict: quantidade de itens por nível
+    """
+    nos = extrair_hierarquia(registros)
+    ids = {}
+    totais = {}
+
+    with transaction.atomic():
+        for nivel, _chave_pai in NIVEIS:
+            objetos = [
+                AtividadeCNAE(
+                    codigo=codigo,
+                    nivel=nivel,
+                    descricao=dados['descricao'],
+                    observacoes=dados['observacoes'],
+                    pai_id=ids.get(dados['pai']),
+                    busca=normalizar_busca(dados['descricao']),
+                )
+                for codigo, dados in nos.items()
+                if dados['nivel'] == nivel
+            ]
+            if not objetos:
+                continue
+            AtividadeCNAE.objects.bulk_create(
+                objetos,
+                batch_size=batch_size,
+                update_conflicts=True,
+                unique_fields=['codigo'],
+                update_fields=['nivel', 'descricao', 'observacoes', 'pai', 'busca', 'atualizado_em'],
+            )
+            ids.update(
+                AtividadeCNAE.objects.filter(nivel=nivel).values_list('codigo', 'id')
+            )
+            totais[nivel] = len(objetos)
+
+    for nivel, _chave_pai in NIVEIS:
+        cache.delete(CATALOG_TOTAL_KEY.format(nivel=nivel))
+    logger.info(f"Catálogo CNAE importado: {totais}")
+    return totais
+
+
+def total_atividades(nivel='classe'):
+    """Total de itens do nível no catálogo (em cache até a próxima importação)."""
+    chave = CATALOG_TOTAL_KEY.format(nivel=nivel)
+    total = cache.get(chave)
+    if total is None:
+        total = AtividadeCNAE.objects.filter(nivel=nivel).count()
+        cache.set(chave, total, CATALOG_TOTAL_TIMEOUT)
+    return total
+
+
+def buscar_atividades(termo='', nivel='classe'):
+    """
+    Queryset da busca por código (prefixo) ou descrição (trecho, sem acentos).
+
+    Resultados cujo código começa com o termo vêm primeiro, depois descrições
+    que começam com o termo e por fim as demais, em ordem de código.
+    """
+    qs = AtividadeCNAE.objects.filter(nivel=nivel)
+    # Só trata como código quando há dígitos (ex: "6201", "62.01-5")
+    termo_codigo = re.sub(r'\D', '', termo or '') if re.search(r'\d', termo or '') else ''
+    termo_texto = normalizar_busca(termo)
+    if not termo_texto:
+        return qs.order_by('codigo')
+
+    filtro = Q(busca__contains=termo_texto)
+    if termo_codigo:
+        filtro |= Q(codigo__startswith=termo_codigo)
+
+    relevancia = [When(busca__startswith=termo_texto, then=Value(1))]
+    if termo_codigo:
+        relevancia.insert(0, When(codigo__startswith=termo_codigo, then=Value(0)))
+
+    return qs.filter(filtro).annotate(
+        relevancia=Case(*relevancia, default=Value(2), output_field=IntegerField())
+    ).order_by('relevancia', 'codigo')
+
+
+def serialize_atividade(atividade):
+    return {
+        'codigo': atividade.codigo,
+        'codigo_formatado': atividade.codigo_formatado,
+        'descricao': atividade.descricao,
+        'observacoes': atividade.observacoes,
+    }
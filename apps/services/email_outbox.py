@@ -0,0 +1,295 @@
+"""
+Fila de saída (outbox) de e-mails transacionais.
+
+Os e-mails são gravados na tabela EmailOutbox e enviados em lotes pela task
+`processar_outbox_emails`:
+
+- uma única conexão SMTP (get_connection) por lote; cada mensagem tem o
+  resultado registrado, e só as que falharam voltam para a fila;
+- templates compilados uma vez por processo e renderizações idênticas
+  (mesmo template e contexto) reaproveitadas dentro do lote;
+- limite de envios por minuto (EMAIL_OUTBOX_RATE_PER_MINUTE);
+- até EMAIL_OUTBOX_MAX_TENTATIVAS tentativas por mensagem;
+- métricas de vazão registradas no log a cada lote.
+
+Configurações (settings, todas opcionais):
+    EMAIL_OUTBOX_BATCH_SIZE       - mensagens por conexão SMTP (padrão 50)
+    EMAIL_OUTBOX_RATE_PER_MINUTE  - limite de envios por minuto (padrão 600)
+    EMAIL_OUTBOX_MAX_PER_RUN      - mensagens por execução da task (padrão 1000)
+"""
+import json
+import logging
+import time
+from datetime import timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.template.loader import get_template
+from django.utils import timezone
+from django.utils.html import strip_tags
+
+from .email_service import EmailService, enviar_mensagens
+from .models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+EMAIL_OUTBOX_MAX_TENTATIVAS = 3
+# Mensagens presas em "enviando" (worker interrompido) voltam para a fila
+EMAIL_OUTBOX_TIMEOUT_ENVIO = timedelta(minutes=15)
+AGENDAMENTO_KEY = 'services:email_outbox:agendado'
+AGENDAMENTO_TIMEOUT = 60
+
+
+def _setting(nome, padrao):
+    return int(getattr(settings, nome, padrao))
+
+
+@lru_cache(maxsize=32)
+def _get_template(nome):
+    """Template compilado, reaproveitado entre lotes do mesmo worker."""
+    return get_template(nome)
+
+
+def _novo_email(destinatario, assunto, mensagem='', html_mensagem='', template_html='', contexto=None):
+    return EmailOutbox(
+        destinatario=destinatario,
+        assunto=assunto,
+        mensagem=mensagem,
+        html_mensagem=html_mensagem or '',
+        template_html=template_html,
+        contexto=contexto or {},
+    )
+
+
+def enfileirar_email(destinatario, assunto, mensagem='', html_mensagem='', template_html='', contexto=None):
+    """
+    Grava um e-mail na fila e agenda o envio após o commit da transação.
+
+    Informe `template_html` + `contexto` para e-mails com template (renderizados
+    no envio) ou `mensagem`/`html_mensagem` para conteúdo já pronto. O contexto
+    precisa ser serializável em JSON.
+
+    Returns:
+        EmailOutbox: registro criado
+    """
+    email = _novo_email(destinatario, assunto, mensagem, html_mensagem, template_html, contexto)
+    email.save()
+    transaction.on_commit(agendar_processamento)
+    return email
+
+
+def enfileirar_emails(emails):
+    """
+    Grava vários e-mails na fila com um único INSERT.
+
+    Args:
+        emails: iterável de dicts com os mesmos argumentos de `enfileirar_email`
+
+    Returns:
+        int: quantidade de e-mails enfileirados
+    """
+    registros = EmailOutbox.objects.bulk_create(
+        [_novo_email(**dados) for dados in emails],
+        batch_size=500,
+    )
+    if registros:
+        transaction.on_commit(agendar_processamento)
+    return len(registros)
+
+
+def agendar_processamento(countdown=0):
+    """
+    Agenda a task de envio, evitando agendar várias execuções em sequência
+    quando muitos e-mails são enfileirados de uma vez.
+    """
+    if not cache.add(AGENDAMENTO_KEY, 1, AGENDAMENTO_TIMEOUT):
+        return
+    from .tasks import processar_outbox_emails
+    try:
+        processar_outbox_emails.apply_async(countdown=countdown)
+    except Exception as e:
+        cache.delete(AGENDAMENTO_KEY)
+        logger.error(f"Erro ao agendar envio da fila de e-mails: {e}")
+
+
+def _reservar_lote(tamanho, ignorar=()):
+    """
+    Marca até `tamanho` mensagens pendentes como "enviando" e as retorna.
+
+    `ignorar` recebe os ids já tentados na execução atual, para que uma falha
+    só seja tentada de novo na próxima execução da task.
+    """
+    limite_envio = timezone.now() - EMAIL_OUTBOX_TIMEOUT_ENVIO
+    with transaction.atomic():
+        ids = list(
+            EmailOutbox.objects.select_for_update(skip_locked=True)
+            .filter(status=EmailOutbox.STATUS_PENDENTE)
+            .exclude(id__in=ignorar)
+            .order_by('criado_em', 'id')
+            .values_list('id', flat=True)[:tamanho]
+        )
+        if len(ids) < tamanho:
+            ids += list(
+                EmailOutbox.objects.select_for_update(skip_locked=True)
+                .filter(status=EmailOutbox.STATUS_ENVIANDO, atualizado_em__lt=limite_envio)
+                .order_by('criado_em', 'id')
+                .values_list('id', flat=True)[:tamanho - len(ids)]
+            )
+        if not ids:
+            return []
+        EmailOutbox.objects.filter(id__in=ids).update(
+            status=EmailOutbox.STATUS_ENVIANDO,
+            atualizado_em=timezone.now(),
+        )
+    return list(EmailOutbox.objects.filter(id__in=ids).order_by('criado_em', 'id'))
+
+
+def _renderizar(email, renderizados):
+    """Retorna (texto, html) do e-mail, reaproveitando renderizações do lote."""
+    if not email.template_html:
+        texto = email.mensagem or strip_tags(email.html_mensagem)
+        return texto, email.html_mensagem or None
+
+    chave = (email.template_html, json.dumps(email.contexto, sort_keys=True, default=str))
+    if chave not in renderizados:
+        html = _get_template(email.template_html).render(email.contexto)
+        renderizados[chave] = (strip_tags(html), html)
+    return renderizados[chave]
+
+
+def _montar_mensagem(email, remetente, renderizados):
+    texto, html = _renderizar(email, renderizados)
+    mensagem = EmailMultiAlternatives(
+        subject=email.assunto,
+        body=texto,
+        from_email=remetente,
+        to=[email.destinatario],
+    )
+    if html:
+        mensagem.attach_alternative(html, "text/html")
+    return mensagem
+
+
+def _registrar_falha(email, erro):
+    email.tentativas += 1
+    email.erro = str(erro)[:2000]
+    if email.tentativas >= EMAIL_OUTBOX_MAX_TENTATIVAS:
+        email.status = EmailOutbox.STATUS_FALHA
+        logger.error(f"E-mail para {email.destinatario} descartado após {email.tentativas} tentativas: {erro}")
+    else:
+        email.status = EmailOutbox.STATUS_PENDENTE
+    email.save(update_fields=['tentativas', 'erro', 'status', 'atualizado_em'])
+
+
+def enviar_lote(emails, remetente=None):
+    """
+    Envia um lote de e-mails da fila por uma única conexão SMTP.
+
+    O resultado de cada mensagem é registrado: as enviadas são marcadas como
+    enviadas e só as que falharam voltam para a fila (até
+    EMAIL_OUTBOX_MAX_TENTATIVAS), sem reenviar as já entregues.
+
+    Returns:
+        tuple[int, int]: (enviados, falhas)
+    """
+    # Mesmo remetente dos envios diretos do EmailService
+    remetente = remetente or EmailService().remetente
+    renderizados = {}
+    prontos, mensagens = [], []
+    falhas = 0
+
+    for email in emails:
+        try:
+            mensagens.append(_montar_mensagem(email, remetente, renderizados))
+            prontos.append(email)
+        except Exception as e:
+            _registrar_falha(email, e)
+            falhas += 1
+
+    if not mensagens:
+        return 0, falhas
+
+    try:
+        erros = enviar_mensagens(mensagens, get_connection(fail_silently=False))
+    except Exception as e:
+        erros = [e] * len(mensagens)
+
+    enviados_ids = []
+    for email, erro in zip(prontos, erros):
+        if erro is None:
+            enviados_ids.append(email.id)
+        else:
+            _registrar_falha(email, erro)
+            falhas += 1
+
+    if enviados_ids:
+        EmailOutbox.objects.filter(id__in=enviados_ids).update(
+            status=EmailOutbox.STATUS_ENVIADO,
+            enviado_em=timezone.now(),
+            atualizado_em=timezone.now(),
+            erro='',
+        )
+    return len(enviados_ids), falhas
+
+
+def processar_outbox():
+    """
+    Envia as mensagens pendentes da fila em lotes, respeitando o limite de
+    envios por minuto. Reagenda a si mesma se restarem mensagens.
+
+    Returns:
+        dict: métricas da execução (enviados, falhas, lotes, segundos, por_segundo)
+    """
+    # Enfileiramentos feitos a partir de agora agendam uma nova execução
+    cache.delete(AGENDAMENTO_KEY)
+
+    tamanho_lote = _setting('EMAIL_OUTBOX_BATCH_SIZE', 50)
+    por_minuto = _setting('EMAIL_OUTBOX_RATE_PER_MINUTE', 600)
+    maximo = _setting('EMAIL_OUTBOX_MAX_PER_RUN', 1000)
+    intervalo_minimo = 60.0 / por_minuto if por_minuto > 0 else 0
+
+    inicio = time.perf_counter()
+    metricas = {'enviados': 0, 'falhas': 0, 'lotes': 0}
+    processados = 0
+    tentados = set()
+
+    while processados < maximo:
+        emails = _reservar_lote(min(tamanho_lote, maximo - processados), ignorar=tentados)
+        if not emails:
+            break
+        tentados.update(email.id for email in emails)
+
+        inicio_lote = time.perf_counter()
+        enviados, falhas = enviar_lote(emails)
+        duracao = time.perf_counter() - inicio_lote
+
+        processados += len(emails)
+        metricas['enviados'] += enviados
+        metricas['falhas'] += falhas
+        metricas['lotes'] += 1
+        logger.info(
+            f"Lote de e-mails {metricas['lotes']}: {enviados} enviados, {falhas} falhas "
+            f"em {duracao:.2f}s ({len(emails) / duracao if duracao else 0:.1f} msg/s)"
+        )
+
+        # Limite de envios: cada mensagem "custa" 60/por_minuto segundos
+        espera = len(emails) * intervalo_minimo - duracao
+        if espera > 0 and processados < maximo:
+            time.sleep(espera)
+
+    metricas['segundos'] = round(time.perf_counter() - inicio, 2)
+    metricas['por_segundo'] = round(metricas['enviados'] / metricas['segundos'], 1) if metricas['segundos'] else 0
+
+    if EmailOutbox.objects.filter(status=EmailOutbox.STATUS_PENDENTE).exists():
+        # Falhas e execuções que atingiram o limite esperam um minuto
+        agendar_processamento(countdown=60 if metricas['falhas'] or processados >= maximo else 5)
+
+    if metricas['lotes']:
+        logger.info(
+            f"Fila de e-mails processada: {metricas['enviados']} enviados, {metricas['falhas']} falhas, "
+            f"{metricas['lotes']} lotes em {metricas['segundos']}s ({metricas['por_segundo']} msg/s)"
+        )
+    return metricas
@@ -15,7 +15,7 @@ Autor: Sistema Vetorial
 Data: 2025-12-02
 """
 
-from django.core.mail import send_mail, EmailMultiAlternatives
+from django.core.mail import send_mail, EmailMultiAlternatives, get_connection
 from django.template.loader import render_to_string
 from django.conf import settings
 from django.utils.html import strip_tags
@@ -26,6 +26,49 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+def enviar_mensagens(mensagens, connection=None):
+    """
+    Envia as mensagens uma a uma pela mesma conexão SMTP, registrando o
+    resultado de cada uma.
+
+    Uma falha não interrompe o envio: a conexão é reaberta (o servidor pode
+    tê-la encerrado) e o envio segue a partir da mensagem seguinte, sem
+    reenviar as que já foram aceitas.
+
+    Args:
+        mensagens: lista de EmailMessage
+        connection: conexão a usar (padrão: get_connection())
+
+    Returns:
+        list: None para cada mensagem enviada ou a exceção da falha, na
+        ordem de `mensagens`
+    """
+    connection = connection or get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        return [e] * len(mensagens)
+
+    resultados = []
+    try:
+        for mensagem in mensagens:
+            try:
+                connection.send_messages([mensagem])
+                resultados.append(None)
+            except Exception as e:
+                resultados.append(e)
+                try:
+                    connection.close()
+                    connection.open()
+                except Exception as erro:
+                    # Sem conexão: as mensagens restantes não foram tentadas
+                    resultados.extend([erro] * (len(mensagens) - len(resultados)))
+                    break
+    finally:
+        connection.close()
+    return resultados
+
+
 class EmailService:
     """
     Serviço centralizado para envio de e-mails.
@@ -222,6 +265,11 @@ class EmailService:
         """
         Envia o mesmo e-mail para múltiplos destinatários.
         
+        As mensagens são enviadas por uma única conexão SMTP, uma a uma; só
+        os destinatários cujo envio falhou são tentados de novo, uma vez, em
+        uma nova conexão. Para grandes volumes, prefira a fila
+        (apps.services.email_outbox).
+        
         Args:
             destinatarios: Lista de e-mails
             assunto: Assunto do e-mail
@@ -231,17 +279,34 @@ class EmailService:
         Returns:
             Dict[str, bool]: Mapa de destinatário -> sucesso
         """
-        resultados = {}
-        
+        mensagens = []
         for destinatario in destinatarios:
-            sucesso = self.enviar_email_simples(
-                destinatario=destinatario,
-                assunto=assunto,
-                mensagem=mensagem,
-                html_mensagem=html_mensagem
+            email = EmailMultiAlternatives(
+                subject=assunto,
+                body=mensagem,
+                from_email=self.remetente,
+                to=[destinatario]
             )
-            resultados[destinatario] = sucesso
+            if html_mensagem:
+                email.attach_alternative(html_mensagem, "text/html")
+            mensagens.append(email)
+        
+        if not mensagens:
+            return {}
         
+        erros = enviar_mensagens(mensagens)
+        pendentes = [i for i, erro in enumerate(erros) if erro is not None]
+        if pendentes:
+            logger.warning(f"{len(pendentes)} de {len(mensagens)} e-mails falharam, tentando novamente")
+            for i, erro in zip(pendentes, enviar_mensagens([mensagens[i] for i in pendentes])):
+                erros[i] = erro
+        
+        resultados = {}
+        for destinatario, erro in zip(destinatarios, erros):
+            if erro is not None:
+                logger.error(f"Erro ao enviar e-mail para {destinatario}: {str(erro)}")
+            resultados[destinatario] = erro is None
+        logger.info(f"{sum(resultados.values())} de {len(mensagens)} e-mails enviados")
         return resultados
 
 
@@ -0,0 +1,63 @@
+"""
+Comando de gerenciamento para carregar a tabela local de CEPs
+Uso: python manage.py importar_ceps ceps.csv [--delimitador ";"] [--lote 5000]
+
+O CSV deve ter cabeçalho com as colunas: cep, logradouro, bairro, cidade, uf
+"""
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.services.cep_service import normalizar_cep
+from apps.services.models import EnderecoCEP
+
+
+class Command(BaseCommand):
+    help = 'Importa em lote uma base de CEPs (CSV) para a tabela local consultada antes do ViaCEP'
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo', help='Arquivo CSV com cep, logradouro, bairro, cidade, uf')
+        parser.add_argument('--delimitador', default=';', help='Separador de colunas (padrão ";")')
+        parser.add_argument('--lote', type=int, default=5000, help='Registros por INSERT')
+
+    def handle(self, *args, **options):
+        lote = []
+        total = 0
+        ignorados = 0
+
+        try:
+            arquivo = open(options['arquivo'], encoding='utf-8', newline='')
+        except FileNotFoundError:
+            raise CommandError(f"Arquivo {options['arquivo']} não encontrado")
+
+        with arquivo:
+            for linha in csv.DictReader(arquivo, delimiter=options['delimitador']):
+                cep = normalizar_cep(linha.get('cep'))
+                if not cep or not linha.get('cidade') or not linha.get('uf'):
+                    ignorados += 1
+                    continue
+                lote.append(EnderecoCEP(
+                    cep=cep,
+                    logradouro=(linha.get('logradouro') or '').strip()[:255],
+                    bairro=(linha.get('bairro') or '').strip()[:120],
+                    cidade=linha['cidade'].strip()[:120],
+                    uf=linha['uf'].strip().upper()[:2],
+                ))
+                if len(lote) >= options['lote']:
+                    total += self._gravar(lote)
+                    lote = []
+                    self.stdout.write(f'  {total} CEPs importados...')
+
+        if lote:
+            total += self._gravar(lote)
+
+        self.stdout.write(self.style.SUCCESS(f'✓ {total} CEPs importados ({ignorados} linhas ignoradas)'))
+
+    def _gravar(self, lote):
+        EnderecoCEP.objects.bulk_create(
+            lote,
+            update_conflicts=True,
+            unique_fields=['cep'],
+            update_fields=['logradouro', 'bairro', 'cidade', 'uf', 'atualizado_em'],
+        )
+        return len(lote)
@@ -0,0 +1,84 @@
+"""
+Comando de gerenciamento para importar o catálogo completo da CNAE (IBGE)
+Uso:
+    python manage.py importar_cnaes                      # arquivo padrão do projeto
+    python manage.py importar_cnaes --arquivo dump.json  # outro arquivo no formato da API do IBGE
+    python manage.py importar_cnaes --ibge --salvar      # baixa do IBGE e atualiza o arquivo padrão
+    python manage.py importar_cnaes --se-vazio           # só importa se o catálogo estiver vazio (deploy)
+
+Sem o arquivo, o catálogo é baixado do IBGE uma única vez e salvo nele; as
+importações seguintes leem o arquivo.
+"""
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.services.cnae_catalog import (
+    DEFAULT_CATALOG_PATH, baixar_ibge, carregar_arquivo, importar_catalogo,
+)
+from apps.services.models import AtividadeCNAE
+
+
+class Command(BaseCommand):
+    help = 'Importa a hierarquia completa da CNAE (seções a subclasses) para o catálogo local'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--arquivo',
+            default=str(DEFAULT_CATALOG_PATH),
+            help='JSON no formato da API de CNAE do IBGE (padrão: arquivo do projeto)'
+        )
+        parser.add_argument(
+            '--ibge',
+            action='store_true',
+            help='Baixa o catálogo direto da API do IBGE em vez de ler o arquivo'
+        )
+        parser.add_argument(
+            '--salvar',
+            action='store_true',
+            help='Com --ibge, grava o JSON baixado em --arquivo'
+        )
+        parser.add_argument(
+            '--se-vazio',
+            action='store_true',
+            help='Não faz nada se o catálogo já tiver sido importado (usado no deploy)'
+        )
+
+    def handle(self, *args, **options):
+        caminho = options['arquivo']
+
+        if options['se_vazio'] and AtividadeCNAE.objects.exists():
+            self.stdout.write('Catálogo CNAE já importado.')
+            return
+
+        if options['ibge']:
+            registros = self._baixar()
+            if options['salvar']:
+                self._salvar(caminho, registros)
+        else:
+            try:
+                registros = carregar_arquivo(caminho)
+            except FileNotFoundError:
+                self.stdout.write(f'Arquivo {caminho} não encontrado; usando o IBGE uma única vez.')
+                registros = self._baixar()
+                self._salvar(caminho, registros)
+
+        totais = importar_catalogo(registros)
+
+        self.stdout.write(self.style.SUCCESS('✓ Catálogo CNAE importado com sucesso!'))
+        for nivel, total in totais.items():
+            self.stdout.write(f'  • {nivel}: {total}')
+
+    def _baixar(self):
+        self.stdout.write('Baixando catálogo de subclasses do IBGE...')
+        try:
+            return baixar_ibge()
+        except Exception as e:
+            raise CommandError(f'Erro ao baixar o catálogo do IBGE: {e}')
+
+    def _salvar(self, caminho, registros):
+        Path(caminho).parent.mkdir(parents=True, exist_ok=True)
+        with open(caminho, 'w', encoding='utf-8') as arquivo:
+            json.dump(registros, arquivo, ensure_ascii=False)
+        self.stdout.write(f'Catálogo salvo em {caminho}')
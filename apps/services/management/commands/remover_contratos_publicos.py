@@ -0,0 +1,26 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from apps.services.pdf_generator import CONTRACT_STORAGE_DIR
+
+
+class Command(BaseCommand):
+    help = (
+        'Remove do MEDIA_ROOT (servido publicamente) os contratos gravados antes do storage privado; '
+        'eles são gerados de novo no próximo download'
+    )
+
+    def handle(self, *args, **options):
+        if not default_storage.exists(CONTRACT_STORAGE_DIR):
+            self.stdout.write("Nenhum contrato no storage público.")
+            return
+
+        count = 0
+        processos, _files = default_storage.listdir(CONTRACT_STORAGE_DIR)
+        for processo_dir in processos:
+            _dirs, files = default_storage.listdir(f"{CONTRACT_STORAGE_DIR}/{processo_dir}")
+            for name in files:
+                default_storage.delete(f"{CONTRACT_STORAGE_DIR}/{processo_dir}/{name}")
+                count += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Concluído! {count} contratos removidos do storage público."))
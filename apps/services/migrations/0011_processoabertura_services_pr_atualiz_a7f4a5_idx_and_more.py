@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0002_pagamento_delete_payment_and_more'),
+        ('services', '0010_solicitacaobaixamei_solicitacaodeclaracaoanual'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='processoabertura',
+            index=models.Index(fields=['atualizado_em', 'id'], name='services_pr_atualiz_a7f4a5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='solicitacaoaberturamei',
+            index=models.Index(fields=['atualizado_em', 'id'], name='services_so_atualiz_f94495_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0002_pagamento_delete_payment_and_more'),
+        ('services', '0011_processoabertura_services_pr_atualiz_a7f4a5_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='solicitacaobaixamei',
+            index=models.Index(fields=['criado_em', 'id'], name='services_so_criado__d47df0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='solicitacaodeclaracaoanualmei',
+            index=models.Index(fields=['criado_em', 'id'], name='services_so_criado__f2d7b7_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0012_solicitacaobaixamei_services_so_criado__d47df0_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('destinatario', models.EmailField(max_length=254, verbose_name='Destinatário')),
+                ('assunto', models.CharField(max_length=255, verbose_name='Assunto')),
+                ('mensagem', models.TextField(blank=True, verbose_name='Mensagem (texto)')),
+                ('html_mensagem', models.TextField(blank=True, verbose_name='Mensagem (HTML)')),
+                ('template_html', models.CharField(blank=True, max_length=200, verbose_name='Template HTML')),
+                ('contexto', models.JSONField(blank=True, default=dict, verbose_name='Contexto do template')),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('enviando', 'Enviando'), ('enviado', 'Enviado'), ('falha', 'Falha')], default='pendente', max_length=20)),
+                ('tentativas', models.PositiveSmallIntegerField(default=0)),
+                ('erro', models.TextField(blank=True)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+                ('enviado_em', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'E-mail na Fila',
+                'verbose_name_plural': 'Fila de E-mails',
+                'ordering': ['-criado_em'],
+                'indexes': [models.Index(fields=['status', 'criado_em'], name='services_em_status_2ad906_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Índice trigram para a busca por trecho da descrição (LIKE '%termo%').
+# Só é criado se a extensão pg_trgm estiver disponível no servidor; sem ela a
+# busca continua funcionando, apenas sem o índice.
+CREATE_TRGM_INDEX = """
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') THEN
+        CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        CREATE INDEX IF NOT EXISTS services_cnae_busca_trgm
+            ON services_atividadecnae USING gin (busca gin_trgm_ops);
+    END IF;
+END
+$$;
+"""
+
+DROP_TRGM_INDEX = "DROP INDEX IF EXISTS services_cnae_busca_trgm;"
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0013_emailoutbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AtividadeCNAE',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('codigo', models.CharField(max_length=10, unique=True, verbose_name='Código IBGE')),
+                ('nivel', models.CharField(choices=[('secao', 'Seção'), ('divisao', 'Divisão'), ('grupo', 'Grupo'), ('classe', 'Classe'), ('subclasse', 'Subclasse')], max_length=10, verbose_name='Nível')),
+                ('descricao', models.CharField(max_length=300, verbose_name='Descrição')),
+                ('observacoes', models.TextField(blank=True, verbose_name='Observações')),
+                ('busca', models.CharField(editable=False, max_length=300)),
+                ('atualizado_em', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('pai', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='filhos', to='services.atividadecnae', verbose_name='Nível superior')),
+            ],
+            options={
+                'verbose_name': 'Atividade CNAE (IBGE)',
+                'verbose_name_plural': 'Atividades CNAE (IBGE)',
+                'ordering': ['codigo'],
+                'indexes': [models.Index(fields=['nivel', 'codigo'], name='services_at_nivel_916c21_idx'), models.Index(fields=['codigo'], name='services_cnae_codigo_like', opclasses=['varchar_pattern_ops'])],
+            },
+        ),
+        migrations.RunSQL(CREATE_TRGM_INDEX, DROP_TRGM_INDEX),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0014_atividadecnae'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EnderecoCEP',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cep', models.CharField(max_length=8, unique=True, verbose_name='CEP')),
+                ('logradouro', models.CharField(blank=True, max_length=255, verbose_name='Logradouro')),
+                ('bairro', models.CharField(blank=True, max_length=120, verbose_name='Bairro')),
+                ('cidade', models.CharField(max_length=120, verbose_name='Cidade')),
+                ('uf', models.CharField(max_length=2, verbose_name='UF')),
+                ('atualizado_em', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+            ],
+            options={
+                'verbose_name': 'Endereço por CEP',
+                'verbose_name_plural': 'Endereços por CEP',
+                'ordering': ['cep'],
+            },
+        ),
+    ]
@@ -238,6 +238,9 @@ class ProcessoAbertura(models.Model):
         verbose_name = 'Processo de Abertura'
         verbose_name_plural = 'Processos de Abertura'
         ordering = ['-criado_em']
+        indexes = [
+            models.Index(fields=['atualizado_em', 'id']),
+        ]
     
     def __str__(self):
         return f"Processo #{self.id} - {self.nome_completo or 'Sem nome'} - {self.get_status_display()}"
@@ -415,6 +418,64 @@ class CNAE(models.Model):
         return f"{self.codigo} - {self.descricao[:50]}"
 
 
+class AtividadeCNAE(models.Model):
+    """
+    Catálogo oficial completo da CNAE (IBGE): seções, divisões, grupos,
+    classes e subclasses, importado pelo comando `importar_cnaes`.
+
+    O campo `codigo` guarda o identificador do IBGE (ex: "A", "62", "620",
+    "62015", "6201501"); `busca` guarda a descrição normalizada (minúsculas,
+    sem acentos) usada pela busca.
+    """
+    NIVEL_CHOICES = [
+        ('secao', 'Seção'),
+        ('divisao', 'Divisão'),
+        ('grupo', 'Grupo'),
+        ('classe', 'Classe'),
+        ('subclasse', 'Subclasse'),
+    ]
+
+    codigo = models.CharField(max_length=10, unique=True, verbose_name='Código IBGE')
+    nivel = models.CharField(max_length=10, choices=NIVEL_CHOICES, verbose_name='Nível')
+    descricao = models.CharField(max_length=300, verbose_name='Descrição')
+    observacoes = models.TextField(blank=True, verbose_name='Observações')
+    pai = models.ForeignKey(
+        'self',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='filhos',
+        verbose_name='Nível superior'
+    )
+    busca = models.CharField(max_length=300, editable=False)
+    atualizado_em = models.DateTimeField(auto_now=True, verbose_name='Atualizado em')
+
+    class Meta:
+        verbose_name = 'Atividade CNAE (IBGE)'
+        verbose_name_plural = 'Atividades CNAE (IBGE)'
+        ordering = ['codigo']
+        indexes = [
+            models.Index(fields=['nivel', 'codigo']),
+            # Busca por prefixo do código (LIKE 'xxx%') independente da collation
+            models.Index(fields=['codigo'], name='services_cnae_codigo_like', opclasses=['varchar_pattern_ops']),
+        ]
+
+    def __str__(self):
+        return f"{self.codigo_formatado} - {self.descricao[:50]}"
+
+    @property
+    def codigo_formatado(self):
+        """Código no formato oficial (ex: 62.01-5 para classe, 6201-5/01 para subclasse)."""
+        c = self.codigo
+        if self.nivel == 'grupo':
+            return f"{c[:2]}.{c[2:]}"
+        if self.nivel == 'classe':
+            return f"{c[:2]}.{c[2:4]}-{c[4:]}"
+        if self.nivel == 'subclasse':
+            return f"{c[:4]}-{c[4]}/{c[5:]}"
+        return c
+
+
 class SolicitacaoAberturaMEI(models.Model):
     """
     Modelo para armazenar as solicitações de abertura de MEI.
@@ -602,6 +663,9 @@ class SolicitacaoAberturaMEI(models.Model):
         verbose_name = 'Solicitação de Abertura MEI'
         verbose_name_plural = 'Solicitações de Abertura MEI'
         ordering = ['-criado_em']
+        indexes = [
+            models.Index(fields=['atualizado_em', 'id']),
+        ]
     
     def __str__(self):
         return f"MEI #{self.id} - {self.nome_completo} ({self.get_status_display()})"
@@ -682,6 +746,9 @@ class SolicitacaoBaixaMEI(models.Model):
         verbose_name = 'Solicitação de Baixa MEI'
         verbose_name_plural = 'Solicitações de Baixa MEI'
         ordering = ['-criado_em']
+        indexes = [
+            models.Index(fields=['criado_em', 'id']),
+        ]
 
     def __str__(self):
         return f"Baixa MEI #{self.id} - {self.nome_completo} ({self.get_status_display()})"
@@ -739,6 +806,9 @@ class SolicitacaoDeclaracaoAnualMEI(models.Model):
         verbose_name = 'Solicitação de Declaração Anual MEI'
         verbose_name_plural = 'Solicitações de Declaração Anual MEI'
         ordering = ['-criado_em']
+        indexes = [
+            models.Index(fields=['criado_em', 'id']),
+        ]
 
     def __str__(self):
         return f"DASN MEI #{self.id} - {self.nome_completo} - Ano {self.ano_referencia} ({self.get_status_display()})"
@@ -878,3 +948,69 @@ class ContratacaoServicoAvulso(models.Model):
             self.concluido_em = timezone.now()
         
         super().save(*args, **kwargs)
+
+
+class EmailOutbox(models.Model):
+    """
+    Fila persistente de e-mails transacionais.
+
+    Os e-mails são gravados aqui e enviados em lotes pela task
+    `processar_outbox_emails`, reaproveitando uma única conexão SMTP por lote.
+    """
+    STATUS_PENDENTE = 'pendente'
+    STATUS_ENVIANDO = 'enviando'
+    STATUS_ENVIADO = 'enviado'
+    STATUS_FALHA = 'falha'
+
+    STATUS_CHOICES = [
+        (STATUS_PENDENTE, 'Pendente'),
+        (STATUS_ENVIANDO, 'Enviando'),
+        (STATUS_ENVIADO, 'Enviado'),
+        (STATUS_FALHA, 'Falha'),
+    ]
+
+    destinatario = models.EmailField(verbose_name='Destinatário')
+    assunto = models.CharField(max_length=255, verbose_name='Assunto')
+    mensagem = models.TextField(blank=True, verbose_name='Mensagem (texto)')
+    html_mensagem = models.TextField(blank=True, verbose_name='Mensagem (HTML)')
+    template_html = models.CharField(max_length=200, blank=True, verbose_name='Template HTML')
+    contexto = models.JSONField(default=dict, blank=True, verbose_name='Contexto do template')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDENTE)
+    tentativas = models.PositiveSmallIntegerField(default=0)
+    erro = models.TextField(blank=True)
+    criado_em = models.DateTimeField(auto_now_add=True)
+    atualizado_em = models.DateTimeField(auto_now=True)
+    enviado_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'E-mail na Fila'
+        verbose_name_plural = 'Fila de E-mails'
+        ordering = ['-criado_em']
+        indexes = [
+            models.Index(fields=['status', 'criado_em']),
+        ]
+
+    def __str__(self):
+        return f"{self.destinatario} - {self.assunto} ({self.get_status_display()})"
+
+
+class EnderecoCEP(models.Model):
+    """
+    Tabela local de CEPs, consultada antes do ViaCEP.
+
+    Carregada em lote pelo comando `importar_ceps` (CSV).
+    """
+    cep = models.CharField(max_length=8, unique=True, verbose_name='CEP')
+    logradouro = models.CharField(max_length=255, blank=True, verbose_name='Logradouro')
+    bairro = models.CharField(max_length=120, blank=True, verbose_name='Bairro')
+    cidade = models.CharField(max_length=120, verbose_name='Cidade')
+    uf = models.CharField(max_length=2, verbose_name='UF')
+    atualizado_em = models.DateTimeField(auto_now=True, verbose_name='Atualizado em')
+
+    class Meta:
+        verbose_name = 'Endereço por CEP'
+        verbose_name_plural = 'Endereços por CEP'
+        ordering = ['cep']
+
+    def __str__(self):
+        return f"{self.cep} - {self.logradouro}, {self.cidade}/{self.uf}"
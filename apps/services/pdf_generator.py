@@ -9,8 +9,156 @@ from reportlab.pdfgen import canvas
 from django.utils import timezone
 from django.conf import settings
 import base64
+import hashlib
+import logging
+import threading
+from functools import lru_cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
 from pypdf import PdfWriter, PdfReader
 
+logger = logging.getLogger(__name__)
+
+# Incrementar sempre que o texto/layout do contrato mudar: invalida os PDFs já
+# gravados no storage
+CONTRACT_TEMPLATE_VERSION = 1
+CONTRACT_STORAGE_DIR = 'contratos'
+# Contratos têm CPF e endereço: ficam no storage privado (STORAGES['private']),
+# nunca no MEDIA_ROOT servido pelo nginx
+CONTRACT_STORAGE_ALIAS = 'private'
+
+# Campos do ProcessoAbertura usados no contrato (entram na chave do cache)
+CONTRACT_FIELDS = (
+    'nome_completo', 'cpf', 'endereco', 'numero', 'bairro', 'cidade', 'estado',
+    'assinatura_digital', 'data_assinatura',
+)
+
+
+@lru_cache(maxsize=1)
+def get_contract_styles():
+    """Folha de estilos do contrato, montada uma única vez por processo."""
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(name='Justify', alignment=TA_JUSTIFY, leading=14))
+    styles.add(ParagraphStyle(name='Center', alignment=TA_CENTER, leading=14, spaceAfter=20))
+    styles.add(ParagraphStyle(name='ContractHeading1', fontSize=14, leading=16, alignment=TA_CENTER, spaceAfter=12, spaceBefore=12, fontName='Helvetica-Bold'))
+    styles.add(ParagraphStyle(name='ContractHeading2', fontSize=12, leading=14, alignment=TA_JUSTIFY, spaceAfter=8, spaceBefore=8, fontName='Helvetica-Bold'))
+    styles.add(ParagraphStyle(name='BodyTextIndent', parent=styles['Justify'], firstLineIndent=10))
+    return styles
+
+
+def _letterhead_candidates():
+    # 1. settings.STATIC_ROOT / pdf / ... (produção)
+    # 2. static/pdf/... (desenvolvimento)
+    candidates = [
+        os.path.join(settings.BASE_DIR, 'static', 'pdf', 'papeltimbrado.pdf'),
+        os.path.join(settings.BASE_DIR, 'vetorial_project', 'static', 'pdf', 'papeltimbrado.pdf'),
+    ]
+    if getattr(settings, 'STATIC_ROOT', None):
+        candidates.insert(0, os.path.join(settings.STATIC_ROOT, 'pdf', 'papeltimbrado.pdf'))
+    return candidates
+
+
+def _build_background_page(bg_path):
+    """Primeira página do papel timbrado já com a máscara branca de opacidade."""
+    reader_bg = PdfReader(bg_path)
+    if len(reader_bg.pages) == 0:
+        return None
+    bg_page = reader_bg.pages[0]
+
+    # --- Criar Mascara Branca para reduzir opacidade ---
+    # Isso desenha um retangulo branco semitransparente sobre o background original
+    try:
+        mask_buffer = io.BytesIO()
+        c = canvas.Canvas(mask_buffer, pagesize=A4)
+        c.setFillAlpha(0.40)
+        c.setFillColorRGB(1, 1, 1)
+        c.rect(0, 0, A4[0], A4[1], fill=True, stroke=False)
+        c.save()
+        mask_buffer.seek(0)
+
+        reader_mask = PdfReader(mask_buffer)
+        if len(reader_mask.pages) > 0:
+            bg_page.merge_page(reader_mask.pages[0], over=True)
+    except Exception as e:
+        logger.warning(f"Erro ao criar mascara de opacidade: {e}")
+    return bg_page
+
+
+# Fundo pronto (papel timbrado + máscara) por processo, invalidado pelo mtime
+_background = {'key': None, 'page': None}
+_background_lock = threading.Lock()
+
+
+def get_letterhead_background():
+    """
+    Retorna (página de fundo, mtime) do papel timbrado, ou (None, None) se o
+    arquivo não existir. O arquivo só é relido quando o mtime muda.
+    """
+    for path in _letterhead_candidates():
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            continue
+        key = (path, mtime)
+        with _background_lock:
+            if _background['key'] != key:
+                _background['page'] = _build_background_page(path)
+                _background['key'] = key
+            return _background['page'], mtime
+    return None, None
+
+
+def apply_letterhead(content_buffer):
+    """Mescla o papel timbrado sob cada página do conteúdo."""
+    bg_page, _mtime = get_letterhead_background()
+    if bg_page is None:
+        return content_buffer
+
+    reader_content = PdfReader(content_buffer)
+    writer = PdfWriter()
+    # A página de fundo é compartilhada entre requisições: a leitura dela
+    # durante a mesclagem fica protegida pelo lock
+    with _background_lock:
+        for page in reader_content.pages:
+            # over=False coloca o bg_page ATRAS do conteudo atual
+            page.merge_page(bg_page, over=False)
+            writer.add_page(page)
+
+    final_buffer = io.BytesIO()
+    writer.write(final_buffer)
+    final_buffer.seek(0)
+    return final_buffer
+
+
+def contract_cache_key(processo):
+    """Hash dos campos usados no contrato, da versão do modelo e do papel timbrado."""
+    _bg_page, mtime = get_letterhead_background()
+    partes = [str(CONTRACT_TEMPLATE_VERSION), str(mtime)]
+    partes.extend(str(getattr(processo, field, None)) for field in CONTRACT_FIELDS)
+    return hashlib.sha256('|'.join(partes).encode()).hexdigest()[:32]
+
+
+def get_contract_pdf(processo):
+    """
+    Retorna o PDF do contrato (arquivo aberto) a partir do storage privado,
+    gerando e gravando apenas quando algum campo usado no contrato mudou.
+    """
+    storage = storages[CONTRACT_STORAGE_ALIAS]
+    directory = f"{CONTRACT_STORAGE_DIR}/{processo.id}"
+    path = f"{directory}/{contract_cache_key(processo)}.pdf"
+    if not storage.exists(path):
+        pdf_buffer = generate_contract_pdf(processo)
+        # Remove versões anteriores do contrato deste processo
+        try:
+            _dirs, files = storage.listdir(directory)
+        except (FileNotFoundError, NotImplementedError):
+            files = []
+        for name in files:
+            storage.delete(f"{directory}/{name}")
+        path = storage.save(path, ContentFile(pdf_buffer.getvalue()))
+    return storage.open(path, 'rb')
+
+
 def generate_contract_pdf(processo):
     """
     Gera o PDF do contrato de prestação de serviços com base no conteúdo da Vetorial.
@@ -22,12 +170,7 @@ def generate_contract_pdf(processo):
                             rightMargin=20*mm, leftMargin=20*mm,
                             topMargin=40*mm, bottomMargin=30*mm) # Margens maiores para o papel timbrado
     
-    styles = getSampleStyleSheet()
-    styles.add(ParagraphStyle(name='Justify', alignment=TA_JUSTIFY, leading=14))
-    styles.add(ParagraphStyle(name='Center', alignment=TA_CENTER, leading=14, spaceAfter=20))
-    styles.add(ParagraphStyle(name='ContractHeading1', fontSize=14, leading=16, alignment=TA_CENTER, spaceAfter=12, spaceBefore=12, fontName='Helvetica-Bold'))
-    styles.add(ParagraphStyle(name='ContractHeading2', fontSize=12, leading=14, alignment=TA_JUSTIFY, spaceAfter=8, spaceBefore=8, fontName='Helvetica-Bold'))
-    styles.add(ParagraphStyle(name='BodyTextIndent', parent=styles['Justify'], firstLineIndent=10))
+    styles = get_contract_styles()
 
     story = []
     
@@ -500,8 +643,10 @@ também com o Aviso de Privacidade da Vetorial.<br/><b>CONTRATANTE</b>:  {nome_c
     # Data e Local
     cidade = processo.cidade or "Cidade de Exemplo"
     estado = processo.estado or "UF"
-    data_hoje = timezone.now().strftime("%d/%m/%Y")
-    story.append(Paragraph(f"{cidade}-{estado}, {data_hoje}", styles['Center']))
+    # Data da assinatura (fixa para o contrato poder ser reaproveitado); sem ela, a data atual
+    data_assinatura = getattr(processo, 'data_assinatura', None)
+    data_contrato = timezone.localtime(data_assinatura) if data_assinatura else timezone.now()
+    story.append(Paragraph(f"{cidade}-{estado}, {data_contrato.strftime('%d/%m/%Y')}", styles['Center']))
     story.append(Spacer(1, 10*mm))
     
     # Assinaturas
@@ -842,65 +987,8 @@ também com o Aviso de Privacidade da Vetorial.<br/><b>CONTRATANTE</b>:  {nome_c
     # Aplicação do Papel Timbrado (Background)
     # -------------------------------------------------------------------------
     try:
-        # Tenta localizar o arquivo de background
-        # 1. Tenta em settings.STATIC_ROOT / pdf / ... (produção)
-        # 2. Tenta em static/pdf/... (desenvolvimento)
-        
-        bg_candidates = [
-            os.path.join(settings.BASE_DIR, 'static', 'pdf', 'papeltimbrado.pdf'),
-            os.path.join(settings.BASE_DIR, 'vetorial_project', 'static', 'pdf', 'papeltimbrado.pdf'),
-        ]
-        if hasattr(settings, 'STATIC_ROOT') and settings.STATIC_ROOT:
-             bg_candidates.insert(0, os.path.join(settings.STATIC_ROOT, 'pdf', 'papeltimbrado.pdf'))
-
-        bg_path = None
-        for p in bg_candidates:
-            if os.path.exists(p):
-                bg_path = p
-                break
-        
-        if bg_path:
-            reader_content = PdfReader(content_buffer)
-            reader_bg = PdfReader(bg_path)
-            
-            if len(reader_bg.pages) > 0:
-                bg_page = reader_bg.pages[0]
-                
-                # --- Criar Mascara Branca para reduzir opacidade ---
-                # Isso desenha um retangulo branco semitransparente sobre o background original
-                try:
-                    mask_buffer = io.BytesIO()
-                    c = canvas.Canvas(mask_buffer, pagesize=A4)
-                    c.setFillAlpha(0.40)
-                    c.setFillColorRGB(1, 1, 1)
-                    c.rect(0, 0, A4[0], A4[1], fill=True, stroke=False)
-                    c.save()
-                    mask_buffer.seek(0)
-                    
-                    reader_mask = PdfReader(mask_buffer)
-                    if len(reader_mask.pages) > 0:
-                        mask_page = reader_mask.pages[0]
-                        bg_page.merge_page(mask_page, over=True)
-                except Exception as e:
-                    print(f"Erro ao criar mascara de opacidade: {e}")
-
-                writer = PdfWriter()
-
-                for page in reader_content.pages:
-                    # Mescla o background (bg_page) SOB a pagina de conteudo
-                    # over=False coloca o bg_page ATRAS do conteudo atual
-                    page.merge_page(bg_page, over=False)
-                    writer.add_page(page)
-                
-                final_buffer = io.BytesIO()
-                writer.write(final_buffer)
-                final_buffer.seek(0)
-                return final_buffer
-        
-        # Se não encontrou background ou erro, retorna original
-        return content_buffer
-
+        return apply_letterhead(content_buffer)
     except Exception as e:
-        print(f"Erro ao aplicar papel timbrado: {e}")
+        logger.error(f"Erro ao aplicar papel timbrado: {e}")
         content_buffer.seek(0)
-        return content_buffer
\ No newline at end of file
+        return content_buffer
@@ -0,0 +1,22 @@
+"""
+Tasks Celery do app services.
+"""
+from celery import shared_task
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+def processar_outbox_emails() -> dict:
+    """
+    Envia as mensagens pendentes da fila de e-mails (EmailOutbox) em lotes.
+
+    Agendada automaticamente quando e-mails são enfileirados.
+
+    Returns:
+        dict: métricas da execução
+    """
+    from apps.services.email_outbox import processar_outbox
+
+    return processar_outbox()
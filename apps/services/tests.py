@@ -1,3 +1,302 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+from unittest.mock import Mock, patch
 
-# Create your tests here.
+import requests
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.storage import default_storage, storages
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from django.core.mail.backends.locmem import EmailBackend as LocmemBackend
+
+from .cep_service import CEP_LOCK_KEY, CEPIndisponivel, consultar_cep
+from .cnae_catalog import importar_catalogo
+from .email_outbox import enfileirar_emails, processar_outbox
+from .email_service import EmailService
+from .models import AtividadeCNAE, EmailOutbox, EnderecoCEP, ProcessoAbertura
+from .pdf_generator import CONTRACT_STORAGE_ALIAS, CONTRACT_STORAGE_DIR, contract_cache_key
+
+
+class BackendComFalhas(LocmemBackend):
+    """Recusa destinatários "recusado@"; "instavel@" falha só na primeira vez."""
+    instaveis = set()
+
+    def send_messages(self, messages):
+        for message in messages:
+            destinatario = message.to[0]
+            if destinatario.startswith('recusado@'):
+                raise OSError(f'{destinatario} recusado')
+            if destinatario.startswith('instavel@') and destinatario not in self.instaveis:
+                self.instaveis.add(destinatario)
+                raise OSError('conexão encerrada')
+        return super().send_messages(messages)
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    EMAIL_OUTBOX_BATCH_SIZE=2,
+    EMAIL_OUTBOX_RATE_PER_MINUTE=0,
+)
+class EmailOutboxTest(TestCase):
+    def _enfileirar(self, quantidade):
+        enfileirar_emails([
+            {
+                'destinatario': f'cliente{i}@example.com',
+                'assunto': 'Nova guia disponível',
+                'template_html': 'emails/notificacao_documento.html',
+                'contexto': {'cliente_nome': 'Cliente', 'tipo_documento': 'Guia'},
+            }
+            for i in range(quantidade)
+        ])
+
+    def test_envia_pendentes_em_lotes(self):
+        self._enfileirar(5)
+
+        with patch('apps.services.email_outbox.get_connection', wraps=mail.get_connection) as conexao:
+            metricas = processar_outbox()
+
+        self.assertEqual(metricas['enviados'], 5)
+        self.assertEqual(metricas['lotes'], 3)
+        self.assertEqual(conexao.call_count, 3)
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual({m.from_email for m in mail.outbox}, {EmailService().remetente})
+        self.assertFalse(EmailOutbox.objects.exclude(status=EmailOutbox.STATUS_ENVIADO).exists())
+
+    def test_falha_volta_para_fila_ate_o_limite(self):
+        self._enfileirar(1)
+
+        with patch('apps.services.email_outbox.get_connection', side_effect=OSError('SMTP fora')), \
+                patch('apps.services.email_outbox.agendar_processamento'):
+            for _ in range(3):
+                processar_outbox()
+
+        email = EmailOutbox.objects.get()
+        self.assertEqual(email.status, EmailOutbox.STATUS_FALHA)
+        self.assertEqual(email.tentativas, 3)
+
+
+@override_settings(EMAIL_BACKEND='apps.services.tests.BackendComFalhas')
+class EnvioParcialTest(TestCase):
+    """Falha de uma mensagem não reenvia as que já foram entregues."""
+
+    def setUp(self):
+        BackendComFalhas.instaveis = set()
+
+    def test_outbox_devolve_a_fila_apenas_a_mensagem_com_falha(self):
+        enfileirar_emails([
+            {'destinatario': destinatario, 'assunto': 'Aviso', 'mensagem': 'Olá'}
+            for destinatario in ('a@example.com', 'recusado@example.com', 'b@example.com')
+        ])
+
+        with patch('apps.services.email_outbox.agendar_processamento'):
+            metricas = processar_outbox()
+
+        self.assertEqual((metricas['enviados'], metricas['falhas']), (2, 1))
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), ['a@example.com', 'b@example.com'])
+        falha = EmailOutbox.objects.get(destinatario='recusado@example.com')
+        self.assertEqual((falha.status, falha.tentativas), (EmailOutbox.STATUS_PENDENTE, 1))
+
+    def test_multiplos_emails_tenta_de_novo_so_os_nao_entregues(self):
+        resultados = EmailService().enviar_multiplos_emails(
+            ['a@example.com', 'instavel@example.com', 'recusado@example.com', 'b@example.com'], 'Aviso', 'Olá',
+        )
+
+        self.assertEqual(resultados, {
+            'a@example.com': True,
+            'instavel@example.com': True,
+            'recusado@example.com': False,
+            'b@example.com': True,
+        })
+        # Cada destinatário entregue recebe uma única cópia
+        self.assertEqual(
+            sorted(m.to[0] for m in mail.outbox),
+            ['a@example.com', 'b@example.com', 'instavel@example.com'],
+        )
+
+
+def _subclasse_ibge(codigo, descricao, classe_id, classe_descricao):
+    return {
+        'id': codigo,
+        'descricao': descricao,
+        'observacoes': [],
+        'classe': {
+            'id': classe_id,
+            'descricao': classe_descricao,
+            'observacoes': ['Esta classe compreende o desenvolvimento de programas.'],
+            'grupo': {
+                'id': classe_id[:3],
+                'descricao': 'ATIVIDADES DOS SERVIÇOS DE TECNOLOGIA DA INFORMAÇÃO',
+                'divisao': {
+                    'id': classe_id[:2],
+                    'descricao': 'ATIVIDADES DOS SERVIÇOS DE TECNOLOGIA DA INFORMAÇÃO',
+                    'secao': {'id': 'J', 'descricao': 'INFORMAÇÃO E COMUNICAÇÃO'},
+                },
+            },
+        },
+    }
+
+
+class CatalogoCNAETest(TestCase):
+    def setUp(self):
+        importar_catalogo([
+            _subclasse_ibge('6201501', 'Desenvolvimento de programas de computador sob encomenda',
+                            '62015', 'Desenvolvimento de programas de computador sob encomenda'),
+            _subclasse_ibge('6202300', 'Desenvolvimento e licenciamento de programas customizáveis',
+                            '62023', 'Desenvolvimento e licenciamento de programas de computador customizáveis'),
+            _subclasse_ibge('6204000', 'Consultoria em tecnologia da informação',
+                            '62040', 'Consultoria em tecnologia da informação'),
+        ])
+
+    def test_importa_hierarquia_completa(self):
+        self.assertEqual(AtividadeCNAE.objects.filter(nivel='classe').count(), 3)
+        classe = AtividadeCNAE.objects.get(codigo='62015')
+        self.assertEqual(classe.codigo_formatado, '62.01-5')
+        self.assertEqual(classe.pai.codigo, '620')
+        self.assertEqual(classe.pai.pai.pai.codigo, 'J')
+
+    def test_api_busca_por_codigo_e_descricao_sem_acento(self):
+        url = reverse('services:api_buscar_cnaes')
+
+        por_descricao = self.client.get(url, {'q': 'informacao'}).json()
+        self.assertEqual([c['codigo'] for c in por_descricao['data']], ['62040'])
+
+        por_codigo = self.client.get(url, {'q': '62.02', 'page_size': 1}).json()
+        self.assertEqual(por_codigo['data'][0]['codigo_formatado'], '62.02-3')
+        self.assertFalse(por_codigo['pagination']['has_more'])
+
+        pagina = self.client.get(url, {'page_size': 2, 'page': 2}).json()
+        self.assertEqual([c['codigo'] for c in pagina['data']], ['62040'])
+
+    def test_comando_sem_arquivo_baixa_do_ibge_uma_unica_vez(self):
+        from django.core.management import call_command
+
+        AtividadeCNAE.objects.all().delete()
+        pasta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, pasta, ignore_errors=True)
+        caminho = f'{pasta}/cnae_subclasses.json'
+        registros = [_subclasse_ibge('6201501', 'Desenvolvimento de programas', '62015', 'Desenvolvimento de programas')]
+
+        with patch('apps.services.management.commands.importar_cnaes.baixar_ibge', return_value=registros) as baixar:
+            call_command('importar_cnaes', arquivo=caminho, se_vazio=True, stdout=io.StringIO())
+            call_command('importar_cnaes', arquivo=caminho, se_vazio=True, stdout=io.StringIO())
+            call_command('importar_cnaes', arquivo=caminho, stdout=io.StringIO())
+
+        # Baixado uma vez e salvo; a reimportação lê o arquivo
+        self.assertEqual(baixar.call_count, 1)
+        self.assertTrue(AtividadeCNAE.objects.filter(codigo='62015', nivel='classe').exists())
+
+
+class ConsultaCEPTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    @patch('apps.services.cep_service.get_session')
+    def test_cache_de_acertos_e_de_cep_inexistente(self, get_session):
+        get_session.return_value.get.side_effect = [
+            Mock(status_code=200, json=lambda: {'logradouro': 'Praça da Sé', 'bairro': 'Sé', 'localidade': 'São Paulo', 'uf': 'SP'}),
+            Mock(status_code=200, json=lambda: {'erro': 'true'}),
+        ]
+
+        for _ in range(2):
+            self.assertEqual(consultar_cep('01001000')['cidade'], 'São Paulo')
+            self.assertIsNone(consultar_cep('99999999'))
+        self.assertEqual(get_session.return_value.get.call_count, 2)
+
+    @patch('apps.services.cep_service.get_session')
+    def test_tabela_local_e_viacep_indisponivel(self, get_session):
+        get_session.return_value.get.side_effect = requests.Timeout('timeout')
+        EnderecoCEP.objects.create(cep='70040010', logradouro='Esplanada dos Ministérios', cidade='Brasília', uf='DF')
+        url = reverse('services:buscar_cep')
+
+        self.assertEqual(self.client.get(url, {'cep': '70040-010'}).json()['estado'], 'DF')
+        self.assertEqual(self.client.get(url, {'cep': '01001-000'}).status_code, 503)
+        self.assertEqual(self.client.get(url, {'cep': '123'}).status_code, 400)
+
+    @patch('apps.services.cep_service.get_session')
+    def test_falha_do_viacep_nao_e_repetida_por_quem_aguarda(self, get_session):
+        get_session.return_value.get.side_effect = requests.Timeout('timeout')
+
+        for _ in range(3):
+            with self.assertRaises(CEPIndisponivel):
+                consultar_cep('01001000')
+        self.assertEqual(get_session.return_value.get.call_count, 1)
+
+        # Consulta em andamento que não termina a tempo: não vai ao ViaCEP
+        cache.add(CEP_LOCK_KEY.format(cep='20040002'), 1, 10)
+        with patch('apps.services.cep_service.CEP_WAIT_TIMEOUT', 0.1), self.assertRaises(CEPIndisponivel):
+            consultar_cep('20040002')
+        self.assertEqual(get_session.return_value.get.call_count, 1)
+
+    def test_limite_de_requisicoes_por_ip(self):
+        url = reverse('services:buscar_cep')
+        respostas = [self.client.get(url, {'cep': '123'}).status_code for _ in range(16)]
+        self.assertEqual(respostas[:15], [400] * 15)
+        self.assertEqual(respostas[15], 429)
+
+
+class ContratoPdfTest(TestCase):
+    """Contrato assinado: gerado uma vez, guardado no storage privado e entregue só ao dono."""
+
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(username='contrato1', email='c1@example.com', password='pass1234')
+        User.objects.create_user(username='contrato2', email='c2@example.com', password='pass1234')
+        self.processo = ProcessoAbertura.objects.create(
+            usuario=self.user, nome_completo='Fulano de Tal', cpf='123.456.789-00', assinatura_digital='data:image/png;base64,AAA',
+        )
+        self.url = reverse('services:download_contrato', args=[self.processo.id])
+
+        publico, privado = tempfile.mkdtemp(), tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, publico, ignore_errors=True)
+        self.addCleanup(shutil.rmtree, privado, ignore_errors=True)
+        backend = 'django.core.files.storage.FileSystemStorage'
+        storages_override = override_settings(MEDIA_ROOT=publico, STORAGES={
+            'default': {'BACKEND': backend},
+            'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+            CONTRACT_STORAGE_ALIAS: {'BACKEND': backend, 'OPTIONS': {'location': privado}},
+        })
+        storages_override.enable()
+        self.addCleanup(storages_override.disable)
+
+        gerar = patch('apps.services.pdf_generator.generate_contract_pdf', side_effect=lambda p: io.BytesIO(f'%PDF {p.cpf}'.encode()))
+        self.gerar = gerar.start()
+        self.addCleanup(gerar.stop)
+
+    def _arquivos(self):
+        _dirs, files = storages[CONTRACT_STORAGE_ALIAS].listdir(f'{CONTRACT_STORAGE_DIR}/{self.processo.id}')
+        return files
+
+    def test_gera_uma_vez_no_storage_privado(self):
+        self.client.login(username='contrato1', password='pass1234')
+        for _ in range(2):
+            response = self.client.get(self.url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(b''.join(response.streaming_content), b'%PDF 123.456.789-00')
+
+        self.assertEqual(self.gerar.call_count, 1)
+        self.assertEqual(self._arquivos(), [f'{contract_cache_key(self.processo)}.pdf'])
+        self.assertFalse(default_storage.exists(CONTRACT_STORAGE_DIR))
+
+    def test_regenera_quando_dados_do_contrato_mudam(self):
+        self.client.login(username='contrato1', password='pass1234')
+        self.client.get(self.url)
+        chave_anterior = contract_cache_key(self.processo)
+
+        self.processo.cpf = '987.654.321-00'
+        self.processo.save()
+        response = self.client.get(self.url)
+
+        self.assertEqual(b''.join(response.streaming_content), b'%PDF 987.654.321-00')
+        self.assertEqual(self.gerar.call_count, 2)
+        self.assertNotEqual(contract_cache_key(self.processo), chave_anterior)
+        # A versão anterior é removida
+        self.assertEqual(self._arquivos(), [f'{contract_cache_key(self.processo)}.pdf'])
+
+    def test_outro_usuario_nao_acessa(self):
+        self.client.login(username='contrato2', password='pass1234')
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.gerar.assert_not_called()
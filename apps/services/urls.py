@@ -49,4 +49,5 @@ urlpatterns = [
     
     # API
     path('api/buscar-cep/', views.buscar_cep, name='buscar_cep'),
+    path('api/cnaes/', views.api_buscar_cnaes, name='api_buscar_cnaes'),
 ]
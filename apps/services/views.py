@@ -10,7 +10,8 @@ from .forms import (
     SocioFormSet, Etapa5DocumentosForm, Etapa6InformacoesFiscaisForm,
     Etapa8AssinaturaForm, Etapa8RevisaoForm
 )
-from .pdf_generator import generate_contract_pdf
+from .pdf_generator import generate_contract_pdf, get_contract_pdf
+from gestao360_project.rate_limit import rate_limit
 
 
 @login_required
@@ -200,31 +201,30 @@ def processo_sucesso(request, processo_id):
     return render(request, 'services/abertura_empresa/sucesso.html', context)
 
 
-@login_required
+@rate_limit('buscar_cep', taxa='30/m', rajada=15)
 def buscar_cep(request):
-    """API para buscar endereço por CEP usando ViaCEP"""
-    import requests
+    """
+    API para buscar endereço por CEP (cache, tabela local e ViaCEP).
+
+    Usada pelos campos de endereço do wizard de abertura e dos formulários MEI
+    (inclusive por visitantes), por isso limitada por IP.
+    """
+    from .cep_service import CEPIndisponivel, consultar_cep, normalizar_cep
     
-    cep = request.GET.get('cep', '').replace('-', '').replace('.', '')
+    cep = normalizar_cep(request.GET.get('cep', ''))
     
-    if len(cep) != 8:
+    if cep is None:
         return JsonResponse({'error': 'CEP inválido'}, status=400)
     
     try:
-        response = requests.get(f'https://viacep.com.br/ws/{cep}/json/')
-        data = response.json()
-        
-        if 'erro' in data:
-            return JsonResponse({'error': 'CEP não encontrado'}, status=404)
-        
-        return JsonResponse({
-            'endereco': data.get('logradouro', ''),
-            'bairro': data.get('bairro', ''),
-            'cidade': data.get('localidade', ''),
-            'estado': data.get('uf', ''),
-        })
-    except Exception as e:
-        return JsonResponse({'error': str(e)}, status=500)
+        endereco = consultar_cep(cep)
+    except CEPIndisponivel:
+        return JsonResponse({'error': 'Serviço de CEP indisponível no momento. Preencha o endereço manualmente.'}, status=503)
+    
+    if endereco is None:
+        return JsonResponse({'error': 'CEP não encontrado'}, status=404)
+    
+    return JsonResponse(endereco)
 
 
 def planos_view(request):
@@ -247,46 +247,56 @@ def planos_view(request):
 
 def consulta_cnaes_view(request):
     """
-    View para consulta de CNAEs usando a API do IBGE
+    View para consulta de CNAEs a partir do catálogo local (importado do IBGE).
+
+    Renderiza apenas a primeira página; a busca e as páginas seguintes vêm de
+    api_buscar_cnaes.
     """
-    import requests
+    from .cnae_catalog import SEARCH_PAGE_SIZE, buscar_atividades, serialize_atividade, total_atividades
     
-    cnaes_data = []
-    error_message = None
-    
-    try:
-        # Buscar CNAEs da API do IBGE
-        response = requests.get('https://servicodados.ibge.gov.br/api/v2/cnae/classes', timeout=10)
-        
-        if response.status_code == 200:
-            cnaes_api = response.json()
-            
-            # Processar e organizar os dados
-            for cnae in cnaes_api:
-                cnaes_data.append({
-                    'id': cnae.get('id'),
-                    'descricao': cnae.get('descricao', 'Sem descrição'),
-                    'observacoes': cnae.get('observacoes', ''),
-                })
-        else:
-            error_message = f'Erro ao buscar CNAEs: Status {response.status_code}'
-            
-    except requests.exceptions.Timeout:
-        error_message = 'Tempo esgotado ao conectar com a API do IBGE. Tente novamente.'
-    except requests.exceptions.RequestException as e:
-        error_message = f'Erro ao conectar com a API do IBGE: {str(e)}'
-    except Exception as e:
-        error_message = f'Erro inesperado: {str(e)}'
+    total_cnaes = total_atividades('classe')
+    cnaes = [serialize_atividade(a) for a in buscar_atividades(nivel='classe')[:SEARCH_PAGE_SIZE]]
     
     context = {
-        'cnaes': cnaes_data,
-        'total_cnaes': len(cnaes_data),
-        'error_message': error_message,
+        'cnaes': cnaes,
+        'total_cnaes': total_cnaes,
+        'page_size': SEARCH_PAGE_SIZE,
+        'error_message': None if total_cnaes else 'O catálogo de CNAEs ainda não foi carregado. Tente novamente mais tarde.',
     }
     
     return render(request, 'services/consultar_cnaes.html', context)
 
 
+def api_buscar_cnaes(request):
+    """
+    API de busca no catálogo de CNAEs (autocomplete da página de consulta).
+
+    Parâmetros: q (código ou trecho da descrição), nivel (padrão "classe"),
+    page (a partir de 1) e page_size (máximo 50).
+    """
+    from .cnae_catalog import SEARCH_MAX_PAGE_SIZE, SEARCH_PAGE_SIZE, buscar_atividades, serialize_atividade
+    from .models import AtividadeCNAE
+    
+    nivel = request.GET.get('nivel', 'classe')
+    if nivel not in dict(AtividadeCNAE.NIVEL_CHOICES):
+        return JsonResponse({'success': False, 'error': 'Nível inválido'}, status=400)
+    try:
+        page = max(1, int(request.GET.get('page', 1)))
+        page_size = max(1, min(int(request.GET.get('page_size', SEARCH_PAGE_SIZE)), SEARCH_MAX_PAGE_SIZE))
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Parâmetros de paginação inválidos'}, status=400)
+    
+    inicio = (page - 1) * page_size
+    resultados = list(buscar_atividades(request.GET.get('q', ''), nivel)[inicio:inicio + page_size + 1])
+    has_more = len(resultados) > page_size
+    
+    return JsonResponse({
+        'success': True,
+        'data': [serialize_atividade(a) for a in resultados[:page_size]],
+        'pagination': {'page': page, 'page_size': page_size, 'has_more': has_more},
+    })
+
+
 def calculadora_clt_pj(request):
     """
     Calculadora de Salário CLT vs. PJ
@@ -390,7 +400,8 @@ def calculadora_clt_pj(request):
 @login_required
 def download_contrato(request, processo_id):
     """
-    Gera e retorna o PDF do contrato assinado
+    Retorna o PDF do contrato assinado (gerado uma vez e servido do storage
+    enquanto os dados usados no contrato não mudarem)
     """
     processo = get_object_or_404(ProcessoAbertura, id=processo_id, usuario=request.user)
     
@@ -398,10 +409,10 @@ def download_contrato(request, processo_id):
         messages.warning(request, 'O contrato ainda não foi assinado.')
         return redirect('services:abertura_empresa', etapa=7)
         
-    pdf_buffer = generate_contract_pdf(processo)
+    pdf_file = get_contract_pdf(processo)
     
     return FileResponse(
-        pdf_buffer, 
+        pdf_file, 
         as_attachment=True, 
         filename=f'contrato_prestacao_servicos_{processo.id}.pdf'
     )
@@ -1,7 +1,7 @@
 from django.contrib import admin
 from .models import Lead, Ticket, TicketMessage, Duvida, Cliente, Chamado
 from .models import ChamadoAttachment, ChamadoMessage
-from .models import ChatbotPergunta, ChatbotSessao, ChatbotMensagem
+from .models import ChatbotPergunta, ChatbotSessao, ChatbotMensagem, RespostaIACache
 
 # Register your models here.
 
@@ -132,6 +132,28 @@ class ChatbotPerguntaAdmin(admin.ModelAdmin):
     )
 
 
+@admin.register(RespostaIACache)
+class RespostaIACacheAdmin(admin.ModelAdmin):
+    """Perguntas mais frequentes respondidas pelo cache da IA, com as métricas do cache."""
+    list_display = ['pergunta_normalizada', 'escopo', 'acertos', 'tokens', 'ultimo_acesso', 'expira_em']
+    list_filter = ['escopo', 'versao_prompt']
+    search_fields = ['pergunta_normalizada', 'pergunta', 'resposta']
+    ordering = ['-acertos', '-ultimo_acesso']
+    readonly_fields = [
+        'chave', 'escopo', 'versao_prompt', 'pergunta_normalizada', 'pergunta',
+        'tokens', 'latencia_ms', 'acertos', 'criado_em', 'ultimo_acesso',
+    ]
+    change_list_template = 'admin/support/respostaiacache/change_list.html'
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def changelist_view(self, request, extra_context=None):
+        from .ia_cache import estatisticas
+        extra_context = {**(extra_context or {}), 'estatisticas_cache': estatisticas()}
+        return super().changelist_view(request, extra_context=extra_context)
+
+
 class ChatbotMensagemInline(admin.TabularInline):
     model = ChatbotMensagem
     extra = 0
@@ -5,3 +5,6 @@ class SupportConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.support"
     verbose_name = "Suporte"
+
+    def ready(self):
+        import apps.support.signals
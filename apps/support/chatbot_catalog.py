@@ -0,0 +1,126 @@
+"""
+Catálogo de perguntas frequentes (FAQ) do chatbot, em memória por processo.
+
+O catálogo completo (perguntas ativas por id, as perguntas iniciais do widget
+e o agrupamento por categoria, além do JSON já serializado) é montado uma vez
+por processo e reaproveitado por todas as requisições. A versão fica no cache
+(Redis): os signals de ChatbotPergunta incrementam a versão e cada processo
+recarrega o catálogo na próxima requisição depois de notar a mudança.
+
+A versão no Redis é consultada no máximo uma vez a cada
+CATALOG_CHECK_INTERVAL segundos por processo, então abrir o widget não faz
+nenhuma consulta de FAQ ao banco.
+"""
+import json
+import logging
+import threading
+import time
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+
+from gestao360_project.cache_versions import bump_version, get_version
+
+from .models import ChatbotPergunta
+
+logger = logging.getLogger(__name__)
+
+CATALOG_VERSION_KEY = 'support:chatbot_catalog:version'
+# Intervalo entre verificações da versão no Redis (segundos)
+CATALOG_CHECK_INTERVAL = 2
+# Perguntas exibidas ao abrir/recuperar o widget
+PERGUNTAS_INICIAIS = 10
+
+_catalogo = None
+_verificado_em = 0.0
+_lock = threading.Lock()
+
+
+def get_catalog_version():
+    """Retorna a versão atual do catálogo (cria a chave se não existir)."""
+    return get_version(CATALOG_VERSION_KEY)
+
+
+def invalidate_chatbot_catalog():
+    """Incrementa a versão do catálogo e descarta a cópia deste processo."""
+    global _catalogo
+    _catalogo = None
+    bump_version(CATALOG_VERSION_KEY)
+
+
+def _dumps(dados):
+    return json.dumps(dados, cls=DjangoJSONEncoder).encode()
+
+
+def _montar_catalogo(version):
+    perguntas = list(
+        ChatbotPergunta.objects.filter(ativo=True)
+        .order_by('categoria', 'ordem')
+        .values('id', 'pergunta', 'resposta', 'categoria')
+    )
+
+    por_id = {}
+    categorias = {}
+    for p in perguntas:
+        p['categoria'] = p['categoria'] or 'Geral'
+        por_id[p['id']] = p
+        categorias.setdefault(p['categoria'], []).append({'id': p['id'], 'pergunta': p['pergunta']})
+
+    iniciais = [
+        {'id': p['id'], 'pergunta': p['pergunta'], 'categoria': p['categoria']}
+        for p in perguntas[:PERGUNTAS_INICIAIS]
+    ]
+    return {
+        'version': version,
+        'por_id': por_id,
+        'iniciais': iniciais,
+        'categorias': categorias,
+        'iniciais_json': _dumps(iniciais),
+        'listar_json': _dumps({'success': True, 'categorias': categorias}),
+    }
+
+
+def get_catalog():
+    """Retorna o catálogo deste processo, recarregando-o se a versão mudou."""
+    global _catalogo, _verificado_em
+
+    agora = time.monotonic()
+    catalogo = _catalogo
+    if catalogo is not None and agora - _verificado_em < CATALOG_CHECK_INTERVAL:
+        return catalogo
+
+    version = get_catalog_version()
+    if catalogo is not None and catalogo['version'] == version:
+        _verificado_em = agora
+        return catalogo
+
+    with _lock:
+        if _catalogo is None or _catalogo['version'] != version:
+            _catalogo = _montar_catalogo(version)
+        _verificado_em = agora
+        return _catalogo
+
+
+def obter_pergunta(pergunta_id):
+    """Pergunta ativa pelo id (dict com id, pergunta, resposta e categoria) ou None."""
+    try:
+        return get_catalog()['por_id'].get(int(pergunta_id))
+    except (TypeError, ValueError):
+        return None
+
+
+def resposta_com_perguntas(dados, status=200):
+    """
+    JsonResponse equivalente a {**dados, 'perguntas': <perguntas iniciais>},
+    reaproveitando o JSON das perguntas já serializado no catálogo.
+    """
+    corpo = _dumps(dados)[:-1]
+    if dados:
+        corpo += b','
+    corpo += b' "perguntas": ' + get_catalog()['iniciais_json'] + b'}'
+    return HttpResponse(corpo, status=status, content_type='application/json')
+
+
+def resposta_listar_perguntas():
+    """Resposta completa de chatbot_listar_perguntas (bytes prontos do catálogo)."""
+    return HttpResponse(get_catalog()['listar_json'], content_type='application/json')
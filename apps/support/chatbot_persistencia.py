@@ -0,0 +1,223 @@
+"""
+Gravação das sessões e mensagens do chatbot.
+
+- O início da sessão (Lead, ChatbotSessao e mensagem de boas-vindas) é uma
+  única transação.
+- Cada turno (mensagem do visitante + resposta do bot) é gravado com um
+  único bulk_create, e a sessão é atualizada (atualizado_em) no mesmo bloco
+  atômico.
+
+Com CHATBOT_BUFFER_MENSAGENS ligado (tráfego alto de campanhas), os turnos
+vão para uma lista no Redis e são gravados em lotes pela task
+`descarregar_mensagens_chatbot`, agendada CHATBOT_BUFFER_INTERVALO segundos
+após o primeiro turno pendente. Nesse modo as mensagens aparecem no banco
+(admin, recuperar sessão) com esse atraso; se o Redis falhar, o turno é
+gravado direto no banco. A memória da IA (apps.support.memoria) não depende
+dessas mensagens.
+
+Cada descarga move o lote para uma lista de processamento (LMOVE) e só a
+apaga depois do commit: se o worker morrer no meio, a próxima descarga
+grava esse lote antes de puxar outro do buffer. Uma descarga por vez.
+
+Configurações (settings, todas opcionais):
+    CHATBOT_BUFFER_MENSAGENS  - bufferizar os turnos no Redis (padrão False)
+    CHATBOT_BUFFER_INTERVALO  - segundos até a descarga do buffer (padrão 5)
+    CHATBOT_BUFFER_LOTE       - mensagens por descarga (padrão 1000)
+"""
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, Value, When
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import ChatbotMensagem, ChatbotPergunta, ChatbotSessao, Lead
+
+logger = logging.getLogger(__name__)
+
+BUFFER_KEY = 'support:chatbot:mensagens'
+PROCESSANDO_KEY = 'support:chatbot:mensagens:processando'
+DESCARGA_KEY = 'support:chatbot:descarga_agendada'
+DESCARGA_TIMEOUT = 60
+DESCARGA_LOCK_KEY = 'support:chatbot:descarga_em_andamento'
+DESCARGA_LOCK_TIMEOUT = 60 * 5
+
+
+def _setting(nome, padrao):
+    return int(getattr(settings, nome, padrao))
+
+
+def _redis():
+    from django_redis import get_redis_connection
+    return get_redis_connection('default')
+
+
+def nova_mensagem(conteudo, is_bot=False, pergunta_id=None, criado_em=None):
+    """Dados de uma mensagem do turno (criado_em padrão: agora)."""
+    return {
+        'is_bot': is_bot,
+        'conteudo': conteudo,
+        'pergunta_relacionada_id': pergunta_id,
+        'criado_em': criado_em or timezone.now(),
+    }
+
+
+def iniciar_sessao(lead, sessao, boas_vindas):
+    """
+    Cria o Lead, a sessão e a mensagem de boas-vindas em uma transação.
+
+    Args:
+        lead: campos do Lead
+        sessao: campos da ChatbotSessao (sem o lead)
+        boas_vindas: texto da primeira mensagem do bot
+
+    Returns:
+        ChatbotSessao: sessão criada
+    """
+    with transaction.atomic():
+        lead = Lead.objects.create(**lead)
+        sessao = ChatbotSessao.objects.create(lead=lead, **sessao)
+        ChatbotMensagem.objects.create(sessao=sessao, is_bot=True, conteudo=boas_vindas)
+    return sessao
+
+
+def _gravar(sessao_id, mensagens):
+    with transaction.atomic():
+        ChatbotMensagem.objects.bulk_create([ChatbotMensagem(sessao_id=sessao_id, **m) for m in mensagens])
+        ChatbotSessao.objects.filter(pk=sessao_id).update(atualizado_em=timezone.now())
+
+
+def _bufferizar(sessao_id, mensagens):
+    """Acrescenta o turno ao buffer do Redis; False se o Redis falhar."""
+    try:
+        _redis().rpush(BUFFER_KEY, *[
+            json.dumps({**m, 'sessao_id': sessao_id, 'criado_em': m['criado_em'].isoformat()})
+            for m in mensagens
+        ])
+    except Exception as e:
+        logger.warning(f"Buffer de mensagens do chatbot indisponível, gravando direto: {e}")
+        return False
+    agendar_descarga()
+    return True
+
+
+def gravar_turno(sessao_id, mensagens):
+    """
+    Grava as mensagens de um turno (lista de `nova_mensagem`) e atualiza a
+    sessão: direto no banco ou, com CHATBOT_BUFFER_MENSAGENS, pelo buffer.
+    """
+    if getattr(settings, 'CHATBOT_BUFFER_MENSAGENS', False) and _bufferizar(sessao_id, mensagens):
+        return
+    _gravar(sessao_id, mensagens)
+
+
+async def gravar_turno_async(sessao_id, mensagens):
+    """Versão assíncrona de `gravar_turno`."""
+    await sync_to_async(gravar_turno)(sessao_id, mensagens)
+
+
+def agendar_descarga():
+    """Agenda a descarga do buffer (uma execução pendente por vez)."""
+    if not cache.add(DESCARGA_KEY, 1, DESCARGA_TIMEOUT):
+        return
+    from .tasks import descarregar_mensagens_chatbot
+    try:
+        descarregar_mensagens_chatbot.apply_async(countdown=_setting('CHATBOT_BUFFER_INTERVALO', 5))
+    except Exception as e:
+        cache.delete(DESCARGA_KEY)
+        logger.error(f"Erro ao agendar a gravação das mensagens do chatbot: {e}")
+
+
+def _reservar_lote(conexao, lote):
+    """
+    Lote a gravar: o que sobrou na lista de processamento (descarga
+    interrompida) ou até `lote` mensagens movidas do buffer para ela.
+    """
+    brutos = conexao.lrange(PROCESSANDO_KEY, 0, -1)
+    if brutos:
+        logger.warning(f"Chatbot: retomando {len(brutos)} mensagens de uma descarga interrompida")
+        return brutos
+    # LMOVEs em MULTI/EXEC: o lote sai do buffer de uma vez
+    with conexao.pipeline() as pipe:
+        for _ in range(lote):
+            pipe.lmove(BUFFER_KEY, PROCESSANDO_KEY, 'LEFT', 'RIGHT')
+        return [bruto for bruto in pipe.execute() if bruto is not None]
+
+
+def _gravar_lote(brutos):
+    """Grava as mensagens do lote (descartando as de sessões excluídas) e atualiza as sessões."""
+    itens = [json.loads(bruto) for bruto in brutos]
+    sessoes = set(ChatbotSessao.objects.filter(
+        pk__in={item['sessao_id'] for item in itens}
+    ).values_list('pk', flat=True))
+    perguntas = {item['pergunta_relacionada_id'] for item in itens} - {None}
+    if perguntas:
+        perguntas = set(ChatbotPergunta.objects.filter(pk__in=perguntas).values_list('pk', flat=True))
+
+    mensagens, ultimas = [], {}
+    for item in itens:
+        if item['sessao_id'] not in sessoes:
+            continue
+        criado_em = parse_datetime(item['criado_em'])
+        mensagens.append(ChatbotMensagem(
+            sessao_id=item['sessao_id'],
+            is_bot=item['is_bot'],
+            conteudo=item['conteudo'],
+            pergunta_relacionada_id=item['pergunta_relacionada_id'] if item['pergunta_relacionada_id'] in perguntas else None,
+            criado_em=criado_em,
+        ))
+        ultimas[item['sessao_id']] = max(criado_em, ultimas.get(item['sessao_id'], criado_em))
+
+    with transaction.atomic():
+        ChatbotMensagem.objects.bulk_create(mensagens, batch_size=500)
+        if ultimas:
+            ChatbotSessao.objects.filter(pk__in=ultimas).update(atualizado_em=Case(
+                *[When(pk=pk, then=Value(quando)) for pk, quando in ultimas.items()]
+            ))
+    logger.info(f"Chatbot: {len(mensagens)} mensagens gravadas do buffer ({len(ultimas)} sessões)")
+    return len(mensagens)
+
+
+def descarregar_buffer():
+    """
+    Grava um lote do buffer com um bulk_create e atualiza as sessões com um
+    único UPDATE. Mensagens de sessões excluídas nesse meio-tempo são
+    descartadas. Reagenda a si mesma se restarem mensagens.
+
+    O lote fica na lista de processamento até o commit; se a gravação falhar
+    (ou o worker morrer), a próxima execução grava o mesmo lote. Um worker
+    que morra entre o commit e a limpeza da lista faz o lote ser gravado de
+    novo (entrega ao menos uma vez).
+
+    Returns:
+        int: quantidade de mensagens gravadas
+    """
+    # Turnos bufferizados a partir de agora agendam uma nova execução
+    cache.delete(DESCARGA_KEY)
+    if not cache.add(DESCARGA_LOCK_KEY, 1, DESCARGA_LOCK_TIMEOUT):
+        # Outra descarga em andamento (ou interrompida): tenta de novo depois
+        agendar_descarga()
+        return 0
+
+    try:
+        conexao = _redis()
+        brutos = _reservar_lote(conexao, _setting('CHATBOT_BUFFER_LOTE', 1000))
+        if not brutos:
+            return 0
+        try:
+            gravadas = _gravar_lote(brutos)
+        except Exception:
+            # O lote continua na lista de processamento para a próxima execução
+            agendar_descarga()
+            raise
+        conexao.delete(PROCESSANDO_KEY)
+
+        if conexao.llen(BUFFER_KEY):
+            agendar_descarga()
+        return gravadas
+    finally:
+        cache.delete(DESCARGA_LOCK_KEY)
@@ -0,0 +1,113 @@
+"""
+Listagem de clientes (roster) do painel do staff.
+
+Busca usuários já unidos ao perfil Cliente em uma única consulta .values()
+(LEFT JOIN em cliente_profile), com filtros, paginação por cursor e um ETag
+forte derivado da versão da listagem (incrementada pelos signals de User e
+Cliente) e do último "atualizado_em" dos perfis. Clientes que fazem polling
+recebem 304 enquanto nada mudar.
+"""
+import hashlib
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Max, Q
+
+from gestao360_project.cache_versions import bump_version, get_version
+
+ROSTER_VERSION_KEY = 'support:clientes_roster:version'
+
+ROSTER_FIELDS = (
+    'id',
+    'username',
+    'first_name',
+    'last_name',
+    'email',
+    'date_joined',
+    'cliente_profile__telefone',
+    'cliente_profile__fase_abertura',
+    'cliente_profile__regime_tributario',
+    'cliente_profile__cnpj',
+    'cliente_profile__razao_social',
+    'cliente_profile__nome_fantasia',
+    'cliente_profile__endereco',
+    'cliente_profile__endereco_virtual_status',
+    'cliente_profile__certificado_digital_status',
+)
+
+# Parâmetros que alteram o conteúdo da resposta (entram no ETag)
+ROSTER_PARAMS = ('q', 'regime', 'fase', 'limit', 'cursor', 'sort', 'compat')
+
+
+def roster_queryset(params):
+    """
+    Queryset de usuários com os filtros da querystring aplicados.
+
+    Filtros: q (nome, usuário, e-mail, CNPJ ou razão social), regime, fase.
+    """
+    User = get_user_model()
+    qs = User.objects.all()
+
+    q = (params.get('q') or '').strip()
+    if q:
+        qs = qs.filter(
+            Q(first_name__icontains=q) | Q(last_name__icontains=q) |
+            Q(username__icontains=q) | Q(email__icontains=q) |
+            Q(cliente_profile__cnpj__icontains=q) |
+            Q(cliente_profile__razao_social__icontains=q)
+        )
+    regime = params.get('regime')
+    if regime:
+        qs = qs.filter(cliente_profile__regime_tributario=regime)
+    fase = params.get('fase')
+    if fase:
+        qs = qs.filter(cliente_profile__fase_abertura=fase)
+    return qs
+
+
+def invalidate_roster():
+    """Incrementa a versão da listagem (usuário ou perfil alterado/excluído)."""
+    bump_version(ROSTER_VERSION_KEY)
+
+
+def roster_etag(request):
+    """
+    ETag da listagem: muda quando um usuário ou perfil é salvo/excluído
+    (versão), quando algum perfil é atualizado por update() em lote, quando
+    usuários entram/saem do filtro ou quando os parâmetros da consulta mudam.
+    """
+    stats = roster_queryset(request.GET).aggregate(
+        total=Count('id'),
+        ultimo_id=Max('id'),
+        ultimo_perfil=Max('cliente_profile__atualizado_em'),
+    )
+    chave = '|'.join([
+        str(get_version(ROSTER_VERSION_KEY)),
+        str(stats['total']),
+        str(stats['ultimo_id']),
+        stats['ultimo_perfil'].isoformat() if stats['ultimo_perfil'] else '',
+        *(f"{p}={request.GET.get(p, '')}" for p in ROSTER_PARAMS),
+    ])
+    return hashlib.md5(chave.encode()).hexdigest()
+
+
+def serialize_roster_row(row):
+    nome = f"{row['first_name']} {row['last_name']}".strip() or row['username']
+    fase = row['cliente_profile__fase_abertura'] or 'fase_1'
+    tem_perfil = row['cliente_profile__fase_abertura'] is not None
+    return {
+        'id': row['id'],
+        'nome': nome,
+        'email': row['email'],
+        'telefone': row['cliente_profile__telefone'] if tem_perfil else 'N/D',
+        'fase': fase,
+        'regime': row['cliente_profile__regime_tributario'] or 'SN',
+        'fase_display': fase,
+        # Dados da empresa
+        'cnpj': row['cliente_profile__cnpj'],
+        'razao_social': row['cliente_profile__razao_social'],
+        'nome_fantasia': row['cliente_profile__nome_fantasia'],
+        'endereco': row['cliente_profile__endereco'],
+        # Serviços
+        'endereco_virtual_status': row['cliente_profile__endereco_virtual_status'] or 'nao_contratado',
+        'certificado_digital_status': row['cliente_profile__certificado_digital_status'] or 'nao_contratado',
+    }
@@ -0,0 +1,109 @@
+"""
+Motor de estatísticas do dashboard do staff.
+
+Calcula todos os contadores do painel (clientes por regime, assinaturas por
+plano e fila de leads) com agregação condicional e guarda o resultado como um
+snapshot versionado no cache (Redis). Os signals de Cliente, Subscription e
+Lead apenas incrementam a versão, invalidando o snapshot atual.
+"""
+import logging
+import time
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from apps.services.models import Subscription
+from gestao360_project.cache_versions import bump_version, get_version
+from .models import Cliente, Lead
+
+logger = logging.getLogger(__name__)
+
+STATS_VERSION_KEY = 'support:dashboard_stats:version'
+STATS_SNAPSHOT_KEY = 'support:dashboard_stats:v{version}'
+# O snapshot é invalidado pelos signals; o TTL é apenas uma rede de segurança
+STATS_TIMEOUT = 60 * 10
+
+
+def get_stats_version():
+    """Retorna a versão atual do snapshot (cria a chave se não existir)."""
+    return get_version(STATS_VERSION_KEY)
+
+
+def invalidate_dashboard_stats():
+    """Incrementa a versão do snapshot, tornando o snapshot atual obsoleto."""
+    bump_version(STATS_VERSION_KEY)
+
+
+def compute_dashboard_stats():
+    """
+    Calcula as estatísticas do dashboard direto no banco.
+
+    Usa uma consulta agregada por tabela (Cliente, Subscription e Lead) em vez
+    de um COUNT por filtro.
+    """
+    regime_aggregates = {
+        codigo: Count('id', filter=Q(regime_tributario=codigo))
+        for codigo, _label in Cliente.REGIME_CHOICES
+    }
+    clientes = Cliente.objects.filter(user__is_active=True).aggregate(
+        total=Count('id'),
+        **regime_aggregates
+    )
+
+    planos_data = [
+        {'nome': p['plano__nome'], 'total': p['total']}
+        for p in Subscription.objects.filter(status='ativa')
+        .values('plano__nome')
+        .annotate(total=Count('id'))
+        .order_by('-total')
+    ]
+
+    leads = Lead.objects.aggregate(**{
+        status: Count('id', filter=Q(status=status))
+        for status, _label in Lead.STATUS_CHOICES
+    })
+
+    return {
+        'clientes_ativos': clientes['total'],
+        'leads_pendentes': leads['pendente'],
+        'leads_em_atendimento': leads['em_atendimento'],
+        'regimes': {
+            label: clientes[codigo]
+            for codigo, label in Cliente.REGIME_CHOICES
+        },
+        'planos': planos_data,
+    }
+
+
+def get_dashboard_stats(fresh=False):
+    """
+    Retorna as estatísticas do dashboard a partir do snapshot em cache.
+
+    Args:
+        fresh: Se True, ignora o snapshot e recalcula no banco
+
+    Returns:
+        dict com os dados, a versão do snapshot, se veio do cache e a
+        latência medida (ms) da obtenção
+    """
+    inicio = time.perf_counter()
+    version = get_stats_version()
+    cache_key = STATS_SNAPSHOT_KEY.format(version=version)
+
+    snapshot = None if fresh else cache.get(cache_key)
+    from_cache = snapshot is not None
+
+    if snapshot is None:
+        snapshot = {
+            'data': compute_dashboard_stats(),
+            'versao': version,
+            'gerado_em': timezone.now().isoformat(),
+        }
+        cache.set(cache_key, snapshot, STATS_TIMEOUT)
+
+    return {
+        **snapshot,
+        'cache': from_cache,
+        'latencia_ms': round((time.perf_counter() - inicio) * 1000, 2),
+    }
@@ -2,9 +2,12 @@
 Serviço de Atendente IA usando Google Gemini
 Vetorial Contabilidade
 """
+import asyncio
 import os
 import logging
 
+from .ia_concorrencia import IAOcupada, limite_ia
+
 logger = logging.getLogger(__name__)
 
 # Contexto do sistema para o assistente
@@ -59,7 +62,11 @@ class GeminiService:
     def __init__(self):
         self.api_key = os.getenv('GEMINI_API_KEY', '')
         self.model = None
+        self.model_name = "gemini-1.5-flash-latest"
         self.chat = None
+        self._genai = None
+        # Modelos por prompt de sistema / limite de tokens (usados pelo roteador de IA)
+        self._modelos = {}
         
         if self.api_key:
             try:
@@ -83,11 +90,14 @@ class GeminiService:
                 }
                 
                 self.model = genai.GenerativeModel(
-                    model_name="gemini-1.5-flash-latest",
+                    model_name=self.model_name,
                     generation_config=generation_config,
                     safety_settings=safety_settings,
                     system_instruction=SYSTEM_PROMPT
                 )
+                self._genai = genai
+                self.generation_config = generation_config
+                self.safety_settings = safety_settings
                 
                 logger.info("Gemini client inicializado com sucesso")
             except Exception as e:
@@ -97,10 +107,63 @@ class GeminiService:
         """Verifica se o serviço está disponível"""
         return self.model is not None and bool(self.api_key)
     
-    def get_response(self, user_message: str, conversation_history: list = None) -> str:
+    def _modelo(self, system_prompt, max_tokens):
+        chave = (system_prompt, max_tokens)
+        modelo = self._modelos.get(chave)
+        if modelo is None:
+            modelo = self._genai.GenerativeModel(
+                model_name=self.model_name,
+                generation_config={**self.generation_config, "max_output_tokens": max_tokens},
+                safety_settings=self.safety_settings,
+                system_instruction=system_prompt,
+            )
+            self._modelos[chave] = modelo
+        return modelo
+    
+    def _chat(self, messages, max_tokens):
+        """Chat do Gemini a partir de mensagens no formato OpenAI/Groq."""
+        history = [
+            {"role": "model" if msg["role"] == "assistant" else "user", "parts": [msg["content"]]}
+            for msg in messages[1:-1]
+        ]
+        return self._modelo(messages[0]["content"], max_tokens).start_chat(history=history)
+    
+    async def completar(self, messages: list, max_tokens: int = 500):
+        """
+        Uma chamada ao Gemini (usada pelo roteador de IA). Erros são propagados.
+        
+        Args:
+            messages: Mensagens no formato OpenAI/Groq (system, histórico e usuário)
+            max_tokens: Limite de tokens da resposta
+        
+        Returns:
+            tuple[str, int]: resposta e total de tokens
+        """
+        response = await self._chat(messages, max_tokens).send_message_async(messages[-1]["content"])
+        return response.text.strip(), response.usage_metadata.total_token_count
+    
+    async def stream_completar(self, messages: list, max_tokens: int = 500, uso: dict = None):
+        """
+        Chamada ao Gemini em streaming (usada pelo roteador de IA).
+        
+        Yields:
+            str: trechos da resposta (o total de tokens vai para uso['tokens'])
+        """
+        response = await self._chat(messages, max_tokens).send_message_async(messages[-1]["content"], stream=True)
+        async for chunk in response:
+            # Chunks sem conteúdo (ex.: só metadados) não têm .text
+            if chunk.parts and chunk.text:
+                yield chunk.text
+            if uso is not None and getattr(chunk, 'usage_metadata', None):
+                uso['tokens'] = chunk.usage_metadata.total_token_count
+    
+    async def aget_response(self, user_message: str, conversation_history: list = None) -> str:
         """
         Obtém uma resposta do assistente IA.
         
+        Assíncrono: a espera pela API e o intervalo entre tentativas
+        (rate limit) não bloqueiam o worker.
+        
         Args:
             user_message: Mensagem do usuário
             conversation_history: Lista de mensagens anteriores [{"role": "user/model", "content": "..."}]
@@ -108,8 +171,6 @@ class GeminiService:
         Returns:
             Resposta do assistente
         """
-        import time
-        
         if not self.is_available():
             logger.warning("Gemini não está disponível")
             return "Desculpe, o atendente virtual está temporariamente indisponível. Por favor, entre em contato pelo WhatsApp (11) 3164-2284."
@@ -133,7 +194,8 @@ class GeminiService:
                 chat = self.model.start_chat(history=history)
                 
                 # Enviar mensagem e obter resposta
-                response = chat.send_message(user_message)
+                async with limite_ia():
+                    response = await chat.send_message_async(user_message)
                 
                 assistant_message = response.text.strip()
                 
@@ -141,6 +203,9 @@ class GeminiService:
                 
                 return assistant_message
             
+            except IAOcupada:
+                return "Estou processando muitas mensagens no momento. ⏳ Por favor, aguarde alguns segundos e tente novamente!"
+            
             except Exception as e:
                 error_msg = str(e)
                 logger.error(f"Erro ao obter resposta do Gemini (tentativa {attempt + 1}): {e}")
@@ -149,7 +214,7 @@ class GeminiService:
                 if ('quota' in error_msg.lower() or '429' in error_msg or 'resource_exhausted' in error_msg.lower()) and attempt < max_retries - 1:
                     wait_time = retry_delay * (attempt + 1)  # Backoff exponencial simples
                     logger.info(f"Rate limit atingido, aguardando {wait_time}s antes de tentar novamente...")
-                    time.sleep(wait_time)
+                    await asyncio.sleep(wait_time)
                     continue
                 
                 # Tratar erros específicos
@@ -164,32 +229,6 @@ class GeminiService:
         
         # Se chegou aqui sem retornar, algo deu errado
         return "Desculpe, não consegui processar sua mensagem. Tente novamente em alguns segundos."
-    
-    def get_conversation_history_from_session(self, sessao) -> list:
-        """
-        Extrai o histórico de conversa de uma sessão do chatbot.
-        
-        Args:
-            sessao: Objeto ChatbotSessao
-        
-        Returns:
-            Lista de mensagens formatadas para a API
-        """
-        from .models import ChatbotMensagem
-        
-        mensagens = ChatbotMensagem.objects.filter(
-            sessao=sessao
-        ).order_by('criado_em')[:20]  # Limitar a 20 mensagens
-        
-        history = []
-        for msg in mensagens:
-            role = "assistant" if msg.is_bot else "user"
-            history.append({
-                "role": role,
-                "content": msg.conteudo
-            })
-        
-        return history
 
 
 # Instância singleton do serviço
@@ -1,10 +1,20 @@
 """
 Serviço de Atendente IA usando Groq (Llama 3)
 Vetorial Contabilidade
+
+O cliente é assíncrono (AsyncGroq): as views de IA são views async e, no
+ASGI, não prendem o worker enquanto o modelo gera a resposta. As views usam
+o Groq através do roteador de IA (apps.support.llm_router).
+
+O pool de conexões do AsyncGroq fica preso ao event loop em que foi usado:
+há um cliente por loop (no WSGI, cada requisição async roda em um loop novo).
 """
+import asyncio
 import os
 import logging
-from groq import Groq
+import weakref
+
+from groq import AsyncGroq
 
 logger = logging.getLogger(__name__)
 
@@ -64,99 +74,95 @@ class GroqService:
     
     def __init__(self):
         self.api_key = os.getenv('GROQ_API_KEY', '')
-        self.client = None
         self.model = "llama-3.3-70b-versatile"  # Modelo mais capaz e gratuito
-        
-        if self.api_key:
-            try:
-                self.client = Groq(api_key=self.api_key)
-                logger.info("Groq client inicializado com sucesso")
-            except Exception as e:
-                logger.error(f"Erro ao inicializar Groq client: {e}")
+        # Um AsyncGroq por event loop (descartado junto com o loop)
+        self._clientes = weakref.WeakKeyDictionary()
     
     def is_available(self):
         """Verifica se o serviço está disponível"""
-        return self.client is not None and bool(self.api_key)
+        return bool(self.api_key)
     
-    def get_response(self, user_message: str, conversation_history: list = None) -> str:
+    def _cliente(self):
+        """AsyncGroq do event loop atual."""
+        loop = asyncio.get_running_loop()
+        cliente = self._clientes.get(loop)
+        if cliente is None:
+            cliente = self._clientes[loop] = AsyncGroq(api_key=self.api_key)
+        return cliente
+    
+    async def completar(self, messages: list, max_tokens: int = 500):
         """
-        Obtém uma resposta do assistente IA.
+        Uma chamada ao Groq (usada pelo roteador de IA). Erros são propagados.
         
         Args:
-            user_message: Mensagem do usuário
-            conversation_history: Lista de mensagens anteriores [{"role": "user/assistant", "content": "..."}]
+            messages: Mensagens no formato da API (system, histórico e usuário)
+            max_tokens: Limite de tokens da resposta
         
         Returns:
-            Resposta do assistente
+            tuple[str, int]: resposta e total de tokens
         """
-        if not self.is_available():
-            logger.warning("Groq não está disponível")
-            return "Desculpe, o atendente virtual está temporariamente indisponível. Por favor, entre em contato pelo WhatsApp (11) 3164-2284."
+        response = await self._cliente().chat.completions.create(
+            model=self.model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=0.7,
+        )
+        return response.choices[0].message.content.strip(), response.usage.total_tokens
+    
+    async def stream_completar(self, messages: list, max_tokens: int = 500, uso: dict = None):
+        """
+        Chamada ao Groq em streaming (usada pelo roteador de IA).
         
-        try:
-            # Construir mensagens
-            messages = [
-                {"role": "system", "content": SYSTEM_PROMPT}
-            ]
-            
-            # Adicionar histórico de conversa (últimas 10 mensagens para economizar tokens)
-            if conversation_history:
-                messages.extend(conversation_history[-10:])
-            
-            # Adicionar mensagem atual
-            messages.append({"role": "user", "content": user_message})
-            
-            # Fazer chamada à API
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                max_tokens=500,
-                temperature=0.7,
-            )
-            
-            assistant_message = response.choices[0].message.content.strip()
-            
-            logger.info(f"Groq resposta gerada. Tokens: {response.usage.total_tokens}")
-            
-            return assistant_message
+        Args:
+            messages: Mensagens no formato da API
+            max_tokens: Limite de tokens da resposta
+            uso: dict que recebe o total de tokens em uso['tokens'] ao fim
         
-        except Exception as e:
-            error_msg = str(e)
-            logger.error(f"Erro ao obter resposta do Groq: {e}")
-            
-            # Tratar erros específicos
-            if 'rate_limit' in error_msg.lower() or '429' in error_msg:
-                return "Estou processando muitas mensagens no momento. ⏳ Por favor, aguarde alguns segundos e tente novamente!"
-            elif 'invalid' in error_msg.lower() or '401' in error_msg or '403' in error_msg:
-                return "Atendente virtual temporariamente indisponível. Entre em contato pelo WhatsApp (11) 3164-2284."
-            else:
-                return "Desculpe, ocorreu um erro ao processar sua mensagem. Por favor, tente novamente ou entre em contato pelo WhatsApp (11) 3164-2284."
+        Yields:
+            str: trechos da resposta
+        """
+        stream = await self._cliente().chat.completions.create(
+            model=self.model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=0.7,
+            stream=True,
+        )
+        async for chunk in stream:
+            if chunk.choices:
+                trecho = chunk.choices[0].delta.content
+                if trecho:
+                    yield trecho
+            # O Groq envia o uso de tokens no último chunk (x_groq.usage)
+            usage = getattr(getattr(chunk, 'x_groq', None), 'usage', None)
+            if usage is not None and uso is not None:
+                uso['tokens'] = usage.total_tokens
     
-    def get_conversation_history_from_session(self, sessao) -> list:
+    async def aget_response(self, user_message: str, conversation_history: list = None) -> str:
         """
-        Extrai o histórico de conversa de uma sessão do chatbot.
+        Obtém uma resposta do atendente diretamente do Groq (sem roteador).
         
         Args:
-            sessao: Objeto ChatbotSessao
+            user_message: Mensagem do usuário
+            conversation_history: Lista de mensagens anteriores [{"role": "user/assistant", "content": "..."}]
         
         Returns:
-            Lista de mensagens formatadas para a API
+            Resposta do assistente (erros viram mensagens amigáveis)
         """
-        from .models import ChatbotMensagem
+        from .llm_router import mensagem_erro, montar_mensagens
         
-        mensagens = ChatbotMensagem.objects.filter(
-            sessao=sessao
-        ).order_by('criado_em')[:20]  # Limitar a 20 mensagens
+        if not self.is_available():
+            logger.warning("Groq não está disponível")
+            return "Desculpe, o atendente virtual está temporariamente indisponível. Por favor, entre em contato pelo WhatsApp (11) 3164-2284."
         
-        history = []
-        for msg in mensagens:
-            role = "assistant" if msg.is_bot else "user"
-            history.append({
-                "role": role,
-                "content": msg.conteudo
-            })
+        try:
+            resposta, tokens = await self.completar(montar_mensagens(SYSTEM_PROMPT, user_message, conversation_history))
+        except Exception as e:
+            logger.error(f"Erro ao obter resposta do Groq: {e}")
+            return mensagem_erro(e)
         
-        return history
+        logger.info(f"Groq resposta gerada. Tokens: {tokens}")
+        return resposta
 
 
 # Instância singleton do serviço
@@ -0,0 +1,211 @@
+"""
+Cache de respostas do assistente IA (Groq) por pergunta normalizada.
+
+A maioria das dúvidas se repete (limite do MEI, vencimento do DAS, Fator R...).
+Perguntas feitas sem contexto (primeira mensagem da conversa ou pergunta
+autocontida) são normalizadas (minúsculas, sem acentos, pontuação e
+stopwords) e a resposta fica na tabela RespostaIACache, com chave
+sha256(escopo + versão do prompt + pergunta normalizada). Alterar o prompt de
+sistema ou o modelo muda a versão e descarta as respostas antigas.
+
+- Expiração: IA_CACHE_TTL (padrão 7 dias).
+- LRU: a limpeza periódica mantém no máximo IA_CACHE_MAX_ENTRIES respostas,
+  removendo as acessadas há mais tempo.
+- Métricas (cache): acertos, erros, tokens e tempo economizados por escopo,
+  exibidas no admin de RespostaIACache.
+"""
+import hashlib
+import logging
+import re
+import unicodedata
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError
+from django.db.models import F
+from django.utils import timezone
+
+from .models import RespostaIACache
+
+logger = logging.getLogger(__name__)
+
+STATS_KEY = 'support:ia_cache:{escopo}:{nome}'
+STATS_NOMES = ('acertos', 'erros', 'tokens_economizados', 'ms_economizados')
+LIMPEZA_KEY = 'support:ia_cache:limpeza'
+LIMPEZA_INTERVALO = 60 * 60
+
+# Perguntas muito curtas ("e o valor?") dependem da conversa
+MIN_PALAVRAS = 2
+
+# Palavras que negam ou contrastam (com/sem, ou, não, nem, mais/menos) mudam
+# o sentido da pergunta e nunca entram aqui: "MEI com funcionário" e "MEI sem
+# funcionário" precisam de chaves diferentes
+STOPWORDS = frozenset("""
+a o as os um uma uns umas de do da dos das em no na nos nas por pelo pela pelos pelas
+para pra pro ao aos e que se me te lhe eu voce voces vc vcs meu minha
+seu sua eh ola oi bom boa dia tarde noite por favor obrigado obrigada gostaria
+queria quero saber poderia pode podem duvida
+""".split())
+
+# Palavras que fazem referência à conversa anterior
+REFERENCIAS_CONTEXTO = frozenset("""
+isso isto esse essa esses essas disso nisso desse dessa nesse nessa aquilo
+ele ela eles elas dele dela deles delas mesmo mesma anterior acima tambem
+entao ai caso
+""".split())
+
+_NAO_PALAVRA_RE = re.compile(r'[^a-z0-9]+')
+
+
+def _setting(nome, padrao):
+    return int(getattr(settings, nome, padrao))
+
+
+def _palavras(texto):
+    texto = unicodedata.normalize('NFKD', texto or '')
+    texto = ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+    return _NAO_PALAVRA_RE.sub(' ', texto).split()
+
+
+def normalizar_pergunta(texto):
+    """Pergunta sem acentos, maiúsculas, pontuação e stopwords."""
+    return ' '.join(p for p in _palavras(texto) if p not in STOPWORDS)[:500]
+
+
+def versao_prompt(system_prompt, model):
+    """Versão do prompt de sistema + modelo (muda quando qualquer um mudar)."""
+    return hashlib.sha256(f"{model}\n{system_prompt}".encode()).hexdigest()[:16]
+
+
+def pergunta_autocontida(texto):
+    """Indica se a pergunta faz sentido sem o restante da conversa."""
+    palavras = _palavras(texto)
+    if palavras and palavras[0] == 'e':
+        return False
+    if REFERENCIAS_CONTEXTO & set(palavras):
+        return False
+    return len([p for p in palavras if p not in STOPWORDS]) >= MIN_PALAVRAS
+
+
+def pode_usar_cache(mensagem, historico=None):
+    """
+    A resposta pode vir do (ou ir para o) cache quando é a primeira pergunta
+    do visitante ou quando a pergunta não depende da conversa.
+    """
+    if not normalizar_pergunta(mensagem):
+        return False
+    primeira = not any(m.get('role') == 'user' for m in historico or [])
+    return primeira or pergunta_autocontida(mensagem)
+
+
+def _chave(escopo, versao, normalizada):
+    return hashlib.sha256(f"{escopo}|{versao}|{normalizada}".encode()).hexdigest()
+
+
+def _incr(escopo, nome, valor=1):
+    key = STATS_KEY.format(escopo=escopo, nome=nome)
+    try:
+        cache.add(key, 0, None)
+        cache.incr(key, valor)
+    except Exception as e:
+        logger.debug(f"Métrica do cache IA não registrada ({key}): {e}")
+
+
+def buscar_resposta(escopo, mensagem, system_prompt, model):
+    """
+    Resposta em cache para a pergunta, ou None. Registra acerto/erro.
+    """
+    normalizada = normalizar_pergunta(mensagem)
+    chave = _chave(escopo, versao_prompt(system_prompt, model), normalizada)
+    agora = timezone.now()
+
+    entrada = RespostaIACache.objects.filter(chave=chave, expira_em__gt=agora).only(
+        'id', 'resposta', 'tokens', 'latencia_ms'
+    ).first()
+    if entrada is None:
+        _incr(escopo, 'erros')
+        return None
+
+    RespostaIACache.objects.filter(pk=entrada.pk).update(acertos=F('acertos') + 1, ultimo_acesso=agora)
+    _incr(escopo, 'acertos')
+    _incr(escopo, 'tokens_economizados', entrada.tokens)
+    _incr(escopo, 'ms_economizados', entrada.latencia_ms)
+    logger.info(f"Cache IA ({escopo}): acerto para '{normalizada[:60]}'")
+    return entrada.resposta
+
+
+def guardar_resposta(escopo, mensagem, system_prompt, model, resposta, tokens=0, latencia_ms=0):
+    """Grava (ou renova) a resposta gerada pela IA para a pergunta."""
+    normalizada = normalizar_pergunta(mensagem)
+    if not normalizada or not resposta:
+        return
+    versao = versao_prompt(system_prompt, model)
+    agora = timezone.now()
+    try:
+        RespostaIACache.objects.update_or_create(
+            chave=_chave(escopo, versao, normalizada),
+            defaults={
+                'escopo': escopo,
+                'versao_prompt': versao,
+                'pergunta_normalizada': normalizada,
+                'pergunta': mensagem[:1500],
+                'resposta': resposta,
+                'tokens': tokens or 0,
+                'latencia_ms': latencia_ms or 0,
+                'ultimo_acesso': agora,
+                'expira_em': agora + timedelta(seconds=_setting('IA_CACHE_TTL', 60 * 60 * 24 * 7)),
+            },
+        )
+    except IntegrityError:
+        # Outra requisição gravou a mesma pergunta ao mesmo tempo
+        return
+
+    if cache.add(LIMPEZA_KEY, 1, LIMPEZA_INTERVALO):
+        limpar_cache_ia()
+
+
+def limpar_cache_ia():
+    """
+    Remove respostas expiradas e, acima de IA_CACHE_MAX_ENTRIES, as acessadas
+    há mais tempo (LRU).
+
+    Returns:
+        int: quantidade de respostas removidas
+    """
+    removidas, _ = RespostaIACache.objects.filter(expira_em__lte=timezone.now()).delete()
+
+    maximo = _setting('IA_CACHE_MAX_ENTRIES', 2000)
+    excedentes = list(
+        RespostaIACache.objects.order_by('-ultimo_acesso').values_list('id', flat=True)[maximo:]
+    )
+    if excedentes:
+        removidas += RespostaIACache.objects.filter(id__in=excedentes).delete()[0]
+    if removidas:
+        logger.info(f"Cache IA: {removidas} respostas removidas")
+    return removidas
+
+
+def estatisticas():
+    """
+    Métricas do cache por escopo: acertos, erros, taxa de acerto e economia.
+
+    Returns:
+        dict: {escopo: {acertos, erros, taxa_acerto, tokens_economizados, segundos_economizados}}
+    """
+    escopos = [codigo for codigo, _label in RespostaIACache.ESCOPO_CHOICES]
+    keys = [STATS_KEY.format(escopo=e, nome=n) for e in escopos for n in STATS_NOMES]
+    valores = cache.get_many(keys)
+
+    resultado = {}
+    for escopo in escopos:
+        m = {n: valores.get(STATS_KEY.format(escopo=escopo, nome=n), 0) for n in STATS_NOMES}
+        total = m['acertos'] + m['erros']
+        resultado[escopo] = {
+            'acertos': m['acertos'],
+            'erros': m['erros'],
+            'taxa_acerto': round(100 * m['acertos'] / total, 1) if total else 0,
+            'tokens_economizados': m['tokens_economizados'],
+            'segundos_economizados': round(m['ms_economizados'] / 1000, 1),
+        }
+    return resultado
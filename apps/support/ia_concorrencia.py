@@ -0,0 +1,56 @@
+"""
+Limite de chamadas simultâneas aos provedores de IA (Groq/Gemini).
+
+As views de IA são assíncronas (servidas pelo asgi.py): enquanto a IA gera a
+resposta, o worker continua atendendo outras páginas. O semáforo evita que
+um pico de conversas abra centenas de conexões com o provedor (e estoure o
+rate limit): no máximo IA_MAX_CONCORRENCIA chamadas por processo; as demais
+aguardam até IA_FILA_TIMEOUT segundos e então recebem IAOcupada.
+
+Com os workers síncronos (WSGI, padrão) cada requisição roda em um loop
+próprio e o limite efetivo passa a ser o número de workers.
+"""
+import asyncio
+import logging
+import weakref
+from contextlib import asynccontextmanager
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Um semáforo por event loop (asyncio.Semaphore fica preso ao loop em que é usado)
+_semaforos = weakref.WeakKeyDictionary()
+
+
+class IAOcupada(Exception):
+    """Todas as vagas de chamada à IA deste processo estão em uso."""
+
+
+def _semaforo():
+    loop = asyncio.get_running_loop()
+    semaforo = _semaforos.get(loop)
+    if semaforo is None:
+        semaforo = asyncio.Semaphore(int(getattr(settings, 'IA_MAX_CONCORRENCIA', 8)))
+        _semaforos[loop] = semaforo
+    return semaforo
+
+
+@asynccontextmanager
+async def limite_ia():
+    """
+    Reserva uma vaga de chamada à IA durante o bloco.
+
+    Raises:
+        IAOcupada: se nenhuma vaga abrir em IA_FILA_TIMEOUT segundos
+    """
+    semaforo = _semaforo()
+    try:
+        await asyncio.wait_for(semaforo.acquire(), timeout=float(getattr(settings, 'IA_FILA_TIMEOUT', 10)))
+    except asyncio.TimeoutError:
+        logger.warning("Chamadas à IA no limite de concorrência; requisição recusada")
+        raise IAOcupada("Limite de chamadas simultâneas à IA atingido")
+    try:
+        yield
+    finally:
+        semaforo.release()
@@ -0,0 +1,450 @@
+"""
+Roteador de IA: escolhe, a cada pergunta, o provedor (Groq, Gemini, OpenAI)
+mais rápido entre os saudáveis.
+
+- Métricas por provedor (por processo): latência p50/p95 até a primeira
+  resposta (primeiro trecho, no streaming) e taxa de erro, numa janela das
+  últimas IA_JANELA_AMOSTRAS chamadas dos últimos IA_JANELA_SEGUNDOS.
+- Circuit breaker: IA_CIRCUITO_FALHAS falhas seguidas de provedor (429, 5xx,
+  401/403, timeout ou conexão) abrem o circuito por IA_CIRCUITO_ABERTO
+  segundos; depois disso uma única chamada de teste (meio-aberto) decide se
+  ele fecha ou volta a abrir.
+- Roteamento: provedores configurados e com circuito fechado, ordenados pela
+  latência mediana (penalizada pela taxa de erro). Provedor sem amostras
+  recentes fica com a pontuação mediana dos demais e, no máximo uma vez a
+  cada IA_EXPLORACAO_SEGUNDOS, é tentado primeiro para medir a latência
+  (exploração; em empate vale a ordem de IA_PROVEDORES). Se o provedor
+  falhar antes de responder, a pergunta segue para o próximo.
+- Hedge (opcional, IA_HEDGE_MS > 0): se o primeiro provedor não responder
+  (primeiro trecho) nesse tempo, o segundo é acionado em paralelo e vale a
+  resposta que chegar antes; a outra chamada é cancelada.
+
+O cache de respostas (apps.support.ia_cache) também fica aqui, antes de
+qualquer provedor.
+"""
+import asyncio
+import logging
+import statistics
+import threading
+import time
+from collections import deque
+from importlib import import_module
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .groq_service import SYSTEM_PROMPT
+from .ia_concorrencia import IAOcupada, limite_ia
+
+logger = logging.getLogger(__name__)
+
+# nome do provedor -> (módulo, instância do serviço)
+SERVICOS = {
+    'groq': ('apps.support.groq_service', 'groq_service'),
+    'gemini': ('apps.support.gemini_service', 'gemini_service'),
+    'openai': ('apps.support.openai_service', 'openai_service'),
+}
+
+FECHADO = 'fechado'
+ABERTO = 'aberto'
+MEIO_ABERTO = 'meio-aberto'
+
+
+class SemProvedorIA(Exception):
+    """Nenhum provedor de IA configurado ou com circuito fechado."""
+
+
+def _setting(nome, padrao):
+    return getattr(settings, nome, padrao)
+
+
+def montar_mensagens(system_prompt, user_message, conversation_history=None):
+    """
+    Mensagens no formato da API: system, histórico e usuário.
+
+    O histórico das views já vem limitado por tokens (apps.support.memoria).
+    """
+    messages = [{"role": "system", "content": system_prompt}]
+    if conversation_history:
+        messages.extend(conversation_history)
+    messages.append({"role": "user", "content": user_message})
+    return messages
+
+
+def mensagem_erro(exc) -> str:
+    """Mensagem amigável para uma falha na chamada à IA."""
+    error_msg = str(exc)
+    if isinstance(exc, IAOcupada) or 'rate_limit' in error_msg.lower() or '429' in error_msg:
+        return "Estou processando muitas mensagens no momento. ⏳ Por favor, aguarde alguns segundos e tente novamente!"
+    elif isinstance(exc, SemProvedorIA) or 'invalid' in error_msg.lower() or '401' in error_msg or '403' in error_msg:
+        return "Atendente virtual temporariamente indisponível. Entre em contato pelo WhatsApp (11) 3164-2284."
+    else:
+        return "Desculpe, ocorreu um erro ao processar sua mensagem. Por favor, tente novamente ou entre em contato pelo WhatsApp (11) 3164-2284."
+
+
+def falha_do_provedor(exc):
+    """
+    Indica se o erro é do provedor (conta para o circuit breaker): rate limit,
+    erro 5xx, credencial recusada, timeout ou falha de conexão.
+    """
+    status = getattr(exc, 'status_code', None) or getattr(exc, 'code', None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500 or status in (401, 403)
+    if isinstance(exc, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    nome = type(exc).__name__
+    return 'Timeout' in nome or 'Connection' in nome or '429' in str(exc)
+
+
+class Provedor:
+    """Provedor de IA no roteador: serviço, métricas e circuit breaker."""
+
+    def __init__(self, nome, servico, modelo):
+        self.nome = nome
+        self.servico = servico
+        self.modelo = modelo
+        self._amostras = deque(maxlen=int(_setting('IA_JANELA_AMOSTRAS', 50)))
+        self._falhas_seguidas = 0
+        self._aberto_ate = 0.0
+        self._testando = False
+        self._explorado_em = None
+        self._lock = threading.Lock()
+
+    def configurado(self):
+        return self.servico.is_available()
+
+    def estado(self):
+        if not self._aberto_ate:
+            return FECHADO
+        return ABERTO if time.monotonic() < self._aberto_ate else MEIO_ABERTO
+
+    def pode_tentar(self):
+        """Circuito fechado, ou meio-aberto sem chamada de teste em andamento."""
+        estado = self.estado()
+        return estado == FECHADO or (estado == MEIO_ABERTO and not self._testando)
+
+    def iniciar_tentativa(self):
+        with self._lock:
+            if self.estado() == MEIO_ABERTO:
+                self._testando = True
+
+    def cancelar_tentativa(self):
+        with self._lock:
+            self._testando = False
+
+    def registrar_sucesso(self, latencia_ms):
+        with self._lock:
+            self._amostras.append((time.monotonic(), latencia_ms, True))
+            if self._aberto_ate:
+                logger.info(f"IA: circuito do provedor {self.nome} fechado")
+            self._falhas_seguidas = 0
+            self._aberto_ate = 0.0
+            self._testando = False
+
+    def registrar_falha(self, exc):
+        with self._lock:
+            self._amostras.append((time.monotonic(), None, False))
+            self._testando = False
+            if not falha_do_provedor(exc):
+                return
+            self._falhas_seguidas += 1
+            meio_aberto = self.estado() == MEIO_ABERTO
+            if meio_aberto or self._falhas_seguidas >= int(_setting('IA_CIRCUITO_FALHAS', 3)):
+                segundos = int(_setting('IA_CIRCUITO_ABERTO', 30))
+                self._aberto_ate = time.monotonic() + segundos
+                logger.warning(
+                    f"IA: circuito do provedor {self.nome} aberto por {segundos}s "
+                    f"({self._falhas_seguidas} falhas seguidas; última: {exc})"
+                )
+
+    def _recentes(self):
+        limite = time.monotonic() - int(_setting('IA_JANELA_SEGUNDOS', 300))
+        return [a for a in list(self._amostras) if a[0] >= limite]
+
+    def metricas(self):
+        """p50/p95 de latência (ms), taxa de erro (%) e quantidade de amostras recentes."""
+        amostras = self._recentes()
+        latencias = sorted(a[1] for a in amostras if a[2])
+        erros = sum(1 for a in amostras if not a[2])
+        return {
+            'p50_ms': int(statistics.median(latencias)) if latencias else None,
+            'p95_ms': latencias[min(len(latencias) - 1, int(len(latencias) * 0.95))] if latencias else None,
+            'taxa_erro': round(100 * erros / len(amostras), 1) if amostras else 0,
+            'amostras': len(amostras),
+        }
+
+    def pontuacao(self):
+        """
+        Latência mediana penalizada pela taxa de erro: None sem amostras
+        recentes e infinito se todas as chamadas recentes falharam.
+        """
+        m = self.metricas()
+        if not m['amostras']:
+            return None
+        if m['p50_ms'] is None:
+            return float('inf')
+        return m['p50_ms'] * (1 + 2 * m['taxa_erro'] / 100)
+
+    def explorar(self, intervalo):
+        """Reserva a chamada de exploração, se a última foi há `intervalo` segundos ou mais."""
+        with self._lock:
+            agora = time.monotonic()
+            if self._explorado_em is not None and agora - self._explorado_em < intervalo:
+                return False
+            self._explorado_em = agora
+            return True
+
+    def status(self):
+        aberto_por = max(0, int(self._aberto_ate - time.monotonic())) if self._aberto_ate else 0
+        return {
+            'nome': self.nome,
+            'modelo': self.modelo,
+            'configurado': self.configurado(),
+            'circuito': self.estado(),
+            'reabre_em_s': aberto_por,
+            **self.metricas(),
+        }
+
+
+class LLMRouter:
+    """Roteia as perguntas para o provedor de IA mais rápido entre os saudáveis."""
+
+    def __init__(self, provedores):
+        self.provedores = provedores
+
+    @property
+    def versao_modelos(self):
+        """Identifica os modelos do roteador na versão do cache de respostas."""
+        return '+'.join(p.modelo for p in self.provedores)
+
+    def disponivel(self):
+        return any(p.configurado() for p in self.provedores)
+
+    def candidatos(self):
+        """
+        Provedores configurados e com circuito fechado, do mais rápido ao mais
+        lento, com o provedor a explorar (sem amostras recentes) à frente.
+        """
+        ativos = [p for p in self.provedores if p.configurado() and p.pode_tentar()]
+        pontuacoes = {p.nome: p.pontuacao() for p in ativos}
+        conhecidas = [v for v in pontuacoes.values() if v is not None and v != float('inf')]
+        neutra = statistics.median(conhecidas) if conhecidas else 0
+        # sorted é estável: em empate, vale a ordem de IA_PROVEDORES
+        ordenados = sorted(ativos, key=lambda p: neutra if pontuacoes[p.nome] is None else pontuacoes[p.nome])
+
+        intervalo = int(_setting('IA_EXPLORACAO_SEGUNDOS', 60))
+        for provedor in ordenados:
+            if pontuacoes[provedor.nome] is None and provedor.explorar(intervalo):
+                ordenados.remove(provedor)
+                ordenados.insert(0, provedor)
+                break
+        return ordenados
+
+    def status(self):
+        return [p.status() for p in self.provedores]
+
+    # ------------------------------------------------------------------
+    # Chamadas
+    # ------------------------------------------------------------------
+
+    async def _completar(self, provedor, messages, max_tokens):
+        provedor.iniciar_tentativa()
+        inicio = time.perf_counter()
+        try:
+            async with limite_ia():
+                resposta, tokens = await provedor.servico.completar(messages, max_tokens)
+        except (IAOcupada, asyncio.CancelledError):
+            provedor.cancelar_tentativa()
+            raise
+        except Exception as e:
+            provedor.registrar_falha(e)
+            raise
+        provedor.registrar_sucesso(int((time.perf_counter() - inicio) * 1000))
+        return provedor, (resposta, tokens)
+
+    async def _trechos(self, provedor, messages, max_tokens, uso):
+        async with limite_ia():
+            async for trecho in provedor.servico.stream_completar(messages, max_tokens, uso):
+                yield trecho
+
+    async def _abrir_stream(self, provedor, messages, max_tokens, uso):
+        """Abre o stream e aguarda o primeiro trecho: (provedor, (gerador, primeiro trecho))."""
+        provedor.iniciar_tentativa()
+        inicio = time.perf_counter()
+        trechos = self._trechos(provedor, messages, max_tokens, uso)
+        try:
+            primeiro = await trechos.__anext__()
+        except StopAsyncIteration:
+            primeiro = ''
+        except (IAOcupada, asyncio.CancelledError):
+            provedor.cancelar_tentativa()
+            await trechos.aclose()
+            raise
+        except Exception as e:
+            provedor.registrar_falha(e)
+            await trechos.aclose()
+            raise
+        provedor.registrar_sucesso(int((time.perf_counter() - inicio) * 1000))
+        return provedor, (trechos, primeiro)
+
+    async def _correr(self, chamar):
+        """
+        Executa `chamar(provedor)` no melhor candidato, passando ao próximo se
+        ele falhar (e acionando o segundo em paralelo, com hedge habilitado).
+
+        Returns:
+            tuple: (provedor vencedor, resultado de chamar)
+        """
+        fila = self.candidatos()
+        if not fila:
+            raise SemProvedorIA("Nenhum provedor de IA disponível")
+
+        hedge = int(_setting('IA_HEDGE_MS', 0)) / 1000
+        tarefas = []
+        pendentes = set()
+        vencedora = None
+        ultimo_erro = None
+
+        def acionar():
+            tarefa = asyncio.ensure_future(chamar(fila.pop(0)))
+            tarefas.append(tarefa)
+            pendentes.add(tarefa)
+
+        acionar()
+        try:
+            while pendentes:
+                espera = hedge if hedge and fila and len(pendentes) == 1 else None
+                prontos, pendentes = await asyncio.wait(pendentes, timeout=espera, return_when=asyncio.FIRST_COMPLETED)
+                if not prontos:
+                    # Hedge: o primeiro provedor está lento, aciona o próximo em paralelo
+                    hedge = 0
+                    acionar()
+                    continue
+                for tarefa in prontos:
+                    erro = tarefa.exception()
+                    if erro is None:
+                        vencedora = tarefa
+                        return tarefa.result()
+                    if isinstance(erro, IAOcupada):
+                        raise erro
+                    ultimo_erro = erro
+                    logger.warning(f"IA: falha no provedor, tentando o próximo: {erro}")
+                if not pendentes and fila:
+                    acionar()
+        finally:
+            await self._descartar([t for t in tarefas if t is not vencedora])
+        raise ultimo_erro
+
+    async def _descartar(self, tarefas):
+        """
+        Cancela as chamadas perdedoras e fecha os streams das que já tinham
+        aberto (inclusive as que terminaram junto com a vencedora), liberando
+        a vaga de limite_ia de cada uma.
+        """
+        for tarefa in tarefas:
+            tarefa.cancel()
+        for tarefa in tarefas:
+            try:
+                _provedor, resultado = await tarefa
+            except BaseException:
+                continue
+            if hasattr(resultado[0], 'aclose'):
+                await resultado[0].aclose()
+
+    async def gerar(self, user_message, conversation_history=None, system_prompt=SYSTEM_PROMPT,
+                    max_tokens=500, escopo='chatbot', usar_cache=True):
+        """
+        Resposta da IA pelo melhor provedor (consultando o cache de respostas,
+        exceto com usar_cache=False).
+
+        Erros são propagados: IAOcupada (limite de concorrência), SemProvedorIA
+        ou a falha do último provedor tentado.
+        """
+        from .ia_cache import buscar_resposta, guardar_resposta, pode_usar_cache
+
+        # Primeira pergunta ou pergunta sem contexto: tenta o cache de respostas
+        usar_cache = usar_cache and pode_usar_cache(user_message, conversation_history)
+        if usar_cache:
+            resposta = await sync_to_async(buscar_resposta)(escopo, user_message, system_prompt, self.versao_modelos)
+            if resposta:
+                return resposta
+
+        messages = montar_mensagens(system_prompt, user_message, conversation_history)
+        inicio = time.perf_counter()
+        provedor, (resposta, tokens) = await self._correr(
+            lambda p: self._completar(p, messages, max_tokens)
+        )
+        latencia_ms = int((time.perf_counter() - inicio) * 1000)
+        logger.info(f"IA ({escopo}): resposta de {provedor.nome} em {latencia_ms}ms. Tokens: {tokens}")
+
+        if usar_cache:
+            await sync_to_async(guardar_resposta)(
+                escopo, user_message, system_prompt, self.versao_modelos, resposta,
+                tokens=tokens, latencia_ms=latencia_ms,
+            )
+        return resposta
+
+    async def stream(self, user_message, conversation_history=None, system_prompt=SYSTEM_PROMPT,
+                     max_tokens=500, escopo='chatbot'):
+        """
+        Resposta da IA em trechos, pelo melhor provedor. A troca de provedor
+        (falha ou hedge) só acontece até o primeiro trecho.
+
+        Yields:
+            str: trechos da resposta
+        """
+        from .ia_cache import buscar_resposta, guardar_resposta, pode_usar_cache
+
+        usar_cache = pode_usar_cache(user_message, conversation_history)
+        if usar_cache:
+            resposta = await sync_to_async(buscar_resposta)(escopo, user_message, system_prompt, self.versao_modelos)
+            if resposta:
+                yield resposta
+                return
+
+        messages = montar_mensagens(system_prompt, user_message, conversation_history)
+        uso = {'tokens': 0}
+        inicio = time.perf_counter()
+        provedor, (trechos, primeiro) = await self._correr(
+            lambda p: self._abrir_stream(p, messages, max_tokens, uso)
+        )
+
+        partes = [primeiro] if primeiro else []
+        try:
+            if primeiro:
+                yield primeiro
+            async for trecho in trechos:
+                partes.append(trecho)
+                yield trecho
+        except Exception as e:
+            provedor.registrar_falha(e)
+            raise
+        finally:
+            await trechos.aclose()
+        latencia_ms = int((time.perf_counter() - inicio) * 1000)
+        logger.info(f"IA ({escopo}, stream): resposta de {provedor.nome} em {latencia_ms}ms. Tokens: {uso['tokens']}")
+
+        if usar_cache:
+            await sync_to_async(guardar_resposta)(
+                escopo, user_message, system_prompt, self.versao_modelos, ''.join(partes).strip(),
+                tokens=uso['tokens'], latencia_ms=latencia_ms,
+            )
+
+
+def carregar_provedores(nomes=None):
+    """Provedores de IA_PROVEDORES (os de SDK não instalado são ignorados)."""
+    provedores = []
+    for nome in nomes or _setting('IA_PROVEDORES', ['groq', 'gemini', 'openai']):
+        try:
+            modulo, instancia = SERVICOS[nome]
+            servico = getattr(import_module(modulo), instancia)
+        except (KeyError, ImportError) as e:
+            logger.warning(f"Provedor de IA '{nome}' ignorado: {e}")
+            continue
+        modelo = getattr(servico, 'model_name', None) or servico.model
+        provedores.append(Provedor(nome, servico, modelo))
+    return provedores
+
+
+# Instância singleton do roteador
+llm_router = LLMRouter(carregar_provedores())
@@ -0,0 +1,248 @@
+"""
+Memória das conversas com a IA, limitada por tokens.
+
+Cada conversa (sessão do chatbot ou cliente do assistente contábil) tem um
+registro MemoriaConversa com:
+
+- as mensagens recentes, dentro de IA_MEMORIA_TOKENS (estimativa de ~4
+  caracteres por token); a cada turno gravado, os turnos mais antigos que
+  estouram o orçamento saem da janela;
+- um resumo das mensagens que saíram, atualizado em segundo plano (task
+  resumir_memoria_conversa) pela própria IA, com até IA_RESUMO_TOKENS.
+
+Montar o prompt custa uma consulta (pela chave, única) e o tamanho do prompt
+não cresce com a conversa. Nada disso fica na sessão HTTP.
+
+As perguntas rápidas do chatbot não gravam na memória (a maioria das sessões
+nunca chega à IA): o atendente IA as busca nas mensagens da sessão clicadas
+desde o último turno com a IA e as grava junto com o próximo turno.
+
+Retenção: a memória do chatbot é excluída junto com a ChatbotSessao (e a do
+assistente, com o usuário), e a task periódica limpar_memorias_conversa
+remove as conversas sem atividade há mais de IA_MEMORIA_RETENCAO_DIAS dias.
+"""
+import logging
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ChatbotMensagem, MemoriaConversa
+
+logger = logging.getLogger(__name__)
+
+RESUMO_LOCK_KEY = 'support:memoria:resumo:{chave}'
+RESUMO_LOCK_TIMEOUT = 60 * 2
+
+PROMPT_RESUMO = """
+Você resume conversas de atendimento da Vetorial Contabilidade para que o
+assistente virtual continue o atendimento sem o histórico completo.
+
+Atualize o resumo com as novas mensagens. Mantenha os fatos informados pelo
+cliente (tipo de empresa, regime tributário, faturamento, prazos, dúvidas em
+aberto) e o que já foi respondido. Escreva em português, em texto corrido,
+sem saudações, com no máximo {palavras} palavras.
+"""
+
+
+def _setting(nome, padrao):
+    return int(getattr(settings, nome, padrao))
+
+
+def estimar_tokens(texto):
+    """Estimativa de tokens (~4 caracteres por token, + papel da mensagem)."""
+    return len(texto or '') // 4 + 4
+
+
+def chave_chatbot(session_key):
+    return f'chatbot:{session_key}'
+
+
+def chave_assistente(user_id):
+    return f'assistente:{user_id}'
+
+
+class Memoria:
+    """Memória de uma conversa carregada para montar o prompt do turno."""
+
+    def __init__(self, chave, resumo='', mensagens=None, atualizado_em=None):
+        self.chave = chave
+        self.resumo = resumo
+        self.mensagens = mensagens or []
+        self.atualizado_em = atualizado_em
+        # Mensagens de fora da memória (perguntas rápidas) a gravar com o turno
+        self.pendentes = []
+
+    @classmethod
+    async def carregar(cls, chave):
+        """Carrega resumo e mensagens recentes (uma consulta pela chave)."""
+        dados = await MemoriaConversa.objects.filter(chave=chave).values(
+            'resumo', 'mensagens', 'atualizado_em'
+        ).afirst()
+        return cls(chave, **dados) if dados else cls(chave)
+
+    async def incluir_perguntas_rapidas(self, sessao_id):
+        """
+        Acrescenta as perguntas rápidas (e respostas) da sessão do chatbot
+        clicadas desde o último turno gravado, até IA_MEMORIA_TOKENS.
+        """
+        filtro = {'sessao_id': sessao_id, 'pergunta_relacionada__isnull': False}
+        if self.atualizado_em:
+            filtro['criado_em__gt'] = self.atualizado_em
+        mensagens = [
+            {"role": "assistant" if is_bot else "user", "content": conteudo}
+            async for is_bot, conteudo in ChatbotMensagem.objects.filter(**filtro).order_by(
+                'criado_em', 'pk'
+            ).values_list('is_bot', 'conteudo')
+        ]
+        orcamento = _setting('IA_MEMORIA_TOKENS', 1500)
+        while mensagens and (
+            mensagens[0]['role'] != 'user' or sum(estimar_tokens(m['content']) for m in mensagens) > orcamento
+        ):
+            mensagens = mensagens[1:]
+        self.pendentes = mensagens
+        self.mensagens = self.mensagens + mensagens
+
+    def historico(self):
+        """Histórico para a IA: resumo (se houver) + mensagens recentes."""
+        historico = []
+        if self.resumo:
+            historico.append({"role": "system", "content": f"Resumo da conversa até aqui: {self.resumo}"})
+        return historico + self.mensagens
+
+    async def registrar(self, pergunta, resposta):
+        """Grava o turno (pergunta do usuário + resposta da IA)."""
+        await sync_to_async(registrar_turno)(self.chave, pergunta, resposta, anteriores=self.pendentes)
+        self.pendentes = []
+
+
+def registrar_turno(chave, pergunta, resposta, anteriores=()):
+    """
+    Acrescenta o turno (precedido de `anteriores`, se houver) à memória e
+    tira da janela os turnos mais antigos que estouram IA_MEMORIA_TOKENS (o
+    último turno sempre fica). Os que saem são resumidos em segundo plano.
+    """
+    orcamento = _setting('IA_MEMORIA_TOKENS', 1500)
+    with transaction.atomic():
+        memoria, _ = MemoriaConversa.objects.select_for_update().get_or_create(chave=chave)
+        novas = list(anteriores) + [
+            {"role": "user", "content": pergunta},
+            {"role": "assistant", "content": resposta},
+        ]
+        mensagens = memoria.mensagens + novas
+        saem = []
+        tokens = sum(estimar_tokens(m['content']) for m in mensagens)
+        # Turnos saem em pares (pergunta + resposta) para a janela não começar pela resposta
+        while len(mensagens) > 2 and tokens > orcamento:
+            tokens -= sum(estimar_tokens(m['content']) for m in mensagens[:2])
+            saem.extend(mensagens[:2])
+            mensagens = mensagens[2:]
+
+        memoria.mensagens = mensagens
+        memoria.a_resumir = memoria.a_resumir + saem
+        memoria.tokens = tokens + estimar_tokens(memoria.resumo)
+        memoria.total_mensagens += len(novas)
+        memoria.save()
+        if saem:
+            transaction.on_commit(lambda: agendar_resumo(chave))
+
+
+def agendar_resumo(chave):
+    """Agenda a task de resumo (uma por conversa de cada vez)."""
+    if not cache.add(RESUMO_LOCK_KEY.format(chave=chave), 1, RESUMO_LOCK_TIMEOUT):
+        return
+    from .tasks import resumir_memoria_conversa
+    try:
+        resumir_memoria_conversa.delay(chave)
+    except Exception as e:
+        cache.delete(RESUMO_LOCK_KEY.format(chave=chave))
+        logger.warning(f"Não foi possível agendar o resumo da conversa {chave}: {e}")
+
+
+def _transcricao(mensagens):
+    nomes = {'user': 'Cliente', 'assistant': 'Assistente'}
+    return '\n'.join(f"{nomes.get(m['role'], m['role'])}: {m['content']}" for m in mensagens)
+
+
+def _resumo_extrativo(resumo, mensagens, limite_caracteres):
+    """Resumo sem IA (provedores indisponíveis): perguntas do cliente, recortadas."""
+    perguntas = '; '.join(m['content'][:150] for m in mensagens if m['role'] == 'user')
+    resumo = f"{resumo} O cliente também perguntou: {perguntas}.".strip()
+    return resumo[-limite_caracteres:]
+
+
+def gerar_resumo(resumo, mensagens):
+    """Resumo atualizado com as mensagens (pela IA, ou extrativo se ela falhar)."""
+    from .llm_router import llm_router
+
+    limite_tokens = _setting('IA_RESUMO_TOKENS', 300)
+    texto = f"Resumo atual: {resumo or '(vazio)'}\n\nNovas mensagens:\n{_transcricao(mensagens)}"
+    try:
+        return async_to_sync(llm_router.gerar)(
+            texto,
+            system_prompt=PROMPT_RESUMO.format(palavras=int(limite_tokens * 0.6)),
+            max_tokens=limite_tokens,
+            escopo='resumo',
+            usar_cache=False,
+        )
+    except Exception as e:
+        logger.warning(f"Resumo da conversa pela IA falhou, usando resumo extrativo: {e}")
+        return _resumo_extrativo(resumo, mensagens, limite_tokens * 4)
+
+
+def resumir_memoria(chave):
+    """
+    Incorpora ao resumo as mensagens que saíram da janela.
+
+    A IA é chamada fora da transação; mensagens que saírem da janela nesse
+    meio-tempo ficam para a próxima execução.
+
+    Returns:
+        int: quantidade de mensagens resumidas
+    """
+    try:
+        dados = MemoriaConversa.objects.filter(chave=chave).values('resumo', 'a_resumir').first()
+        if not dados or not dados['a_resumir']:
+            return 0
+        pendentes = dados['a_resumir']
+        novo_resumo = gerar_resumo(dados['resumo'], pendentes)
+
+        with transaction.atomic():
+            memoria = MemoriaConversa.objects.select_for_update().filter(chave=chave).first()
+            if memoria is None:
+                return 0
+            memoria.resumo = novo_resumo
+            memoria.a_resumir = memoria.a_resumir[len(pendentes):]
+            memoria.tokens = sum(estimar_tokens(m['content']) for m in memoria.mensagens) + estimar_tokens(novo_resumo)
+            memoria.save(update_fields=['resumo', 'a_resumir', 'tokens', 'atualizado_em'])
+    finally:
+        cache.delete(RESUMO_LOCK_KEY.format(chave=chave))
+
+    if memoria.a_resumir:
+        agendar_resumo(chave)
+    return len(pendentes)
+
+
+def excluir_memoria(chave):
+    """Exclui a memória de uma conversa encerrada (sessão ou usuário excluído)."""
+    MemoriaConversa.objects.filter(chave=chave).delete()
+
+
+def limpar_memorias(dias=None):
+    """
+    Exclui as memórias sem atividade há mais de `dias` dias (padrão:
+    IA_MEMORIA_RETENCAO_DIAS).
+
+    Returns:
+        int: quantidade de memórias excluídas
+    """
+    if dias is None:
+        dias = _setting('IA_MEMORIA_RETENCAO_DIAS', 30)
+    limite = timezone.now() - timedelta(days=dias)
+    excluidas, _ = MemoriaConversa.objects.filter(atualizado_em__lt=limite).delete()
+    if excluidas:
+        logger.info(f"Memória da IA: {excluidas} conversas sem atividade há {dias} dias excluídas")
+    return excluidas
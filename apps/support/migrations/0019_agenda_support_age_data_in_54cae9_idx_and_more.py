@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('support', '0018_alter_lead_estado_alter_lead_servico_interesse'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='agenda',
+            index=models.Index(fields=['data_inicio', 'id'], name='support_age_data_in_54cae9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='agenda',
+            index=models.Index(fields=['status', 'data_inicio', 'id'], name='support_age_status_1f6442_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['criado_em', 'id'], name='support_lea_criado__e3d04b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['status', 'criado_em', 'id'], name='support_lea_status_08232e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stafftask',
+            index=models.Index(fields=['updated_at', 'id'], name='support_sta_updated_7317a2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stafftask',
+            index=models.Index(fields=['status', 'updated_at', 'id'], name='support_sta_status_8817b8_idx'),
+        ),
+    ]
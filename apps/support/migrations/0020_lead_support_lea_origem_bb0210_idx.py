@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('support', '0019_agenda_support_age_data_in_54cae9_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['origem', 'criado_em', 'id'], name='support_lea_origem_bb0210_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('support', '0021_cliente_atualizado_em'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RespostaIACache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chave', models.CharField(max_length=64, unique=True)),
+                ('escopo', models.CharField(choices=[('chatbot', 'Chatbot do site'), ('assistente', 'Assistente contábil')], max_length=20, verbose_name='Escopo')),
+                ('versao_prompt', models.CharField(max_length=16, verbose_name='Versão do prompt')),
+                ('pergunta_normalizada', models.CharField(max_length=500, verbose_name='Pergunta normalizada')),
+                ('pergunta', models.TextField(verbose_name='Pergunta (exemplo)')),
+                ('resposta', models.TextField(verbose_name='Resposta')),
+                ('tokens', models.PositiveIntegerField(default=0, verbose_name='Tokens')),
+                ('latencia_ms', models.PositiveIntegerField(default=0, verbose_name='Latência (ms)')),
+                ('acertos', models.PositiveIntegerField(default=0, verbose_name='Acertos')),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('ultimo_acesso', models.DateTimeField(verbose_name='Último acesso')),
+                ('expira_em', models.DateTimeField(verbose_name='Expira em')),
+            ],
+            options={
+                'verbose_name': 'Resposta IA em cache',
+                'verbose_name_plural': 'Respostas IA em cache',
+                'ordering': ['-acertos', '-ultimo_acesso'],
+                'indexes': [models.Index(fields=['ultimo_acesso'], name='support_res_ultimo__743a62_idx'), models.Index(fields=['expira_em'], name='support_res_expira__8cece8_idx')],
+            },
+        ),
+    ]
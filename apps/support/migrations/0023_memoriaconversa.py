@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('support', '0022_respostaiacache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MemoriaConversa',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chave', models.CharField(max_length=100, unique=True, verbose_name='Conversa')),
+                ('resumo', models.TextField(blank=True, verbose_name='Resumo das mensagens antigas')),
+                ('mensagens', models.JSONField(default=list, verbose_name='Mensagens recentes')),
+                ('a_resumir', models.JSONField(default=list, verbose_name='Mensagens a resumir')),
+                ('tokens', models.PositiveIntegerField(default=0, verbose_name='Tokens (estimativa)')),
+                ('total_mensagens', models.PositiveIntegerField(default=0, verbose_name='Total de mensagens')),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Memória de conversa IA',
+                'verbose_name_plural': 'Memórias de conversa IA',
+                'ordering': ['-atualizado_em'],
+            },
+        ),
+    ]
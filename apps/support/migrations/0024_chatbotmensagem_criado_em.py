@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:08
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('support', '0023_memoriaconversa'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='chatbotmensagem',
+            options={'ordering': ['criado_em', 'id'], 'verbose_name': 'Mensagem do Chatbot', 'verbose_name_plural': 'Mensagens do Chatbot'},
+        ),
+        migrations.AlterField(
+            model_name='chatbotmensagem',
+            name='criado_em',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('support', '0024_chatbotmensagem_criado_em'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='stafftask',
+            index=models.Index(fields=['created_at', 'id'], name='support_sta_created_c871d9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stafftask',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='support_sta_status_ecbd14_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('support', '0025_stafftask_support_sta_created_c871d9_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='memoriaconversa',
+            index=models.Index(fields=['atualizado_em'], name='support_mem_atualiz_493668_idx'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 # Create your models here.
 
@@ -31,6 +32,13 @@ class Lead(models.Model):
         verbose_name = 'Lead'
         verbose_name_plural = 'Leads'
         ordering = ['-criado_em']
+        indexes = [
+            # Paginação por cursor (criado_em, id) com e sem filtro de status
+            models.Index(fields=['criado_em', 'id']),
+            models.Index(fields=['status', 'criado_em', 'id']),
+            # Leads antigos dos formulários MEI no feed de serviços MEI
+            models.Index(fields=['origem', 'criado_em', 'id']),
+        ]
 
     STATUS_CHOICES = [
         ('pendente', 'Pendente'),
@@ -259,6 +267,8 @@ class Cliente(models.Model):
         verbose_name='Validade Certificado Digital'
     )
 
+    atualizado_em = models.DateTimeField(auto_now=True, db_index=True, verbose_name='Atualizado em')
+
     class Meta:
         verbose_name = 'Cliente'
         verbose_name_plural = 'Clientes'
@@ -382,6 +392,12 @@ class StaffTask(models.Model):
         verbose_name = 'Tarefa Interna'
         verbose_name_plural = 'Tarefas Internas'
         ordering = ['-updated_at']
+        indexes = [
+            models.Index(fields=['updated_at', 'id']),
+            models.Index(fields=['status', 'updated_at', 'id']),
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['status', 'created_at', 'id']),
+        ]
 
     def __str__(self):
         return self.title
@@ -421,6 +437,10 @@ class Agenda(models.Model):
         verbose_name = 'Item de Agenda'
         verbose_name_plural = 'Itens de Agenda'
         ordering = ['data_inicio']
+        indexes = [
+            models.Index(fields=['data_inicio', 'id']),
+            models.Index(fields=['status', 'data_inicio', 'id']),
+        ]
     
     def __str__(self):
         return f"{self.titulo} - {self.data_inicio}"
@@ -542,13 +562,85 @@ class ChatbotMensagem(models.Model):
         blank=True
     )
     
-    criado_em = models.DateTimeField(auto_now_add=True)
+    # Não é auto_now_add: mensagens gravadas em lote (buffer) mantêm o horário do turno
+    criado_em = models.DateTimeField(default=timezone.now, editable=False)
     
     class Meta:
         verbose_name = 'Mensagem do Chatbot'
         verbose_name_plural = 'Mensagens do Chatbot'
-        ordering = ['criado_em']
+        ordering = ['criado_em', 'id']
     
     def __str__(self):
         tipo = "Bot" if self.is_bot else "Visitante"
         return f"[{tipo}] {self.conteudo[:50]}..."
+
+
+class RespostaIACache(models.Model):
+    """
+    Respostas do assistente IA em cache, por pergunta normalizada.
+
+    A chave combina o escopo (chatbot do site ou assistente da área do
+    cliente), a versão do prompt de sistema/modelo e a pergunta normalizada
+    (ver apps.support.ia_cache).
+    """
+    ESCOPO_CHOICES = [
+        ('chatbot', 'Chatbot do site'),
+        ('assistente', 'Assistente contábil'),
+    ]
+    
+    chave = models.CharField(max_length=64, unique=True)
+    escopo = models.CharField(max_length=20, choices=ESCOPO_CHOICES, verbose_name='Escopo')
+    versao_prompt = models.CharField(max_length=16, verbose_name='Versão do prompt')
+    pergunta_normalizada = models.CharField(max_length=500, verbose_name='Pergunta normalizada')
+    pergunta = models.TextField(verbose_name='Pergunta (exemplo)')
+    resposta = models.TextField(verbose_name='Resposta')
+    
+    # Custo da resposta original (para estimar a economia a cada acerto)
+    tokens = models.PositiveIntegerField(default=0, verbose_name='Tokens')
+    latencia_ms = models.PositiveIntegerField(default=0, verbose_name='Latência (ms)')
+    
+    acertos = models.PositiveIntegerField(default=0, verbose_name='Acertos')
+    criado_em = models.DateTimeField(auto_now_add=True)
+    ultimo_acesso = models.DateTimeField(verbose_name='Último acesso')
+    expira_em = models.DateTimeField(verbose_name='Expira em')
+    
+    class Meta:
+        verbose_name = 'Resposta IA em cache'
+        verbose_name_plural = 'Respostas IA em cache'
+        ordering = ['-acertos', '-ultimo_acesso']
+        indexes = [
+            models.Index(fields=['ultimo_acesso']),
+            models.Index(fields=['expira_em']),
+        ]
+    
+    def __str__(self):
+        return f"[{self.escopo}] {self.pergunta_normalizada[:80]}"
+
+
+class MemoriaConversa(models.Model):
+    """
+    Memória de uma conversa com a IA (chatbot do site ou assistente contábil).
+
+    Guarda as mensagens recentes dentro de um orçamento de tokens e um resumo
+    das mais antigas (ver apps.support.memoria), fora da sessão HTTP.
+    """
+    chave = models.CharField(max_length=100, unique=True, verbose_name='Conversa')
+    resumo = models.TextField(blank=True, verbose_name='Resumo das mensagens antigas')
+    mensagens = models.JSONField(default=list, verbose_name='Mensagens recentes')
+    # Mensagens que saíram da janela e ainda não entraram no resumo
+    a_resumir = models.JSONField(default=list, verbose_name='Mensagens a resumir')
+    tokens = models.PositiveIntegerField(default=0, verbose_name='Tokens (estimativa)')
+    total_mensagens = models.PositiveIntegerField(default=0, verbose_name='Total de mensagens')
+    atualizado_em = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Memória de conversa IA'
+        verbose_name_plural = 'Memórias de conversa IA'
+        ordering = ['-atualizado_em']
+        indexes = [
+            # Limpeza das conversas sem atividade (limpar_memorias)
+            models.Index(fields=['atualizado_em']),
+        ]
+    
+    def __str__(self):
+        return self.chave
@@ -1,10 +1,15 @@
 """
 Serviço de Atendente IA usando OpenAI GPT
 Vetorial Contabilidade
+
+O AsyncOpenAI (roteador de IA) é criado por event loop, como no Groq
+(apps.support.groq_service); get_response usa o cliente síncrono.
 """
+import asyncio
 import os
 import logging
-from openai import OpenAI
+import weakref
+from openai import AsyncOpenAI, OpenAI
 from django.conf import settings
 
 logger = logging.getLogger(__name__)
@@ -62,6 +67,8 @@ class OpenAIService:
         self.api_key = os.getenv('OPENAI_API_KEY', '')
         self.client = None
         self.model = "gpt-4o-mini"  # Modelo mais econômico e eficiente
+        # Um AsyncOpenAI por event loop (descartado junto com o loop)
+        self._clientes = weakref.WeakKeyDictionary()
         
         if self.api_key:
             try:
@@ -74,6 +81,52 @@ class OpenAIService:
         """Verifica se o serviço está disponível"""
         return self.client is not None and bool(self.api_key)
     
+    def _cliente_async(self):
+        """AsyncOpenAI do event loop atual."""
+        loop = asyncio.get_running_loop()
+        cliente = self._clientes.get(loop)
+        if cliente is None:
+            cliente = self._clientes[loop] = AsyncOpenAI(api_key=self.api_key)
+        return cliente
+    
+    async def completar(self, messages: list, max_tokens: int = 500):
+        """
+        Uma chamada assíncrona à OpenAI (usada pelo roteador de IA). Erros são propagados.
+        
+        Returns:
+            tuple[str, int]: resposta e total de tokens
+        """
+        response = await self._cliente_async().chat.completions.create(
+            model=self.model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=0.7,
+        )
+        return response.choices[0].message.content.strip(), response.usage.total_tokens
+    
+    async def stream_completar(self, messages: list, max_tokens: int = 500, uso: dict = None):
+        """
+        Chamada à OpenAI em streaming (usada pelo roteador de IA).
+        
+        Yields:
+            str: trechos da resposta (o total de tokens vai para uso['tokens'])
+        """
+        stream = await self._cliente_async().chat.completions.create(
+            model=self.model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=0.7,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        async for chunk in stream:
+            if chunk.choices:
+                trecho = chunk.choices[0].delta.content
+                if trecho:
+                    yield trecho
+            if chunk.usage is not None and uso is not None:
+                uso['tokens'] = chunk.usage.total_tokens
+    
     def get_response(self, user_message: str, conversation_history: list = None) -> str:
         """
         Obtém uma resposta do assistente IA.
@@ -129,32 +182,6 @@ class OpenAIService:
                 return "Atendente virtual temporariamente indisponível. Entre em contato pelo WhatsApp (11) 3164-2284."
             else:
                 return "Desculpe, ocorreu um erro ao processar sua mensagem. Por favor, tente novamente ou entre em contato pelo WhatsApp (11) 3164-2284."
-    
-    def get_conversation_history_from_session(self, sessao) -> list:
-        """
-        Extrai o histórico de conversa de uma sessão do chatbot.
-        
-        Args:
-            sessao: Objeto ChatbotSessao
-        
-        Returns:
-            Lista de mensagens formatadas para a API
-        """
-        from .models import ChatbotMensagem
-        
-        mensagens = ChatbotMensagem.objects.filter(
-            sessao=sessao
-        ).order_by('criado_em')[:20]  # Limitar a 20 mensagens
-        
-        history = []
-        for msg in mensagens:
-            role = "assistant" if msg.is_bot else "user"
-            history.append({
-                "role": role,
-                "content": msg.conteudo
-            })
-        
-        return history
 
 
 # Instância singleton do serviço
@@ -0,0 +1,187 @@
+"""
+Paginação por cursor (keyset) para as APIs de listagem do painel do staff.
+
+Em vez de OFFSET, cada página continua a partir dos valores de ordenação do
+último item retornado, o que mantém o custo de páginas profundas igual ao da
+primeira página quando existe um índice composto (campo_ordenacao, id).
+
+Parâmetros aceitos na querystring:
+    limit  - itens por página (padrão 50, máximo 200)
+    cursor - token opaco devolvido em pagination.next_cursor
+    sort   - um dos campos permitidos pela view (prefixo "-" para decrescente)
+    compat - "1" devolve a lista completa no formato antigo (sem paginação)
+"""
+import base64
+import datetime
+import json
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+
+class InvalidCursor(ValueError):
+    """Cursor ou parâmetro de paginação inválido."""
+
+
+def is_compat_request(request):
+    """Indica se o cliente pediu o formato antigo (lista completa)."""
+    return request.GET.get('compat') == '1'
+
+
+def parse_limit(request, default=DEFAULT_LIMIT):
+    try:
+        limit = int(request.GET.get('limit', default))
+    except (TypeError, ValueError):
+        raise InvalidCursor('Parâmetro limit inválido')
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def _encode_value(value):
+    if isinstance(value, datetime.datetime):
+        return {'dt': value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {'d': value.isoformat()}
+    if isinstance(value, Decimal):
+        return {'dec': str(value)}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if 'dt' in value:
+            return datetime.datetime.fromisoformat(value['dt'])
+        if 'd' in value:
+            return datetime.date.fromisoformat(value['d'])
+        if 'dec' in value:
+            return Decimal(value['dec'])
+    return value
+
+
+def encode_cursor(values):
+    """Serializa os valores de ordenação do último item em um token opaco."""
+    raw = json.dumps([_encode_value(v) for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return [_decode_value(v) for v in values]
+    except Exception:
+        raise InvalidCursor('Cursor inválido')
+
+
+def keyset_filter(ordering, values):
+    """
+    Monta o filtro "depois do cursor" para uma ordenação composta.
+
+    Para ordering=('-criado_em', '-id') e values=(t, 10) gera:
+        criado_em < t OR (criado_em = t AND id < 10)
+    """
+    condition = Q()
+    equal_prefix = Q()
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        condition |= equal_prefix & Q(**{f'{name}__{lookup}': value})
+        equal_prefix &= Q(**{name: value})
+    return condition
+
+
+class KeysetPaginator:
+    """
+    Pagina um queryset por cursor.
+
+    Args:
+        queryset: Queryset já filtrado
+        sort_fields: dict {nome_publico: campo_do_model} com as ordenações permitidas
+        default_sort: ordenação padrão (ex: '-criado_em')
+    """
+
+    def __init__(self, queryset, sort_fields, default_sort):
+        self.queryset = queryset
+        self.sort_fields = sort_fields
+        self.default_sort = default_sort
+
+    def get_ordering(self, sort):
+        sort = sort or self.default_sort
+        descending = sort.startswith('-')
+        field = self.sort_fields.get(sort.lstrip('-'))
+        if field is None:
+            raise InvalidCursor(f'Ordenação não permitida: {sort}')
+        prefix = '-' if descending else ''
+        # O id desempata itens com o mesmo valor de ordenação
+        return (f'{prefix}{field}', f'{prefix}id')
+
+    def _coerce(self, ordering, values):
+        """
+        Converte os valores do cursor com o to_python de cada campo; um valor
+        do tipo errado vira InvalidCursor (400) em vez de erro na consulta.
+        """
+        opts = self.queryset.model._meta
+        coerced = []
+        for field, value in zip(ordering, values):
+            try:
+                model_field = opts.get_field(field.lstrip('-'))
+            except FieldDoesNotExist:
+                # Anotações e campos relacionados: usados como vieram
+                coerced.append(value)
+                continue
+            try:
+                value = model_field.to_python(value)
+            except (ValidationError, AttributeError, TypeError, ValueError):
+                raise InvalidCursor('Cursor inválido')
+            if value is None:
+                raise InvalidCursor('Cursor inválido')
+            coerced.append(value)
+        return coerced
+
+    def paginate(self, request):
+        """
+        Retorna (itens, pagination) onde pagination descreve a próxima página.
+        """
+        limit = parse_limit(request)
+        sort = request.GET.get('sort') or self.default_sort
+        ordering = self.get_ordering(sort)
+
+        qs = self.queryset.order_by(*ordering)
+        cursor = request.GET.get('cursor')
+        if cursor:
+            values = decode_cursor(cursor)
+            if len(values) != len(ordering):
+                raise InvalidCursor('Cursor inválido')
+            qs = qs.filter(keyset_filter(ordering, self._coerce(ordering, values)))
+
+        items = list(qs[:limit + 1])
+        has_more = len(items) > limit
+        items = items[:limit]
+
+        next_cursor = None
+        if has_more and items:
+            last = items[-1]
+            next_cursor = encode_cursor([
+                _get_attr(last, field.lstrip('-')) for field in ordering
+            ])
+
+        return items, {
+            'limit': limit,
+            'sort': sort,
+            'has_more': has_more,
+            'next_cursor': next_cursor,
+        }
+
+
+def _get_attr(obj, name):
+    if isinstance(obj, dict):
+        return obj[name]
+    return getattr(obj, name)
+
+
+def paginated_response_data(data, pagination):
+    """Corpo padrão das respostas paginadas."""
+    return {'success': True, 'data': data, 'pagination': pagination}
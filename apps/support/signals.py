@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from apps.services.models import Subscription
+from .models import ChatbotPergunta, ChatbotSessao, Cliente, Lead
+from .chatbot_catalog import invalidate_chatbot_catalog
+from .clientes_roster import invalidate_roster
+from .dashboard_stats import invalidate_dashboard_stats
+from .memoria import chave_assistente, chave_chatbot, excluir_memoria
+
+
+@receiver([post_save, post_delete], sender=Cliente)
+@receiver([post_save, post_delete], sender=Subscription)
+@receiver([post_save, post_delete], sender=Lead)
+def invalidar_estatisticas_dashboard(sender, **kwargs):
+    """
+    Invalida o snapshot de estatísticas do dashboard do staff sempre que
+    clientes, assinaturas ou leads forem alterados.
+    """
+    invalidate_dashboard_stats()
+
+
+@receiver([post_save, post_delete], sender=ChatbotPergunta)
+def invalidar_catalogo_chatbot(sender, **kwargs):
+    """
+    Invalida o catálogo de perguntas do chatbot. Invalida de novo após o
+    commit, para que nenhum processo guarde uma cópia lida antes do commit.
+    """
+    invalidate_chatbot_catalog()
+    transaction.on_commit(invalidate_chatbot_catalog)
+
+
+@receiver([post_save, post_delete], sender=settings.AUTH_USER_MODEL)
+@receiver([post_save, post_delete], sender=Cliente)
+def invalidar_listagem_clientes(sender, update_fields=None, **kwargs):
+    """
+    Invalida o ETag da listagem de clientes quando um usuário (com ou sem
+    perfil Cliente) ou um perfil é salvo ou excluído.
+    Ignora o save de last_login feito a cada login.
+    """
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    invalidate_roster()
+
+
+@receiver(post_delete, sender=ChatbotSessao)
+def excluir_memoria_chatbot(sender, instance, **kwargs):
+    """A memória da IA não sobrevive à sessão do chatbot."""
+    excluir_memoria(chave_chatbot(instance.session_key))
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def excluir_memoria_assistente(sender, instance, **kwargs):
+    """A memória do assistente contábil é excluída com o usuário."""
+    excluir_memoria(chave_assistente(instance.pk))
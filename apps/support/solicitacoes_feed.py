@@ -0,0 +1,319 @@
+"""
+Feed unificado de solicitações para o painel do staff.
+
+Junta várias tabelas de solicitação (processos de abertura, solicitações MEI,
+baixa/DASN e leads antigos) em um único UNION ALL de projeções .values(),
+ordenado e limitado no banco. Cada fonte projeta as mesmas colunas (as que
+não existem na fonte viram NULL), e o status do pagamento vem por JOIN.
+
+A paginação é por cursor (valor de ordenação, tag da fonte, id): o filtro do
+cursor é aplicado dentro de cada ramo do UNION, então páginas profundas custam
+o mesmo que a primeira.
+"""
+from django.db.models import BooleanField, Case, F, IntegerField, Q, TextField, Value, When
+from django.db.models.functions import Cast
+
+from apps.services.models import (
+    ProcessoAbertura, SolicitacaoAberturaMEI, SolicitacaoBaixaMEI, SolicitacaoDeclaracaoAnualMEI,
+)
+from .models import Lead
+from .pagination import InvalidCursor, decode_cursor, encode_cursor, keyset_filter, parse_limit
+
+
+def _null(output_field):
+    return Cast(Value(None), output_field)
+
+
+def _text(field_name):
+    return Cast(F(field_name), TextField())
+
+
+class UnionFeed:
+    """
+    Feed paginado sobre um UNION ALL de várias fontes.
+
+    Args:
+        columns: dict {coluna: output_field} com as colunas comuns do feed
+        sources: lista de (tag, queryset, {coluna: expressão}); colunas
+            ausentes viram NULL
+        order_field: campo de data presente em todas as fontes
+    """
+
+    def __init__(self, columns, sources, order_field):
+        self.columns = columns
+        self.sources = sources
+        self.order_field = order_field
+
+    def _cursor_filter(self, tag, values):
+        ts, cursor_tag, cursor_id = values
+        if tag < cursor_tag:
+            return Q(**{f'{self.order_field}__lte': ts})
+        if tag > cursor_tag:
+            return Q(**{f'{self.order_field}__lt': ts})
+        return keyset_filter((f'-{self.order_field}', '-id'), (ts, cursor_id))
+
+    def _branch(self, tag, queryset, expressions, cursor_values):
+        # Os aliases recebem prefixo para não colidir com campos dos models e
+        # são anotados sempre na mesma ordem, mantendo as colunas alinhadas.
+        annotations = {
+            'feed_sort': F(self.order_field),
+            'feed_tag': Value(tag, output_field=TextField()),
+            'feed_id': F('id'),
+        }
+        for column, output_field in self.columns.items():
+            annotations[f'feed_{column}'] = expressions.get(column, _null(output_field))
+
+        qs = queryset.order_by()
+        if cursor_values is not None:
+            qs = qs.filter(self._cursor_filter(tag, cursor_values))
+        return qs.annotate(**annotations).values(*annotations)
+
+    def _rows(self, cursor_values, limit):
+        branches = [
+            self._branch(tag, qs, expressions, cursor_values)
+            for tag, qs, expressions in self.sources
+        ]
+        union = branches[0].union(*branches[1:], all=True)
+        union = union.order_by('-feed_sort', '-feed_tag', '-feed_id')
+        if limit is not None:
+            union = union[:limit]
+        for row in union:
+            item = {column: row[f'feed_{column}'] for column in self.columns}
+            item['tag'] = row['feed_tag']
+            item['id'] = row['feed_id']
+            item[self.order_field] = row['feed_sort']
+            yield item
+
+    def all(self):
+        """Todas as linhas do feed, em ordem (sem paginação)."""
+        return self._rows(None, None)
+
+    def paginate(self, request):
+        """Retorna (linhas, pagination) a partir de limit/cursor da querystring."""
+        limit = parse_limit(request)
+        cursor = request.GET.get('cursor')
+        values = decode_cursor(cursor) if cursor else None
+        if values is not None and len(values) != 3:
+            raise InvalidCursor('Cursor inválido')
+
+        rows = list(self._rows(values, limit + 1))
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        next_cursor = None
+        if has_more and rows:
+            last = rows[-1]
+            next_cursor = encode_cursor([last[self.order_field], last['tag'], last['id']])
+
+        return rows, {
+            'limit': limit,
+            'sort': f'-{self.order_field}',
+            'has_more': has_more,
+            'next_cursor': next_cursor,
+        }
+
+
+# ==================== ABERTURA DE EMPRESA ====================
+
+ABERTURA_COLUMNS = {
+    'nome_completo': TextField(),
+    'email': TextField(),
+    'usuario_email': TextField(),
+    'telefone': TextField(),
+    'status': TextField(),
+    'etapa_atual': IntegerField(),
+    'tipo_societario': TextField(),
+    'tem_documentos': BooleanField(),
+    'criado_em': ProcessoAbertura._meta.get_field('criado_em'),
+}
+
+_STATUS_PROCESSO = dict(ProcessoAbertura.STATUS_CHOICES)
+_STATUS_MEI = dict(SolicitacaoAberturaMEI.STATUS_CHOICES)
+_TIPO_SOCIETARIO = dict(ProcessoAbertura.TIPO_SOCIETARIO_CHOICES)
+
+
+def abertura_feed(status=None):
+    """Feed de processos de abertura + solicitações de abertura MEI."""
+    processos = ProcessoAbertura.objects.all()
+    solicitacoes_mei = SolicitacaoAberturaMEI.objects.all()
+    if status:
+        processos = processos.filter(status=status)
+        solicitacoes_mei = solicitacoes_mei.filter(status=status)
+
+    tem_documentos = Case(
+        When(Q(doc_identidade_frente__gt='') | Q(comprovante_residencia__gt=''), then=Value(True)),
+        default=Value(False),
+        output_field=BooleanField(),
+    )
+
+    return UnionFeed(ABERTURA_COLUMNS, [
+        ('proc', processos, {
+            'nome_completo': _text('nome_completo'),
+            'email': _text('email'),
+            'usuario_email': _text('usuario__email'),
+            'telefone': _text('telefone_whatsapp'),
+            'status': _text('status'),
+            'etapa_atual': F('etapa_atual'),
+            'tipo_societario': _text('tipo_societario'),
+            'tem_documentos': tem_documentos,
+            'criado_em': F('criado_em'),
+        }),
+        ('mei', solicitacoes_mei, {
+            'nome_completo': _text('nome_completo'),
+            'email': _text('email'),
+            'telefone': _text('telefone'),
+            'status': _text('status'),
+            'tem_documentos': Value(False, output_field=BooleanField()),
+            'criado_em': F('criado_em'),
+        }),
+    ], order_field='atualizado_em')
+
+
+def serialize_abertura_row(row):
+    """Converte uma linha do feed de abertura no formato da API."""
+    criado_em = row['criado_em']
+    atualizado_em = row['atualizado_em']
+    datas = {
+        'criado_em': criado_em.strftime('%d/%m/%Y %H:%M') if criado_em else '-',
+        'atualizado_em': atualizado_em.strftime('%d/%m/%Y %H:%M') if atualizado_em else '-',
+    }
+
+    if row['tag'] == 'mei':
+        return {
+            'id': f"mei-{row['id']}",
+            'cliente': row['nome_completo'],
+            'email': row['email'],
+            'telefone': row['telefone'],
+            'status': _STATUS_MEI.get(row['status'], row['status']),
+            'status_code': row['status'],
+            'etapa': "Solicitação MEI",
+            'tipo_societario': 'MEI',
+            'tem_documentos': False,
+            **datas,
+        }
+
+    cliente_nome = row['nome_completo'] or "Não informado"
+    if row['usuario_email'] is not None:
+        cliente_nome += f" ({row['usuario_email']})"
+
+    return {
+        'id': f"proc-{row['id']}",
+        'cliente': cliente_nome,
+        'email': row['email'] or row['usuario_email'] or '',
+        'telefone': row['telefone'],
+        'status': _STATUS_PROCESSO.get(row['status'], row['status']),
+        'status_code': row['status'],
+        'etapa': f"Etapa {row['etapa_atual']}",
+        'tipo_societario': _TIPO_SOCIETARIO.get(row['tipo_societario']) or '-',
+        'tem_documentos': bool(row['tem_documentos']),
+        **datas,
+    }
+
+
+# ==================== SERVIÇOS MEI ====================
+
+MEI_SERVICOS_COLUMNS = {
+    'nome_completo': TextField(),
+    'email': TextField(),
+    'telefone': TextField(),
+    'origem': TextField(),
+    'status': TextField(),
+    'pagamento_status': TextField(),
+    'observacoes': TextField(),
+    'servico_interesse': TextField(),
+    'cnpj': TextField(),
+    'cpf': TextField(),
+    'motivo': TextField(),
+    'ano_referencia': TextField(),
+    'faturamento': TextField(),
+}
+
+LEADS_MEI_ORIGENS = ['formulario_baixar_mei', 'formulario_declaracao_anual_mei']
+
+_MOTIVO_BAIXA = dict(SolicitacaoBaixaMEI.MOTIVO_CHOICES)
+
+
+def servicos_mei_feed(status=None):
+    """Feed de baixa MEI + declaração anual (DASN) + leads antigos desses formulários."""
+    baixas = SolicitacaoBaixaMEI.objects.all()
+    declaracoes = SolicitacaoDeclaracaoAnualMEI.objects.all()
+    leads = Lead.objects.filter(origem__in=LEADS_MEI_ORIGENS)
+    if status:
+        baixas = baixas.filter(status=status)
+        declaracoes = declaracoes.filter(status=status)
+        leads = leads.filter(status=status)
+
+    comuns = {
+        'nome_completo': _text('nome_completo'),
+        'email': _text('email'),
+        'telefone': _text('telefone'),
+        'status': _text('status'),
+        'observacoes': _text('observacoes'),
+    }
+
+    return UnionFeed(MEI_SERVICOS_COLUMNS, [
+        ('baixa', baixas, {
+            **comuns,
+            'origem': Value('formulario_baixar_mei', output_field=TextField()),
+            'pagamento_status': _text('pagamento__status'),
+            'cnpj': _text('cnpj'),
+            'cpf': _text('cpf'),
+            'motivo': _text('motivo'),
+        }),
+        ('dasn', declaracoes, {
+            **comuns,
+            'origem': Value('formulario_declaracao_anual_mei', output_field=TextField()),
+            'pagamento_status': _text('pagamento__status'),
+            'cnpj': _text('cnpj'),
+            'ano_referencia': _text('ano_referencia'),
+            'faturamento': _text('faturamento'),
+        }),
+        ('lead', leads, {
+            **comuns,
+            'origem': _text('origem'),
+            'servico_interesse': _text('servico_interesse'),
+        }),
+    ], order_field='criado_em')
+
+
+def serialize_servico_mei_row(row):
+    """Converte uma linha do feed de serviços MEI no formato da API."""
+    tag = row['tag']
+    base = {
+        'id': f"{tag}-{row['id']}",
+        'real_id': row['id'],
+        'nome_completo': row['nome_completo'],
+        'email': row['email'],
+        'telefone': row['telefone'],
+        'origem': row['origem'],
+        'observacoes': row['observacoes'] or '',
+        'status': row['status'] or 'pendente',
+        'pagamento_status': row['pagamento_status'] or '',
+        'criado_em': row['criado_em'].strftime('%Y-%m-%d %H:%M:%S'),
+    }
+
+    if tag == 'baixa':
+        motivo = _MOTIVO_BAIXA.get(row['motivo']) if row['motivo'] else "N/A"
+        base.update({
+            'model': 'SolicitacaoBaixaMEI',
+            'tipo_servico': 'Baixa do MEI',
+            'servico_interesse': f"CNPJ: {row['cnpj']} | CPF: {row['cpf']} | Motivo: {motivo}",
+            'valor': str(SolicitacaoBaixaMEI.VALOR_SERVICO),
+        })
+    elif tag == 'dasn':
+        base.update({
+            'model': 'SolicitacaoDeclaracaoAnualMEI',
+            'tipo_servico': 'Declaração Anual (DASN)',
+            'servico_interesse': (
+                f"CNPJ: {row['cnpj']} | Ano: {row['ano_referencia']} | Faturamento: R$ {row['faturamento']}"
+            ),
+            'valor': str(SolicitacaoDeclaracaoAnualMEI.VALOR_SERVICO),
+        })
+    else:
+        base.update({
+            'model': 'Lead',
+            'tipo_servico': 'Baixa do MEI' if row['origem'] == 'formulario_baixar_mei' else 'Declaração Anual (DASN)',
+            'servico_interesse': row['servico_interesse'] or '',
+            'valor': '',
+        })
+    return base
@@ -0,0 +1,82 @@
+"""
+Respostas em streaming (Server-Sent Events) do assistente IA e do chatbot.
+
+O texto gerado pela IA é repassado ao navegador à medida que chega do Groq,
+em eventos SSE sobre um POST (lido no frontend com fetch + ReadableStream):
+
+    event: token   data: {"t": "<trecho>"}
+    event: done    data: {"resposta": "<resposta completa>"}
+    event: error   data: {"error": "<mensagem amigável>"}
+
+A resposta completa só é gravada (ChatbotMensagem / memória da conversa)
+quando o stream termina. Se a IA falhar no meio, nenhuma resposta (nem o
+trecho já enviado) é gravada e a memória não muda; só roda o `ao_falhar`
+da view: o chatbot grava a mensagem do visitante, sem resposta, e o
+assistente contábil não grava nada.
+
+O modo JSON continua disponível: o streaming só é usado quando o cliente
+envia "stream": true no corpo ou "Accept: text/event-stream".
+"""
+import json
+import logging
+
+from django.http import StreamingHttpResponse
+
+logger = logging.getLogger(__name__)
+
+
+def quer_stream(request, data):
+    """Indica se o cliente pediu a resposta em streaming."""
+    stream = data.get('stream')
+    if stream in (True, 1) or str(stream).lower() in ('1', 'true'):
+        return True
+    return 'text/event-stream' in request.headers.get('Accept', '')
+
+
+def evento(nome, dados):
+    """Evento SSE serializado."""
+    return f"event: {nome}\ndata: {json.dumps(dados, ensure_ascii=False)}\n\n"
+
+
+async def transmitir(trechos, ao_concluir, mensagem_erro, ao_falhar=None):
+    """
+    Repassa os trechos gerados pela IA como eventos SSE (gerador assíncrono).
+
+    Args:
+        trechos: iterável assíncrono com os trechos de texto gerados
+        ao_concluir: corrotina chamada com a resposta completa ao fim do
+            stream (persistência); não é chamada se a geração falhar
+        mensagem_erro: função que converte a exceção em mensagem para o usuário
+        ao_falhar: corrotina opcional chamada (sem argumentos) se a geração falhar
+    """
+    partes = []
+    try:
+        async for trecho in trechos:
+            if trecho:
+                partes.append(trecho)
+                yield evento('token', {'t': trecho})
+    except Exception as e:
+        logger.error(f"Erro durante o streaming da IA: {e}")
+        if ao_falhar is not None:
+            try:
+                await ao_falhar()
+            except Exception as erro:
+                logger.error(f"Erro ao gravar falha da IA em streaming: {erro}")
+        yield evento('error', {'error': mensagem_erro(e)})
+        return
+
+    resposta = ''.join(partes).strip()
+    try:
+        await ao_concluir(resposta)
+    except Exception as e:
+        logger.error(f"Erro ao gravar resposta da IA em streaming: {e}")
+    yield evento('done', {'resposta': resposta})
+
+
+def resposta_sse(eventos):
+    """StreamingHttpResponse para eventos SSE (sem cache e sem buffer no proxy)."""
+    response = StreamingHttpResponse(eventos, content_type='text/event-stream; charset=utf-8')
+    response['Cache-Control'] = 'no-cache'
+    # Nginx não deve acumular a resposta antes de repassá-la
+    response['X-Accel-Buffering'] = 'no'
+    return response
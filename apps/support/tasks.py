@@ -0,0 +1,54 @@
+"""
+Tasks Celery do app support.
+"""
+from celery import shared_task
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+def resumir_memoria_conversa(chave: str) -> int:
+    """
+    Atualiza o resumo da conversa com as mensagens que saíram da janela
+    de memória da IA.
+
+    Agendada automaticamente quando um turno estoura o orçamento de tokens.
+
+    Returns:
+        int: quantidade de mensagens resumidas
+    """
+    from apps.support.memoria import resumir_memoria
+
+    return resumir_memoria(chave)
+
+
+@shared_task(ignore_result=True)
+def limpar_memorias_conversa() -> int:
+    """
+    Exclui as memórias de conversa com a IA sem atividade há mais de
+    IA_MEMORIA_RETENCAO_DIAS dias (agendada no beat).
+
+    Returns:
+        int: quantidade de memórias excluídas
+    """
+    from apps.support.memoria import limpar_memorias
+
+    return limpar_memorias()
+
+
+@shared_task(ignore_result=True)
+def descarregar_mensagens_chatbot() -> int:
+    """
+    Grava em lote as mensagens do chatbot acumuladas no buffer do Redis
+    (CHATBOT_BUFFER_MENSAGENS).
+
+    Agendada automaticamente pelo primeiro turno pendente; reagenda a si
+    mesma enquanto houver mensagens no buffer.
+
+    Returns:
+        int: quantidade de mensagens gravadas
+    """
+    from apps.support.chatbot_persistencia import descarregar_buffer
+
+    return descarregar_buffer()
@@ -1,8 +1,14 @@
+from types import SimpleNamespace
+from unittest import mock
+
 from django.test import TestCase, Client
 from django.contrib.auth import get_user_model
 from django.urls import reverse
+from django.core.cache import cache
+from django.db import DatabaseError
 
-from .models import Cliente, Chamado
+from .models import ChatbotPergunta, ChatbotMensagem, Cliente, Chamado, Lead, MemoriaConversa
+from .dashboard_stats import get_dashboard_stats
 
 
 class ChamadoFlowTest(TestCase):
@@ -46,6 +52,785 @@ class ChamadoFlowTest(TestCase):
         # verificar que foi criado
         chamados = self.cliente.chamados.filter(titulo='Pedido de Documentos')
         self.assertTrue(chamados.exists())
-from django.test import TestCase
 
-# Create your tests here.
+
+class DashboardStatsTest(TestCase):
+    """Testa o snapshot em cache das estatísticas do dashboard."""
+
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.staff = User.objects.create_user(username='staff1', password='pass1234', is_staff=True)
+        for i, regime in enumerate(['MEI', 'MEI', 'SN', 'LP']):
+            user = User.objects.create_user(username=f'cli{i}', password='pass1234')
+            Cliente.objects.create(user=user, regime_tributario=regime)
+        Lead.objects.create(nome_completo='Lead', email='lead@example.com', telefone='11999999999', origem='popup')
+
+    def test_contadores_agregados(self):
+        data = get_dashboard_stats()['data']
+        self.assertEqual(data['clientes_ativos'], 4)
+        self.assertEqual(data['regimes']['MEI'], 2)
+        self.assertEqual(data['regimes']['Simples Nacional'], 1)
+        self.assertEqual(data['regimes']['Lucro Real'], 0)
+        self.assertEqual(data['leads_pendentes'], 1)
+
+    def test_snapshot_em_cache_e_invalidacao(self):
+        primeiro = get_dashboard_stats()
+        self.assertFalse(primeiro['cache'])
+        with self.assertNumQueries(0):
+            self.assertTrue(get_dashboard_stats()['cache'])
+
+        Lead.objects.create(nome_completo='Outro', email='outro@example.com', telefone='11988888888', origem='popup')
+        atualizado = get_dashboard_stats()
+        self.assertFalse(atualizado['cache'])
+        self.assertGreater(atualizado['versao'], primeiro['versao'])
+        self.assertEqual(atualizado['data']['leads_pendentes'], 2)
+
+    def test_endpoint_fresh(self):
+        self.client.login(username='staff1', password='pass1234')
+        get_dashboard_stats()
+        resp = self.client.get(reverse('support:api_dashboard_stats'), {'fresh': '1'})
+        payload = resp.json()
+        self.assertTrue(payload['success'])
+        self.assertFalse(payload['meta']['cache'])
+        self.assertIn('latencia_ms', payload['meta'])
+
+
+class KeysetPaginationTest(TestCase):
+    """Testa a paginação por cursor das listagens do staff."""
+
+    def setUp(self):
+        User = get_user_model()
+        User.objects.create_user(username='staff1', password='pass1234', is_staff=True)
+        for i in range(7):
+            Lead.objects.create(
+                nome_completo=f'Lead {i}', email=f'lead{i}@example.com',
+                telefone=f'1199999000{i}', origem='popup',
+                status='finalizado' if i % 2 else 'pendente',
+            )
+        self.client.login(username='staff1', password='pass1234')
+        self.url = reverse('support:api_leads_list')
+
+    def test_percorre_todas_as_paginas_sem_repetir(self):
+        ids = []
+        params = {'limit': 3}
+        while True:
+            payload = self.client.get(self.url, params).json()
+            self.assertTrue(payload['success'])
+            ids.extend(item['id'] for item in payload['data'])
+            if not payload['pagination']['has_more']:
+                break
+            params['cursor'] = payload['pagination']['next_cursor']
+        esperado = list(Lead.objects.order_by('-criado_em', '-id').values_list('id', flat=True))
+        self.assertEqual(ids, esperado)
+
+    def test_filtro_e_modo_compat(self):
+        payload = self.client.get(self.url, {'status': 'pendente'}).json()
+        self.assertEqual(len(payload['data']), 4)
+
+        payload = self.client.get(self.url, {'compat': '1'}).json()
+        self.assertEqual(len(payload['data']), 7)
+        self.assertNotIn('pagination', payload)
+
+    def test_cursor_invalido(self):
+        from .pagination import encode_cursor
+
+        resp = self.client.get(self.url, {'cursor': 'xxx'})
+        self.assertEqual(resp.status_code, 400)
+
+        # Cursor bem formado, mas com valores do tipo errado para criado_em/id
+        for valores in (['x', 1], [{'dt': '2025-01-01T00:00:00'}, 'abc'], [None, 1], [[1], 1]):
+            resp = self.client.get(self.url, {'cursor': encode_cursor(valores)})
+            self.assertEqual(resp.status_code, 400, valores)
+            self.assertFalse(resp.json()['success'])
+
+
+class SolicitacoesFeedTest(TestCase):
+    """Testa o feed unificado (UNION ALL) de serviços MEI."""
+
+    def setUp(self):
+        from apps.services.models import SolicitacaoBaixaMEI, SolicitacaoDeclaracaoAnualMEI
+        User = get_user_model()
+        User.objects.create_user(username='staff1', password='pass1234', is_staff=True)
+        for i in range(3):
+            SolicitacaoBaixaMEI.objects.create(
+                nome_completo=f'Baixa {i}', email=f'b{i}@example.com', telefone='1199',
+                cnpj='12345678000199', cpf='12345678901', motivo='encerramento',
+            )
+            SolicitacaoDeclaracaoAnualMEI.objects.create(
+                nome_completo=f'DASN {i}', email=f'd{i}@example.com', telefone='1199',
+                cnpj='12345678000199', ano_referencia='2025', faturamento='50000.00',
+            )
+        Lead.objects.create(
+            nome_completo='Lead antigo', email='lead@example.com', telefone='1199',
+            origem='formulario_baixar_mei',
+        )
+        Lead.objects.create(nome_completo='Outro lead', email='x@example.com', telefone='1199', origem='popup')
+        self.client.login(username='staff1', password='pass1234')
+        self.url = reverse('support:api_servicos_mei_list')
+
+    def test_paginas_cobrem_todas_as_fontes(self):
+        vistos = []
+        params = {'limit': 4}
+        while True:
+            payload = self.client.get(self.url, params).json()
+            self.assertTrue(payload['success'])
+            vistos.extend(item['id'] for item in payload['data'])
+            if not payload['pagination']['has_more']:
+                break
+            params['cursor'] = payload['pagination']['next_cursor']
+
+        self.assertEqual(len(vistos), 7)
+        self.assertEqual(len(set(vistos)), 7)
+
+        compat = self.client.get(self.url, {'compat': '1'}).json()['data']
+        self.assertEqual([item['id'] for item in compat], vistos)
+
+    def test_formato_das_linhas(self):
+        data = self.client.get(self.url, {'compat': '1'}).json()['data']
+        por_id = {item['id']: item for item in data}
+        baixa = next(item for item in data if item['model'] == 'SolicitacaoBaixaMEI')
+        self.assertIn('Motivo: Encerramento das atividades', baixa['servico_interesse'])
+        self.assertEqual(baixa['pagamento_status'], '')
+        lead = next(item for item in data if item['model'] == 'Lead')
+        self.assertEqual(lead['tipo_servico'], 'Baixa do MEI')
+        self.assertEqual(len(por_id), 7)
+
+
+class ClientesRosterTest(TestCase):
+    """Testa a listagem de clientes com ETag e filtros."""
+
+    def setUp(self):
+        User = get_user_model()
+        User.objects.create_user(username='staff1', password='pass1234', is_staff=True)
+        for i, regime in enumerate(['MEI', 'SN', 'SN']):
+            user = User.objects.create_user(
+                username=f'cli{i}', first_name=f'Cliente {i}', email=f'cli{i}@example.com', password='pass1234'
+            )
+            Cliente.objects.create(user=user, regime_tributario=regime, cnpj=f'0000000000000{i}')
+        self.url = reverse('support:api_clientes_list')
+
+    def test_exige_staff(self):
+        self.client.login(username='cli0', password='pass1234')
+        resp = self.client.get(self.url)
+        self.assertEqual(resp.status_code, 302)
+
+    def test_filtros_e_consulta_unica(self):
+        self.client.login(username='staff1', password='pass1234')
+        resp = self.client.get(self.url, {'regime': 'SN'})
+        self.assertEqual([c['nome'] for c in resp.json()['data']], ['Cliente 1', 'Cliente 2'])
+
+        resp = self.client.get(self.url, {'q': 'cli0@'})
+        data = resp.json()['data']
+        self.assertEqual(len(data), 1)
+        self.assertEqual(data[0]['regime'], 'MEI')
+
+    def test_etag_304_e_invalidacao(self):
+        self.client.login(username='staff1', password='pass1234')
+        resp = self.client.get(self.url)
+        etag = resp['ETag']
+        self.assertTrue(etag)
+
+        resp = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+
+        perfil = Cliente.objects.get(user__username='cli1')
+        perfil.fase_abertura = 'fase_2'
+        perfil.save()
+        resp = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp['ETag'], etag)
+
+    def test_etag_muda_ao_editar_usuario_sem_perfil(self):
+        User = get_user_model()
+        sem_perfil = User.objects.create_user(username='avulso', first_name='Avulso', password='pass1234')
+        self.client.login(username='staff1', password='pass1234')
+        etag = self.client.get(self.url)['ETag']
+
+        sem_perfil.first_name = 'Renomeado'
+        sem_perfil.save()
+        resp = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn('Renomeado', [c['nome'] for c in resp.json()['data']])
+
+
+class ChatbotCatalogTest(TestCase):
+    """Catálogo de perguntas do chatbot em memória, invalidado pelos signals."""
+
+    def setUp(self):
+        cache.clear()
+        self.pergunta = ChatbotPergunta.objects.create(
+            pergunta='Como abrir um MEI?', resposta='Pelo Portal do Empreendedor.', categoria='MEI'
+        )
+        ChatbotPergunta.objects.create(pergunta='Qual o prazo?', resposta='Até 5 dias.')
+        ChatbotPergunta.objects.create(pergunta='Inativa', resposta='-', ativo=False)
+
+    def test_widget_sem_consultas_de_faq(self):
+        resp = self.client.post(
+            reverse('support:chatbot_iniciar_sessao'),
+            data={'nome': 'Ana Souza', 'email': 'ana@example.com', 'telefone': '11999999999'},
+            content_type='application/json',
+        )
+        data = resp.json()
+        self.assertEqual([p['pergunta'] for p in data['perguntas']], ['Como abrir um MEI?', 'Qual o prazo?'])
+        self.assertEqual(data['perguntas'][1]['categoria'], 'Geral')
+
+        with self.assertNumQueries(0):
+            resp = self.client.get(reverse('support:chatbot_listar_perguntas'))
+        self.assertEqual(list(resp.json()['categorias']), ['MEI', 'Geral'])
+
+        resp = self.client.post(
+            reverse('support:chatbot_enviar_pergunta'),
+            data={'session_key': data['session_key'], 'pergunta_id': self.pergunta.id},
+            content_type='application/json',
+        )
+        self.assertEqual(resp.json()['resposta'], 'Pelo Portal do Empreendedor.')
+        self.assertEqual(ChatbotMensagem.objects.filter(pergunta_relacionada=self.pergunta).count(), 2)
+
+    def test_invalidacao_ao_salvar(self):
+        self.client.get(reverse('support:chatbot_listar_perguntas'))
+
+        self.pergunta.ativo = False
+        self.pergunta.save()
+
+        resp = self.client.get(reverse('support:chatbot_listar_perguntas'))
+        self.assertEqual(list(resp.json()['categorias']), ['Geral'])
+
+
+class ListaRedisFalsa:
+    """Listas do Redis em memória (rpush/llen/lrange/delete e pipeline de lmove)."""
+
+    def __init__(self):
+        self.listas = {}
+        self.comandos = []
+
+    def _lista(self, chave):
+        return self.listas.setdefault(chave, [])
+
+    def rpush(self, chave, *valores):
+        self._lista(chave).extend(v.encode() for v in valores)
+
+    def llen(self, chave):
+        return len(self._lista(chave))
+
+    def lrange(self, chave, inicio, fim):
+        lista = self._lista(chave)
+        return lista[inicio:None if fim == -1 else fim + 1]
+
+    def delete(self, chave):
+        self.listas.pop(chave, None)
+
+    def pipeline(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def lmove(self, origem, destino, lado_origem, lado_destino):
+        def mover():
+            if not self._lista(origem):
+                return None
+            valor = self._lista(origem).pop(0)
+            self._lista(destino).append(valor)
+            return valor
+        self.comandos.append(mover)
+
+    def execute(self):
+        resultados = [comando() for comando in self.comandos]
+        self.comandos = []
+        return resultados
+
+
+class ChatbotPersistenciaTest(TestCase):
+    """Turnos do chatbot bufferizados no Redis e gravados em lote."""
+
+    def setUp(self):
+        cache.clear()
+        self.pergunta = ChatbotPergunta.objects.create(pergunta='Como abrir um MEI?', resposta='Pelo portal.')
+        self.redis = ListaRedisFalsa()
+        # Descarga chamada explicitamente no teste (sem agendar a task)
+        for nome, valor in (('_redis', lambda: self.redis), ('agendar_descarga', mock.Mock())):
+            patcher = mock.patch(f'apps.support.chatbot_persistencia.{nome}', valor)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_turnos_vao_para_o_buffer_e_sao_gravados_em_lote(self):
+        from django.test import override_settings
+
+        from .chatbot_persistencia import BUFFER_KEY, PROCESSANDO_KEY, descarregar_buffer
+        from .models import ChatbotSessao
+
+        resp = self.client.post(
+            reverse('support:chatbot_iniciar_sessao'),
+            data={'nome': 'Ana Souza', 'email': 'ana@example.com', 'telefone': '11999999999'},
+            content_type='application/json',
+        )
+        session_key = resp.json()['session_key']
+        with override_settings(CHATBOT_BUFFER_MENSAGENS=True):
+            for _ in range(2):
+                self.client.post(
+                    reverse('support:chatbot_enviar_pergunta'),
+                    data={'session_key': session_key, 'pergunta_id': self.pergunta.id},
+                    content_type='application/json',
+                )
+
+        sessao = ChatbotSessao.objects.get(session_key=session_key)
+        self.assertEqual(sessao.mensagens.count(), 1)  # só as boas-vindas
+        self.assertEqual(self.redis.llen(BUFFER_KEY), 4)
+
+        self.assertEqual(descarregar_buffer(), 4)
+        mensagens = list(sessao.mensagens.all())
+        self.assertEqual([m.is_bot for m in mensagens], [True, False, True, False, True])
+        self.assertEqual(mensagens[1].pergunta_relacionada, self.pergunta)
+        sessao.refresh_from_db()
+        self.assertEqual(sessao.atualizado_em, mensagens[-1].criado_em)
+        self.assertEqual((self.redis.llen(BUFFER_KEY), self.redis.llen(PROCESSANDO_KEY)), (0, 0))
+        self.assertEqual(descarregar_buffer(), 0)
+
+    def test_lote_interrompido_e_gravado_na_proxima_descarga(self):
+        from .chatbot_persistencia import (
+            BUFFER_KEY, PROCESSANDO_KEY, _bufferizar, descarregar_buffer, iniciar_sessao, nova_mensagem,
+        )
+
+        sessao = iniciar_sessao(
+            {'nome_completo': 'Bia Lima', 'email': 'bia@example.com', 'telefone': '11988888888', 'origem': 'chatbot'},
+            {'session_key': 'sessao-lote', 'nome': 'Bia Lima', 'email': 'bia@example.com', 'telefone': '11988888888'},
+            'Olá!',
+        )
+        _bufferizar(sessao.pk, [nova_mensagem('primeira'), nova_mensagem('resposta', is_bot=True)])
+
+        with mock.patch('apps.support.chatbot_persistencia.ChatbotMensagem.objects.bulk_create',
+                        side_effect=DatabaseError('conexão perdida')):
+            with self.assertRaises(DatabaseError):
+                descarregar_buffer()
+        # O lote saiu do buffer, mas continua na lista de processamento
+        self.assertEqual((self.redis.llen(BUFFER_KEY), self.redis.llen(PROCESSANDO_KEY)), (0, 2))
+
+        _bufferizar(sessao.pk, [nova_mensagem('segunda')])
+        self.assertEqual(descarregar_buffer(), 2)
+        self.assertEqual(self.redis.llen(PROCESSANDO_KEY), 0)
+        self.assertEqual(descarregar_buffer(), 1)
+        self.assertEqual(
+            list(sessao.mensagens.values_list('conteudo', flat=True)), ['Olá!', 'primeira', 'resposta', 'segunda'],
+        )
+
+
+class RespostaIACacheTest(TestCase):
+    """Cache de respostas da IA por pergunta normalizada."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_normalizacao_e_contexto(self):
+        from .ia_cache import normalizar_pergunta, pode_usar_cache
+
+        self.assertEqual(
+            normalizar_pergunta('Olá! Qual é o LIMITE de faturamento do MEI?'),
+            normalizar_pergunta('qual e o limite de faturamento do mei'),
+        )
+        historico = [{'role': 'user', 'content': 'Sou MEI'}, {'role': 'assistant', 'content': '...'}]
+        self.assertTrue(pode_usar_cache('Qual o limite do MEI?', []))
+        self.assertTrue(pode_usar_cache('Qual o vencimento do DAS?', historico))
+        self.assertFalse(pode_usar_cache('E quanto custa isso?', historico))
+
+    def test_negacao_e_contraste_mudam_a_chave(self):
+        from .ia_cache import buscar_resposta, guardar_resposta, normalizar_pergunta
+
+        pares = [
+            ('MEI com funcionário paga INSS?', 'MEI sem funcionário paga INSS?'),
+            ('Pago DAS ou INSS?', 'Pago DAS e INSS?'),
+            ('MEI não paga IRPJ?', 'MEI paga IRPJ?'),
+            ('Posso faturar mais de 81 mil?', 'Posso faturar menos de 81 mil?'),
+        ]
+        for primeira, segunda in pares:
+            self.assertNotEqual(normalizar_pergunta(primeira), normalizar_pergunta(segunda))
+
+        guardar_resposta('chatbot', 'MEI com funcionário paga INSS?', 'prompt', 'modelo', 'Sim, 3% sobre o salário.')
+        self.assertIsNone(buscar_resposta('chatbot', 'MEI sem funcionário paga INSS?', 'prompt', 'modelo'))
+        self.assertIsNotNone(buscar_resposta('chatbot', 'MEI com funcionário paga INSS?', 'prompt', 'modelo'))
+
+    def test_acerto_contabiliza_economia_e_troca_de_prompt(self):
+        from .ia_cache import buscar_resposta, estatisticas, guardar_resposta
+
+        self.assertIsNone(buscar_resposta('chatbot', 'Qual o limite do MEI?', 'prompt v1', 'modelo'))
+        guardar_resposta('chatbot', 'Qual o limite do MEI?', 'prompt v1', 'modelo', 'R$ 81 mil.', tokens=300, latencia_ms=2000)
+
+        self.assertEqual(buscar_resposta('chatbot', 'qual o LIMITE do mei', 'prompt v1', 'modelo'), 'R$ 81 mil.')
+        self.assertIsNone(buscar_resposta('chatbot', 'Qual o limite do MEI?', 'prompt v2', 'modelo'))
+
+        stats = estatisticas()['chatbot']
+        self.assertEqual((stats['acertos'], stats['erros']), (1, 2))
+        self.assertEqual(stats['tokens_economizados'], 300)
+        self.assertEqual(stats['segundos_economizados'], 2.0)
+
+
+class ChatbotStreamingTest(TestCase):
+    """Atendente IA assíncrono: streaming (SSE), modo JSON e concorrência."""
+
+    def setUp(self):
+        from .groq_service import groq_service
+        from .llm_router import Provedor, llm_router
+        from .models import ChatbotSessao
+
+        cache.clear()
+        self.sessao = ChatbotSessao.objects.create(
+            session_key='sse-1', nome='Ana', email='ana@example.com', telefone='11999999999'
+        )
+
+        def chunk(texto):
+            return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=texto))])
+
+        async def stream(**kwargs):
+            for texto in ('Olá, ', 'tudo bem?', None):
+                yield chunk(texto)
+
+        self.create = mock.AsyncMock(side_effect=stream)
+        client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=self.create)))
+        # Roteador só com o Groq, com métricas e circuito zerados
+        provedores = [Provedor('groq', groq_service, groq_service.model)]
+        for alvo, nome, valor in (
+            (groq_service, '_cliente', lambda: client), (groq_service, 'api_key', 'teste'),
+            (llm_router, 'provedores', provedores),
+        ):
+            patcher = mock.patch.object(alvo, nome, valor)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_um_cliente_groq_por_event_loop(self):
+        from asgiref.sync import async_to_sync
+
+        from .groq_service import GroqService
+
+        servico = GroqService()
+        servico.api_key = 'teste'
+
+        async def clientes():
+            return servico._cliente(), servico._cliente()
+
+        # Como no WSGI: cada async_to_sync roda em um event loop novo
+        primeiro, repetido = async_to_sync(clientes)()
+        segundo, _ = async_to_sync(clientes)()
+        self.assertIs(primeiro, repetido)
+        self.assertIsNot(primeiro, segundo)
+
+    async def _enviar(self, **extra):
+        return await self.async_client.post(
+            reverse('support:chatbot_atendente_ia'),
+            data={'session_key': 'sse-1', 'mensagem': 'Como abrir um MEI?', **extra},
+            content_type='application/json',
+        )
+
+    async def _ler(self, response):
+        return b''.join([parte async for parte in response.streaming_content]).decode()
+
+    async def test_stream_envia_trechos_e_grava_resposta_no_fim(self):
+        response = await self._enviar(stream=True)
+        self.assertEqual(response['Content-Type'], 'text/event-stream; charset=utf-8')
+        # Nada é gravado antes de o stream ser consumido
+        self.assertFalse(await ChatbotMensagem.objects.filter(is_bot=True).aexists())
+
+        corpo = await self._ler(response)
+        self.assertTrue(self.create.call_args.kwargs['stream'])
+        self.assertIn('event: token\ndata: {"t": "Olá, "}', corpo)
+        self.assertIn('event: done\ndata: {"resposta": "Olá, tudo bem?"}', corpo)
+        mensagem = await ChatbotMensagem.objects.aget(sessao=self.sessao, is_bot=True)
+        self.assertEqual(mensagem.conteudo, 'Olá, tudo bem?')
+        memoria = await MemoriaConversa.objects.aget(chave='chatbot:sse-1')
+        self.assertEqual([m['content'] for m in memoria.mensagens], ['Como abrir um MEI?', 'Olá, tudo bem?'])
+
+    async def test_perguntas_rapidas_entram_na_memoria_quando_a_sessao_chega_a_ia(self):
+        pergunta = await ChatbotPergunta.objects.acreate(pergunta='Qual o prazo do DAS?', resposta='Dia 20.')
+        await self.async_client.post(
+            reverse('support:chatbot_enviar_pergunta'),
+            data={'session_key': 'sse-1', 'pergunta_id': pergunta.id},
+            content_type='application/json',
+        )
+        # Clique em pergunta rápida não grava memória
+        self.assertFalse(await MemoriaConversa.objects.filter(chave='chatbot:sse-1').aexists())
+
+        for _ in range(2):
+            await self._ler(await self._enviar(stream=True))
+        enviadas = [m['content'] for m in self.create.call_args_list[0].kwargs['messages'][1:]]
+        self.assertEqual(enviadas, ['Qual o prazo do DAS?', 'Dia 20.', 'Como abrir um MEI?'])
+        memoria = await MemoriaConversa.objects.aget(chave='chatbot:sse-1')
+        self.assertEqual([m['content'] for m in memoria.mensagens], [
+            'Qual o prazo do DAS?', 'Dia 20.', 'Como abrir um MEI?', 'Olá, tudo bem?', 'Como abrir um MEI?', 'Olá, tudo bem?',
+        ])
+
+    async def test_erro_no_stream_nao_grava_resposta(self):
+        self.create.side_effect = Exception('Error code: 429 rate_limit_exceeded')
+        corpo = await self._ler(await self._enviar(stream=True))
+        self.assertIn('event: error', corpo)
+        self.assertFalse(await ChatbotMensagem.objects.filter(is_bot=True).aexists())
+        # A mensagem do visitante continua registrada
+        self.assertTrue(await ChatbotMensagem.objects.filter(sessao=self.sessao, is_bot=False).aexists())
+
+    async def test_modo_json_continua_disponivel(self):
+        self.create.side_effect = None
+        self.create.return_value = SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content='Resposta'))],
+            usage=SimpleNamespace(total_tokens=10),
+        )
+        data = (await self._enviar()).json()
+        self.assertEqual((data['success'], data['resposta']), (True, 'Resposta'))
+
+    async def test_espera_pela_ia_nao_bloqueia_outras_requisicoes(self):
+        import asyncio
+
+        concluidas = []
+
+        async def lenta(**kwargs):
+            await asyncio.sleep(0.5)
+            return SimpleNamespace(
+                choices=[SimpleNamespace(message=SimpleNamespace(content='Resposta'))],
+                usage=SimpleNamespace(total_tokens=10),
+            )
+
+        async def registrar(nome, requisicao):
+            response = await requisicao
+            concluidas.append(nome)
+            return response
+
+        self.create.side_effect = lenta
+        ia, status = await asyncio.gather(
+            registrar('ia', self._enviar()),
+            registrar('status', self.async_client.get(reverse('support:chatbot_ia_status'))),
+        )
+        self.assertEqual((ia.status_code, status.status_code), (200, 200))
+        self.assertEqual(concluidas, ['status', 'ia'])
+
+
+class FakeProvedorIA:
+    """Serviço de IA de teste: responde com o próprio nome após `atraso` segundos."""
+
+    def __init__(self, nome, atraso=0, erro=None):
+        self.nome = nome
+        self.model = f'{nome}-modelo'
+        self.atraso = atraso
+        self.erro = erro
+        self.chamadas = 0
+        self.canceladas = 0
+
+    def is_available(self):
+        return True
+
+    async def completar(self, messages, max_tokens=500):
+        import asyncio
+
+        self.chamadas += 1
+        try:
+            await asyncio.sleep(self.atraso)
+        except asyncio.CancelledError:
+            self.canceladas += 1
+            raise
+        if self.erro:
+            raise self.erro
+        return self.nome, 5
+
+    async def stream_completar(self, messages, max_tokens=500, uso=None):
+        resposta, _tokens = await self.completar(messages, max_tokens)
+        yield resposta
+
+
+class LLMRouterTest(TestCase):
+    """Roteador de IA: circuit breaker, escolha por latência e hedge."""
+
+    def setUp(self):
+        cache.clear()
+
+    def _roteador(self, *servicos):
+        from .llm_router import LLMRouter, Provedor
+
+        return LLMRouter([Provedor(s.nome, s, s.model) for s in servicos])
+
+    async def test_falha_usa_o_proximo_e_429_seguidos_abrem_o_circuito(self):
+        from .llm_router import SemProvedorIA
+
+        erro = Exception('Error code: 429 - rate limit')
+        erro.status_code = 429
+        groq = FakeProvedorIA('groq', erro=erro)
+        self.assertEqual(await self._roteador(groq, FakeProvedorIA('gemini')).gerar('Qual o prazo do DAS?'), 'gemini')
+
+        roteador = self._roteador(groq)
+        for i in range(2):
+            with self.assertRaises(Exception):
+                await roteador.gerar(f'Qual o prazo do imposto numero {i}?')
+        self.assertEqual(roteador.provedores[0].estado(), 'fechado')
+        with self.assertRaises(Exception):
+            await roteador.gerar('Qual o prazo do imposto numero 3?')
+        self.assertEqual(roteador.provedores[0].estado(), 'aberto')
+
+        # Com o circuito aberto o Groq não é mais chamado
+        with self.assertRaises(SemProvedorIA):
+            await roteador.gerar('Qual o prazo do imposto numero 4?')
+        self.assertEqual(groq.chamadas, 4)
+        status = roteador.status()[0]
+        self.assertEqual((status['circuito'], status['taxa_erro']), ('aberto', 100.0))
+
+    async def test_escolhe_o_provedor_mais_rapido(self):
+        groq, gemini = FakeProvedorIA('groq'), FakeProvedorIA('gemini')
+        roteador = self._roteador(groq, gemini)
+        lento, rapido = roteador.provedores
+        lento.registrar_sucesso(900)
+        rapido.registrar_sucesso(150)
+
+        self.assertEqual([p.nome for p in roteador.candidatos()], ['gemini', 'groq'])
+        trechos = [t async for t in roteador.stream('Como abrir uma empresa de servicos?')]
+        self.assertEqual(trechos, ['gemini'])
+        self.assertEqual(groq.chamadas, 0)
+
+    async def test_provedor_sem_amostras_e_explorado(self):
+        groq, gemini, openai = FakeProvedorIA('groq'), FakeProvedorIA('gemini'), FakeProvedorIA('openai')
+        roteador = self._roteador(groq, gemini, openai)
+        rapido, _sem_amostras, lento = roteador.provedores
+        rapido.registrar_sucesso(200)
+        lento.registrar_sucesso(1000)
+
+        # Sem amostras: explorado primeiro, uma vez por intervalo...
+        self.assertEqual([p.nome for p in roteador.candidatos()], ['gemini', 'groq', 'openai'])
+        # ...e depois fica com a pontuação mediana, à frente do mais lento
+        self.assertEqual([p.nome for p in roteador.candidatos()], ['groq', 'gemini', 'openai'])
+
+        self.assertEqual(await roteador.gerar('Como funciona o Fator R?'), 'groq')
+        self.assertEqual(gemini.chamadas, 0)
+
+    async def test_streams_perdedores_sao_fechados(self):
+        import asyncio
+        from django.test import override_settings
+
+        from .ia_concorrencia import _semaforo
+
+        groq, gemini = FakeProvedorIA('groq', atraso=0.2), FakeProvedorIA('gemini', atraso=0.2)
+        roteador = self._roteador(groq, gemini)
+
+        # Hedge de 1ms: as duas chamadas abrem o stream praticamente juntas
+        with override_settings(IA_HEDGE_MS=1, IA_MAX_CONCORRENCIA=8):
+            _provedor, (trechos, primeiro) = await roteador._correr(
+                lambda p: roteador._abrir_stream(p, [], 10, {'tokens': 0})
+            )
+            await asyncio.sleep(0.3)
+            # Só o stream vencedor continua com uma vaga do limite de concorrência
+            self.assertEqual(_semaforo()._value, 7)
+            await trechos.aclose()
+            self.assertEqual(_semaforo()._value, 8)
+        self.assertEqual((groq.chamadas, gemini.chamadas), (1, 1))
+
+    async def test_hedge_aciona_o_segundo_provedor_se_o_primeiro_demorar(self):
+        from django.test import override_settings
+
+        groq, gemini = FakeProvedorIA('groq', atraso=2), FakeProvedorIA('gemini', atraso=0.01)
+        roteador = self._roteador(groq, gemini)
+        with override_settings(IA_HEDGE_MS=50):
+            self.assertEqual(await roteador.gerar('Como declarar o imposto de renda?'), 'gemini')
+        self.assertEqual((groq.chamadas, groq.canceladas), (1, 1))
+
+    def test_status_mostra_provedores_apenas_para_a_equipe(self):
+        url = reverse('support:chatbot_ia_status')
+        self.assertNotIn('provedores', self.client.get(url).json())
+
+        staff = get_user_model().objects.create_user(
+            username='equipe', email='equipe@example.com', password='x', is_staff=True
+        )
+        self.client.force_login(staff)
+        provedores = self.client.get(url).json()['provedores']
+        self.assertEqual(provedores[0]['nome'], 'groq')
+        self.assertIn('p95_ms', provedores[0])
+
+
+class MemoriaConversaTest(TestCase):
+    """Memória da IA: janela limitada por tokens e resumo das mensagens antigas."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_turnos_antigos_saem_da_janela_e_viram_resumo(self):
+        from asgiref.sync import async_to_sync
+        from django.test import override_settings
+
+        from .llm_router import llm_router
+        from .memoria import Memoria, registrar_turno, resumir_memoria
+
+        gerar = mock.AsyncMock(return_value='Cliente é MEI de serviços.')
+        # A task de resumo roda em linha (sem depender de um worker ou do modo eager)
+        with override_settings(IA_MEMORIA_TOKENS=120), mock.patch.object(llm_router, 'gerar', gerar), \
+                mock.patch('apps.support.tasks.resumir_memoria_conversa.delay', side_effect=resumir_memoria) as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                for i in range(4):
+                    registrar_turno('assistente:1', f'Pergunta {i} ' + 'x' * 100, f'Resposta {i} ' + 'y' * 100)
+
+        memoria = MemoriaConversa.objects.get(chave='assistente:1')
+        self.assertEqual(memoria.total_mensagens, 8)
+        self.assertEqual([m['content'][:10] for m in memoria.mensagens], ['Pergunta 3', 'Resposta 3'])
+        self.assertEqual((memoria.resumo, memoria.a_resumir), ('Cliente é MEI de serviços.', []))
+        self.assertIn('Pergunta 0', gerar.call_args_list[0].args[0])
+        delay.assert_called_with('assistente:1')
+
+        with self.assertNumQueries(1):
+            historico = async_to_sync(Memoria.carregar)('assistente:1').historico()
+        self.assertEqual(historico[0], {'role': 'system', 'content': 'Resumo da conversa até aqui: Cliente é MEI de serviços.'})
+        self.assertEqual(len(historico), 3)
+
+    def test_retencao_e_exclusao_com_a_sessao_e_o_usuario(self):
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        from .memoria import chave_assistente, chave_chatbot, limpar_memorias
+        from .models import ChatbotSessao
+
+        sessao = ChatbotSessao.objects.create(session_key='mem-1', nome='Ana', email='ana@example.com', telefone='11999999999')
+        user = get_user_model().objects.create_user(username='mem', email='mem@example.com', password='x')
+        for chave in (chave_chatbot('mem-1'), chave_assistente(user.pk), 'chatbot:antiga', 'chatbot:recente'):
+            MemoriaConversa.objects.create(chave=chave)
+        MemoriaConversa.objects.filter(chave='chatbot:antiga').update(atualizado_em=timezone.now() - timedelta(days=31))
+
+        sessao.delete()
+        user.delete()
+        self.assertEqual(limpar_memorias(dias=30), 1)
+        self.assertEqual(list(MemoriaConversa.objects.values_list('chave', flat=True)), ['chatbot:recente'])
+
+
+class RateLimitTest(TestCase):
+    """Token bucket dos endpoints públicos: 429 com Retry-After antes do banco."""
+
+    def setUp(self):
+        cache.clear()
+
+    def _iniciar(self, ip='10.0.0.1'):
+        return self.client.post(
+            reverse('support:chatbot_iniciar_sessao'),
+            data={'nome': 'Bot', 'email': 'bot@example.com', 'telefone': '11999999999'},
+            content_type='application/json',
+            HTTP_X_REAL_IP=ip,
+        )
+
+    def test_rajada_esgotada_responde_429_sem_tocar_no_banco(self):
+        from gestao360_project.rate_limit import contadores
+
+        self.assertEqual([self._iniciar().status_code for _ in range(5)], [200] * 5)
+        with self.assertNumQueries(0):
+            response = self._iniciar()
+        self.assertEqual(response.status_code, 429)
+        # 10/h: uma ficha a cada 6 minutos
+        self.assertEqual(response['Retry-After'], '360')
+        self.assertFalse(response.json()['success'])
+        self.assertEqual(Lead.objects.filter(origem='chatbot').count(), 5)
+
+        # Outro IP tem o próprio balde
+        self.assertEqual(self._iniciar(ip='10.0.0.2').status_code, 200)
+        self.assertEqual(contadores()['chatbot_iniciar'], {'permitidas': 6, 'bloqueadas': 1})
+
+    def test_session_keys_aleatorias_nao_escapam_do_balde_por_ip(self):
+        url = reverse('support:chatbot_encerrar_sessao')
+        respostas = [
+            self.client.post(
+                url, data={'session_key': f'aleatoria-{i}'}, content_type='application/json', HTTP_X_REAL_IP='10.0.0.3',
+            ).status_code
+            for i in range(31)
+        ]
+        # Cada chave tem balde próprio, mas o IP esgota a rajada de 30
+        self.assertNotIn(429, respostas[:30])
+        self.assertEqual(respostas[30], 429)
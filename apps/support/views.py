@@ -1,13 +1,13 @@
 from django.shortcuts import render, get_object_or_404
 from django.http import JsonResponse
-from django.views.decorators.http import require_http_methods
+from django.views.decorators.http import require_http_methods, condition
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
 from django.core.serializers import serialize
 from django.forms.models import model_to_dict
 from django.core.cache import cache
-from django.db.models import Count, Q
+from django.db.models import Count, Q, Prefetch
 from django.utils.dateparse import parse_datetime
 import json
 import logging
@@ -19,6 +19,15 @@ from apps.testimonials.models import Testimonial
 from apps.services.models import Plano
 from apps.documents.models import Document
 from .whatsapp_service import whatsapp_service
+from gestao360_project.rate_limit import rate_limit
+from .dashboard_stats import get_dashboard_stats
+from .pagination import (
+    InvalidCursor, KeysetPaginator, is_compat_request, paginated_response_data,
+)
+from .clientes_roster import ROSTER_FIELDS, roster_etag, roster_queryset, serialize_roster_row
+from .solicitacoes_feed import (
+    abertura_feed, serialize_abertura_row, servicos_mei_feed, serialize_servico_mei_row,
+)
 from apps.documents.models_guia_imposto import GuiaImposto
 from apps.services.models import Subscription, Plan, Plano, ProcessoAbertura, SolicitacaoAberturaMEI
 
@@ -42,159 +51,110 @@ def staff_dashboard(request):
 @login_required
 @user_passes_test(is_staff_user)
 def api_dashboard_stats(request):
-    """Retorna estatísticas para o dashboard"""
+    """
+    Retorna estatísticas para o dashboard.
+
+    Os dados vêm do snapshot versionado em cache (ver dashboard_stats).
+    Use ?fresh=1 para forçar o recálculo no banco.
+    """
     try:
-        # Clientes Ativos (consideramos todos que possuem usuário ativo)
-        clientes_ativos = Cliente.objects.filter(user__is_active=True).count()
-        
-        # Clientes por Regime
-        # MEI, Simples Nacional (SN), Lucro Presumido (LP), Lucro Real (LR)
-        # Assumindo que o campo regime_tributario existe no model Cliente (adicionado anteriormente)
-        
-        clientes_mei = Cliente.objects.filter(regime_tributario='MEI', user__is_active=True).count()
-        clientes_simples = Cliente.objects.filter(regime_tributario='SN', user__is_active=True).count()
-        clientes_presumido = Cliente.objects.filter(regime_tributario='LP', user__is_active=True).count()
-        clientes_real = Cliente.objects.filter(regime_tributario='LR', user__is_active=True).count()
-        
-        # Clientes por Plano (... existing code ...)
-        # Vamos pegar da Subscription ativa
-        planos_stats = Subscription.objects.filter(status='ativa') \
-            .values('plano__nome') \
-            .annotate(total=Count('id')) \
-            .order_by('-total')
-            
-        planos_data = []
-        for p in planos_stats:
-            planos_data.append({
-                'nome': p['plano__nome'],
-                'total': p['total']
-            })
+        fresh = request.GET.get('fresh') == '1'
+        stats = get_dashboard_stats(fresh=fresh)
 
-        # Contagem de Leads Pendentes
-        leads_pendentes = Lead.objects.filter(status='pendente').count()
-            
-        data = {
-            'clientes_ativos': clientes_ativos,
-            'leads_pendentes': leads_pendentes,
-            'regimes': {
-                'MEI': clientes_mei,
-                'Simples Nacional': clientes_simples,
-                'Lucro Presumido': clientes_presumido,
-                'Lucro Real': clientes_real
-            },
-            'planos': planos_data
-        }
-        
-        return JsonResponse({'success': True, 'data': data})
+        return JsonResponse({
+            'success': True,
+            'data': stats['data'],
+            'meta': {
+                'versao': stats['versao'],
+                'gerado_em': stats['gerado_em'],
+                'cache': stats['cache'],
+                'latencia_ms': stats['latencia_ms'],
+            }
+        })
     except Exception as e:
         logger.error(f"Erro ao buscar estatísticas do dashboard: {str(e)}")
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
 
 # ==================== LEADS API ====================
 
+def _serialize_lead(lead):
+    return {
+        'id': lead.id,
+        'nome_completo': lead.nome_completo,
+        'email': lead.email,
+        'telefone': lead.telefone,
+        'estado': lead.estado,
+        'cidade': lead.cidade,
+        'servico_interesse': lead.servico_interesse,
+        'origem': lead.origem,
+        'contatado': lead.contatado,
+        'status': getattr(lead, 'status', 'pendente'),
+        'observacoes': lead.observacoes or '',
+        'criado_em': lead.criado_em.strftime('%Y-%m-%d %H:%M:%S')
+    }
+
 @login_required
 @user_passes_test(is_staff_user)
 def api_leads_list(request):
-    """Lista todos os leads"""
-    print("DEBUG: api_leads_list accessed by user", request.user)
+    """
+    Lista leads paginados por cursor.
+
+    Filtros: status, origem, contatado (0/1), q (nome, e-mail ou telefone).
+    Ordenação (sort): criado_em (padrão -criado_em).
+    """
     try:
-        leads = Lead.objects.all().order_by('-criado_em')
-        count = leads.count()
-        print(f"DEBUG: Found {count} leads")
-        data = []
-        for lead in leads:
-            data.append({
-                'id': lead.id,
-                'nome_completo': lead.nome_completo,
-                'email': lead.email,
-                'telefone': lead.telefone,
-                'estado': lead.estado,
-                'cidade': lead.cidade,
-                'servico_interesse': lead.servico_interesse,
-                'origem': lead.origem,
-                'contatado': lead.contatado,
-                'status': getattr(lead, 'status', 'pendente'),
-                'observacoes': lead.observacoes or '',
-                'criado_em': lead.criado_em.strftime('%Y-%m-%d %H:%M:%S')
-            })
-        print("DEBUG: Returning JSON response")
-        return JsonResponse({'success': True, 'data': data})
+        leads = Lead.objects.all()
+
+        status = request.GET.get('status')
+        if status:
+            leads = leads.filter(status=status)
+        origem = request.GET.get('origem')
+        if origem:
+            leads = leads.filter(origem=origem)
+        contatado = request.GET.get('contatado')
+        if contatado in ('0', '1'):
+            leads = leads.filter(contatado=contatado == '1')
+        q = request.GET.get('q', '').strip()
+        if q:
+            leads = leads.filter(
+                Q(nome_completo__icontains=q) | Q(email__icontains=q) | Q(telefone__icontains=q)
+            )
+
+        if is_compat_request(request):
+            data = [_serialize_lead(lead) for lead in leads.order_by('-criado_em')]
+            return JsonResponse({'success': True, 'data': data})
+
+        paginator = KeysetPaginator(leads, {'criado_em': 'criado_em'}, '-criado_em')
+        items, pagination = paginator.paginate(request)
+        data = [_serialize_lead(lead) for lead in items]
+        return JsonResponse(paginated_response_data(data, pagination))
+    except InvalidCursor as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
     except Exception as e:
-        import traceback
-        print(f"DEBUG: Error in api_leads_list: {e}")
-        traceback.print_exc()
+        logger.error(f"Erro ao listar leads: {str(e)}")
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
 
-@login_required
-@user_passes_test(is_staff_user)
 @login_required
 @user_passes_test(is_staff_user)
 def api_processos_abertura_list(request):
-    """Lista processos de abertura de empresa"""
+    """
+    Lista processos de abertura de empresa e solicitações MEI, paginados por
+    cursor e ordenados por data de atualização (mais recente primeiro).
+
+    Filtros: status.
+    """
     try:
-        data = []
-        
-        # 1. Processos Abertura (Padrão)
-        processos = ProcessoAbertura.objects.all()
-        for proc in processos:
-            cliente_nome = proc.nome_completo or "Não informado"
-            if proc.usuario:
-                 cliente_nome += f" ({proc.usuario.email})"
-            
-            tem_docs = bool(proc.doc_identidade_frente or proc.comprovante_residencia)
-            
-            data.append({
-                'id': f"proc-{proc.id}",
-                'cliente': cliente_nome,
-                'email': proc.email or (proc.usuario.email if proc.usuario else ''),
-                'telefone': proc.telefone_whatsapp,
-                'status': proc.get_status_display(),
-                'status_code': proc.status,
-                'etapa': f"Etapa {proc.etapa_atual}",
-                'tipo_societario': proc.get_tipo_societario_display() or '-',
-                'tem_documentos': tem_docs,
-                'criado_em': proc.criado_em,
-                'atualizado_em': proc.atualizado_em,
-                'timestamp': proc.atualizado_em.timestamp() if proc.atualizado_em else 0
-            })
-            
-        # 2. Solicitações MEI
-        solicitacoes_mei = SolicitacaoAberturaMEI.objects.all()
-        for mei in solicitacoes_mei:
-            data.append({
-                'id': f"mei-{mei.id}",
-                'cliente': mei.nome_completo,
-                'email': mei.email,
-                'telefone': mei.telefone,
-                'status': mei.get_status_display(),
-                'status_code': mei.status,
-                'etapa': "Solicitação MEI",
-                'tipo_societario': 'MEI',
-                'tem_documentos': False,
-                'criado_em': mei.criado_em,
-                'atualizado_em': mei.atualizado_em,
-                'timestamp': mei.atualizado_em.timestamp() if mei.atualizado_em else 0
-            })
-            
-        # Ordenar por data de atualização (mais recente primeiro)
-        data.sort(key=lambda x: x['timestamp'], reverse=True)
-        
-        # Formatar datas para string e remover timestamp
-        for item in data:
-            if item.get('criado_em'):
-                item['criado_em'] = item['criado_em'].strftime('%d/%m/%Y %H:%M')
-            else:
-                item['criado_em'] = '-'
-                
-            if item.get('atualizado_em'):
-                item['atualizado_em'] = item['atualizado_em'].strftime('%d/%m/%Y %H:%M')
-            else:
-                item['atualizado_em'] = '-'
-                
-            if 'timestamp' in item:
-                del item['timestamp']
-            
-        return JsonResponse({'success': True, 'data': data})
+        feed = abertura_feed(status=request.GET.get('status'))
+
+        if is_compat_request(request):
+            data = [serialize_abertura_row(row) for row in feed.all()]
+            return JsonResponse({'success': True, 'data': data})
+
+        rows, pagination = feed.paginate(request)
+        data = [serialize_abertura_row(row) for row in rows]
+        return JsonResponse(paginated_response_data(data, pagination))
+    except InvalidCursor as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
 
@@ -438,94 +398,24 @@ def api_leads_delete(request, pk):
 @login_required
 @user_passes_test(is_staff_user)
 def api_servicos_mei_list(request):
-    """Lista serviços MEI (das novas tabelas de solicitação + leads antigos)"""
-    try:
-        data = []
-
-        # Buscar solicitações de Baixa MEI (novas)
-        try:
-            from apps.services.models import SolicitacaoBaixaMEI
-            for s in SolicitacaoBaixaMEI.objects.order_by('-criado_em'):
-                pag_status = ''
-                if s.pagamento:
-                    pag_status = s.pagamento.status
-                data.append({
-                    'id': f'baixa-{s.id}',
-                    'real_id': s.id,
-                    'model': 'SolicitacaoBaixaMEI',
-                    'nome_completo': s.nome_completo,
-                    'email': s.email,
-                    'telefone': s.telefone,
-                    'tipo_servico': 'Baixa do MEI',
-                    'origem': 'formulario_baixar_mei',
-                    'servico_interesse': f'CNPJ: {s.cnpj} | CPF: {s.cpf} | Motivo: {s.get_motivo_display() if s.motivo else "N/A"}',
-                    'observacoes': s.observacoes or '',
-                    'status': s.status,
-                    'pagamento_status': pag_status,
-                    'valor': str(s.VALOR_SERVICO),
-                    'criado_em': s.criado_em.strftime('%Y-%m-%d %H:%M:%S')
-                })
-        except Exception:
-            pass
-
-        # Buscar solicitações de Declaração Anual MEI (novas)
-        try:
-            from apps.services.models import SolicitacaoDeclaracaoAnualMEI
-            for s in SolicitacaoDeclaracaoAnualMEI.objects.order_by('-criado_em'):
-                pag_status = ''
-                if s.pagamento:
-                    pag_status = s.pagamento.status
-                data.append({
-                    'id': f'dasn-{s.id}',
-                    'real_id': s.id,
-                    'model': 'SolicitacaoDeclaracaoAnualMEI',
-                    'nome_completo': s.nome_completo,
-                    'email': s.email,
-                    'telefone': s.telefone,
-                    'tipo_servico': 'Declaração Anual (DASN)',
-                    'origem': 'formulario_declaracao_anual_mei',
-                    'servico_interesse': f'CNPJ: {s.cnpj} | Ano: {s.ano_referencia} | Faturamento: R$ {s.faturamento}',
-                    'observacoes': s.observacoes or '',
-                    'status': s.status,
-                    'pagamento_status': pag_status,
-                    'valor': str(s.VALOR_SERVICO),
-                    'criado_em': s.criado_em.strftime('%Y-%m-%d %H:%M:%S')
-                })
-        except Exception:
-            pass
-
-        # Buscar leads antigos (dos formulários anteriores)
-        leads = Lead.objects.filter(
-            origem__in=['formulario_baixar_mei', 'formulario_declaracao_anual_mei']
-        ).order_by('-criado_em')
-
-        for lead in leads:
-            if lead.origem == 'formulario_baixar_mei':
-                tipo_servico = 'Baixa do MEI'
-            else:
-                tipo_servico = 'Declaração Anual (DASN)'
+    """
+    Lista serviços MEI (das novas tabelas de solicitação + leads antigos),
+    paginados por cursor e ordenados por data de criação.
 
-            data.append({
-                'id': f'lead-{lead.id}',
-                'real_id': lead.id,
-                'model': 'Lead',
-                'nome_completo': lead.nome_completo,
-                'email': lead.email,
-                'telefone': lead.telefone,
-                'tipo_servico': tipo_servico,
-                'origem': lead.origem,
-                'servico_interesse': lead.servico_interesse or '',
-                'observacoes': lead.observacoes or '',
-                'status': getattr(lead, 'status', 'pendente'),
-                'pagamento_status': '',
-                'valor': '',
-                'criado_em': lead.criado_em.strftime('%Y-%m-%d %H:%M:%S')
-            })
+    Filtros: status.
+    """
+    try:
+        feed = servicos_mei_feed(status=request.GET.get('status'))
 
-        # Ordenar tudo por data decrescente
-        data.sort(key=lambda x: x['criado_em'], reverse=True)
+        if is_compat_request(request):
+            data = [serialize_servico_mei_row(row) for row in feed.all()]
+            return JsonResponse({'success': True, 'data': data})
 
-        return JsonResponse({'success': True, 'data': data})
+        rows, pagination = feed.paginate(request)
+        data = [serialize_servico_mei_row(row) for row in rows]
+        return JsonResponse(paginated_response_data(data, pagination))
+    except InvalidCursor as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
     except Exception as e:
         logger.error(f"Erro ao listar serviços MEI: {str(e)}")
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
@@ -670,26 +560,55 @@ def sync_with_google(action, agenda_item, raise_error=False):
         if raise_error:
             raise e
 
+def _serialize_agenda(item):
+    return {
+        'id': item.id,
+        'titulo': item.titulo,
+        'descricao': item.descricao,
+        'data_inicio': item.data_inicio.strftime('%Y-%m-%d %H:%M'),
+        'data_fim': item.data_fim.strftime('%Y-%m-%d %H:%M') if item.data_fim else None,
+        'responsavel': item.responsavel.get_full_name() or item.responsavel.username,
+        'status': item.get_status_display(),
+        'status_value': item.status,
+        'recorrente': item.recorrente,
+        'google_link': item.google_html_link,
+    }
+
 @login_required
 @user_passes_test(is_staff_user)
 def api_agenda_list(request):
-    """Lista itens da agenda"""
-    itens = Agenda.objects.all().select_related('responsavel').order_by('data_inicio')
-    data = []
-    for item in itens:
-        data.append({
-            'id': item.id,
-            'titulo': item.titulo,
-            'descricao': item.descricao,
-            'data_inicio': item.data_inicio.strftime('%Y-%m-%d %H:%M'),
-            'data_fim': item.data_fim.strftime('%Y-%m-%d %H:%M') if item.data_fim else None,
-            'responsavel': item.responsavel.get_full_name() or item.responsavel.username,
-            'status': item.get_status_display(),
-            'status_value': item.status,
-            'recorrente': item.recorrente,
-            'google_link': item.google_html_link,
-        })
-    return JsonResponse({'success': True, 'data': data})
+    """
+    Lista itens da agenda paginados por cursor.
+
+    Filtros: status, responsavel_id, inicio/fim (intervalo de data_inicio, ISO 8601).
+    Ordenação (sort): data_inicio (padrão crescente).
+    """
+    try:
+        itens = Agenda.objects.select_related('responsavel')
+
+        status = request.GET.get('status')
+        if status:
+            itens = itens.filter(status=status)
+        responsavel_id = request.GET.get('responsavel_id')
+        if responsavel_id:
+            itens = itens.filter(responsavel_id=responsavel_id)
+        inicio = parse_datetime(request.GET.get('inicio', '') or '')
+        if inicio:
+            itens = itens.filter(data_inicio__gte=inicio)
+        fim = parse_datetime(request.GET.get('fim', '') or '')
+        if fim:
+            itens = itens.filter(data_inicio__lt=fim)
+
+        if is_compat_request(request):
+            data = [_serialize_agenda(item) for item in itens.order_by('data_inicio')]
+            return JsonResponse({'success': True, 'data': data})
+
+        paginator = KeysetPaginator(itens, {'data_inicio': 'data_inicio'}, 'data_inicio')
+        items, pagination = paginator.paginate(request)
+        data = [_serialize_agenda(item) for item in items]
+        return JsonResponse(paginated_response_data(data, pagination))
+    except InvalidCursor as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
 
 @login_required
 @user_passes_test(is_staff_user)
@@ -1040,6 +959,7 @@ def api_documents_list(request):
 
 @require_http_methods(["POST"])
 @csrf_exempt
+@rate_limit('capturar_lead', taxa='10/h', rajada=5)
 def capturar_lead(request):
     """
     View para capturar leads dos formulários do site (popup e seção de contato).
@@ -1328,51 +1248,30 @@ def api_chamado_update_status(request, pk):
 
 # ==================== NOTAS FISCAIS API (STAFF) ====================
 
-# @login_required
-# @user_passes_test(is_staff_user) # Desabilitando permissão para teste
+@login_required
+@user_passes_test(is_staff_user)
+@condition(etag_func=roster_etag)
 def api_clientes_list(request):
-    print("API CLIENTES CALLED") # Debug Log
-    """Lista todos os clientes com dados completos para o dashboard"""
-    from django.contrib.auth import get_user_model
-    User = get_user_model()
-    
-    # DEBUG: Include eveybody for now to debug
-    clientes = User.objects.all().order_by('first_name')
-    print(f"DEBUG: Found {clientes.count()} clients in DB")
-    # clientes = User.objects.filter(is_active=True).exclude(is_superuser=True).order_by('first_name')
-    
-    data = []
-    for cliente in clientes:
-        # Tentar obter o profile
-        fase = 'fase_1' # Default fallback
-        regime = 'SN' # Default fallback
-        profile = None
-        try:
-            if hasattr(cliente, 'cliente_profile'):
-               profile = cliente.cliente_profile
-               fase = profile.fase_abertura or 'fase_1'
-               regime = profile.regime_tributario or 'SN'
-        except Exception:
-            pass
+    """
+    Lista os clientes com dados completos para o dashboard.
 
-        data.append({
-            'id': cliente.id,
-            'nome': cliente.get_full_name() or cliente.username,
-            'email': cliente.email,
-            'telefone': getattr(profile, 'telefone', 'N/D') if profile else 'N/D',
-            'fase': fase,
-            'regime': regime,
-            'fase_display': dict(getattr(Cliente.FASE_ABERTURA_CHOICES, 'choices', [])) if 0 else fase, # Simplificado
-            # Dados da empresa
-            'cnpj': getattr(profile, 'cnpj', None) if profile else None,
-            'razao_social': getattr(profile, 'razao_social', None) if profile else None,
-            'nome_fantasia': getattr(profile, 'nome_fantasia', None) if profile else None,
-            'endereco': getattr(profile, 'endereco', None) if profile else None,
-            # Serviços
-            'endereco_virtual_status': getattr(profile, 'endereco_virtual_status', 'nao_contratado') if profile else 'nao_contratado',
-            'certificado_digital_status': getattr(profile, 'certificado_digital_status', 'nao_contratado') if profile else 'nao_contratado',
-        })
-    return JsonResponse({'success': True, 'data': data})
+    Usuário e perfil Cliente vêm em uma única consulta. Aceita filtros
+    (q, regime, fase), paginação por cursor (ordenado por nome) e responde
+    304 Not Modified quando o ETag enviado em If-None-Match ainda é válido.
+    """
+    try:
+        clientes = roster_queryset(request.GET).values(*ROSTER_FIELDS)
+
+        if is_compat_request(request):
+            data = [serialize_roster_row(row) for row in clientes.order_by('first_name', 'id')]
+            return JsonResponse({'success': True, 'data': data})
+
+        paginator = KeysetPaginator(clientes, {'nome': 'first_name'}, 'nome')
+        rows, pagination = paginator.paginate(request)
+        data = [serialize_roster_row(row) for row in rows]
+        return JsonResponse(paginated_response_data(data, pagination))
+    except InvalidCursor as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
 
 
 @login_required
@@ -1733,75 +1632,40 @@ def api_clientes_com_extratos(request):
 @login_required
 @user_passes_test(is_staff_user)
 def api_contabilidade_movimentacoes(request, cliente_id):
-    """Lista movimentações financeiras de um cliente específico, agrupadas por mês"""
-    from apps.users.models import MovimentacaoFinanceira
+    """
+    Movimentações financeiras de um cliente específico, agrupadas por mês.
+
+    Sem parâmetros retorna apenas os totais de cada mês (calculados no banco).
+    Com ?mes=YYYY-MM retorna o mês pedido já com a lista de movimentações.
+    """
     from django.contrib.auth import get_user_model
-    from collections import defaultdict
-    from datetime import datetime
-    
+    from apps.users.ledger import (
+        ledger_queryset, month_summary, month_totals, parse_month,
+        serialize_ledger_entry, serialize_month_totals,
+    )
+
     User = get_user_model()
-    
+
     cliente = get_object_or_404(User, pk=cliente_id)
-    
-    # Buscar todas as movimentações do cliente
-    movimentacoes = MovimentacaoFinanceira.objects.filter(
-        user=cliente
-    ).order_by('-competencia', '-created_at')
-    
-    # Agrupar por mês/ano
-    movimentacoes_por_mes = defaultdict(list)
-    
-    for mov in movimentacoes:
-        mes_ano = mov.competencia.strftime('%Y-%m')
-        mes_ano_formatado = mov.competencia.strftime('%B de %Y')
-        
-        # Traduzir mês para português
-        meses_pt = {
-            'January': 'Janeiro', 'February': 'Fevereiro', 'March': 'Março',
-            'April': 'Abril', 'May': 'Maio', 'June': 'Junho',
-            'July': 'Julho', 'August': 'Agosto', 'September': 'Setembro',
-            'October': 'Outubro', 'November': 'Novembro', 'December': 'Dezembro'
-        }
-        
-        for eng, pt in meses_pt.items():
-            mes_ano_formatado = mes_ano_formatado.replace(eng, pt)
-        
-        movimentacoes_por_mes[mes_ano].append({
-            'id': mov.id,
-            'tipo': mov.get_tipo_display(),
-            'tipo_raw': mov.tipo,
-            'nome': mov.nome,
-            'valor': float(mov.valor),
-            'valor_formatado': f'R$ {mov.valor:,.2f}'.replace(',', 'X').replace('.', ',').replace('X', '.'),
-            'status': mov.get_status_display(),
-            'status_raw': mov.status,
-            'anexo_url': mov.anexo.url if mov.anexo else None,
-            'data_criacao': mov.created_at.strftime('%d/%m/%Y %H:%M'),
-            'mes_ano_formatado': mes_ano_formatado
-        })
-    
-    # Converter para lista ordenada
-    data = []
-    for mes_ano in sorted(movimentacoes_por_mes.keys(), reverse=True):
-        movs = movimentacoes_por_mes[mes_ano]
-        
-        # Calcular totais
-        total_receitas = sum(m['valor'] for m in movs if m['tipo_raw'] == 'receita')
-        total_despesas = sum(m['valor'] for m in movs if m['tipo_raw'] == 'despesa')
-        saldo = total_receitas - total_despesas
-        
-        data.append({
-            'mes_ano': mes_ano,
-            'mes_ano_formatado': movs[0]['mes_ano_formatado'],
-            'movimentacoes': movs,
-            'total_receitas': total_receitas,
-            'total_despesas': total_despesas,
-            'saldo': saldo,
-            'total_receitas_formatado': f'R$ {total_receitas:,.2f}'.replace(',', 'X').replace('.', ',').replace('X', '.'),
-            'total_despesas_formatado': f'R$ {total_despesas:,.2f}'.replace(',', 'X').replace('.', ',').replace('X', '.'),
-            'saldo_formatado': f'R$ {saldo:,.2f}'.replace(',', 'X').replace('.', ',').replace('X', '.')
-        })
-    
+
+    mes_param = request.GET.get('mes')
+    if mes_param:
+        mes = parse_month(mes_param)
+        if mes is None:
+            return JsonResponse({'success': False, 'error': 'Mês inválido.'}, status=400)
+        totais = month_summary(cliente, mes)
+        if totais['quantidade']:
+            item = serialize_month_totals({**totais, 'mes': mes})
+            item['movimentacoes'] = [
+                serialize_ledger_entry(mov)
+                for mov in ledger_queryset(cliente, mes=mes).order_by('-competencia', '-created_at')
+            ]
+            data = [item]
+        else:
+            data = []
+    else:
+        data = [serialize_month_totals(row) for row in month_totals(cliente)]
+
     return JsonResponse({
         'success': True,
         'cliente': {
@@ -1939,29 +1803,56 @@ def api_cliente_dados_empresa(request, cliente_id):
 
 # ==================== GUIAS DE IMPOSTO ====================
 
+def _serialize_guia_imposto(guia):
+    return {
+        'id': guia.id,
+        'cliente_id': guia.cliente.id,
+        'cliente_email': guia.cliente.email,
+        'tipo': guia.get_tipo_display(),
+        'descricao': guia.descricao or '',
+        'valor': str(guia.valor),
+        'vencimento': guia.vencimento.strftime('%d/%m/%Y'),
+        'competencia': guia.competencia.strftime('%m/%Y'),
+        'status': guia.get_status_display(),
+        'status_raw': guia.status,
+        'arquivo_url': guia.arquivo_pdf.url if guia.arquivo_pdf else None,
+        'codigo_barras': guia.codigo_barras
+    }
+
 @login_required
 @user_passes_test(is_staff_user)
 def api_guias_imposto_list(request):
-    """Lista guias de imposto"""
-    from apps.documents.models_guia_imposto import GuiaImposto
-    guias = GuiaImposto.objects.select_related('cliente').all().order_by('-vencimento')
-    data = []
-    for guia in guias:
-        data.append({
-            'id': guia.id,
-            'cliente_id': guia.cliente.id,
-            'cliente_email': guia.cliente.email,
-            'tipo': guia.get_tipo_display(),
-            'descricao': guia.descricao or '',
-            'valor': str(guia.valor),
-            'vencimento': guia.vencimento.strftime('%d/%m/%Y'),
-            'competencia': guia.competencia.strftime('%m/%Y'),
-            'status': guia.get_status_display(),
-            'status_raw': guia.status,
-            'arquivo_url': guia.arquivo_pdf.url if guia.arquivo_pdf else None,
-            'codigo_barras': guia.codigo_barras
-        })
-    return JsonResponse({'success': True, 'data': data})
+    """
+    Lista guias de imposto paginadas por cursor.
+
+    Filtros: status, tipo, cliente_id.
+    Ordenação (sort): vencimento ou criado_em (padrão -vencimento).
+    """
+    try:
+        guias = GuiaImposto.objects.select_related('cliente')
+
+        status = request.GET.get('status')
+        if status:
+            guias = guias.filter(status=status)
+        tipo = request.GET.get('tipo')
+        if tipo:
+            guias = guias.filter(tipo=tipo)
+        cliente_id = request.GET.get('cliente_id')
+        if cliente_id:
+            guias = guias.filter(cliente_id=cliente_id)
+
+        if is_compat_request(request):
+            data = [_serialize_guia_imposto(guia) for guia in guias.order_by('-vencimento')]
+            return JsonResponse({'success': True, 'data': data})
+
+        paginator = KeysetPaginator(
+            guias, {'vencimento': 'vencimento', 'criado_em': 'criado_em'}, '-vencimento'
+        )
+        items, pagination = paginator.paginate(request)
+        data = [_serialize_guia_imposto(guia) for guia in items]
+        return JsonResponse(paginated_response_data(data, pagination))
+    except InvalidCursor as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
 
 @login_required
 @user_passes_test(is_staff_user)
@@ -2099,6 +1990,24 @@ def api_cliente_subscription_update(request):
 
 # ==================== STAFF TASKS API ====================
 
+def _serialize_staff_task(t):
+    return {
+        'id': t.id,
+        'title': t.title,
+        'description': t.description,
+        'status': t.status,
+        'status_display': t.get_status_display(),
+        'priority': t.priority,
+        'priority_display': t.get_priority_display(),
+        'due_date': t.due_date.strftime('%Y-%m-%d') if t.due_date else None,
+        'clients': [
+            {'id': c.id, 'nome': str(c), 'email': c.user.email}
+            for c in t.clients.all()
+        ],
+        'created_at': t.created_at.strftime('%Y-%m-%d %H:%M'),
+        'updated_at': t.updated_at.strftime('%Y-%m-%d %H:%M'),
+    }
+
 @login_required
 @user_passes_test(is_staff_user)
 def api_staff_tasks_list(request):
@@ -2107,31 +2016,30 @@ def api_staff_tasks_list(request):
     POST: Cria nova tarefa.
     """
     if request.method == 'GET':
-        tasks = StaffTask.objects.all().order_by('-updated_at')
-        data = []
-        for t in tasks:
-            clients_data = []
-            for c in t.clients.all():
-                clients_data.append({
-                    'id': c.id,
-                    'nome': str(c),
-                    'email': c.user.email
-                })
-            
-            data.append({
-                'id': t.id,
-                'title': t.title,
-                'description': t.description,
-                'status': t.status,
-                'status_display': t.get_status_display(),
-                'priority': t.priority,
-                'priority_display': t.get_priority_display(),
-                'due_date': t.due_date.strftime('%Y-%m-%d') if t.due_date else None,
-                'clients': clients_data,
-                'created_at': t.created_at.strftime('%Y-%m-%d %H:%M'),
-                'updated_at': t.updated_at.strftime('%Y-%m-%d %H:%M'),
-            })
-        return JsonResponse({'success': True, 'data': data})
+        try:
+            tasks = StaffTask.objects.prefetch_related(
+                Prefetch('clients', queryset=Cliente.objects.select_related('user'))
+            )
+
+            status = request.GET.get('status')
+            if status:
+                tasks = tasks.filter(status=status)
+            priority = request.GET.get('priority')
+            if priority:
+                tasks = tasks.filter(priority=priority)
+
+            if is_compat_request(request):
+                data = [_serialize_staff_task(t) for t in tasks.order_by('-updated_at')]
+                return JsonResponse({'success': True, 'data': data})
+
+            paginator = KeysetPaginator(
+                tasks, {'updated_at': 'updated_at', 'created_at': 'created_at'}, '-updated_at'
+            )
+            items, pagination = paginator.paginate(request)
+            data = [_serialize_staff_task(t) for t in items]
+            return JsonResponse(paginated_response_data(data, pagination))
+        except InvalidCursor as e:
+            return JsonResponse({'success': False, 'error': str(e)}, status=400)
 
 
     elif request.method == 'POST':
@@ -2236,7 +2144,9 @@ def api_staff_tasks_delete(request, pk):
 # CHATBOT - Views e API
 # ========================================
 
-from .models import ChatbotPergunta, ChatbotSessao, ChatbotMensagem
+from .models import ChatbotSessao
+from .chatbot_catalog import obter_pergunta, resposta_com_perguntas, resposta_listar_perguntas
+from .chatbot_persistencia import gravar_turno, iniciar_sessao, nova_mensagem
 import uuid
 from django.utils import timezone
 
@@ -2251,10 +2161,12 @@ def get_client_ip(request):
 
 @csrf_exempt
 @require_http_methods(["POST"])
+@rate_limit('chatbot_iniciar', taxa='10/h', rajada=5)
 def chatbot_iniciar_sessao(request):
     """
     Inicia uma nova sessão do chatbot.
-    Cria um Lead automaticamente com os dados do visitante.
+    Cria um Lead automaticamente com os dados do visitante (Lead, sessão e
+    boas-vindas em uma única transação).
     """
     try:
         data = json.loads(request.body)
@@ -2275,57 +2187,44 @@ def chatbot_iniciar_sessao(request):
     # Gerar chave única da sessão
     session_key = str(uuid.uuid4())
     
-    # Criar Lead automaticamente
-    lead = Lead.objects.create(
-        nome_completo=nome,
-        email=email,
-        telefone=telefone,
-        estado='',  # Pode ser preenchido depois
-        origem='chatbot',
-        servico_interesse='Chatbot - Atendimento Automático',
-        observacoes=f'Lead gerado via chatbot. Página: {pagina_origem}'
-    )
-    
-    # Criar sessão do chatbot
-    sessao = ChatbotSessao.objects.create(
-        session_key=session_key,
-        nome=nome,
-        email=email,
-        telefone=telefone,
-        lead=lead,
-        pagina_origem=pagina_origem or None,
-        ip_address=get_client_ip(request),
-        user_agent=request.META.get('HTTP_USER_AGENT', '')[:500],
-    )
-    
     # Mensagem de boas-vindas do bot
     msg_boas_vindas = f"Olá, {nome.split()[0]}! 👋 Sou o assistente virtual da Vetorial Contabilidade. Como posso ajudar você hoje?"
     
-    ChatbotMensagem.objects.create(
-        sessao=sessao,
-        is_bot=True,
-        conteudo=msg_boas_vindas
+    # Criar Lead, sessão do chatbot e boas-vindas
+    iniciar_sessao(
+        lead={
+            'nome_completo': nome,
+            'email': email,
+            'telefone': telefone,
+            'estado': '',  # Pode ser preenchido depois
+            'origem': 'chatbot',
+            'servico_interesse': 'Chatbot - Atendimento Automático',
+            'observacoes': f'Lead gerado via chatbot. Página: {pagina_origem}',
+        },
+        sessao={
+            'session_key': session_key,
+            'nome': nome,
+            'email': email,
+            'telefone': telefone,
+            'pagina_origem': pagina_origem or None,
+            'ip_address': get_client_ip(request),
+            'user_agent': request.META.get('HTTP_USER_AGENT', '')[:500],
+        },
+        boas_vindas=msg_boas_vindas,
     )
     
-    # Buscar perguntas frequentes para exibir
-    perguntas = ChatbotPergunta.objects.filter(ativo=True).order_by('categoria', 'ordem')[:10]
-    
-    perguntas_data = [{
-        'id': p.id,
-        'pergunta': p.pergunta,
-        'categoria': p.categoria or 'Geral'
-    } for p in perguntas]
-    
-    return JsonResponse({
+    # Perguntas frequentes para exibir (catálogo em memória)
+    return resposta_com_perguntas({
         'success': True,
         'session_key': session_key,
         'mensagem_boas_vindas': msg_boas_vindas,
-        'perguntas': perguntas_data
     })
 
 
 @csrf_exempt
 @require_http_methods(["POST"])
+@rate_limit('chatbot_pergunta_ip', taxa='90/m', rajada=30)
+@rate_limit('chatbot_pergunta', taxa='30/m', rajada=10, por='sessao')
 def chatbot_enviar_pergunta(request):
     """
     Visitante seleciona uma pergunta pré-definida.
@@ -2342,70 +2241,45 @@ def chatbot_enviar_pergunta(request):
     if not session_key:
         return JsonResponse({'success': False, 'error': 'Sessão inválida.'}, status=400)
     
-    try:
-        sessao = ChatbotSessao.objects.get(session_key=session_key, status='ativa')
-    except ChatbotSessao.DoesNotExist:
+    sessao_id = ChatbotSessao.objects.filter(
+        session_key=session_key, status='ativa'
+    ).values_list('pk', flat=True).first()
+    if sessao_id is None:
         return JsonResponse({'success': False, 'error': 'Sessão não encontrada ou encerrada.'}, status=404)
     
-    try:
-        pergunta = ChatbotPergunta.objects.get(id=pergunta_id, ativo=True)
-    except ChatbotPergunta.DoesNotExist:
+    pergunta = obter_pergunta(pergunta_id)
+    if pergunta is None:
         return JsonResponse({'success': False, 'error': 'Pergunta não encontrada.'}, status=404)
     
-    # Salvar mensagem do visitante (a pergunta que ele clicou)
-    ChatbotMensagem.objects.create(
-        sessao=sessao,
-        is_bot=False,
-        conteudo=pergunta.pergunta,
-        pergunta_relacionada=pergunta
-    )
-    
-    # Salvar resposta do bot
-    ChatbotMensagem.objects.create(
-        sessao=sessao,
-        is_bot=True,
-        conteudo=pergunta.resposta,
-        pergunta_relacionada=pergunta
-    )
-    
-    # Atualizar timestamp da sessão
-    sessao.atualizado_em = timezone.now()
-    sessao.save(update_fields=['atualizado_em'])
+    # Pergunta que o visitante clicou + resposta do bot, gravadas juntas com a sessão
+    gravar_turno(sessao_id, [
+        nova_mensagem(pergunta['pergunta'], pergunta_id=pergunta['id']),
+        nova_mensagem(pergunta['resposta'], is_bot=True, pergunta_id=pergunta['id']),
+    ])
+    # A memória do atendente IA não é gravada aqui: ela busca as perguntas
+    # rápidas nas mensagens da sessão quando a conversa chega à IA
     
     return JsonResponse({
         'success': True,
-        'pergunta': pergunta.pergunta,
-        'resposta': pergunta.resposta
+        'pergunta': pergunta['pergunta'],
+        'resposta': pergunta['resposta']
     })
 
 
 @csrf_exempt
 @require_http_methods(["GET"])
+@rate_limit('chatbot_perguntas', taxa='60/m', rajada=30)
 def chatbot_listar_perguntas(request):
     """
     Retorna todas as perguntas ativas agrupadas por categoria.
     """
-    perguntas = ChatbotPergunta.objects.filter(ativo=True).order_by('categoria', 'ordem')
-    
-    # Agrupar por categoria
-    categorias = {}
-    for p in perguntas:
-        cat = p.categoria or 'Geral'
-        if cat not in categorias:
-            categorias[cat] = []
-        categorias[cat].append({
-            'id': p.id,
-            'pergunta': p.pergunta
-        })
-    
-    return JsonResponse({
-        'success': True,
-        'categorias': categorias
-    })
+    return resposta_listar_perguntas()
 
 
 @csrf_exempt
 @require_http_methods(["POST"])
+@rate_limit('chatbot_sessao_ip', taxa='60/m', rajada=30)
+@rate_limit('chatbot_sessao', taxa='20/m', rajada=10, por='sessao')
 def chatbot_encerrar_sessao(request):
     """
     Encerra a sessão do chatbot.
@@ -2433,6 +2307,8 @@ def chatbot_encerrar_sessao(request):
 
 @csrf_exempt
 @require_http_methods(["POST"])
+@rate_limit('chatbot_sessao_ip', taxa='60/m', rajada=30)
+@rate_limit('chatbot_sessao', taxa='20/m', rajada=10, por='sessao')
 def chatbot_avaliar_sessao(request):
     """
     Visitante avalia o atendimento do chatbot.
@@ -2468,6 +2344,7 @@ def chatbot_avaliar_sessao(request):
 
 @csrf_exempt
 @require_http_methods(["GET"])
+@rate_limit('chatbot_recuperar', taxa='30/m', rajada=10)
 def chatbot_recuperar_sessao(request):
     """
     Recupera uma sessão existente pelo session_key.
@@ -2482,22 +2359,15 @@ def chatbot_recuperar_sessao(request):
         sessao = ChatbotSessao.objects.get(session_key=session_key, status='ativa')
         
         # Buscar mensagens da sessão
-        mensagens = sessao.mensagens.all().order_by('criado_em')
+        mensagens = sessao.mensagens.all().order_by('criado_em', 'id')
         mensagens_data = [{
             'is_bot': m.is_bot,
             'conteudo': m.conteudo,
             'timestamp': m.criado_em.isoformat()
         } for m in mensagens]
         
-        # Buscar perguntas disponíveis
-        perguntas = ChatbotPergunta.objects.filter(ativo=True).order_by('categoria', 'ordem')[:10]
-        perguntas_data = [{
-            'id': p.id,
-            'pergunta': p.pergunta,
-            'categoria': p.categoria or 'Geral'
-        } for p in perguntas]
-        
-        return JsonResponse({
+        # Perguntas disponíveis (catálogo em memória)
+        return resposta_com_perguntas({
             'success': True,
             'sessao': {
                 'nome': sessao.nome,
@@ -2505,7 +2375,6 @@ def chatbot_recuperar_sessao(request):
                 'status': sessao.status
             },
             'mensagens': mensagens_data,
-            'perguntas': perguntas_data
         })
     except ChatbotSessao.DoesNotExist:
         return JsonResponse({'success': False, 'error': 'Sessão não encontrada ou encerrada.'}, status=404)
@@ -2515,12 +2384,21 @@ def chatbot_recuperar_sessao(request):
 
 @csrf_exempt
 @require_http_methods(["POST"])
-def chatbot_atendente_ia(request):
+@rate_limit('chatbot_ia_ip', taxa='30/m', rajada=15)
+@rate_limit('chatbot_ia', taxa='10/m', rajada=5, por='sessao')
+async def chatbot_atendente_ia(request):
     """
     Processa mensagem livre do usuário usando IA (Groq - Llama 3).
     Ativa o modo de atendimento com IA na sessão.
+    Com "stream": true (ou Accept: text/event-stream) responde em SSE.
+    
+    View assíncrona: a espera pela IA não ocupa um worker. O provedor (Groq,
+    Gemini ou OpenAI) é escolhido pelo roteador de IA.
     """
-    from .groq_service import groq_service
+    from .chatbot_persistencia import gravar_turno_async
+    from .llm_router import llm_router, mensagem_erro
+    from .memoria import Memoria, chave_chatbot
+    from .sse import quer_stream, resposta_sse, transmitir
     
     try:
         data = json.loads(request.body)
@@ -2540,37 +2418,51 @@ def chatbot_atendente_ia(request):
     if len(mensagem) > 1000:
         return JsonResponse({'success': False, 'error': 'Mensagem muito longa (máx. 1000 caracteres).'}, status=400)
     
-    try:
-        sessao = ChatbotSessao.objects.get(session_key=session_key, status='ativa')
-    except ChatbotSessao.DoesNotExist:
+    sessao_id = await ChatbotSessao.objects.filter(
+        session_key=session_key, status='ativa'
+    ).values_list('pk', flat=True).afirst()
+    if sessao_id is None:
         return JsonResponse({'success': False, 'error': 'Sessão não encontrada ou encerrada.'}, status=404)
     
     # Verificar se IA está disponível
-    if not groq_service.is_available():
+    if not llm_router.disponivel():
         return JsonResponse({
             'success': False, 
             'error': 'Atendente virtual temporariamente indisponível. Tente as perguntas rápidas ou WhatsApp.'
         }, status=503)
     
-    # Salvar mensagem do usuário
-    ChatbotMensagem.objects.create(
-        sessao=sessao,
-        is_bot=False,
-        conteudo=mensagem
-    )
+    # Memória da conversa: resumo + mensagens recentes, limitadas por tokens
+    memoria = await Memoria.carregar(chave_chatbot(session_key))
+    await memoria.incluir_perguntas_rapidas(sessao_id)
+    conversation_history = memoria.historico()
+    
+    # Mensagem do usuário: gravada junto com a resposta do bot, no fim do turno
+    msg_usuario = nova_mensagem(mensagem)
     
-    # Obter histórico de conversa
-    conversation_history = groq_service.get_conversation_history_from_session(sessao)
+    # Resposta em streaming (SSE): o turno é gravado ao fim do stream
+    if quer_stream(request, data):
+        async def concluir(resposta_ia):
+            await gravar_turno_async(sessao_id, [msg_usuario, nova_mensagem(resposta_ia, is_bot=True)])
+            await memoria.registrar(mensagem, resposta_ia)
+        
+        async def falhar():
+            await gravar_turno_async(sessao_id, [msg_usuario])
+        
+        return resposta_sse(transmitir(
+            llm_router.stream(mensagem, conversation_history),
+            concluir, mensagem_erro, ao_falhar=falhar,
+        ))
     
-    # Obter resposta da IA
-    resposta_ia = groq_service.get_response(mensagem, conversation_history)
+    # Obter resposta da IA (erros viram mensagens amigáveis, fora da memória)
+    try:
+        resposta_ia = await llm_router.gerar(mensagem, conversation_history)
+        await memoria.registrar(mensagem, resposta_ia)
+    except Exception as e:
+        logger.error(f"Erro ao obter resposta da IA: {e}")
+        resposta_ia = mensagem_erro(e)
     
-    # Salvar resposta do bot
-    ChatbotMensagem.objects.create(
-        sessao=sessao,
-        is_bot=True,
-        conteudo=resposta_ia
-    )
+    # Salvar o turno (mensagem do usuário + resposta do bot)
+    await gravar_turno_async(sessao_id, [msg_usuario, nova_mensagem(resposta_ia, is_bot=True)])
     
     return JsonResponse({
         'success': True,
@@ -2580,16 +2472,25 @@ def chatbot_atendente_ia(request):
 
 @csrf_exempt
 @require_http_methods(["GET"])
+@rate_limit('chatbot_ia_status', taxa='60/m', rajada=30)
 def chatbot_ia_status(request):
     """
     Verifica se o atendente IA está disponível.
+    Para a equipe, inclui a saúde de cada provedor do roteador de IA
+    (circuito, latência p50/p95 e taxa de erro deste processo) e os
+    contadores do limite de requisições por endpoint.
     """
-    from .groq_service import groq_service
+    from gestao360_project.rate_limit import contadores
+    from .llm_router import llm_router
     
-    return JsonResponse({
+    dados = {
         'success': True,
-        'disponivel': groq_service.is_available()
-    })
+        'disponivel': llm_router.disponivel()
+    }
+    if request.user.is_staff:
+        dados['provedores'] = llm_router.status()
+        dados['limites'] = contadores()
+    return JsonResponse(dados)
 
 
 # =============================================================================
@@ -2801,14 +2702,21 @@ def assistente_ia(request):
 @login_required
 @csrf_exempt
 @require_http_methods(["POST"])
-def assistente_ia_chat(request):
+@rate_limit('assistente_ia', taxa='10/m', rajada=5, por='usuario')
+async def assistente_ia_chat(request):
     """
     API para processar mensagens do assistente IA de dúvidas contábeis.
-    Armazena histórico na sessão do usuário.
+    O histórico fica na memória de conversa (apps.support.memoria), fora da sessão.
+    Com "stream": true (ou Accept: text/event-stream) responde em SSE.
+    
+    View assíncrona: a espera pela IA não ocupa um worker. O provedor (Groq,
+    Gemini ou OpenAI) é escolhido pelo roteador de IA.
     """
-    from .groq_service import GroqService
-    import os
-    from groq import Groq
+    from .ia_concorrencia import IAOcupada
+    from .llm_router import SemProvedorIA, llm_router, mensagem_erro
+    from .memoria import Memoria, chave_assistente
+    from .models import MemoriaConversa
+    from .sse import quer_stream, resposta_sse, transmitir
     
     try:
         data = json.loads(request.body)
@@ -2825,83 +2733,67 @@ def assistente_ia_chat(request):
     if mensagem and len(mensagem) > 1500:
         return JsonResponse({'success': False, 'error': 'Mensagem muito longa (máx. 1500 caracteres).'}, status=400)
     
-    # Chave única para o histórico do usuário
-    history_key = f'assistente_ia_history_{request.user.id}'
+    # Memória da conversa do usuário (fora da sessão HTTP)
+    user = await request.auser()
+    chave = chave_assistente(user.id)
+    # Histórico antigo guardado na sessão: não é mais usado
+    await request.session.apop(f'assistente_ia_history_{user.id}', None)
     
     # Se solicitado, limpar histórico
     if limpar_historico:
-        request.session[history_key] = []
-        request.session.modified = True
+        await MemoriaConversa.objects.filter(chave=chave).adelete()
         return JsonResponse({'success': True, 'message': 'Histórico limpo.'})
     
-    # Recuperar histórico da sessão
-    conversation_history = request.session.get(history_key, [])
+    # Resumo + mensagens recentes, limitadas por tokens
+    memoria = await Memoria.carregar(chave)
+    conversation_history = memoria.historico()
     
-    # Verificar API Key do Groq
-    api_key = os.getenv('GROQ_API_KEY', '')
-    if not api_key:
+    # Verificar se há provedor de IA configurado
+    if not llm_router.disponivel():
         return JsonResponse({
             'success': False, 
             'error': 'Assistente virtual temporariamente indisponível. Entre em contato pelo WhatsApp (11) 3164-2284.'
         }, status=503)
     
-    try:
-        client = Groq(api_key=api_key)
-        
-        # Construir mensagens
-        messages = [
-            {"role": "system", "content": ASSISTENTE_CONTABIL_PROMPT}
-        ]
-        
-        # Adicionar histórico (últimas 10 mensagens para economizar tokens)
-        if conversation_history:
-            messages.extend(conversation_history[-10:])
-        
-        # Adicionar mensagem atual
-        messages.append({"role": "user", "content": mensagem})
-        
-        # Fazer chamada à API
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=messages,
-            max_tokens=800,
-            temperature=0.7,
-        )
-        
-        resposta_ia = response.choices[0].message.content.strip()
-        
-        # Atualizar histórico na sessão
-        conversation_history.append({"role": "user", "content": mensagem})
-        conversation_history.append({"role": "assistant", "content": resposta_ia})
-        
-        # Manter apenas últimas 20 mensagens no histórico
-        if len(conversation_history) > 20:
-            conversation_history = conversation_history[-20:]
-        
-        request.session[history_key] = conversation_history
-        request.session.modified = True
-        
-        logger.info(f"Assistente IA: resposta gerada para usuário {request.user.id}. Tokens: {response.usage.total_tokens}")
-        
-        return JsonResponse({
-            'success': True,
-            'resposta': resposta_ia
-        })
+    opcoes = {'system_prompt': ASSISTENTE_CONTABIL_PROMPT, 'max_tokens': 800, 'escopo': 'assistente'}
+    
+    # Resposta em streaming (SSE): a memória é gravada ao fim do stream
+    if quer_stream(request, data):
+        async def concluir(resposta_ia):
+            await memoria.registrar(mensagem, resposta_ia)
         
+        return resposta_sse(transmitir(
+            llm_router.stream(mensagem, conversation_history, **opcoes),
+            concluir, mensagem_erro,
+        ))
+    
+    try:
+        resposta_ia = await llm_router.gerar(mensagem, conversation_history, **opcoes)
     except Exception as e:
         error_msg = str(e)
         logger.error(f"Erro no assistente IA: {e}")
         
-        if 'rate_limit' in error_msg.lower() or '429' in error_msg:
+        if isinstance(e, IAOcupada) or 'rate_limit' in error_msg.lower() or '429' in error_msg:
             return JsonResponse({
                 'success': False,
                 'error': 'Estou processando muitas mensagens no momento. Por favor, aguarde alguns segundos e tente novamente.'
             }, status=429)
+        elif isinstance(e, SemProvedorIA):
+            return JsonResponse({
+                'success': False,
+                'error': 'Assistente virtual temporariamente indisponível. Entre em contato pelo WhatsApp (11) 3164-2284.'
+            }, status=503)
         else:
             return JsonResponse({
                 'success': False,
                 'error': 'Desculpe, ocorreu um erro ao processar sua mensagem. Por favor, tente novamente.'
             }, status=500)
+    
+    await memoria.registrar(mensagem, resposta_ia)
+    return JsonResponse({
+        'success': True,
+        'resposta': resposta_ia
+    })
 
 
 # ==================== BOLETOS CONTABILIDADE ====================
@@ -0,0 +1,23 @@
+"""
+Formatação pt-BR compartilhada (moeda e mês/ano).
+
+As tabelas são montadas uma única vez no carregamento do módulo, em vez de
+recriar dicionários de tradução ou encadear .replace() a cada valor.
+"""
+MESES_PT = (
+    'Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
+    'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro',
+)
+
+# Troca os separadores do formato "1,234.56" para "1.234,56" em uma passada
+_SEPARADORES_BRL = str.maketrans(',.', '.,')
+
+
+def format_currency_brl(valor):
+    """Formata um número como moeda brasileira (ex: 'R$ 1.234,56')."""
+    return f'R$ {valor or 0:,.2f}'.translate(_SEPARADORES_BRL)
+
+
+def format_month_year(data):
+    """Formata a competência como 'Março de 2025'."""
+    return f'{MESES_PT[data.month - 1]} de {data.year}'
@@ -0,0 +1,129 @@
+"""
+Agregações mensais das movimentações financeiras (livro-caixa do cliente).
+
+Os totais por mês (receitas, despesas, saldo e quantidade) são calculados no
+banco com TruncMonth + Sum condicional em uma única consulta. O detalhe de
+cada mês é buscado só quando pedido, filtrando a competência por intervalo
+(aproveita o índice (user, competencia)) em vez de __year/__month.
+"""
+import datetime
+from decimal import Decimal
+
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
+
+from .formatters import format_currency_brl, format_month_year
+from .models import MovimentacaoFinanceira
+
+ZERO = Decimal('0')
+
+
+def parse_month(value):
+    """Converte 'YYYY-MM' no primeiro dia do mês; retorna None se inválido."""
+    if not value or len(value) != 7:
+        return None
+    try:
+        return datetime.date(int(value[:4]), int(value[5:]), 1)
+    except ValueError:
+        return None
+
+
+def month_range(mes):
+    """Intervalo [início, fim) da competência que contém a data `mes`."""
+    inicio = mes.replace(day=1)
+    if inicio.month == 12:
+        fim = inicio.replace(year=inicio.year + 1, month=1)
+    else:
+        fim = inicio.replace(month=inicio.month + 1)
+    return inicio, fim
+
+
+def ledger_queryset(user, status=None, mes=None):
+    """
+    Movimentações do usuário, opcionalmente filtradas por status e mês.
+
+    Args:
+        status: um status ou uma lista de status
+        mes: data de qualquer dia do mês desejado
+    """
+    qs = MovimentacaoFinanceira.objects.filter(user=user)
+    if status:
+        if isinstance(status, str):
+            qs = qs.filter(status=status)
+        else:
+            qs = qs.filter(status__in=status)
+    if mes:
+        inicio, fim = month_range(mes)
+        qs = qs.filter(competencia__gte=inicio, competencia__lt=fim)
+    return qs
+
+
+def _totals_aggregates():
+    return {
+        'receitas': Sum('valor', filter=Q(tipo='receita')),
+        'despesas': Sum('valor', filter=Q(tipo='despesa')),
+        'quantidade': Count('id'),
+    }
+
+
+def _with_saldo(row):
+    receitas = row['receitas'] or ZERO
+    despesas = row['despesas'] or ZERO
+    row.update(receitas=receitas, despesas=despesas, saldo=receitas - despesas)
+    return row
+
+
+def month_totals(user, status=None):
+    """
+    Totais de cada competência do usuário, da mais recente para a mais antiga.
+
+    Returns:
+        lista de dicts {mes, receitas, despesas, saldo, quantidade}
+    """
+    rows = (
+        ledger_queryset(user, status)
+        .annotate(mes=TruncMonth('competencia'))
+        .values('mes')
+        .annotate(**_totals_aggregates())
+        .order_by('-mes')
+    )
+    return [_with_saldo(row) for row in rows]
+
+
+def month_summary(user, mes, status=None):
+    """Totais de uma única competência: {receitas, despesas, saldo, quantidade}."""
+    row = ledger_queryset(user, status, mes).aggregate(**_totals_aggregates())
+    return _with_saldo(row)
+
+
+def serialize_month_totals(row):
+    """Formato da API do staff para os totais de um mês."""
+    mes = row['mes']
+    return {
+        'mes_ano': mes.strftime('%Y-%m'),
+        'mes_ano_formatado': format_month_year(mes),
+        'quantidade': row['quantidade'],
+        'total_receitas': float(row['receitas']),
+        'total_despesas': float(row['despesas']),
+        'saldo': float(row['saldo']),
+        'total_receitas_formatado': format_currency_brl(row['receitas']),
+        'total_despesas_formatado': format_currency_brl(row['despesas']),
+        'saldo_formatado': format_currency_brl(row['saldo']),
+    }
+
+
+def serialize_ledger_entry(mov):
+    """Formato da API do staff para uma movimentação do detalhe do mês."""
+    return {
+        'id': mov.id,
+        'tipo': mov.get_tipo_display(),
+        'tipo_raw': mov.tipo,
+        'nome': mov.nome,
+        'valor': float(mov.valor),
+        'valor_formatado': format_currency_brl(mov.valor),
+        'status': mov.get_status_display(),
+        'status_raw': mov.status,
+        'anexo_url': mov.anexo.url if mov.anexo else None,
+        'data_criacao': mov.created_at.strftime('%d/%m/%Y %H:%M'),
+        'mes_ano_formatado': format_month_year(mov.competencia),
+    }
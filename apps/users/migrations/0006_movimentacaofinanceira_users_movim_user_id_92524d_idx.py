@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_alter_movimentacaofinanceira_competencia_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='movimentacaofinanceira',
+            index=models.Index(fields=['user', 'competencia'], name='users_movim_user_id_92524d_idx'),
+        ),
+    ]
@@ -80,6 +80,9 @@ class MovimentacaoFinanceira(models.Model):
         verbose_name = 'Movimentação Financeira'
         verbose_name_plural = 'Movimentações Financeiras'
         ordering = ['-competencia', '-created_at']
+        indexes = [
+            models.Index(fields=['user', 'competencia']),
+        ]
 
     def __str__(self):
         return f"{self.get_tipo_display()} - {self.nome} - {self.valor} ({self.get_status_display()})"
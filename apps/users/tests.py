@@ -1,3 +1,57 @@
+import datetime
+from decimal import Decimal
+
 from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from .formatters import format_currency_brl, format_month_year
+from .ledger import month_summary, month_totals
+from .models import MovimentacaoFinanceira
+
+
+class LedgerTest(TestCase):
+    """Testa os totais mensais do livro-caixa e a API do staff."""
+
+    def setUp(self):
+        User = get_user_model()
+        self.staff = User.objects.create_user(username='staff1', password='pass1234', is_staff=True)
+        self.cliente = User.objects.create_user(username='cli', password='pass1234')
+        for competencia, tipo, valor in [
+            (datetime.date(2025, 1, 1), 'receita', '1500.00'),
+            (datetime.date(2025, 1, 1), 'despesa', '200.50'),
+            (datetime.date(2025, 3, 1), 'despesa', '99.90'),
+        ]:
+            MovimentacaoFinanceira.objects.create(
+                user=self.cliente, tipo=tipo, nome='Lançamento', competencia=competencia, valor=Decimal(valor)
+            )
+
+    def test_formatadores(self):
+        self.assertEqual(format_currency_brl(Decimal('1234567.8')), 'R$ 1.234.567,80')
+        self.assertEqual(format_currency_brl(None), 'R$ 0,00')
+        self.assertEqual(format_month_year(datetime.date(2025, 3, 1)), 'Março de 2025')
+
+    def test_totais_por_mes(self):
+        with self.assertNumQueries(1):
+            totais = month_totals(self.cliente)
+        self.assertEqual([t['mes'] for t in totais], [datetime.date(2025, 3, 1), datetime.date(2025, 1, 1)])
+        self.assertEqual(totais[1]['saldo'], Decimal('1299.50'))
+        self.assertEqual(totais[0]['receitas'], Decimal('0'))
+
+        resumo = month_summary(self.cliente, datetime.date(2025, 1, 15))
+        self.assertEqual(resumo['quantidade'], 2)
+
+    def test_api_staff_detalhe_sob_demanda(self):
+        self.client.login(username='staff1', password='pass1234')
+        url = reverse('support:api_contabilidade_movimentacoes', args=[self.cliente.id])
+
+        data = self.client.get(url).json()['data']
+        self.assertEqual([m['mes_ano'] for m in data], ['2025-03', '2025-01'])
+        self.assertEqual(data[1]['saldo_formatado'], 'R$ 1.299,50')
+        self.assertNotIn('movimentacoes', data[0])
+
+        data = self.client.get(url, {'mes': '2025-01'}).json()['data']
+        self.assertEqual(len(data[0]['movimentacoes']), 2)
+        self.assertEqual(data[0]['mes_ano_formatado'], 'Janeiro de 2025')
 
-# Create your tests here.
+        self.assertEqual(self.client.get(url, {'mes': '2025-13'}).status_code, 400)
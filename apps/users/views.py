@@ -19,6 +19,7 @@ from apps.documents.models_guia_imposto import GuiaImposto
 from django.db.models import Sum, Q
 from django.conf import settings
 from .utils import validate_file_upload
+from .ledger import ledger_queryset, month_summary, parse_month
 
 User = get_user_model()
 
@@ -127,15 +128,7 @@ def api_contabilidade_summary(request):
     e informações sobre a última transmissão do usuário.
     """
     user = request.user
-    from django.utils import timezone
-    now = timezone.localtime()
-    year = now.year
-    month = now.month
-
-    qs = MovimentacaoFinanceira.objects.filter(user=user, competencia__year=year, competencia__month=month)
-    total_receitas = qs.filter(tipo='receita').aggregate(total=Sum('valor'))['total'] or 0
-    total_despesas = qs.filter(tipo='despesa').aggregate(total=Sum('valor'))['total'] or 0
-    resultado = total_receitas - total_despesas
+    totais = month_summary(user, timezone.localdate())
 
     # última transmissão do usuário
     last_trans = TransmissaoMensal.objects.filter(user=user).order_by('-transmitted_at').first()
@@ -150,9 +143,9 @@ def api_contabilidade_summary(request):
 
     return JsonResponse({
         'success': True,
-        'receitas': str(total_receitas),
-        'despesas': str(total_despesas),
-        'resultado': str(resultado),
+        'receitas': str(totais['receitas']),
+        'despesas': str(totais['despesas']),
+        'resultado': str(totais['saldo']),
         'last_transmissao': last_trans_data,
     })
 
@@ -798,21 +791,16 @@ def transmit_movimentacoes(request):
 @login_required
 def drafts_by_month(request):
     """Retorna rascunhos para o mês selecionado e os totais por tipo."""
-    month = request.GET.get('month')
-    if not month or len(month) != 7:
+    comp = parse_month(request.GET.get('month'))
+    if comp is None:
         return JsonResponse({'success': False, 'error': 'Mês inválido.'}, status=400)
-    try:
-        comp = parse_date(month + '-01')
-    except Exception:
-        return JsonResponse({'success': False, 'error': 'Mês inválido.'}, status=400)
-
-    drafts = MovimentacaoFinanceira.objects.filter(user=request.user, status=MovimentacaoFinanceira.STATUS_RASCUNHO, competencia__year=comp.year, competencia__month=comp.month).order_by('-created_at')
 
-    total_receitas = drafts.filter(tipo='receita').aggregate(total=Sum('valor'))['total'] or 0
-    total_despesas = drafts.filter(tipo='despesa').aggregate(total=Sum('valor'))['total'] or 0
+    status = MovimentacaoFinanceira.STATUS_RASCUNHO
+    drafts = ledger_queryset(request.user, status, comp).order_by('-created_at')
+    totais = month_summary(request.user, comp, status)
 
     items = [movimentacao_to_dict(m) for m in drafts]
-    return JsonResponse({'success': True, 'items': items, 'totals': {'receitas': str(total_receitas), 'despesas': str(total_despesas)}})
+    return JsonResponse({'success': True, 'items': items, 'totals': {'receitas': str(totais['receitas']), 'despesas': str(totais['despesas'])}})
 
 
 @login_required
@@ -845,14 +833,9 @@ def transmitted_month_detail(request, pk):
 @login_required
 def contabilidade_history(request):
     """Retorna histórico filtrado por mês/ano (AJAX GET)."""
-    month = request.GET.get('month')  # 'YYYY-MM'
-    qs = MovimentacaoFinanceira.objects.filter(user=request.user, status__in=[MovimentacaoFinanceira.STATUS_TRANSMITIDO, MovimentacaoFinanceira.STATUS_PROCESSADO, MovimentacaoFinanceira.STATUS_COM_PENDENCIA])
-    if month and len(month) == 7:
-        try:
-            comp = parse_date(month + '-01')
-            qs = qs.filter(competencia__year=comp.year, competencia__month=comp.month)
-        except Exception:
-            pass
+    comp = parse_month(request.GET.get('month'))  # 'YYYY-MM'
+    status = [MovimentacaoFinanceira.STATUS_TRANSMITIDO, MovimentacaoFinanceira.STATUS_PROCESSADO, MovimentacaoFinanceira.STATUS_COM_PENDENCIA]
+    qs = ledger_queryset(request.user, status, comp)
 
     items = [movimentacao_to_dict(m) for m in qs.order_by('-competencia')[:200]]
     return JsonResponse({'success': True, 'items': items})
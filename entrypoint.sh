@@ -15,6 +15,9 @@ echo "Banco de dados disponível!"
 echo "Executando migrações..."
 python manage.py migrate --noinput
 
+echo "Carregando catálogo CNAE (se vazio)..."
+python manage.py importar_cnaes --se-vazio || echo "Aviso: catálogo CNAE não importado; rode 'python manage.py importar_cnaes'"
+
 echo "Coletando arquivos estáticos..."
 python manage.py collectstatic --noinput
 
@@ -1,5 +1,5 @@
 """
-ASGI config for vetorial_project project.
+ASGI config for gestao360_project project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
@@ -11,6 +11,6 @@ import os
 
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault("DJANGO_SETTINGS_MODULE", "vetorial_project.settings")
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "gestao360_project.settings")
 
 application = get_asgi_application()
@@ -0,0 +1,33 @@
+"""
+Chaves de versão para invalidação de caches.
+
+Caches derivados de várias tabelas (snapshot do dashboard, landing pages,
+catálogo do chatbot, cabeçalho do blog...) usam a versão atual na chave das
+entradas; para invalidar, os signals apenas incrementam a versão e as
+entradas antigas expiram sozinhas.
+"""
+import logging
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+def get_version(key):
+    """Retorna a versão atual (cria a chave, sem expiração, se não existir)."""
+    version = cache.get(key)
+    if version is None:
+        version = 1
+        cache.add(key, version, None)
+    return version
+
+
+def bump_version(key):
+    """Incrementa a versão, tornando obsoletas as entradas da versão atual."""
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Chave inexistente (cache reiniciado): começa uma nova versão
+        cache.set(key, 2, None)
+    except Exception as e:
+        logger.warning(f"Não foi possível incrementar a versão de cache {key}: {e}")
@@ -1,6 +1,10 @@
 import traceback
 import sys
-from django.utils.cache import patch_cache_control
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from whitenoise.middleware import WhiteNoiseMiddleware
 
 
 class DebugExceptionMiddleware:
@@ -34,21 +38,53 @@ class DebugExceptionMiddleware:
         return None
 
 
-class CacheControlMiddleware:
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise compatível com a cadeia assíncrona do ASGI.
+    
+    O WhiteNoiseMiddleware só declara suporte síncrono, o que faria o Django
+    rodar toda a cadeia (inclusive as views async de IA) em modo síncrono.
+    Em produção os estáticos são servidos pelo Nginx; aqui só é preciso não
+    bloquear o restante da requisição.
+    """
+    
+    sync_capable = True
+    async_capable = True
+    
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+    
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+    
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
+
+
+class CacheControlMiddleware(MiddlewareMixin):
     """
     Middleware para adicionar headers de cache adequados para diferentes tipos de recursos.
     
     - Arquivos estáticos: cache agressivo (1 ano, immutable)
     - Arquivos de mídia: cache moderado (30 dias)
+    - Landing pages do cache anônimo (gestao360_project.page_cache): cache
+      compartilhado curto (s-maxage + stale-while-revalidate), com o navegador
+      sempre revalidando pelo ETag
     - Páginas HTML: sem cache (sempre validar)
-    """
     
-    def __init__(self, get_response):
-        self.get_response = get_response
-
-    def __call__(self, request):
-        response = self.get_response(request)
-        return self.process_response(request, response)
+    Compatível com sync e async (MiddlewareMixin), para não forçar as views
+    assíncronas do ASGI a rodarem em thread.
+    """
     
     def process_response(self, request, response):
         # Arquivos estáticos - cache máximo
@@ -68,6 +104,21 @@ class CacheControlMiddleware:
                 public=True
             )
         
+        # Landing pages do cache anônimo - cache compartilhado (CDN/proxy)
+        elif getattr(response, 'page_cache', False):
+            if self._sets_cookies(request, response):
+                # Resposta com cookie (ex: token CSRF novo) não pode ir para cache compartilhado
+                patch_cache_control(response, private=True, no_cache=True, max_age=0)
+            else:
+                patch_cache_control(
+                    response,
+                    public=True,
+                    max_age=0,
+                    s_maxage=getattr(settings, 'PAGE_CACHE_SHARED_MAX_AGE', 60),
+                    stale_while_revalidate=getattr(settings, 'PAGE_CACHE_STALE', 3600),
+                )
+            patch_vary_headers(response, ['Cookie'])
+        
         # Páginas HTML - sem cache (sempre validar)
         elif response.get('Content-Type', '').startswith('text/html'):
             patch_cache_control(
@@ -78,9 +129,19 @@ class CacheControlMiddleware:
             )
         
         return response
+    
+    @staticmethod
+    def _sets_cookies(request, response):
+        """Indica se a resposta vai definir cookies (aqui ou em middlewares externos)."""
+        session = getattr(request, 'session', None)
+        return bool(
+            response.cookies
+            or request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+            or (session is not None and session.modified)
+        )
 
 
-class SecurityHeadersMiddleware:
+class SecurityHeadersMiddleware(MiddlewareMixin):
     """
     Middleware para adicionar headers de segurança e performance.
     
@@ -91,13 +152,6 @@ class SecurityHeadersMiddleware:
     - Vary: Accept-Encoding (importante para compressão)
     """
     
-    def __init__(self, get_response):
-        self.get_response = get_response
-
-    def __call__(self, request):
-        response = self.get_response(request)
-        return self.process_response(request, response)
-    
     def process_response(self, request, response):
         # Previne MIME type sniffing
         response['X-Content-Type-Options'] = 'nosniff'
@@ -0,0 +1,199 @@
+"""
+Cache de páginas de marketing para visitantes anônimos.
+
+O HTML renderizado das landing pages fica no cache (Redis) por caminho +
+querystring (sem parâmetros de rastreamento como utm_* e gclid). Cada entrada
+guarda a versão do catálogo (planos, depoimentos, dúvidas e redes sociais) com
+que foi gerada; os signals desses models apenas incrementam a versão.
+
+- Entrada fresca (mesma versão, dentro de PAGE_CACHE_TIMEOUT): servida direto.
+- Entrada velha (versão antiga ou expirada, dentro de PAGE_CACHE_STALE):
+  uma única requisição re-renderiza a página enquanto as demais recebem a
+  versão anterior (stale-while-revalidate).
+- O token CSRF é trocado por um marcador antes de ir para o cache e
+  reinserido por visitante na hora de servir.
+- Usuários autenticados e requisições com mensagens pendentes não usam cache.
+
+As respostas levam ETag fraco (versão + hash do HTML) e respondem 304 a
+If-None-Match; o CacheControlMiddleware cuida dos headers de cache
+compartilhado (CDN/proxy).
+"""
+import hashlib
+import logging
+import re
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import CSRF_TOKEN_LENGTH, _unmask_cipher_token, get_token
+from django.utils.cache import get_conditional_response
+
+from .cache_versions import bump_version, get_version
+
+logger = logging.getLogger(__name__)
+
+PAGE_VERSION_KEY = 'pages:catalog_version'
+PAGE_ENTRY_KEY = 'pages:entry:{chave}'
+PAGE_LOCK_KEY = 'pages:lock:{chave}'
+# Tempo máximo que uma re-renderização segura o lock
+PAGE_LOCK_TIMEOUT = 30
+
+CSRF_PLACEHOLDER = '__page_cache_csrf_token__'
+TRACKING_PARAMS = ('gclid', 'fbclid', 'gbraid', 'wbraid', 'msclkid')
+
+_CSRF_TOKEN_RE = re.compile(r'(?<![A-Za-z0-9])[A-Za-z0-9]{%d}(?![A-Za-z0-9])' % CSRF_TOKEN_LENGTH)
+
+
+def _timeouts():
+    return (
+        getattr(settings, 'PAGE_CACHE_TIMEOUT', 60 * 10),
+        getattr(settings, 'PAGE_CACHE_STALE', 60 * 60),
+    )
+
+
+def get_catalog_version():
+    """Retorna a versão atual do catálogo das páginas (cria a chave se não existir)."""
+    return get_version(PAGE_VERSION_KEY)
+
+
+def invalidate_page_cache():
+    """Incrementa a versão do catálogo, tornando as páginas em cache obsoletas."""
+    bump_version(PAGE_VERSION_KEY)
+
+
+def _page_key(request):
+    params = sorted(
+        (nome, valor)
+        for nome, valores in request.GET.lists()
+        if not nome.startswith('utm_') and nome not in TRACKING_PARAMS
+        for valor in valores
+    )
+    raw = f"{request.path}?{params}"
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def _is_cacheable_request(request):
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    if request.user.is_authenticated:
+        return False
+    # Mensagens do framework aparecem no base.html e são por visitante
+    return len(get_messages(request)) == 0
+
+
+def _is_cacheable_response(response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and response.get('Content-Type', '').startswith('text/html')
+    )
+
+
+def _strip_csrf_token(html, request):
+    """Troca os tokens CSRF renderizados para esta requisição pelo marcador."""
+    secret = request.META.get('CSRF_COOKIE')
+    if not secret:
+        return html, False
+
+    encontrou = False
+
+    def substituir(match):
+        nonlocal encontrou
+        if _unmask_cipher_token(match.group(0)) == secret:
+            encontrou = True
+            return CSRF_PLACEHOLDER
+        return match.group(0)
+
+    html = _CSRF_TOKEN_RE.sub(substituir, html)
+    return html, encontrou
+
+
+def _skip_csrf_cookie_renewal(request):
+    """
+    O get_token() sempre reenvia o cookie CSRF só para renovar a validade.
+    Se o visitante já tem o mesmo segredo, o reenvio é dispensado para que a
+    resposta não leve Set-Cookie e possa ir para cache compartilhado.
+    """
+    if request.COOKIES.get(settings.CSRF_COOKIE_NAME) == request.META.get('CSRF_COOKIE'):
+        request.META['CSRF_COOKIE_NEEDS_UPDATE'] = False
+
+
+def _serve(request, entry, status):
+    response = get_conditional_response(request, etag=entry['etag'])
+    if response is None:
+        html = entry['html']
+        if entry['csrf']:
+            html = html.replace(CSRF_PLACEHOLDER, get_token(request))
+            _skip_csrf_cookie_renewal(request)
+        response = HttpResponse(html, content_type=entry['content_type'])
+    response['ETag'] = entry['etag']
+    response['X-Page-Cache'] = status
+    response.page_cache = True
+    return response
+
+
+def anonymous_page_cache(view):
+    """
+    Decorator que guarda no cache o HTML da view para visitantes anônimos.
+
+    Example:
+        path('', anonymous_page_cache(home_view), name='home')
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not _is_cacheable_request(request):
+            return view(request, *args, **kwargs)
+
+        timeout, stale = _timeouts()
+        version = get_catalog_version()
+        chave = _page_key(request)
+        entry_key = PAGE_ENTRY_KEY.format(chave=chave)
+        lock_key = PAGE_LOCK_KEY.format(chave=chave)
+
+        entry = cache.get(entry_key)
+        bloqueado = False
+        if entry is not None:
+            fresh = entry['version'] == version and time.time() - entry['created'] < timeout
+            if fresh:
+                return _serve(request, entry, 'HIT')
+            # Outra requisição já está re-renderizando: serve a versão anterior
+            bloqueado = cache.add(lock_key, 1, PAGE_LOCK_TIMEOUT)
+            if not bloqueado:
+                return _serve(request, entry, 'STALE')
+
+        try:
+            response = view(request, *args, **kwargs)
+            if hasattr(response, 'render') and callable(response.render):
+                response = response.render()
+            if not _is_cacheable_response(response):
+                return response
+
+            html, tem_csrf = _strip_csrf_token(response.content.decode(response.charset), request)
+            entry = {
+                'html': html,
+                'csrf': tem_csrf,
+                'content_type': response['Content-Type'],
+                'version': version,
+                'created': time.time(),
+                'etag': f'W/"{version}-{hashlib.md5(html.encode()).hexdigest()[:16]}"',
+            }
+            cache.set(entry_key, entry, timeout + stale)
+        finally:
+            if bloqueado:
+                cache.delete(lock_key)
+
+        if entry['csrf']:
+            _skip_csrf_cookie_renewal(request)
+        not_modified = get_conditional_response(request, etag=entry['etag'])
+        if not_modified is not None:
+            response = not_modified
+        response['ETag'] = entry['etag']
+        response['X-Page-Cache'] = 'MISS'
+        response.page_cache = True
+        return response
+
+    return wrapper
@@ -0,0 +1,232 @@
+"""
+Limite de requisições (token bucket) para endpoints públicos e de IA.
+
+Cada endpoint decorado com `rate_limit` tem um balde por cliente (IP, sessão
+do chatbot ou usuário): o balde comporta `rajada` requisições e é reabastecido
+na `taxa` configurada ("10/m" = 10 fichas por minuto). Sem fichas, a view nem
+é executada: a resposta é 429 com Retry-After, antes de qualquer consulta ao
+banco ou chamada à IA.
+
+No Redis, o balde é um hash atualizado por um script Lua (uma ida ao Redis,
+atômica entre workers, com o relógio do próprio Redis). O mesmo script soma
+os contadores de requisições permitidas/bloqueadas por endpoint
+(`contadores()`). Sem Redis (desenvolvimento/testes), o balde fica no cache
+padrão do Django; se o Redis falhar, a requisição passa (fail open).
+
+O IP vem do X-Real-IP definido pelo nginx (o X-Forwarded-For pode ser
+forjado pelo cliente) ou do REMOTE_ADDR.
+
+Configurações (settings, todas opcionais):
+    RATE_LIMIT_ENABLED  - liga/desliga os limites (padrão True)
+    RATE_LIMITS         - taxas por endpoint, sobrepõem as do decorator
+                          (ex.: {'chatbot_ia': '20/m'})
+"""
+import json
+import logging
+import math
+import threading
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse
+
+logger = logging.getLogger(__name__)
+
+BALDE_KEY = 'ratelimit:{nome}:{cliente}'
+CONTADORES_KEY = 'ratelimit:contadores'
+PERIODOS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 60 * 60 * 24}
+
+# KEYS[1] balde, KEYS[2] contadores; ARGV: rajada, fichas por segundo, endpoint
+TOKEN_BUCKET_LUA = """
+local rajada = tonumber(ARGV[1])
+local taxa = tonumber(ARGV[2])
+local relogio = redis.call('TIME')
+local agora = tonumber(relogio[1]) + tonumber(relogio[2]) / 1000000
+local balde = redis.call('HMGET', KEYS[1], 'fichas', 'ts')
+local fichas = tonumber(balde[1]) or rajada
+local ts = tonumber(balde[2]) or agora
+fichas = math.min(rajada, fichas + math.max(0, agora - ts) * taxa)
+local permitido = 0
+local espera = 0
+if fichas >= 1 then
+    fichas = fichas - 1
+    permitido = 1
+else
+    espera = (1 - fichas) / taxa
+end
+redis.call('HSET', KEYS[1], 'fichas', tostring(fichas), 'ts', tostring(agora))
+redis.call('PEXPIRE', KEYS[1], math.ceil(rajada / taxa * 1000) + 1000)
+redis.call('HINCRBY', KEYS[2], ARGV[3] .. (permitido == 1 and ':permitidas' or ':bloqueadas'), 1)
+return {permitido, tostring(espera)}
+"""
+
+_script = None
+_lock_local = threading.Lock()
+
+
+def parse_taxa(taxa):
+    """'10/m' -> fichas por segundo (10 / 60)."""
+    quantidade, periodo = taxa.split('/')
+    return int(quantidade) / PERIODOS[periodo]
+
+
+def get_client_ip(request):
+    """IP do cliente (X-Real-IP do nginx ou REMOTE_ADDR)."""
+    return request.META.get('HTTP_X_REAL_IP') or request.META.get('REMOTE_ADDR') or 'desconhecido'
+
+
+def _session_key(request):
+    """session_key do chatbot (corpo JSON, POST ou querystring)."""
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body or b'{}')
+            if isinstance(data, dict) and data.get('session_key'):
+                return str(data['session_key'])[:100]
+        except ValueError:
+            pass
+    elif request.content_type == 'application/x-www-form-urlencoded':
+        # Multipart fica de fora: ler request.POST impediria a view de ler request.body
+        return request.POST.get('session_key')
+    return request.GET.get('session_key')
+
+
+def _cliente(request, por, user=None):
+    """Identificador do balde: sessão ou usuário, com o IP como reserva."""
+    if por == 'sessao':
+        session_key = _session_key(request)
+        if session_key:
+            return f'sessao:{session_key}'
+    elif por == 'usuario' and user is not None and user.is_authenticated:
+        return f'usuario:{user.pk}'
+    return f'ip:{get_client_ip(request)}'
+
+
+def _redis():
+    from django_redis import get_redis_connection
+    return get_redis_connection('default')
+
+
+def _consumir_redis(conexao, chave, rajada, taxa, nome):
+    global _script
+    if _script is None:
+        _script = conexao.register_script(TOKEN_BUCKET_LUA)
+    permitido, espera = _script(
+        keys=[cache.make_key(chave), cache.make_key(CONTADORES_KEY)],
+        args=[rajada, taxa, nome],
+        client=conexao,
+    )
+    return bool(int(permitido)), float(espera)
+
+
+def _consumir_cache(chave, rajada, taxa, nome):
+    """Mesmo balde no cache do Django (sem Redis: atômico só por processo)."""
+    with _lock_local:
+        agora = time.time()
+        fichas, ts = cache.get(chave) or (rajada, agora)
+        fichas = min(rajada, fichas + max(0, agora - ts) * taxa)
+        permitido = fichas >= 1
+        espera = 0 if permitido else (1 - fichas) / taxa
+        cache.set(chave, (fichas - 1 if permitido else fichas, agora), math.ceil(rajada / taxa) + 1)
+        contadores = cache.get(CONTADORES_KEY) or {}
+        campo = f"{nome}:{'permitidas' if permitido else 'bloqueadas'}"
+        contadores[campo] = contadores.get(campo, 0) + 1
+        cache.set(CONTADORES_KEY, contadores, None)
+    return permitido, espera
+
+
+def consumir(nome, cliente, taxa, rajada):
+    """
+    Consome uma ficha do balde do cliente no endpoint.
+
+    Returns:
+        tuple[bool, float]: (permitido, segundos até a próxima ficha)
+    """
+    chave = BALDE_KEY.format(nome=nome, cliente=cliente)
+    taxa = parse_taxa(getattr(settings, 'RATE_LIMITS', {}).get(nome, taxa))
+    try:
+        conexao = _redis()
+    except NotImplementedError:
+        # Cache padrão não é o Redis (desenvolvimento/testes)
+        return _consumir_cache(chave, rajada, taxa, nome)
+    try:
+        return _consumir_redis(conexao, chave, rajada, taxa, nome)
+    except Exception as e:
+        logger.warning(f"Limite de requisições indisponível ({nome}), liberando: {e}")
+        return True, 0
+
+
+def contadores():
+    """Requisições permitidas/bloqueadas por endpoint: {nome: {'permitidas': n, 'bloqueadas': n}}."""
+    try:
+        brutos = {
+            campo.decode(): int(valor)
+            for campo, valor in _redis().hgetall(cache.make_key(CONTADORES_KEY)).items()
+        }
+    except NotImplementedError:
+        brutos = cache.get(CONTADORES_KEY) or {}
+    except Exception as e:
+        logger.warning(f"Não foi possível ler os contadores de limite de requisições: {e}")
+        brutos = {}
+
+    resultado = {}
+    for campo, valor in brutos.items():
+        nome, tipo = campo.rsplit(':', 1)
+        resultado.setdefault(nome, {'permitidas': 0, 'bloqueadas': 0})[tipo] = valor
+    return resultado
+
+
+def _resposta_429(nome, espera):
+    retry_after = max(1, math.ceil(espera))
+    mensagem = f'Muitas requisições. Tente novamente em {retry_after} segundos.'
+    # capturar_lead usa "message"; as APIs do chatbot, "error"
+    response = JsonResponse(
+        {'success': False, 'error': mensagem, 'message': mensagem, 'retry_after': retry_after},
+        status=429,
+    )
+    response['Retry-After'] = str(retry_after)
+    logger.debug(f"Limite de requisições atingido em {nome}")
+    return response
+
+
+def rate_limit(nome, taxa, rajada, por='ip'):
+    """
+    Decorator: limita as requisições à view por cliente (token bucket).
+
+    Funciona com views síncronas e assíncronas; pode ser empilhado para
+    limitar por mais de um critério (ex.: sessão e IP).
+
+    Args:
+        nome: identificador do endpoint (chaves, contadores e RATE_LIMITS)
+        taxa: reabastecimento, como "10/m" (s, m, h ou d)
+        rajada: capacidade do balde (requisições seguidas permitidas)
+        por: 'ip', 'sessao' (session_key do chatbot) ou 'usuario'
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            consumir_async = sync_to_async(consumir, thread_sensitive=False)
+
+            @wraps(view)
+            async def wrapper(request, *args, **kwargs):
+                if getattr(settings, 'RATE_LIMIT_ENABLED', True):
+                    user = await request.auser() if por == 'usuario' else None
+                    permitido, espera = await consumir_async(nome, _cliente(request, por, user), taxa, rajada)
+                    if not permitido:
+                        return _resposta_429(nome, espera)
+                return await view(request, *args, **kwargs)
+
+            return wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if getattr(settings, 'RATE_LIMIT_ENABLED', True):
+                user = request.user if por == 'usuario' else None
+                permitido, espera = consumir(nome, _cliente(request, por, user), taxa, rajada)
+                if not permitido:
+                    return _resposta_429(nome, espera)
+            return view(request, *args, **kwargs)
+
+        return wrapper
+    return decorator
@@ -86,7 +86,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "gestao360_project.middleware.AsyncWhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -139,7 +139,13 @@ DATABASES = {
         "PASSWORD": os.getenv('DB_PASSWORD', 'postgres'),
         "HOST": os.getenv('DB_HOST', 'localhost'),
         "PORT": os.getenv('DB_PORT', '5432'),
-        "CONN_MAX_AGE": 600,  # Reutilizar conexões por 10 minutos
+        # Reutilizar conexões por 10 minutos, verificando-as antes do uso.
+        # Com GUNICORN_ASGI=1 cada requisição síncrona roda em uma thread
+        # própria (ver gunicorn.conf.py) e conexões persistentes ficariam
+        # presas a threads encerradas: nesse modo o padrão é 0 (use um pooler,
+        # ex.: PgBouncer, se o custo de conexão aparecer no teste de carga).
+        "CONN_MAX_AGE": int(os.getenv('DB_CONN_MAX_AGE', 0 if os.getenv('GUNICORN_ASGI', '0') == '1' else 600)),
+        "CONN_HEALTH_CHECKS": True,
         "OPTIONS": {
             "connect_timeout": 10,
         },
@@ -193,6 +199,14 @@ STORAGES = {
     "staticfiles": {
         "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
     },
+    # Arquivos com dados pessoais (contratos assinados): fora do MEDIA_ROOT,
+    # que o nginx serve publicamente; só são entregues por views autenticadas
+    "private": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+        "OPTIONS": {
+            "location": os.getenv('PRIVATE_MEDIA_ROOT', str(BASE_DIR / 'private')),
+        },
+    },
 }
 
 # WhiteNoise optimization settings
@@ -319,6 +333,46 @@ CACHES = {
 SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
 SESSION_CACHE_ALIAS = 'default'
 
+# Cache de landing pages para visitantes anônimos (gestao360_project.page_cache)
+PAGE_CACHE_TIMEOUT = int(os.getenv('PAGE_CACHE_TIMEOUT', 60 * 10))
+PAGE_CACHE_STALE = int(os.getenv('PAGE_CACHE_STALE', 60 * 60))
+PAGE_CACHE_SHARED_MAX_AGE = int(os.getenv('PAGE_CACHE_SHARED_MAX_AGE', 60))
+
+# Cache de respostas do assistente IA (apps.support.ia_cache)
+IA_CACHE_TTL = int(os.getenv('IA_CACHE_TTL', 60 * 60 * 24 * 7))
+IA_CACHE_MAX_ENTRIES = int(os.getenv('IA_CACHE_MAX_ENTRIES', 2000))
+
+# Chamadas simultâneas à IA por processo ASGI (apps.support.ia_concorrencia)
+IA_MAX_CONCORRENCIA = int(os.getenv('IA_MAX_CONCORRENCIA', 8))
+IA_FILA_TIMEOUT = int(os.getenv('IA_FILA_TIMEOUT', 10))
+
+# Roteador de provedores de IA (apps.support.llm_router)
+IA_PROVEDORES = [p.strip() for p in os.getenv('IA_PROVEDORES', 'groq,gemini,openai').split(',') if p.strip()]
+IA_CIRCUITO_FALHAS = int(os.getenv('IA_CIRCUITO_FALHAS', 3))
+IA_CIRCUITO_ABERTO = int(os.getenv('IA_CIRCUITO_ABERTO', 30))
+IA_JANELA_AMOSTRAS = int(os.getenv('IA_JANELA_AMOSTRAS', 50))
+IA_JANELA_SEGUNDOS = int(os.getenv('IA_JANELA_SEGUNDOS', 300))
+# Intervalo mínimo entre chamadas de exploração de um provedor sem amostras recentes
+IA_EXPLORACAO_SEGUNDOS = int(os.getenv('IA_EXPLORACAO_SEGUNDOS', 60))
+# Hedge do primeiro trecho em ms (0 = desligado)
+IA_HEDGE_MS = int(os.getenv('IA_HEDGE_MS', 0))
+
+# Memória das conversas com a IA (apps.support.memoria): janela e resumo em tokens
+IA_MEMORIA_TOKENS = int(os.getenv('IA_MEMORIA_TOKENS', 1500))
+IA_RESUMO_TOKENS = int(os.getenv('IA_RESUMO_TOKENS', 300))
+# Memórias de conversa sem atividade há mais dias que isso são excluídas
+IA_MEMORIA_RETENCAO_DIAS = int(os.getenv('IA_MEMORIA_RETENCAO_DIAS', 30))
+
+# Mensagens do chatbot gravadas em lote via Redis (apps.support.chatbot_persistencia)
+CHATBOT_BUFFER_MENSAGENS = os.getenv('CHATBOT_BUFFER_MENSAGENS', 'False') == 'True'
+CHATBOT_BUFFER_INTERVALO = int(os.getenv('CHATBOT_BUFFER_INTERVALO', 5))
+CHATBOT_BUFFER_LOTE = int(os.getenv('CHATBOT_BUFFER_LOTE', 1000))
+
+# Limite de requisições (token bucket no Redis) dos endpoints públicos e de IA
+# (gestao360_project.rate_limit); RATE_LIMITS sobrepõe taxas, ex.: {'chatbot_ia': '20/m'}
+RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'True') == 'True'
+RATE_LIMITS = {}
+
 # Configurações do Mercado Pago
 MERCADO_PAGO_PUBLIC_KEY = os.getenv('MP_PUBLIC_KEY', '')
 MERCADO_PAGO_ACCESS_TOKEN = os.getenv('MP_ACCESS_TOKEN', '')
@@ -413,6 +467,10 @@ EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 SERVER_EMAIL = EMAIL_HOST_USER
 
+# Fila de e-mails (apps.services.email_outbox)
+EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv('EMAIL_OUTBOX_BATCH_SIZE', 50))
+EMAIL_OUTBOX_RATE_PER_MINUTE = int(os.getenv('EMAIL_OUTBOX_RATE_PER_MINUTE', 600))
+
 # ==================================
 # CONFIGURAÇÕES DO CELERY
 # ==================================
@@ -425,6 +483,23 @@ CELERY_TIMEZONE = TIME_ZONE
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60  # 30 minutos
 
+# Tarefas periódicas (sincronizadas com o DatabaseScheduler do django_celery_beat)
+CELERY_BEAT_SCHEDULE = {
+    'finance-cleanup-report-files': {
+        'task': 'apps.finance.tasks.cleanup_report_files',
+        'schedule': 60 * 60 * 6,
+    },
+    'support-limpar-memorias-conversa': {
+        'task': 'apps.support.tasks.limpar_memorias_conversa',
+        'schedule': 60 * 60 * 24,
+    },
+}
+
+# Relatórios financeiros com mais lançamentos que isso são gerados via Celery
+FINANCE_REPORT_ASYNC_THRESHOLD = int(os.getenv('FINANCE_REPORT_ASYNC_THRESHOLD', 2000))
+# Dias que os relatórios gerados em segundo plano ficam disponíveis para download
+FINANCE_REPORT_RETENTION_DAYS = int(os.getenv('FINANCE_REPORT_RETENTION_DAYS', 7))
+
 # ==================================
 # CONFIGURAÇÕES DO SITE
 # ==================================
@@ -20,13 +20,15 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from django.views.generic import TemplateView
-from django.contrib.sitemaps.views import sitemap
+from django.contrib.sitemaps.views import index as sitemap_index, sitemap
 from django.http import JsonResponse
 from apps.testimonials.models import Testimonial
 from apps.support.models import Duvida
 from apps.services.models import Plano
 from apps.services.views import calculadora_clt_pj, servicos_view, contabilidade_mei_view
+from apps.blog.seo_cache import cached_xml
 from apps.blog.sitemaps import StaticViewSitemap, BlogPostSitemap, ServicesSitemap
+from .page_cache import anonymous_page_cache
 
 # Customização do Admin
 admin.site.site_header = "Vetorial - Administração"
@@ -65,6 +67,7 @@ def health_check(request):
     status_code = 200 if health['status'] == 'healthy' else 503
     return JsonResponse(health, status=status_code)
 
+@anonymous_page_cache
 def home_view(request):
     from django.shortcuts import render
     from apps.support.models import Duvida
@@ -87,6 +90,7 @@ def home_view(request):
         'planos_comercio': planos_comercio,
     })
 
+@anonymous_page_cache
 def abrir_empresa_view(request):
     from django.shortcuts import render
     from apps.services.models import Plano
@@ -103,6 +107,7 @@ def abrir_empresa_view(request):
         'planos_comercio': planos_comercio,
     })
 
+@anonymous_page_cache
 def deixar_mei_view(request):
     """Renderiza a página 'deixar_mei.html' separadamente para permitir edição independente."""
     from django.shortcuts import render
@@ -120,6 +125,7 @@ def deixar_mei_view(request):
         'planos_comercio': planos_comercio,
     })
 
+@anonymous_page_cache
 def trocar_contador_view(request):
     """Renderiza a página 'trocar-contador.html' separadamente para permitir edição independente."""
     from django.shortcuts import render
@@ -137,6 +143,7 @@ def trocar_contador_view(request):
         'planos_comercio': planos_comercio,
     })
 
+@anonymous_page_cache
 def contabilidade_completa_view(request):
     """Renderiza a página 'contabilidade-completa.html' separadamente para permitir edição independente."""
     from django.shortcuts import render
@@ -154,6 +161,7 @@ def contabilidade_completa_view(request):
         'planos_comercio': planos_comercio,
     })
 
+@anonymous_page_cache
 def assessoria_view(request):
     """Renderiza a página 'assessoria.html' separadamente para permitir edição independente."""
     from django.shortcuts import render
@@ -171,6 +179,7 @@ def assessoria_view(request):
         'planos_comercio': planos_comercio,
     })
     
+@anonymous_page_cache
 def render_segmento(request, template_name):
     """Renderiza a página para um segmento específico com os planos."""
     from django.shortcuts import render
@@ -186,16 +195,19 @@ def render_segmento(request, template_name):
     })
 
 # ── Views das novas páginas institucionais ──
+@anonymous_page_cache
 def depoimentos_view(request):
     from django.shortcuts import render
     testimonials = Testimonial.objects.filter(is_active=True).order_by('order')
     return render(request, 'pages/depoimentos.html', {'testimonials': testimonials})
 
+@anonymous_page_cache
 def faq_view(request):
     from django.shortcuts import render
     duvidas = Duvida.objects.filter(ativo=True).order_by('ordem')
     return render(request, 'pages/faq.html', {'duvidas': duvidas})
 
+@anonymous_page_cache
 def quanto_custa_view(request):
     from django.shortcuts import render
     planos_servicos = Plano.objects.filter(ativo=True, categoria='servicos').order_by('ordem', 'preco')
@@ -209,6 +221,7 @@ def contato_view(request):
     from django.shortcuts import render
     return render(request, 'pages/contato.html')
 
+@anonymous_page_cache
 def abrir_mei_view(request):
     from django.shortcuts import render
     planos_mei = Plano.objects.filter(ativo=True, categoria='mei').order_by('ordem', 'preco')
@@ -281,7 +294,10 @@ urlpatterns = [
     # path("payments/", include('apps.payments.urls')),
     
     # SEO - Sitemap e Robots
-    path('sitemap.xml', sitemap, {'sitemaps': sitemaps}, name='django.contrib.sitemaps.views.sitemap'),
+    path('sitemap.xml', cached_xml(sitemap_index), {'sitemaps': sitemaps}, name='sitemap_index'),
+    path('sitemap-static.xml', cached_xml(sitemap, lastmod=None), {'sitemaps': {'static': StaticViewSitemap}, 'section': 'static'}),
+    path('sitemap-services.xml', cached_xml(sitemap, lastmod=None), {'sitemaps': {'services': ServicesSitemap}, 'section': 'services'}),
+    path('sitemap-<section>.xml', cached_xml(sitemap), {'sitemaps': sitemaps}, name='django.contrib.sitemaps.views.sitemap'),
     path('robots.txt', TemplateView.as_view(template_name='robots.txt', content_type='text/plain')),
 ]
 
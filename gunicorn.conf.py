@@ -2,12 +2,36 @@
 # GUNICORN CONFIGURATION
 # ==================================
 
+import os
+
 # Bind
 bind = "0.0.0.0:8000"
 
 # Workers
-workers = 3
-worker_class = "sync"
+# Padrão: WSGI (gestao360_project.wsgi) com workers síncronos. As views de IA
+# são assíncronas e também funcionam aqui (o Django as roda com
+# async_to_sync), mas ocupam o worker enquanto a IA responde.
+#
+# GUNICORN_ASGI=1 serve gestao360_project.asgi com workers uvicorn: a espera
+# pela IA deixa de ocupar o worker. As views síncronas (todas as outras) NÃO
+# rodam em um pool de threads: o ASGIHandler abre um ThreadSensitiveContext
+# por requisição, então cada requisição síncrona ganha uma thread própria e
+# todo o código síncrono dela (middlewares, view, ORM) roda serializado nessa
+# thread. Código síncrono chamado fora desse contexto (ex.: tasks iniciadas
+# na inicialização) cai na thread única do processo e serializa todo o
+# worker. Consequências:
+# - não há limite de threads por worker: o limite de concorrência é o de
+#   conexões do uvicorn e o número de workers (GUNICORN_WORKERS);
+# - cada thread abre sua própria conexão com o banco, por isso CONN_MAX_AGE
+#   cai de 600 para 0 nesse modo (DB_CONN_MAX_AGE em settings.py).
+#
+# Só ligue GUNICORN_ASGI em produção depois de rodar scripts/loadtest_ia.py
+# contra homologação nos dois modos e registrar o resultado em
+# scripts/README.md (seção "Resultados do teste de carga").
+ASGI = os.getenv('GUNICORN_ASGI', '0') == '1'
+wsgi_app = 'gestao360_project.asgi:application' if ASGI else 'gestao360_project.wsgi:application'
+workers = int(os.getenv('GUNICORN_WORKERS', 3))
+worker_class = 'uvicorn_worker.UvicornWorker' if ASGI else 'sync'
 timeout = 120
 
 # Forwarded headers - aceitar de qualquer IP
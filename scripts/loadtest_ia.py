@@ -0,0 +1,161 @@
+"""
+Teste de carga: latência das páginas enquanto há chamadas de IA em andamento.
+
+Mede a latência (p50/p95/máx) de páginas comuns em duas fases:
+
+1. linha de base, sem chamadas de IA;
+2. com --ia conversas do chatbot IA em andamento ao mesmo tempo (cada uma
+   envia uma nova pergunta assim que recebe a resposta).
+
+Rode uma vez com os workers síncronos (padrão) e outra com GUNICORN_ASGI=1
+(gestao360_project.asgi + UvicornWorker). No modo ASGI a espera pelo Groq não
+ocupa worker e a fase 2 deve ficar próxima da fase 1; com os workers
+síncronos, poucas conversas simultâneas já ocupam todos os workers.
+
+As perguntas levam um sufixo aleatório para não serem atendidas pelo cache
+de respostas (apps.support.ia_cache). Use contra homologação: sem
+--session-key o script inicia uma sessão de chatbot, o que cria um Lead de
+teste ("Teste de Carga").
+
+Uso:
+    python scripts/loadtest_ia.py --base-url https://homologacao.exemplo.com.br
+    python scripts/loadtest_ia.py --base-url http://localhost:8000 --ia 12 --duracao 30 \
+        --pagina / --pagina /blog/ --pagina /planos/
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+import uuid
+
+import httpx
+
+PAGINAS_PADRAO = ['/', '/blog/', '/support/api/chatbot/perguntas/']
+
+PERGUNTAS = [
+    'Qual o limite de faturamento do MEI?',
+    'Quando vence o DAS do MEI?',
+    'Como funciona o Fator R no Simples Nacional?',
+    'Quais documentos preciso para abrir uma ME?',
+    'Como trocar de contador?',
+]
+
+
+def resumo(latencias):
+    if not latencias:
+        return 'sem amostras'
+    ordenadas = sorted(latencias)
+    p95 = ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * 0.95))]
+    return (
+        f"n={len(ordenadas):4d}  p50={statistics.median(ordenadas) * 1000:7.1f}ms  "
+        f"p95={p95 * 1000:7.1f}ms  máx={ordenadas[-1] * 1000:7.1f}ms"
+    )
+
+
+async def medir_paginas(client, paginas, duracao, concorrencia):
+    """Requisita as páginas em laço por `duracao` segundos; retorna {página: [latências]}."""
+    latencias = {pagina: [] for pagina in paginas}
+    erros = 0
+    fim = time.monotonic() + duracao
+
+    async def usuario(indice):
+        nonlocal erros
+        i = indice
+        while time.monotonic() < fim:
+            pagina = paginas[i % len(paginas)]
+            i += 1
+            inicio = time.perf_counter()
+            try:
+                response = await client.get(pagina)
+                if response.status_code >= 500:
+                    erros += 1
+            except httpx.HTTPError:
+                erros += 1
+                continue
+            latencias[pagina].append(time.perf_counter() - inicio)
+
+    await asyncio.gather(*(usuario(i) for i in range(concorrencia)))
+    return latencias, erros
+
+
+async def conversa_ia(client, session_key, parar, resultados):
+    """Envia perguntas ao atendente IA até `parar` ser sinalizado."""
+    i = 0
+    while not parar.is_set():
+        pergunta = f"{PERGUNTAS[i % len(PERGUNTAS)]} ref {uuid.uuid4().hex[:8]}"
+        i += 1
+        inicio = time.perf_counter()
+        try:
+            response = await client.post(
+                '/support/api/chatbot/ia/',
+                json={'session_key': session_key, 'mensagem': pergunta},
+                timeout=120,
+            )
+            resultados.append((response.status_code, time.perf_counter() - inicio))
+        except httpx.HTTPError:
+            resultados.append((0, time.perf_counter() - inicio))
+
+
+async def iniciar_sessao(client):
+    response = await client.post('/support/api/chatbot/iniciar/', json={
+        'nome': 'Teste de Carga',
+        'email': 'teste-carga@example.com',
+        'telefone': '11900000000',
+        'pagina_origem': 'loadtest_ia',
+    })
+    response.raise_for_status()
+    return response.json()['session_key']
+
+
+async def main(args):
+    paginas = args.pagina or PAGINAS_PADRAO
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=30, follow_redirects=True) as client:
+        session_key = args.session_key or await iniciar_sessao(client)
+
+        print(f"Fase 1: linha de base ({args.duracao}s, {args.usuarios} usuários)")
+        base, erros_base = await medir_paginas(client, paginas, args.duracao, args.usuarios)
+
+        print(f"Fase 2: {args.ia} conversas de IA em andamento ({args.duracao}s)")
+        parar = asyncio.Event()
+        resultados_ia = []
+        conversas = [
+            asyncio.create_task(conversa_ia(client, session_key, parar, resultados_ia))
+            for _ in range(args.ia)
+        ]
+        # Dá tempo para as chamadas de IA começarem antes de medir
+        await asyncio.sleep(1)
+        carga, erros_carga = await medir_paginas(client, paginas, args.duracao, args.usuarios)
+        parar.set()
+        await asyncio.gather(*conversas)
+
+    print()
+    piora_maxima = 0.0
+    for pagina in paginas:
+        print(pagina)
+        print(f"  sem IA: {resumo(base[pagina])}")
+        print(f"  com IA: {resumo(carga[pagina])}")
+        if base[pagina] and carga[pagina]:
+            piora = statistics.median(carga[pagina]) / statistics.median(base[pagina])
+            piora_maxima = max(piora_maxima, piora)
+
+    ok_ia = [latencia for status, latencia in resultados_ia if status == 200]
+    print(f"\nChamadas de IA: {len(resultados_ia)} ({len(resultados_ia) - len(ok_ia)} com erro)")
+    print(f"  latência IA: {resumo(ok_ia)}")
+    print(f"Erros nas páginas: {erros_base} sem IA, {erros_carga} com IA")
+    print(f"Piora da mediana (pior página): {piora_maxima:.2f}x (limite: {args.limite:.2f}x)")
+
+    return 0 if piora_maxima <= args.limite and not erros_carga else 1
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--base-url', default='http://localhost:8000')
+    parser.add_argument('--session-key', help='Sessão ativa do chatbot (padrão: inicia uma nova)')
+    parser.add_argument('--pagina', action='append', help='Página medida (pode repetir)')
+    parser.add_argument('--ia', type=int, default=10, help='Conversas de IA simultâneas')
+    parser.add_argument('--usuarios', type=int, default=5, help='Usuários simultâneos nas páginas')
+    parser.add_argument('--duracao', type=int, default=20, help='Duração de cada fase (s)')
+    parser.add_argument('--limite', type=float, default=1.5,
+                        help='Piora máxima aceita da mediana com IA (ex.: 1.5 = 50%% mais lenta)')
+    sys.exit(asyncio.run(main(parser.parse_args())))